@@ -0,0 +1,115 @@
+"""
+Measure small-call latency while large calls run on the same worker.
+
+Serves upstream responses from an httpx mock transport: a 70k-row census
+tract response for the large calls and an 88-row county response for the
+small ones. A few clients keep calling area_summary_stats over the tract
+response while another client issues small calls one after another. The
+benchmark reports small-call latency percentiles with the JSON decode and
+summary statistics run inline on the event loop, and offloaded to the
+worker thread pool (places.offload) as the server does by default.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_event_loop_offload.py [--rows 70000] [--calls 100] [--big-clients 2]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+from fastmcp import Client
+
+from places import utils
+from places.app import mcp
+from places.serialization import dumps
+
+BIG = {"geo_scope": "tracts_in_county", "state_code": "MI", "county_fips": "26163", "year": "2023",
+       "measureid": "OBESITY", "datavaluetypeid": "CrdPrv"}
+SMALL = {"geo_scope": "counties_in_state", "state_code": "MI", "year": "2023",
+         "measureid": "OBESITY", "datavaluetypeid": "CrdPrv"}
+
+
+def rows(n: int) -> bytes:
+    """Returns n synthetic Socrata rows, encoded."""
+    return dumps([
+        {"stateabbr": "MI", "statedesc": "Michigan", "countyname": "Wayne", "countyfips": "26163",
+         "locationname": f"{26163000000 + i}", "locationid": f"{26163000000 + i}", "measureid": "OBESITY",
+         "data_value": f"{20 + (i * 7919) % 300 / 10:.1f}", "low_confidence_limit": "18.0",
+         "high_confidence_limit": "22.0", "totalpopulation": str(1000 + i % 5000)}
+        for i in range(n)
+    ])
+
+
+def install_upstream(big_rows: int) -> None:
+    """Serves tract requests with a big body and everything else with a small one."""
+    big, small = rows(big_rows), rows(88)
+
+    def handler(request):
+        return httpx.Response(200, content=big if "countyfips" in str(request.url) else small)
+
+    real_client = httpx.AsyncClient
+    utils.httpx.AsyncClient = lambda **kwargs: real_client(transport=httpx.MockTransport(handler))
+    # Measure the work itself, not the response cache
+    utils.RESPONSE_CACHE_SIZE = 0
+
+
+async def run(calls: int, big_clients: int) -> dict:
+    stop = asyncio.Event()
+    big_done = 0
+
+    async def big_client():
+        nonlocal big_done
+        async with Client(mcp) as client:
+            while not stop.is_set():
+                await client.call_tool("area_summary_stats", BIG)
+                big_done += 1
+
+    async with Client(mcp) as client:
+        await client.call_tool("area_summary_stats", SMALL)
+        tasks = [asyncio.create_task(big_client()) for _ in range(big_clients)]
+        await asyncio.sleep(0.5)
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(calls):
+            t = time.perf_counter()
+            await client.call_tool("area_summary_stats", SMALL)
+            latencies.append((time.perf_counter() - t) * 1000)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "p99": latencies[int(0.99 * (len(latencies) - 1))],
+        "max": latencies[-1],
+        "big_per_s": big_done / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=70000)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--big-clients", type=int, default=2)
+    args = parser.parse_args()
+    install_upstream(args.rows)
+
+    thresholds = (utils.OFFLOAD_MIN_BYTES, utils.OFFLOAD_MIN_ROWS)
+    print(f"{args.calls} small calls while {args.big_clients} clients run {args.rows}-row calls\n")
+    print(f"{'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'big calls/s':>12}")
+    for mode in ("inline", "offload"):
+        utils.OFFLOAD_MIN_BYTES, utils.OFFLOAD_MIN_ROWS = (float("inf"),) * 2 if mode == "inline" else thresholds
+        r = asyncio.run(run(args.calls, args.big_clients))
+        print(f"{mode:<10} {r['p50']:8.1f} {r['p95']:8.1f} {r['p99']:8.1f} {r['max']:8.1f} {r['big_per_s']:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
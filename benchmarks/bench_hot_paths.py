@@ -0,0 +1,273 @@
+"""
+Benchmark the server's hot paths and compare them against a stored baseline.
+
+Cases:
+
+- lookup.get_release_for_year: release lookups against the local table,
+- stats.summary_{100,10k,100k}: compute_summary_stats over synthetic rows,
+- decode.{county_88,tract_70k}: decoding Socrata response bodies,
+- tool.get_cdc_places_data / tool.area_summary_stats: full tool calls (with
+  middleware, response cache disabled) against an httpx mock transport that
+  replays the payloads in benchmarks/fixtures.
+
+Each case is warmed up and calibrated so that one round takes at least 50 ms,
+then timed over ``--rounds`` rounds. The median and best seconds per operation
+are written as JSON (``--output``). With a baseline file (``--baseline``,
+default benchmarks/baseline.json), a case whose best round (``--statistic``,
+the least noisy measure on a shared machine) is more than ``--threshold``
+slower than the baseline's (default 0.25, i.e. 25%) is reported as a
+regression and the script exits with status 1. Baselines are machine
+specific: record one with ``--save-baseline`` on the machine that runs the
+comparison.
+
+Fixtures hold one upstream request and its response each. Re-record them from
+data.cdc.gov with ``--record`` (needs network access).
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_hot_paths.py [--filter stats] [--rounds 9] [--threshold 0.25]
+        [--statistic min_s|median_s]
+        [--baseline benchmarks/baseline.json] [--output results.json] [--save-baseline] [--record]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+
+from places import locations, utils
+from places.app import mcp
+from places.config import SELECT_COLUMNS
+from places.serialization import dumps, loads_rows
+from places.utils import compute_summary_stats, get_release_for_year
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+OHIO_COUNTY_IDS = [f"39{n:03d}" for n in range(1, 176, 2)]
+
+TOOL_CALLS = {
+    "get_cdc_places_data": {
+        "year": "2023", "measureid": "OBESITY", "geo": "county", "datavaluetypeid": "CrdPrv",
+        "locationid": OHIO_COUNTY_IDS,
+    },
+    "area_summary_stats": {
+        "geo_scope": "tracts_in_county", "state_code": "OH", "county_fips": "39035", "year": "2023",
+        "measureid": "OBESITY", "datavaluetypeid": "CrdPrv",
+    },
+}
+
+# fixture file -> (geo, upstream params) recorded by --record
+FIXTURES = {
+    "county_oh_obesity.json": ("county", {
+        "measureid": "OBESITY", "datavaluetypeid": "CrdPrv", "$select": SELECT_COLUMNS["county"],
+        "$where": "stateabbr = 'OH'", "$limit": 100000,
+    }),
+    "tracts_cuyahoga_obesity.json": ("census", {
+        "measureid": "OBESITY", "datavaluetypeid": "CrdPrv",
+        "$select": "locationname,countyname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation",
+        "$where": "stateabbr = 'OH' AND countyfips = '39035'", "$limit": 100000,
+    }),
+}
+
+
+def load_fixtures() -> dict:
+    """Returns recorded response bodies by dataset id."""
+    bodies = {}
+    for name in FIXTURES:
+        with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+            fixture = json.load(f)
+        bodies[fixture["request"]["dataset"]] = fixture["response"]["body"]
+    return bodies
+
+
+def record_fixtures() -> None:
+    """Fetches every fixture's request from data.cdc.gov and writes it to benchmarks/fixtures."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    release = get_release_for_year("OBESITY", "2023")
+    for name, (geo, params) in FIXTURES.items():
+        url = utils.get_endpoint_for_geo(geo, release)
+        response = httpx.get(url, params=params, timeout=60.0)
+        response.raise_for_status()
+        fixture = {
+            "request": {"url": url, "dataset": utils.dataset_id(url), "params": params},
+            "response": {"status": response.status_code, "recorded_at": datetime.now(timezone.utc).isoformat(),
+                         "body": response.json()},
+        }
+        with open(os.path.join(FIXTURE_DIR, name), "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=1)
+        print(f"Recorded {len(fixture['response']['body'])} rows to {name}")
+
+
+def install_upstream(bodies: dict) -> None:
+    """Replays fixture bodies by dataset id, honouring 'locationid IN (...)' filters."""
+    encoded = {dataset: dumps(rows) for dataset, rows in bodies.items()}
+
+    def handler(request):
+        dataset = utils.dataset_id(request.url.path)
+        where = request.url.params.get("$where", "")
+        match = re.search(r"locationid IN \(([^)]*)\)", where)
+        if match is None:
+            return httpx.Response(200, content=encoded[dataset])
+        wanted = set(re.findall(r"'([^']*)'", match.group(1)))
+        return httpx.Response(200, content=dumps([row for row in bodies[dataset] if row.get("locationid") in wanted]))
+
+    real_client = httpx.AsyncClient
+    utils.httpx.AsyncClient = lambda **kwargs: real_client(transport=httpx.MockTransport(handler))
+    # Measure the full path, not the response cache; never bootstrap location indexes
+    utils.RESPONSE_CACHE_SIZE = 0
+    locations.LOCATION_INDEX_BOOTSTRAP_GEOS = []
+
+
+def synthetic_rows(n: int) -> list:
+    """Returns n Socrata-shaped tract rows with string values."""
+    return [
+        {"locationname": f"{39035000000 + i}", "countyname": "Cuyahoga",
+         "data_value": f"{20 + (i * 7919) % 300 / 10:.1f}", "low_confidence_limit": "18.0",
+         "high_confidence_limit": "22.0", "totalpopulation": str(1000 + i % 5000)}
+        for i in range(n)
+    ]
+
+
+def cases(bodies: dict, loop) -> dict:
+    """Returns case name -> operation."""
+    run = loop.run_until_complete
+    rows = {n: synthetic_rows(n) for n in (100, 10_000, 100_000)}
+    county_body = dumps(bodies["swc5-untb"])
+    tract_body = dumps(synthetic_rows(70_000))
+    measures = [("OBESITY", "2023"), ("CSMOKING", "2022"), ("DIABETES", "2021"), ("NOT_A_MEASURE", "2023")]
+
+    def lookups():
+        for measureid, year in measures:
+            get_release_for_year(measureid, year)
+
+    return {
+        "lookup.get_release_for_year": lookups,
+        "stats.summary_100": lambda: run(compute_summary_stats(rows[100])),
+        "stats.summary_10k": lambda: run(compute_summary_stats(rows[10_000])),
+        "stats.summary_100k": lambda: run(compute_summary_stats(rows[100_000])),
+        "decode.county_88": lambda: loads_rows(county_body),
+        "decode.tract_70k": lambda: loads_rows(tract_body),
+        **{
+            f"tool.{name}": lambda name=name, arguments=arguments: run(mcp.call_tool(name, arguments))
+            for name, arguments in TOOL_CALLS.items()
+        },
+    }
+
+
+def measure(operation, rounds: int, min_round_seconds: float = 0.05) -> dict:
+    """Times an operation; returns median and best seconds per iteration over the rounds."""
+    start = time.perf_counter()
+    for _ in range(3):
+        operation()
+    single = (time.perf_counter() - start) / 3
+    iterations = max(1, math.ceil(min_round_seconds / max(single, 1e-9)))
+    per_op = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        per_op.append((time.perf_counter() - start) / iterations)
+    return {"median_s": statistics.median(per_op), "min_s": min(per_op), "iterations": iterations, "rounds": rounds}
+
+
+def compare(results: dict, baseline: dict, threshold: float, statistic: str = "min_s") -> list:
+    """
+    Compares results against a baseline.
+
+    Args:
+        results (dict): Case name -> measurement, as returned by measure().
+        baseline (dict): A previous run's "results".
+        threshold (float): Allowed relative slowdown, e.g. 0.25.
+        statistic (str): The measurement compared, 'min_s' or 'median_s'.
+
+    Returns:
+        list: (case, baseline value, current value, relative change) for every regressed case.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = result[statistic] / previous[statistic] - 1
+        result["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append((name, previous[statistic], result[statistic], change))
+    return regressions
+
+
+def _fmt(seconds: float) -> str:
+    return f"{seconds * 1e6:,.1f} µs" if seconds < 1e-3 else f"{seconds * 1e3:,.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--rounds", type=int, default=9)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--statistic", choices=("min_s", "median_s"), default="min_s")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--output")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--record", action="store_true", help="Re-record fixtures from data.cdc.gov and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+        return
+
+    bodies = load_fixtures()
+    install_upstream(bodies)
+    loop = asyncio.new_event_loop()
+    results = {}
+    for name, operation in cases(bodies, loop).items():
+        if args.filter in name:
+            results[name] = measure(operation, args.rounds)
+    loop.close()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold, args.statistic)
+        report["regressions"] = [name for name, *_ in regressions]
+
+    print(f"{'case':<32}{'median':>14}{'best':>14}{'vs baseline':>14}")
+    for name, result in results.items():
+        change = f"{result['change']:+.1%}" if "change" in result else "-"
+        print(f"{name:<32}{_fmt(result['median_s']):>14}{_fmt(result['min_s']):>14}{change:>14}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {_fmt(before)} -> {_fmt(after)} ({change:+.1%}, threshold {args.threshold:+.0%})")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
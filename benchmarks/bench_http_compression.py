@@ -0,0 +1,100 @@
+"""
+Benchmark serialization CPU and bytes-on-wire for a large tract response.
+
+Builds a synthetic 70k-row census tract result shaped like the output of
+get_cdc_places_data(geo="census"), then reports:
+
+- CPU time to serialize the tool result with the standard library, with
+  FastMCP's default (pydantic-core) serializer, and with places.serialization.
+- Size of the JSON-RPC response body uncompressed and with every encoding
+  places.compression can produce, plus the CPU time to compress it.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_http_compression.py [--rows 70000] [--repeat 5]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastmcp.tools.base import default_serializer
+
+from places import serialization
+from places.compression import ENCODERS, compress_bytes
+
+STATES = [
+    ("MI", "Michigan", ["Wayne", "Oakland", "Macomb", "Kent", "Genesee"]),
+    ("MA", "Massachusetts", ["Worcester", "Middlesex", "Suffolk", "Essex"]),
+    ("CA", "California", ["Los Angeles", "San Diego", "Orange", "Riverside"]),
+    ("TX", "Texas", ["Harris", "Dallas", "Tarrant", "Bexar", "Travis"]),
+]
+
+
+def tract_rows(n: int, seed: int = 0) -> list:
+    """Returns n synthetic census tract records as Socrata would (all values as strings)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        abbr, desc, counties = STATES[i % len(STATES)]
+        value = rng.uniform(5, 40)
+        rows.append({
+            "stateabbr": abbr,
+            "statedesc": desc,
+            "countyname": rng.choice(counties),
+            "locationname": f"{26000000000 + i * 7:011d}",
+            "data_value": f"{value:.1f}",
+            "low_confidence_limit": f"{value - rng.uniform(0.5, 3):.1f}",
+            "high_confidence_limit": f"{value + rng.uniform(0.5, 3):.1f}",
+            "totalpopulation": str(rng.randint(500, 9000)),
+        })
+    return rows
+
+
+def cpu_time(fn, repeat: int) -> float:
+    """Returns the best per-call CPU time in milliseconds over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=70000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = tract_rows(args.rows)
+
+    serializers = {
+        "stdlib json": lambda: json.dumps(rows).encode("utf-8"),
+        "fastmcp default": lambda: default_serializer(rows).encode("utf-8"),
+        f"places.serialization ({'orjson' if serialization.orjson else 'stdlib'})": lambda: serialization.dumps(rows),
+    }
+    print(f"Serialization of {args.rows:,} rows (best of {args.repeat})")
+    for name, fn in serializers.items():
+        print(f"  {name:<36} {cpu_time(fn, args.repeat):9.1f} ms CPU")
+
+    # The text content is embedded as a string in the JSON-RPC response envelope.
+    text = serialization.dumps(rows).decode("utf-8")
+    envelope = {"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": text}], "isError": False}}
+    body = serialization.dumps(envelope)
+
+    print("\nBytes on wire for the tools/call response")
+    print(f"  {'identity':<10} {len(body):>12,} bytes")
+    for encoding in ENCODERS:
+        compressed = compress_bytes(body, encoding)
+        elapsed = cpu_time(lambda: compress_bytes(body, encoding), args.repeat)
+        ratio = len(body) / len(compressed)
+        print(f"  {encoding:<10} {len(compressed):>12,} bytes  ({ratio:5.1f}x, {elapsed:7.1f} ms CPU)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Profile the memory of the large-response paths at 10k to 1M rows.
+
+Stages:
+
+- decode: serialization.loads_rows over a Socrata response body of n rows
+  (the upstream fetch path),
+- summary_stats: utils.compute_summary_stats over n decoded rows (the
+  area_summary_stats path).
+
+Inputs are synthetic tract rows (benchmarks/synthetic.py) with the columns
+area_summary_stats selects (``--columns`` to change them), so value and
+string distributions look like the real datasets.
+
+Each (stage, size) runs twice, in fresh processes, so one measurement does
+not inherit another's heap:
+
+- rss: peak RSS above the baseline taken just before the stage (the peak is
+  reset through /proc/self/clear_refs), RSS retained after it, the net
+  change in allocated Python blocks and the garbage collector passes it
+  triggered,
+- trace: with tracemalloc, the peak and retained bytes of Python allocations
+  made by the stage and the number of blocks retained. tracemalloc slows the
+  stage down, so its time is not reported.
+
+Bytes per row are reported for the peaks. Results can be written as JSON
+(``--output``). Linux only (reads /proc/self/status).
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_memory.py [--sizes 10000,100000,1000000] [--stages decode,summary_stats]
+        [--columns locationname,data_value] [--output memory.json]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+from synthetic import generate_rows
+
+from places import utils
+from places.serialization import dumps, loads_rows
+
+STAGES = ("decode", "summary_stats")
+MODES = ("rss", "trace")
+DEFAULT_SIZES = "10000,100000,1000000"
+# Columns area_summary_stats selects for tract rows
+DEFAULT_COLUMNS = "locationname,countyname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation"
+
+
+def status_kb(field: str) -> int:
+    """Returns a field of /proc/self/status in kB (VmRSS, VmHWM, ...)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def reset_peak_rss() -> bool:
+    """Resets VmHWM to the current RSS; returns False where the kernel does not allow it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def build_input(stage: str, size: int, columns: list):
+    """Returns the stage's input: an encoded response body, or decoded rows."""
+    body = dumps(list(generate_rows(size, columns=columns)))
+    return body if stage == "decode" else loads_rows(body)
+
+
+def run_stage(stage: str, data):
+    if stage == "decode":
+        return loads_rows(data)
+    return asyncio.run(utils.compute_summary_stats(data))
+
+
+def measure(stage: str, size: int, mode: str, columns: list) -> dict:
+    """Runs one stage once in this process and returns its measurements."""
+    data = build_input(stage, size, columns)
+    # Start the offload pool and the event loop machinery outside the measurement
+    run_stage(stage, build_input(stage, 100, columns))
+    gc.collect()
+    result = {"stage": stage, "rows": size, "mode": mode}
+    if stage == "decode":
+        result["input_mb"] = round(len(data) / 2**20, 1)
+
+    if mode == "trace":
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        blocks = len(tracemalloc.take_snapshot().traces)
+        tracemalloc.reset_peak()
+        output = run_stage(stage, data)
+        current, peak = tracemalloc.get_traced_memory()
+        retained_blocks = len(tracemalloc.take_snapshot().traces) - blocks
+        tracemalloc.stop()
+        del output
+        return {
+            **result,
+            "traced_peak_mb": round((peak - before) / 2**20, 1),
+            "traced_retained_mb": round((current - before) / 2**20, 1),
+            "retained_blocks": retained_blocks,
+            "peak_bytes_per_row": round((peak - before) / size),
+        }
+
+    baseline = status_kb("VmRSS")
+    peak_reset = reset_peak_rss()
+    blocks = sys.getallocatedblocks()
+    collections = [stats["collections"] for stats in gc.get_stats()]
+    start = time.perf_counter()
+    output = run_stage(stage, data)
+    elapsed = time.perf_counter() - start
+    peak = status_kb("VmHWM") - baseline
+    retained = status_kb("VmRSS") - baseline
+    new_blocks = sys.getallocatedblocks() - blocks
+    gc_passes = sum(stats["collections"] for stats in gc.get_stats()) - sum(collections)
+    del output
+    return {
+        **result,
+        "seconds": round(elapsed, 3),
+        # Without the reset, VmHWM includes building the input and is an upper bound
+        "peak_rss_mb": round(peak / 1024, 1),
+        "peak_rss_exact": peak_reset,
+        "retained_rss_mb": round(retained / 1024, 1),
+        "net_blocks": new_blocks,
+        "gc_passes": gc_passes,
+        "peak_bytes_per_row": round(peak * 1024 / size),
+    }
+
+
+def run_child(stage: str, size: int, mode: str, columns: str) -> dict:
+    """Measures one stage in a fresh interpreter."""
+    command = [sys.executable, __file__, "--child", f"{stage}:{size}:{mode}", "--columns", columns]
+    completed = subprocess.run(command, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        return {"stage": stage, "rows": size, "mode": mode, "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout)
+
+
+def print_report(results: list) -> None:
+    rss = {(r["stage"], r["rows"]): r for r in results if r["mode"] == "rss"}
+    trace = {(r["stage"], r["rows"]): r for r in results if r["mode"] == "trace"}
+    print(f"{'stage':<14} {'rows':>9} {'seconds':>8} {'peak RSS MB':>12} {'kept RSS MB':>12} {'net blocks':>11} "
+          f"{'gc':>5} {'traced peak MB':>15} {'traced kept MB':>15} {'B/row':>7}")
+    for key in sorted(rss.keys() | trace.keys(), key=lambda k: (STAGES.index(k[0]), k[1])):
+        r, t = rss.get(key, {}), trace.get(key, {})
+        if "error" in r or "error" in t:
+            print(f"{key[0]:<14} {key[1]:>9} failed: {r.get('error') or t.get('error')}")
+            continue
+        peak = f"{r.get('peak_rss_mb', '')}{'' if r.get('peak_rss_exact', True) else '*'}"
+        print(f"{key[0]:<14} {key[1]:>9} {r.get('seconds', ''):>8} {peak:>12} {r.get('retained_rss_mb', ''):>12} "
+              f"{r.get('net_blocks', ''):>11} {r.get('gc_passes', ''):>5} {t.get('traced_peak_mb', ''):>15} "
+              f"{t.get('traced_retained_mb', ''):>15} {r.get('peak_bytes_per_row', ''):>7}")
+    if any(not r.get("peak_rss_exact", True) for r in rss.values()):
+        print("* peak RSS could not be reset; it includes building the input")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated row counts")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--columns", default=DEFAULT_COLUMNS, help="Columns of the synthetic rows")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    columns = args.columns.split(",")
+
+    if args.child:
+        stage, size, mode = args.child.split(":")
+        print(json.dumps(measure(stage, int(size), mode, columns)))
+        return
+
+    results = []
+    for stage in args.stages.split(","):
+        if stage not in STAGES:
+            parser.error(f"unknown stage {stage!r}; choose from {', '.join(STAGES)}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            for mode in MODES:
+                print(f"{stage} {size} rows ({mode})...", file=sys.stderr)
+                results.append(run_child(stage, size, mode, args.columns))
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"columns": columns, "results": results}, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
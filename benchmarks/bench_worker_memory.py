@@ -0,0 +1,104 @@
+"""
+Measure the memory footprint of the HTTP server with several workers.
+
+Starts the server with the pre-forking launcher (places.serve) and with
+``uvicorn --workers``, warms every worker with a few MCP requests, and
+reports RSS, PSS (proportional set size, shared pages split between the
+processes sharing them) and private memory per process from
+/proc/<pid>/smaps_rollup. PSS summed over the process tree is what counts
+against a container memory quota.
+
+Linux only. Usage:
+    PYTHONPATH=src python benchmarks/bench_worker_memory.py [--workers 2] [--requests 20]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+COMMANDS = {
+    "places.serve (pre-fork)": [sys.executable, "-m", "places.serve", "{port}"],
+    "uvicorn --workers": [sys.executable, "-m", "uvicorn", "places.app:app", "--port", "{port}", "--workers", "{workers}"],
+}
+
+
+def smaps(pid: int) -> dict:
+    """Returns the smaps_rollup fields of a process in kB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields
+
+
+def process_tree(pid: int) -> list:
+    """Returns a process and all of its descendants."""
+    pids = [pid]
+    for child in open(f"/proc/{pid}/task/{pid}/children").read().split():
+        pids.extend(process_tree(int(child)))
+    return pids
+
+
+def wait_healthy(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError("server did not become healthy")
+
+
+def warm(port: int, requests: int) -> None:
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"}).encode()
+    for _ in range(requests):
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/mcp", data=body, method="POST",
+            headers={"content-type": "application/json", "accept": "application/json, text/event-stream"},
+        )
+        urllib.request.urlopen(request, timeout=10).read()
+
+
+def measure(name: str, command: list, port: int, workers: int, requests: int) -> None:
+    env = {**os.environ, "PYTHONPATH": SRC, "WEB_CONCURRENCY": str(workers)}
+    args = [part.format(port=port, workers=workers) for part in command]
+    proc = subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_healthy(port)
+        warm(port, requests)
+        time.sleep(1)
+        print(f"\n{name}")
+        print(f"{'pid':>8} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11}")
+        total = 0
+        for pid in process_tree(proc.pid):
+            fields = smaps(pid)
+            private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+            total += fields["Pss"]
+            print(f"{pid:>8} {fields['Rss'] / 1024:8.1f} {fields['Pss'] / 1024:8.1f} {private / 1024:11.1f}")
+        print(f"{'total PSS':>17} {total / 1024:8.1f} MB")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    for offset, (name, command) in enumerate(COMMANDS.items()):
+        measure(name, command, args.port + offset, args.workers, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+Load-test the streamable HTTP MCP endpoint with many concurrent sessions.
+
+Each of ``--sessions`` virtual users opens its own MCP session (initialize,
+then notifications/initialized) and calls tools back to back (plus optional
+``--think-time``) for ``--duration`` seconds. Sessions start spread over
+``--ramp-up`` seconds. Every call is drawn from a weighted mix of tool calls
+(``--mix``, default benchmarks/load_mix.json: the calls that answer the
+questions in eval/mcp-data-check/questions.csv).
+
+The report gives, overall and per scenario: calls, throughput, p50/p95/p99
+latency and error rate, with errors split into HTTP statuses, transport
+failures, JSON-RPC errors, tool errors and admission-control rejections
+(overloaded). A timeline gives the same figures per ``--interval`` together
+with the RSS of the server's process tree (parent and workers, from /proc).
+
+By default the script starts everything it needs and runs fully offline:
+
+- ``places.emulator`` serving generated datasets that hold rows for every
+  scenario in the mix (``--upstream-latency``/``--upstream-jitter`` model a
+  slow upstream, ``--filler`` adds unrelated rows to each dataset),
+- ``places.serve`` with ``--workers`` workers, pointed at the emulator
+  through ``PLACES_SOCRATA_BASE_URL``. Location-index bootstrapping is off
+  so location names are matched upstream.
+
+``--upstream live`` points the started server at data.cdc.gov instead, and
+``--target http://host:port/mcp`` loads a server that is already running
+(RSS is then sampled only with ``--server-pid``).
+
+Linux only (RSS sampling). Usage:
+    PYTHONPATH=src python benchmarks/load_test.py [--sessions 50] [--duration 30] [--ramp-up 5]
+        [--workers 2] [--mix benchmarks/load_mix.json] [--upstream emulator|live] [--upstream-latency 0.1]
+        [--target URL] [--server-pid PID] [--interval 5] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+
+from bench_worker_memory import process_tree, smaps
+from places.utils import GEO_SCOPES, dataset_id, get_endpoint, get_endpoint_for_geo, get_release_for_year
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(BENCH_DIR, "..", "src")
+DEFAULT_MIX = os.path.join(BENCH_DIR, "load_mix.json")
+
+PROTOCOL_VERSION = "2025-06-18"
+HEADERS = {"content-type": "application/json", "accept": "application/json, text/event-stream"}
+
+# Areas generated per scope for area_summary_stats scenarios
+SCOPE_SIZES = {"county": 75, "census": 200, "places": 300}
+
+
+def load_mix(path: str) -> list:
+    """Returns the scenarios of a mix file: name, weight, tool and arguments of each call."""
+    with open(path, encoding="utf-8") as f:
+        scenarios = json.load(f)["scenarios"]
+    for scenario in scenarios:
+        scenario.setdefault("weight", 1)
+    return scenarios
+
+
+def _row(rng, geo_values: dict, measureid: str, datavaluetypeid: str, year: str) -> dict:
+    value = rng.uniform(5, 45)
+    return {
+        "year": year, **geo_values, "measureid": measureid, "datavaluetypeid": datavaluetypeid,
+        "data_value": f"{value:.1f}", "low_confidence_limit": f"{value - 2:.1f}",
+        "high_confidence_limit": f"{value + 2:.1f}", "totalpopulation": str(rng.randint(500, 500_000)),
+    }
+
+
+def _scenario_areas(scenario: dict) -> tuple:
+    """Returns (endpoint URL, area fields of every row the scenario's call should find)."""
+    arguments = scenario["arguments"]
+    if scenario["tool"] == "area_summary_stats":
+        geo = GEO_SCOPES[arguments["geo_scope"]]
+        release = get_release_for_year(arguments["measureid"], arguments["year"])
+        url = get_endpoint_for_geo(geo, release) if release else None
+        state = arguments["state_code"]
+        county_fips = arguments.get("county_fips") or "00000"
+        county = arguments.get("county") or f"County {county_fips}"
+        areas = []
+        for i in range(SCOPE_SIZES[geo]):
+            if geo == "census":
+                locationid = f"{county_fips}{i + 1:06d}"
+                areas.append({"stateabbr": state, "countyname": county, "countyfips": county_fips,
+                              "locationid": locationid, "locationname": locationid})
+            else:
+                areas.append({"stateabbr": state, "locationid": f"{i + 1:0{5 if geo == 'county' else 7}d}",
+                              "locationname": f"{state} {geo} {i + 1}"})
+        return url, areas
+
+    url = get_endpoint(arguments["geo"], arguments["year"], arguments["measureid"])
+    ids, names = arguments.get("locationid") or [], arguments.get("locationname") or []
+    ids = [ids] if isinstance(ids, str) else ids
+    names = [names] if isinstance(names, str) else names
+    areas = [{"locationid": locationid, "locationname": locationid} for locationid in ids]
+    areas += [{"locationid": f"{9_000_000 + i}", "locationname": name} for i, name in enumerate(names)]
+    return url, areas
+
+
+def stub_datasets(scenarios: list, filler: int = 1000, seed: int = 0) -> dict:
+    """
+    Generates upstream datasets answering every scenario of a mix.
+
+    Args:
+        scenarios (list): Scenarios as returned by load_mix().
+        filler (int): Unrelated rows added to each dataset, so queries scan more than their matches.
+        seed (int): Random seed for the data values.
+
+    Returns:
+        dict: Dataset id -> Socrata-shaped rows (string values), for places.emulator.
+    """
+    rng = random.Random(seed)
+    datasets = defaultdict(list)
+    for scenario in scenarios:
+        url, areas = _scenario_areas(scenario)
+        if url is None:
+            continue
+        arguments = scenario["arguments"]
+        for area in areas:
+            for datavaluetypeid in ("CrdPrv", "AgeAdjPrv"):
+                datasets[dataset_id(url)].append(
+                    _row(rng, area, arguments["measureid"], datavaluetypeid, arguments["year"])
+                )
+    for rows in datasets.values():
+        rows += [
+            _row(rng, {"stateabbr": "ZZ", "locationid": f"{i:05d}", "locationname": f"Filler {i}"},
+                 "FILLER", "CrdPrv", "2000")
+            for i in range(filler)
+        ]
+    return dict(datasets)
+
+
+def percentile(values: list, q: float):
+    """Returns the nearest-rank q-th percentile (0-100) of values, or None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def parse_message(response: httpx.Response) -> dict:
+    """Returns the JSON-RPC message of a streamable HTTP response, sent as JSON or as an SSE stream."""
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                message = json.loads(line[5:])
+                if "id" in message:
+                    return message
+        raise ValueError("no JSON-RPC response in event stream")
+    return response.json()
+
+
+def call_error(message: dict):
+    """Returns the error kind of a tools/call response, or None for a successful call."""
+    if "error" in message:
+        return "jsonrpc"
+    result = message.get("result") or {}
+    if result.get("isError"):
+        return "tool_error"
+    structured = result.get("structuredContent")
+    if isinstance(structured, dict) and "error" in structured:
+        return "overloaded" if structured.get("overloaded") else "tool_error"
+    return None
+
+
+class Session:
+    """One MCP session over the streamable HTTP transport."""
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url
+        self.headers = dict(HEADERS)
+        self._next_id = 0
+
+    async def _post(self, method: str, params: dict, notification: bool = False) -> httpx.Response:
+        body = {"jsonrpc": "2.0", "method": method, "params": params}
+        if not notification:
+            self._next_id += 1
+            body["id"] = self._next_id
+        return await self.client.post(self.url, content=json.dumps(body), headers=self.headers)
+
+    async def open(self) -> None:
+        response = await self._post("initialize", {
+            "protocolVersion": PROTOCOL_VERSION, "capabilities": {},
+            "clientInfo": {"name": "places-load-test", "version": "1.0"},
+        })
+        response.raise_for_status()
+        parse_message(response)
+        if "mcp-session-id" in response.headers:
+            self.headers["mcp-session-id"] = response.headers["mcp-session-id"]
+        self.headers["mcp-protocol-version"] = PROTOCOL_VERSION
+        await self._post("notifications/initialized", {}, notification=True)
+
+    async def call_tool(self, name: str, arguments: dict):
+        """Calls a tool; returns the error kind, or None on success."""
+        try:
+            response = await self._post("tools/call", {"name": name, "arguments": arguments})
+        except httpx.HTTPError:
+            return "transport"
+        if response.status_code != 200:
+            return f"http_{response.status_code}"
+        try:
+            return call_error(parse_message(response))
+        except ValueError:
+            return "transport"
+
+    async def close(self) -> None:
+        if "mcp-session-id" in self.headers:
+            try:
+                await self.client.delete(self.url, headers=self.headers)
+            except httpx.HTTPError:
+                pass
+
+
+async def run_session(client, url: str, scenarios: list, rng, start_delay: float, deadline: float,
+                      think_time: float, calls: list, t0: float) -> None:
+    """Runs one virtual user until the deadline, appending (end offset, latency, scenario, error) to calls."""
+    await asyncio.sleep(start_delay)
+    session = Session(client, url)
+    try:
+        await session.open()
+    except (httpx.HTTPError, ValueError):
+        calls.append((time.perf_counter() - t0, 0.0, "initialize", "initialize"))
+        return
+    weights = [scenario["weight"] for scenario in scenarios]
+    try:
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            start = time.perf_counter()
+            error = await session.call_tool(scenario["tool"], scenario["arguments"])
+            end = time.perf_counter()
+            calls.append((end - t0, end - start, scenario["name"], error))
+            if think_time:
+                await asyncio.sleep(rng.expovariate(1 / think_time))
+    finally:
+        await session.close()
+
+
+def tree_rss_mb(pid: int) -> float:
+    """Returns the summed RSS of a process and its descendants in MB, or None once it has exited."""
+    total = 0
+    try:
+        pids = process_tree(pid)
+    except OSError:
+        return None
+    for member in pids:
+        try:
+            total += smaps(member)["Rss"]
+        except (OSError, KeyError):
+            continue
+    return total / 1024
+
+
+async def sample_rss(pid: int, interval: float, samples: list, t0: float) -> None:
+    """Appends (offset, RSS MB) of a server's process tree every interval, forever."""
+    while True:
+        rss = tree_rss_mb(pid)
+        if rss is not None:
+            samples.append((time.perf_counter() - t0, rss))
+        await asyncio.sleep(interval)
+
+
+def _figures(entries: list, seconds: float) -> dict:
+    latencies = [latency for _, latency, _, error in entries if error is None]
+    errors = Counter(error for *_, error in entries if error is not None)
+    p50, p95, p99 = (percentile(latencies, q) for q in (50, 95, 99))
+    return {
+        "calls": len(entries),
+        "throughput_per_s": round(len(entries) / seconds, 2) if seconds else None,
+        "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+        "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        "error_rate": round(sum(errors.values()) / len(entries), 4) if entries else 0.0,
+        "errors": dict(errors),
+    }
+
+
+def summarize(calls: list, rss: list, elapsed: float, interval: float) -> dict:
+    """
+    Aggregates call records and RSS samples into the report.
+
+    Args:
+        calls (list): (end offset, latency, scenario, error kind or None) per call.
+        rss (list): (offset, RSS MB) samples of the server process tree.
+        elapsed (float): Seconds from the start of the run to the last completed call.
+        interval (float): Width of a timeline row in seconds.
+
+    Returns:
+        dict: Overall, per-scenario and per-interval figures.
+    """
+    by_scenario = defaultdict(list)
+    for entry in calls:
+        by_scenario[entry[2]].append(entry)
+    timeline = []
+    # Row boundaries every interval; a last stretch shorter than half an interval joins the previous row
+    bounds = [index * interval for index in range(max(1, round(elapsed / interval)) + 1)]
+    bounds[-1] = elapsed
+    for start, end in zip(bounds, bounds[1:]):
+        entries = [entry for entry in calls if start <= entry[0] < end or entry[0] == end == elapsed]
+        row = {"t_s": round(end, 1), **_figures(entries, end - start)}
+        sampled = [mb for offset, mb in rss if offset < end]
+        row["server_rss_mb"] = round(sampled[-1], 1) if sampled else None
+        timeline.append(row)
+    return {
+        "overall": {**_figures(calls, elapsed), "elapsed_s": round(elapsed, 2)},
+        "scenarios": {name: _figures(entries, elapsed) for name, entries in sorted(by_scenario.items())},
+        "timeline": timeline,
+        "server_rss_mb": {
+            "start": round(rss[0][1], 1) if rss else None,
+            "peak": round(max(mb for _, mb in rss), 1) if rss else None,
+            "end": round(rss[-1][1], 1) if rss else None,
+        },
+    }
+
+
+async def run_load(url: str, scenarios: list, sessions: int, duration: float, ramp_up: float, think_time: float,
+                   timeout: float, interval: float, server_pid: int = None, seed: int = 0) -> dict:
+    """Runs the load test against an MCP endpoint; returns the report."""
+    calls, rss = [], []
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        t0 = time.perf_counter()
+        sampler = asyncio.create_task(sample_rss(server_pid, interval, rss, t0)) if server_pid else None
+        deadline = t0 + duration
+        await asyncio.gather(*(
+            run_session(client, url, scenarios, random.Random(seed + i), ramp_up * i / sessions, deadline,
+                        think_time, calls, t0)
+            for i in range(sessions)
+        ))
+        if sampler is not None:
+            sampler.cancel()
+            await asyncio.gather(sampler, return_exceptions=True)
+            latest = tree_rss_mb(server_pid)
+            if latest is not None:
+                rss.append((time.perf_counter() - t0, latest))
+    elapsed = max((end for end, *_ in calls), default=duration)
+    return summarize(calls, rss, elapsed, interval)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with status {process.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"{url} did not respond")
+
+
+def start_stack(args, scenarios: list, workdir: str, processes: list) -> tuple:
+    """
+    Starts the emulator (unless --upstream live) and the server; returns (MCP URL, server process).
+
+    Each process is appended to ``processes`` as soon as it is spawned, so the
+    caller can stop them even if a later start fails.
+    """
+    env = {**os.environ, "PYTHONPATH": SRC, "PLACES_LOG_LEVEL": "WARNING"}
+    if args.upstream == "emulator":
+        for dataset, rows in stub_datasets(scenarios, args.filler, args.seed).items():
+            with open(os.path.join(workdir, f"{dataset}.json"), "w", encoding="utf-8") as f:
+                json.dump(rows, f)
+        port = free_port()
+        emulator = subprocess.Popen(
+            [sys.executable, "-m", "places.emulator", "--data-dir", workdir, "--port", str(port),
+             "--latency", str(args.upstream_latency), "--jitter", str(args.upstream_jitter), "--seed", str(args.seed)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        processes.append(emulator)
+        wait_for(f"http://127.0.0.1:{port}/emulator/stats", emulator)
+        env.update(PLACES_SOCRATA_BASE_URL=f"http://127.0.0.1:{port}", PLACES_LOCATION_INDEX_BOOTSTRAP_GEOS="")
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "places.serve", str(port)], env={**env, "WEB_CONCURRENCY": str(args.workers)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    processes.append(server)
+    wait_for(f"http://127.0.0.1:{port}/health", server)
+    return f"http://127.0.0.1:{port}/mcp", server
+
+
+def _ms(value) -> str:
+    return "-" if value is None else f"{value:,.1f}"
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'scenario':<36}{'calls':>8}{'calls/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    rows = [*report["scenarios"].items(), ("overall", report["overall"])]
+    for name, figures in rows:
+        print(f"{name:<36}{figures['calls']:>8}{figures['throughput_per_s'] or 0:>9.1f}{_ms(figures['p50_ms']):>10}"
+              f"{_ms(figures['p95_ms']):>10}{_ms(figures['p99_ms']):>10}{figures['error_rate']:>8.1%}")
+    if report["overall"]["errors"]:
+        print("errors: " + ", ".join(f"{kind} {count}" for kind, count in report["overall"]["errors"].items()))
+    print(f"\n{'t (s)':>7}{'calls/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'RSS MB':>9}")
+    for row in report["timeline"]:
+        print(f"{row['t_s']:>7.1f}{row['throughput_per_s'] or 0:>9.1f}{_ms(row['p50_ms']):>10}{_ms(row['p95_ms']):>10}"
+              f"{_ms(row['p99_ms']):>10}{row['error_rate']:>8.1%}{_ms(row['server_rss_mb']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent MCP sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep issuing calls")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which sessions start")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds between a session's calls")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a call counts as a transport error")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds per timeline row and RSS sample")
+    parser.add_argument("--target", help="MCP endpoint of a running server; nothing is started")
+    parser.add_argument("--server-pid", type=int, help="Server process whose tree's RSS is sampled, with --target")
+    parser.add_argument("--workers", type=int, default=2, help="Server workers (WEB_CONCURRENCY)")
+    parser.add_argument("--upstream", choices=("emulator", "live"), default="emulator")
+    parser.add_argument("--upstream-latency", type=float, default=0.1, help="Emulator seconds per response")
+    parser.add_argument("--upstream-jitter", type=float, default=0.05, help="Emulator random +/- seconds")
+    parser.add_argument("--filler", type=int, default=1000, help="Unrelated rows per emulated dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    scenarios = load_mix(args.mix)
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="places-load-") as workdir:
+        try:
+            if args.target:
+                url, server_pid = args.target, args.server_pid
+            else:
+                url, server = start_stack(args, scenarios, workdir, processes)
+                server_pid = server.pid
+            print(f"{args.sessions} sessions for {args.duration:.0f} s against {url} "
+                  f"({len(scenarios)} scenarios, upstream: {'external' if args.target else args.upstream})")
+            report = asyncio.run(run_load(
+                url, scenarios, args.sessions, args.duration, args.ramp_up, args.think_time, args.timeout,
+                args.interval, server_pid, args.seed,
+            ))
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait(timeout=30)
+
+    report["config"] = {name: value for name, value in vars(args).items() if name != "output"}
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Generate synthetic PLACES-shaped census tract records at any size.
+
+Rows have the columns of the PLACES tract datasets and values shaped like the
+real ones, so decode and aggregation costs match what the server sees:
+
+- a geography of 51 states and 3,143 counties (real per-state county counts),
+  about 1,800 distinct county names with common names such as "Washington"
+  reused across states, and tracts spread over counties by a heavy-tailed
+  weight (most counties have a few tracts, a few have hundreds),
+- 11-digit tract ids (county FIPS + 6 digits) as locationid and
+  locationname,
+- the 45 measures with their category and a typical mean and spread; values
+  are correlated across the measures of a tract (a shared tract effect) and
+  formatted with one decimal, with confidence limits around them,
+- log-normal tract populations,
+- every value a string, as Socrata returns them (geolocation is a GeoJSON
+  point object).
+
+Rows are produced lazily in (state, county, tract, measure) order, so
+millions of them can be streamed to a file without being held in memory.
+Restrict ``columns`` to what a query selects to match a specific response.
+The output is deterministic for a given seed.
+
+Usage:
+    python benchmarks/synthetic.py --rows 1000000 --output tracts.json
+    python benchmarks/synthetic.py --rows 100000 --measures OBESITY --columns locationname,countyname,data_value \\
+        --format csv --output /tmp/emulator/cwsq-ngmh.csv
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import random
+import sys
+
+# (abbreviation, name, FIPS, counties)
+STATES = [
+    ("AL", "Alabama", "01", 67), ("AK", "Alaska", "02", 30), ("AZ", "Arizona", "04", 15),
+    ("AR", "Arkansas", "05", 75), ("CA", "California", "06", 58), ("CO", "Colorado", "08", 64),
+    ("CT", "Connecticut", "09", 8), ("DE", "Delaware", "10", 3), ("DC", "District of Columbia", "11", 1),
+    ("FL", "Florida", "12", 67), ("GA", "Georgia", "13", 159), ("HI", "Hawaii", "15", 5),
+    ("ID", "Idaho", "16", 44), ("IL", "Illinois", "17", 102), ("IN", "Indiana", "18", 92),
+    ("IA", "Iowa", "19", 99), ("KS", "Kansas", "20", 105), ("KY", "Kentucky", "21", 120),
+    ("LA", "Louisiana", "22", 64), ("ME", "Maine", "23", 16), ("MD", "Maryland", "24", 24),
+    ("MA", "Massachusetts", "25", 14), ("MI", "Michigan", "26", 83), ("MN", "Minnesota", "27", 87),
+    ("MS", "Mississippi", "28", 82), ("MO", "Missouri", "29", 115), ("MT", "Montana", "30", 56),
+    ("NE", "Nebraska", "31", 93), ("NV", "Nevada", "32", 17), ("NH", "New Hampshire", "33", 10),
+    ("NJ", "New Jersey", "34", 21), ("NM", "New Mexico", "35", 33), ("NY", "New York", "36", 62),
+    ("NC", "North Carolina", "37", 100), ("ND", "North Dakota", "38", 53), ("OH", "Ohio", "39", 88),
+    ("OK", "Oklahoma", "40", 77), ("OR", "Oregon", "41", 36), ("PA", "Pennsylvania", "42", 67),
+    ("RI", "Rhode Island", "44", 5), ("SC", "South Carolina", "45", 46), ("SD", "South Dakota", "46", 66),
+    ("TN", "Tennessee", "47", 95), ("TX", "Texas", "48", 254), ("UT", "Utah", "49", 29),
+    ("VT", "Vermont", "50", 14), ("VA", "Virginia", "51", 133), ("WA", "Washington", "53", 39),
+    ("WV", "West Virginia", "54", 55), ("WI", "Wisconsin", "55", 72), ("WY", "Wyoming", "56", 23),
+]
+
+# measureid -> (categoryid, short name, tract mean %, tract standard deviation, direction of the shared tract effect)
+MEASURES = {
+    "ARTHRITIS": ("HLTHOUT", "Arthritis", 26.0, 5.0, 1), "BPHIGH": ("HLTHOUT", "High Blood Pressure", 33.0, 6.0, 1),
+    "CANCER": ("HLTHOUT", "Cancer (except skin)", 7.0, 2.0, 0), "CASTHMA": ("HLTHOUT", "Current Asthma", 10.5, 1.5, 1),
+    "CHD": ("HLTHOUT", "Coronary Heart Disease", 6.5, 2.0, 1), "COPD": ("HLTHOUT", "COPD", 7.0, 3.0, 1),
+    "DEPRESSION": ("HLTHOUT", "Depression", 21.0, 4.0, 1), "DIABETES": ("HLTHOUT", "Diabetes", 12.0, 4.0, 1),
+    "HIGHCHOL": ("HLTHOUT", "High Cholesterol", 32.0, 4.0, 1), "KIDNEY": ("HLTHOUT", "Chronic Kidney Disease", 3.2, 0.8, 1),
+    "OBESITY": ("HLTHOUT", "Obesity", 35.0, 6.0, 1), "STROKE": ("HLTHOUT", "Stroke", 3.5, 1.3, 1),
+    "TEETHLOST": ("HLTHOUT", "All Teeth Lost", 13.0, 7.0, 1),
+    "BINGE": ("RISKBEH", "Binge Drinking", 17.0, 3.0, -1), "CSMOKING": ("RISKBEH", "Current Smoking", 16.0, 6.0, 1),
+    "LPA": ("RISKBEH", "Physical Inactivity", 26.0, 7.0, 1), "SLEEP": ("RISKBEH", "Short Sleep Duration", 36.0, 5.0, 1),
+    "GHLTH": ("HLTHSTAT", "General Health", 18.0, 7.0, 1), "MHLTH": ("HLTHSTAT", "Frequent Mental Distress", 16.0, 3.0, 1),
+    "PHLTH": ("HLTHSTAT", "Frequent Physical Distress", 12.0, 3.0, 1),
+    "ACCESS2": ("PREVENT", "Health Insurance", 12.0, 7.0, 1), "BPMED": ("PREVENT", "Taking BP Medication", 78.0, 5.0, 0),
+    "CERVICAL": ("PREVENT", "Cervical Cancer Screening", 82.0, 5.0, -1),
+    "CHECKUP": ("PREVENT", "Annual Checkup", 76.0, 4.0, 0), "CHOLSCREEN": ("PREVENT", "Cholesterol Screening", 86.0, 4.0, -1),
+    "COLON_SCREEN": ("PREVENT", "Colorectal Cancer Screening", 66.0, 8.0, -1),
+    "COREM": ("PREVENT", "Core preventive services for older men", 41.0, 8.0, -1),
+    "COREW": ("PREVENT", "Core preventive services for older women", 37.0, 7.0, -1),
+    "DENTAL": ("PREVENT", "Dental Visit", 62.0, 11.0, -1), "MAMMOUSE": ("PREVENT", "Mammography", 76.0, 5.0, -1),
+    "HEARING": ("DISABLT", "Hearing Disability", 7.0, 2.0, 1), "VISION": ("DISABLT", "Vision Disability", 5.0, 2.0, 1),
+    "COGNITION": ("DISABLT", "Cognitive Disability", 14.0, 4.0, 1),
+    "MOBILITY": ("DISABLT", "Mobility Disability", 13.0, 5.0, 1),
+    "SELFCARE": ("DISABLT", "Self-care Disability", 3.6, 1.5, 1),
+    "INDEPLIVE": ("DISABLT", "Independent Living Disability", 8.0, 3.0, 1),
+    "DISABILITY": ("DISABLT", "Any Disability", 29.0, 7.0, 1),
+    "ISOLATION": ("SOCLNEED", "Social Isolation", 19.0, 4.0, 1), "FOODSTAMP": ("SOCLNEED", "Food Stamps", 14.0, 9.0, 1),
+    "FOODINSECU": ("SOCLNEED", "Food Insecurity", 14.0, 6.0, 1), "HOUSINSECU": ("SOCLNEED", "Housing Insecurity", 10.0, 4.0, 1),
+    "SHUTUTILITY": ("SOCLNEED", "Utility Services Threat", 8.0, 4.0, 1),
+    "LACKTRPT": ("SOCLNEED", "Lack of Transportation", 9.0, 5.0, 1),
+    "EMOTIONSPT": ("SOCLNEED", "Lack of Social and Emotional Support", 25.0, 6.0, 1),
+    "LONELINESS": ("SOCLNEED", "Loneliness", 32.0, 5.0, 1),
+}
+
+CATEGORIES = {
+    "HLTHOUT": "Health Outcomes", "RISKBEH": "Health Risk Behaviors", "HLTHSTAT": "Health Status",
+    "PREVENT": "Prevention", "DISABLT": "Disability", "SOCLNEED": "Health-Related Social Needs",
+}
+
+# County names shared by many states, most common first
+COMMON_COUNTY_NAMES = [
+    "Washington", "Jefferson", "Franklin", "Jackson", "Lincoln", "Madison", "Clay", "Montgomery", "Marion", "Monroe",
+    "Union", "Wayne", "Greene", "Warren", "Grant", "Polk", "Carroll", "Lee", "Adams", "Johnson", "Marshall",
+    "Clark", "Douglas", "Lake", "Morgan", "Calhoun", "Hamilton", "Crawford", "Fayette", "Lawrence", "Perry",
+    "Benton", "Butler", "Decatur", "Harrison", "Henry", "Howard", "Scott", "Shelby", "Brown", "Boone",
+    "Cass", "Clinton", "Knox", "Logan", "Mercer", "Orange", "Putnam", "Randolph", "Sullivan",
+]
+_SYLLABLES = ["al", "ban", "cor", "da", "el", "fen", "gar", "hol", "is", "ken", "lor", "mar", "nor", "os", "pem",
+              "quin", "ros", "sal", "tam", "ur", "val", "win", "yor", "zel"]
+
+FULL_COLUMNS = [
+    "year", "stateabbr", "statedesc", "countyname", "countyfips", "locationname", "datasource", "category",
+    "measure", "data_value_unit", "data_value_type", "data_value", "low_confidence_limit", "high_confidence_limit",
+    "totalpopulation", "totalpop18plus", "geolocation", "locationid", "categoryid", "measureid", "datavaluetypeid",
+    "short_question_text",
+]
+
+# Tracts per county: log-normal weights, median a few tracts, a long tail into the hundreds
+_COUNTY_WEIGHT_MU, _COUNTY_WEIGHT_SIGMA = 2.3, 1.25
+
+
+def _county_name(rng) -> str:
+    if rng.random() < 0.45:
+        index = min(int(rng.paretovariate(1.2)) - 1, len(COMMON_COUNTY_NAMES) - 1)
+        return COMMON_COUNTY_NAMES[index]
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def counties(seed: int = 0) -> list:
+    """Returns (state abbreviation, state name, county FIPS, county name, tract weight) for every county."""
+    rng = random.Random(seed)
+    result = []
+    for abbr, name, fips, count in STATES:
+        names = set()
+        for i in range(count):
+            county = _county_name(rng)
+            while county in names:
+                county = _county_name(rng)
+            names.add(county)
+            result.append((abbr, name, f"{fips}{2 * i + 1:03d}", county, rng.lognormvariate(_COUNTY_WEIGHT_MU, _COUNTY_WEIGHT_SIGMA)))
+    return result
+
+
+def tract_counts(county_list: list, tracts: int) -> list:
+    """Splits a number of tracts over counties: one each while they last, the rest in proportion to their weights."""
+    base = [1 if i < tracts else 0 for i in range(len(county_list))]
+    rest = tracts - sum(base)
+    total = sum(weight for *_, weight in county_list)
+    shares = [rest * weight / total for *_, weight in county_list]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[:rest - sum(counts)]:
+        counts[i] += 1
+    return [b + c for b, c in zip(base, counts)]
+
+
+def generate_rows(n: int, seed: int = 0, measures=None, columns=None, datavaluetypeid: str = "CrdPrv",
+                  year: str = "2022"):
+    """
+    Yields n synthetic PLACES tract records.
+
+    Args:
+        n (int): Number of rows.
+        seed (int): Random seed; the same arguments always give the same rows.
+        measures (list): Measure ids each tract reports (default: all 45); n / len(measures) tracts are generated.
+        columns (list): Columns to keep (default: FULL_COLUMNS), e.g. a query's $select.
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+        year (str): Value of the year column.
+
+    Yields:
+        dict: One row, every value a string (geolocation a GeoJSON point).
+    """
+    measures = list(measures or MEASURES)
+    keep = list(columns) if columns else None
+    rng = random.Random(seed + 1)
+    county_list = counties(seed)
+    tracts = math.ceil(n / len(measures))
+    value_type = "Crude prevalence" if datavaluetypeid == "CrdPrv" else "Age-adjusted prevalence"
+    shared_weight = math.sqrt(0.5)
+
+    def tract_rows():
+        for (abbr, state, county_fips, county, _), count in zip(county_list, tract_counts(county_list, tracts)):
+            lat, lon = rng.uniform(25, 49), rng.uniform(-124, -67)
+            for t in range(count):
+                tract = f"{county_fips}{(t + 1) * 100:06d}"
+                population = min(max(int(rng.lognormvariate(8.3, 0.45)), 100), 30_000)
+                effect = rng.gauss(0, 1)
+                point = {"type": "Point", "coordinates": [round(lon + rng.gauss(0, 0.2), 6), round(lat + rng.gauss(0, 0.2), 6)]}
+                for measureid in measures:
+                    categoryid, short_name, mean, sd, direction = MEASURES[measureid]
+                    value = mean + sd * (shared_weight * direction * effect + shared_weight * rng.gauss(0, 1))
+                    value = min(max(value, 0.2), 99.5)
+                    half_width = value * rng.uniform(0.06, 0.2)
+                    row = {
+                        "year": year, "stateabbr": abbr, "statedesc": state, "countyname": county,
+                        "countyfips": county_fips, "locationname": tract, "datasource": "BRFSS",
+                        "category": CATEGORIES[categoryid], "measure": f"{short_name} among adults",
+                        "data_value_unit": "%", "data_value_type": value_type, "data_value": f"{value:.1f}",
+                        "low_confidence_limit": f"{max(value - half_width, 0.1):.1f}",
+                        "high_confidence_limit": f"{min(value + half_width, 99.9):.1f}",
+                        "totalpopulation": str(population), "totalpop18plus": str(int(population * 0.78)),
+                        "geolocation": point, "locationid": tract, "categoryid": categoryid, "measureid": measureid,
+                        "datavaluetypeid": datavaluetypeid, "short_question_text": short_name,
+                    }
+                    yield row if keep is None else {column: row[column] for column in keep}
+
+    return itertools.islice(tract_rows(), n)
+
+
+def write_rows(rows, path: str, fmt: str = "json") -> int:
+    """Streams rows to a JSON array or CSV file (places.emulator reads both); returns the row count."""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = None
+            for row in rows:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow({k: json.dumps(v) if isinstance(v, dict) else v for k, v in row.items()})
+                count += 1
+            return count
+        f.write("[")
+        for row in rows:
+            f.write(("," if count else "") + "\n" + json.dumps(row, separators=(",", ":")))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--measures", help="Comma-separated measure ids (default: all)")
+    parser.add_argument("--columns", help="Comma-separated columns to keep (default: all)")
+    parser.add_argument("--datavaluetypeid", choices=("CrdPrv", "AgeAdjPrv"), default="CrdPrv")
+    parser.add_argument("--year", default="2022")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--output", required=True, help="File to write, e.g. <dataset id>.json for places.emulator")
+    args = parser.parse_args()
+
+    rows = generate_rows(
+        args.rows, args.seed,
+        measures=args.measures.split(",") if args.measures else None,
+        columns=args.columns.split(",") if args.columns else None,
+        datavaluetypeid=args.datavaluetypeid, year=args.year,
+    )
+    count = write_rows(rows, args.output, args.format)
+    print(f"Wrote {count} rows to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
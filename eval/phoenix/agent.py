@@ -18,7 +18,13 @@ base_url = os.getenv("USAI_BASE_URL")
 class CDCPlacesAgent:
     """Reusable CDC PLACES Agent for Phoenix experiments"""
     
-    def __init__(self, project_name="cdc-places-agent", phoenix_endpoint="http://localhost:4317", prompt_version="v01"):
+    def __init__(self, project_name="cdc-places-agent", phoenix_endpoint="http://localhost:4317", prompt_version="v01",
+                 tools=None):
+        """
+        Args:
+            tools: Optional LangChain tools to use instead of opening an MCP client, e.g. tools sharing
+                a session pool and result cache (see mcp_pool.langchain_tools).
+        """
         self.api_key = api_key
         self.base_url = base_url
         self.project_name = project_name
@@ -26,6 +32,7 @@ class CDCPlacesAgent:
         self.prompt_version = prompt_version
         self.agent = None
         self.client = None
+        self.tools = tools
         self._initialized = False
     
     def _load_system_prompt(self) -> str:
@@ -67,25 +74,36 @@ class CDCPlacesAgent:
         # Instrument LangChain to send traces to Phoenix
         LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
         print("✅ LangChain instrumentation enabled")
+
+        # Send traceparent headers on MCP HTTP calls so server spans join the agent's trace
+        try:
+            from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+            HTTPXClientInstrumentor().instrument(tracer_provider=tracer_provider)
+            print("✅ HTTPX trace propagation enabled")
+        except ImportError:
+            pass
         print(f"📊 Phoenix UI: http://localhost:6006\n")
         
-        print("Initializing MCP client...")
-        self.client = MultiServerMCPClient(
-            {
-                # "reporter_server": {
-                #     "transport": "stdio",
-                #     "command": "uv",
-                #     "args": ["run", "src/reporter/app.py"],
-                # },
-                "places_server": {
-                    "transport": "http",
-                    "url": "http://localhost:8000/mcp",
+        if self.tools is not None:
+            tools = self.tools
+        else:
+            print("Initializing MCP client...")
+            self.client = MultiServerMCPClient(
+                {
+                    # "reporter_server": {
+                    #     "transport": "stdio",
+                    #     "command": "uv",
+                    #     "args": ["run", "src/reporter/app.py"],
+                    # },
+                    "places_server": {
+                        "transport": "http",
+                        "url": "http://localhost:8000/mcp",
+                    }
                 }
-            }
-        )
+            )
 
-        print("Getting tools...")
-        tools = await self.client.get_tools()
+            print("Getting tools...")
+            tools = await self.client.get_tools()
 
         print("Initializing model...")
         model = ChatOpenAI(
@@ -105,12 +123,12 @@ class CDCPlacesAgent:
         self._initialized = True
         print("✅ Agent initialized and ready\n")
     
-    async def run(self, query: str) -> str:
-        """Run a query through the agent and return the response"""
+    async def run(self, query: str, thread_id: str = "1") -> str:
+        """Run a query through the agent and return the response; concurrent runs use distinct thread_ids"""
         if not self._initialized:
             await self.initialize()
         
-        config = {"configurable": {"thread_id": "1"}}
+        config = {"configurable": {"thread_id": thread_id}}
         
         response = await self.agent.ainvoke(
             {"messages": [("user", query)]},
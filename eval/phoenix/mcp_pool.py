@@ -0,0 +1,177 @@
+"""
+Shared MCP sessions and a tool-result cache for concurrent evaluation runs.
+
+``MultiServerMCPClient.get_tools()`` opens a new MCP session for every tool
+call, and every repeat of a question repeats the same tool calls. For an eval
+sweep that runs questions and repeats concurrently:
+
+- ``MCPSessionPool`` opens a few sessions to the server once and spreads the
+  calls of all agents over them (MCP multiplexes concurrent requests on a
+  session),
+- ``ToolResultCache`` answers identical calls (same tool and arguments) from
+  the first result. Concurrent identical calls share one request. Error
+  results (MCP errors and ``{"error": ...}`` responses) are not cached,
+- ``langchain_tools`` exposes the server's tools to a LangChain agent through
+  the pool and the cache.
+
+Each task can collect the tool calls it made with ``record_tool_calls()``.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+from contextlib import AsyncExitStack
+
+from fastmcp import Client
+
+# List receiving the tool calls made by the current task, when collecting
+_tool_calls = contextvars.ContextVar("tool_calls", default=None)
+
+
+def record_tool_calls() -> list:
+    """Starts collecting the current task's tool calls; returns the list they are appended to."""
+    calls = []
+    _tool_calls.set(calls)
+    return calls
+
+
+def call_key(name: str, arguments: dict) -> str:
+    """Returns the cache key of a tool call; argument order does not matter."""
+    return json.dumps([name, arguments or {}], sort_keys=True, default=str)
+
+
+class MCPSessionPool:
+    """
+    A fixed set of MCP client sessions shared by every agent of a run.
+
+    Args:
+        server (str | object): MCP server URL, or anything else fastmcp.Client accepts.
+        size (int): Number of sessions; calls go to the session with the fewest in flight.
+        timeout (float): Seconds before a tool call fails.
+    """
+
+    def __init__(self, server, size: int = 1, timeout: float = 120.0):
+        self.server = server
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.calls = 0
+        self._clients = []
+        self._in_flight = []
+        self._order = itertools.count()
+        self._stack = None
+
+    async def __aenter__(self):
+        self._stack = AsyncExitStack()
+        for _ in range(self.size):
+            client = await self._stack.enter_async_context(Client(self.server, timeout=self.timeout))
+            self._clients.append(client)
+            self._in_flight.append(0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._stack.aclose()
+        self._clients, self._in_flight = [], []
+
+    async def list_tools(self) -> list:
+        return await self._clients[0].list_tools()
+
+    async def call_tool(self, name: str, arguments: dict):
+        """Calls a tool on the least busy session; returns the mcp.types.CallToolResult."""
+        turn = next(self._order)
+        index = min(range(len(self._clients)), key=lambda i: (self._in_flight[i], (i - turn) % len(self._clients)))
+        self._in_flight[index] += 1
+        self.calls += 1
+        try:
+            return await self._clients[index].call_tool_mcp(name, arguments or {})
+        finally:
+            self._in_flight[index] -= 1
+
+
+class ToolResultCache:
+    """
+    Deduplicates identical tool calls across the agents of a run.
+
+    Args:
+        pool (MCPSessionPool): Where uncached calls are sent.
+        enabled (bool): When False, every call goes to the server.
+    """
+
+    def __init__(self, pool: MCPSessionPool, enabled: bool = True):
+        self.pool = pool
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+
+    async def call_tool(self, name: str, arguments: dict):
+        """Returns the result of a tool call, from the cache when an identical call succeeded or is running."""
+        calls = _tool_calls.get()
+        key = call_key(name, arguments)
+        future = self._results.get(key) if self.enabled else None
+        cached = future is not None
+        if cached:
+            self.hits += 1
+            result = await asyncio.shield(future)
+        else:
+            self.misses += 1
+            future = asyncio.get_running_loop().create_future()
+            if self.enabled:
+                self._results[key] = future
+            try:
+                result = await self.pool.call_tool(name, arguments)
+            except BaseException as e:
+                self._results.pop(key, None)
+                future.set_exception(e)
+                future.exception()  # retrieved, so a failure nobody else awaited is not logged
+                raise
+            future.set_result(result)
+            if failed(result):
+                self._results.pop(key, None)
+        if calls is not None:
+            calls.append({"tool_name": name, "input": arguments, "cached": cached, "is_error": failed(result)})
+        return result
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses, "server_calls": self.pool.calls}
+
+
+def failed(result) -> bool:
+    """Returns True for an error result: flagged by MCP, or a tool's {"error": ...} response."""
+    structured = result.structured_content
+    return bool(result.is_error) or (isinstance(structured, dict) and "error" in structured)
+
+
+def result_text(result) -> str:
+    """Returns the text content of a tool result."""
+    return "\n".join(getattr(block, "text", "") or "" for block in result.content)
+
+
+async def langchain_tools(cache: ToolResultCache) -> list:
+    """
+    Builds LangChain tools for every tool on the server, calling through the cache.
+
+    Args:
+        cache (ToolResultCache): Cache in front of the shared session pool.
+
+    Returns:
+        list: langchain_core StructuredTools, for create_agent(tools=...).
+    """
+    from langchain_core.tools import StructuredTool, ToolException
+
+    def make(tool):
+        async def call(**arguments):
+            result = await cache.call_tool(tool.name, arguments)
+            if result.is_error:
+                raise ToolException(result_text(result))
+            return result_text(result)
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.input_schema,
+            coroutine=call,
+            handle_tool_error=True,
+        )
+
+    return [make(tool) for tool in await cache.pool.list_tools()]
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Concurrent evaluation runner.
+
+Runs every question of a questions CSV ``--repeats`` times through the
+CDC PLACES agent, with at most ``--concurrency`` runs (agent and judge) at
+once. All runs share one agent whose tools call the server through a small
+pool of MCP sessions (``--pool-size``), and identical tool calls are answered
+once per sweep by a tool-result cache (``--no-cache`` sends every call to the
+server). See mcp_pool.py.
+
+Results are written in the layout of the mcp-data-check comparison files:
+per question, every repeat's response, verdict, time and tool calls (marked
+``cached`` when deduplicated), plus a summary with the pass rates, the wall
+time of the sweep and the cache statistics.
+
+Usage:
+    uv run eval/phoenix/run_concurrent_eval.py --repeats 5 --concurrency 8
+    uv run eval/phoenix/run_concurrent_eval.py --questions eval/mcp-data-check/questions_test.csv --no-judge
+    uv run eval/phoenix/run_concurrent_eval.py --server-url http://localhost:8000/mcp --pool-size 4 --no-cache
+
+For runs that are deterministic and offline as well, start the server with
+``PLACES_CASSETTE_MODE=replay``.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from mcp_pool import MCPSessionPool, ToolResultCache, langchain_tools, record_tool_calls
+
+EVAL_DIR = Path(__file__).parent.parent
+DEFAULT_QUESTIONS = EVAL_DIR / "mcp-data-check" / "questions.csv"
+DEFAULT_OUTPUT = EVAL_DIR / "mcp-data-check" / "results"
+
+
+def load_questions(path) -> list:
+    """
+    Reads a questions CSV.
+
+    Accepts the mcp-data-check columns (question, expected_answer, eval_type) and the
+    Phoenix dataset columns (query, responses).
+
+    Returns:
+        list: {"question", "expected_answer", "eval_type"} dicts.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {
+                "question": row.get("question") or row.get("query"),
+                "expected_answer": row.get("expected_answer") or row.get("responses") or "",
+                "eval_type": row.get("eval_type") or "llm_judge",
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+def judge_passed(verdict) -> bool:
+    """Interprets a judge result: a bool, or a Phoenix score labelled 'correct' / scored 1."""
+    if isinstance(verdict, bool):
+        return verdict
+    return getattr(verdict, "label", None) == "correct" or getattr(verdict, "score", None) == 1
+
+
+async def run_eval(answer, questions: list, repeats: int = 5, concurrency: int = 8, judge=None) -> dict:
+    """
+    Runs every question ``repeats`` times, at most ``concurrency`` at once.
+
+    Args:
+        answer: Async callable (question, thread_id) -> response text.
+        questions (list): Questions as returned by load_questions().
+        repeats (int): Runs per question.
+        concurrency (int): Runs (answer and judge) in progress at once.
+        judge: Optional callable (question, expected_answer, response) -> verdict, run on a
+            worker thread; see judge_passed().
+
+    Returns:
+        dict: "summary" and per-question "results".
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index: int, repeat: int) -> dict:
+        question = questions[index]
+        async with semaphore:
+            tools_called = record_tool_calls()
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = await answer(question["question"], f"{index}-{repeat}")
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - start
+            passed = None
+            if judge is not None and error is None:
+                try:
+                    verdict = await asyncio.to_thread(judge, question["question"], question["expected_answer"], response)
+                    passed = judge_passed(verdict)
+                except Exception as e:
+                    error = f"judge failed: {type(e).__name__}: {e}"
+            return {
+                "model_response": response,
+                "passed": passed if error is None else False,
+                "error": error,
+                "time_to_answer": elapsed,
+                "tools_called": tools_called,
+            }
+
+    start = time.perf_counter()
+    runs = await asyncio.gather(*(run_one(i, r) for i in range(len(questions)) for r in range(repeats)))
+    wall = time.perf_counter() - start
+
+    results = []
+    for index, question in enumerate(questions):
+        repeat_results = runs[index * repeats:(index + 1) * repeats]
+        pass_count = sum(1 for run in repeat_results if run["passed"])
+        results.append({
+            **question,
+            "passed": pass_count * 2 > repeats if judge is not None else None,
+            "repeat_count": repeats,
+            "repeat_pass_count": pass_count if judge is not None else None,
+            "repeat_results": repeat_results,
+        })
+
+    judged = [run for run in runs if run["passed"] is not None]
+    summary = {
+        "total": len(questions),
+        "runs": len(runs),
+        "errors": sum(1 for run in runs if run["error"]),
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 2),
+        "sequential_seconds": round(sum(run["time_to_answer"] for run in runs), 2),
+    }
+    if judge is not None:
+        summary.update(
+            passed=sum(1 for result in results if result["passed"]),
+            pass_rate=sum(1 for result in results if result["passed"]) / len(results) if results else 0.0,
+            repeat_pass_rate=sum(1 for run in judged if run["passed"]) / len(judged) if judged else 0.0,
+        )
+    return {"summary": summary, "results": results}
+
+
+def phoenix_judge(question: str, expected_answer: str, response: str):
+    """Judges a response with the Phoenix correctness judge (judges.match_expected_response)."""
+    from judges import match_expected_response
+    return match_expected_response({"query": question}, response, {"responses": expected_answer})
+
+
+async def main_async(args) -> dict:
+    from agent import CDCPlacesAgent
+
+    questions = load_questions(args.questions)
+    async with MCPSessionPool(args.server_url, size=args.pool_size) as pool:
+        cache = ToolResultCache(pool, enabled=not args.no_cache)
+        agent = CDCPlacesAgent(
+            project_name=args.project_name,
+            phoenix_endpoint=args.phoenix_endpoint,
+            prompt_version=args.system_prompt_version,
+            tools=await langchain_tools(cache),
+        )
+        await agent.initialize()
+        print(f"Running {len(questions)} questions x {args.repeats} repeats, {args.concurrency} at a time...")
+        report = await run_eval(agent.run, questions, args.repeats, args.concurrency,
+                                judge=None if args.no_judge else phoenix_judge)
+        report["summary"]["tool_cache"] = cache.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PLACES eval questions concurrently through the agent")
+    parser.add_argument("--questions", default=str(DEFAULT_QUESTIONS), help="Questions CSV")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="Runs in progress at once")
+    parser.add_argument("--server-url", default=os.environ.get("MCP_SERVER_URL", "http://localhost:8000/mcp"))
+    parser.add_argument("--pool-size", type=int, default=2, help="MCP sessions shared by all runs")
+    parser.add_argument("--no-cache", action="store_true", help="Send every tool call to the server")
+    parser.add_argument("--no-judge", action="store_true", help="Collect responses without judging them")
+    parser.add_argument("--system-prompt-version", default="v01")
+    parser.add_argument("--project-name", default="cdc-places-experiments")
+    parser.add_argument("--phoenix-endpoint", default="http://localhost:4317")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Directory the results are written to")
+    args = parser.parse_args()
+
+    if not Path(args.questions).exists():
+        print(f"Error: Questions file not found: {args.questions}", file=sys.stderr)
+        sys.exit(1)
+
+    report = asyncio.run(main_async(args))
+    summary = report["summary"]
+
+    print("-" * 50)
+    print(f"Questions: {summary['total']}  Runs: {summary['runs']}  Errors: {summary['errors']}")
+    if "pass_rate" in summary:
+        print(f"Passed: {summary['passed']}/{summary['total']} ({summary['pass_rate']:.1%}), "
+              f"repeats passed: {summary['repeat_pass_rate']:.1%}")
+    print(f"Wall time: {summary['wall_seconds']:.1f} s (sum of run times: {summary['sequential_seconds']:.1f} s)")
+    cache = summary["tool_cache"]
+    print(f"Tool calls: {cache['hits'] + cache['misses']}, sent to server: {cache['server_calls']}, "
+          f"deduplicated: {cache['hits']}")
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"concurrent_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Results saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Admission control and load shedding for tool calls.
+
+Each tool gets a concurrency limit (``TOOL_MAX_CONCURRENCY``, lower for the
+tools in ``TOOL_CONCURRENCY_LIMITS``) and a bounded queue of calls waiting
+for a slot (``PLACES_TOOL_MAX_QUEUE``). A call is rejected at once with an
+"overloaded" result instead of piling up in the event loop when:
+
+- the tool's queue is full,
+- the expected wait (queue position times the tool's recent call duration)
+  exceeds the caller's timeout, or
+- it waits out its timeout without getting a slot.
+
+The caller's timeout is taken from the ``X-Places-Timeout`` header (seconds)
+on the HTTP transport, else ``PLACES_DEFAULT_CALL_TIMEOUT_SECONDS``. The
+overloaded result carries ``retry_after_seconds`` so agents can back off.
+"""
+
+import asyncio
+import math
+import time
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware
+
+from places.config import (
+    DEFAULT_CALL_TIMEOUT_SECONDS,
+    TIMEOUT_HEADER,
+    TOOL_CONCURRENCY_LIMITS,
+    TOOL_MAX_CONCURRENCY,
+    TOOL_MAX_QUEUE,
+)
+from places.metrics import LATENCY_BUCKETS, Counter, Gauge, Histogram, registered_tool
+from places.serialization import tool_result
+
+# Weight of the newest call in a tool's moving average duration
+DURATION_SMOOTHING = 0.2
+
+QUEUE_DEPTH = Gauge("places_tool_queue_depth", "Tool calls waiting for a concurrency slot.", ["tool"])
+QUEUE_WAIT = Histogram("places_tool_queue_wait_seconds", "Time tool calls waited for a slot.", ["tool"],
+                       buckets=LATENCY_BUCKETS)
+REJECTIONS = Counter(
+    "places_tool_rejections_total", "Tool calls shed by admission control, by reason (queue_full, deadline).",
+    ["tool", "reason"],
+)
+
+
+class ToolLimiter:
+    """
+    Concurrency limit and bounded wait queue for one tool.
+
+    Args:
+        tool (str): The tool name.
+        max_concurrency (int): Calls allowed to run at once.
+        max_queue (int): Calls allowed to wait for a slot.
+    """
+
+    def __init__(self, tool: str, max_concurrency: int, max_queue: int):
+        self.tool = tool
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.running = 0
+        self.waiting = 0
+        # Moving average of call durations once admitted, None until a call finishes
+        self.average_duration = None
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def expected_wait(self) -> float:
+        """Seconds a call arriving now is expected to wait for a slot."""
+        if self.running < self.max_concurrency and not self.waiting:
+            return 0.0
+        if self.average_duration is None:
+            return 0.0
+        return math.ceil((self.waiting + 1) / self.max_concurrency) * self.average_duration
+
+    def record(self, duration: float) -> None:
+        """Folds a finished call's duration into the moving average."""
+        if self.average_duration is None:
+            self.average_duration = duration
+        else:
+            self.average_duration += DURATION_SMOOTHING * (duration - self.average_duration)
+
+    async def acquire(self, timeout: float):
+        """
+        Waits for a slot.
+
+        Args:
+            timeout (float): Seconds the caller is willing to wait.
+
+        Returns:
+            str: None once admitted, otherwise the rejection reason ('queue_full' or 'deadline').
+        """
+        if self.running < self.max_concurrency and not self.waiting:
+            await self._slots.acquire()
+            self.running += 1
+            return None
+        if self.waiting >= self.max_queue:
+            return "queue_full"
+        if self.expected_wait() > timeout:
+            return "deadline"
+        self.waiting += 1
+        QUEUE_DEPTH.labels(self.tool).set(self.waiting)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except TimeoutError:
+            return "deadline"
+        finally:
+            self.waiting -= 1
+            QUEUE_DEPTH.labels(self.tool).set(self.waiting)
+        self.running += 1
+        return None
+
+    def release(self) -> None:
+        self.running -= 1
+        self._slots.release()
+
+
+def caller_timeout() -> float:
+    """Seconds the current caller waits for a result (X-Places-Timeout or the default)."""
+    value = get_http_headers(include={TIMEOUT_HEADER}).get(TIMEOUT_HEADER)
+    try:
+        timeout = float(value) if value else DEFAULT_CALL_TIMEOUT_SECONDS
+    except ValueError:
+        timeout = DEFAULT_CALL_TIMEOUT_SECONDS
+    return timeout if timeout > 0 else DEFAULT_CALL_TIMEOUT_SECONDS
+
+
+def overloaded_payload(limiter: ToolLimiter, reason: str) -> dict:
+    """
+    Builds the structured result returned for a shed tool call.
+
+    Args:
+        limiter (ToolLimiter): The limiter of the tool that rejected the call.
+        reason (str): 'queue_full' or 'deadline'.
+
+    Returns:
+        dict: The overloaded error with queue state and a suggested retry delay.
+    """
+    retry_after = max(1.0, limiter.expected_wait())
+    return {
+        "error": f"Server overloaded: {limiter.tool} has {limiter.running} calls running and "
+                 f"{limiter.waiting} waiting. Retry in {retry_after:.0f} seconds.",
+        "overloaded": True,
+        "reason": reason,
+        "tool": limiter.tool,
+        "running": limiter.running,
+        "queued": limiter.waiting,
+        "retry_after_seconds": round(retry_after, 1),
+    }
+
+
+class AdmissionMiddleware(Middleware):
+    """Limits concurrent calls per tool and sheds calls that cannot be served in time."""
+
+    def __init__(self, max_concurrency: int = TOOL_MAX_CONCURRENCY, limits=None, max_queue: int = TOOL_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.limits = TOOL_CONCURRENCY_LIMITS if limits is None else limits
+        self.max_queue = max_queue
+        self.limiters = {}
+
+    def limiter(self, tool: str) -> ToolLimiter:
+        """Returns the limiter for a tool, creating it on first use."""
+        limiter = self.limiters.get(tool)
+        if limiter is None:
+            concurrency = min(self.limits.get(tool, self.max_concurrency), self.max_concurrency)
+            limiter = self.limiters[tool] = ToolLimiter(tool, concurrency, self.max_queue)
+        return limiter
+
+    async def on_call_tool(self, context, call_next):
+        tool = await registered_tool(context)
+        if tool is None:
+            # The server answers unknown tools itself; they get no limiter
+            return await call_next(context)
+        limiter = self.limiter(tool)
+        start = time.perf_counter()
+        reason = await limiter.acquire(caller_timeout())
+        if reason is not None:
+            REJECTIONS.labels(tool, reason).inc()
+            return tool_result(overloaded_payload(limiter, reason))
+        admitted = time.perf_counter()
+        QUEUE_WAIT.labels(tool).observe(admitted - start)
+        try:
+            return await call_next(context)
+        finally:
+            limiter.record(time.perf_counter() - admitted)
+            limiter.release()
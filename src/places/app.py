@@ -1,10 +1,35 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from fastmcp import FastMCP
+from places import log, metrics, offload, profiling, tracing, warmup, watchdog
+from places.config import STATELESS_HTTP
 from places.tools import register_tools
 from places.routes import register_routes 
+from places.compression import CompressionMiddleware
+from starlette.middleware import Middleware
 import os 
 
+
+@asynccontextmanager
+async def lifespan(server):
+    """Runs the per-process setup of the server: logging, tracing, lookup table, cache warm-up, lag sampling and watchdog."""
+    async with AsyncExitStack() as stack:
+        for component in (log, tracing, offload, warmup, metrics, watchdog):
+            await stack.enter_async_context(component.lifespan(server))
+        yield {}
+
+
 # Initialize FastMCP server
-mcp = FastMCP("places")
+mcp = FastMCP(
+    "places",
+    lifespan=lifespan,
+    middleware=[
+        log.LoggingMiddleware(),
+        metrics.ToolMetricsMiddleware(),
+        profiling.ProfilingMiddleware(),
+        watchdog.WatchdogMiddleware(),
+    ],
+)
 
 # Register custom tools
 register_tools(mcp)
@@ -12,12 +37,34 @@ register_tools(mcp)
 # Register custom routes
 register_routes(mcp)
 
+
+def create_app():
+    """
+    Build the ASGI application for the streamable HTTP transport.
+
+    Sessions are stateless by default (PLACES_STATELESS_HTTP) so that any
+    worker can serve any request when several workers share a port.
+
+    Returns:
+        Starlette: The MCP endpoint at /mcp plus the custom routes, wrapped in
+        trace-context propagation and response compression.
+    """
+    return mcp.http_app(
+        middleware=[Middleware(tracing.TraceContextMiddleware), Middleware(CompressionMiddleware)],
+        stateless_http=STATELESS_HTTP,
+    )
+
+
+# ASGI entry point, e.g. `uvicorn places.app:app`
+app = create_app()
+
 if __name__ == "__main__":
     # When run directly, check for a platform port env var.
     # If found, start an HTTP server (useful for Databricks local testing).
     # Otherwise fall back to stdio for local MCP clients (Claude Desktop, etc.).
     port_env = os.getenv("DATABRICKS_APP_PORT") or os.getenv("PORT")
     if port_env:
-        mcp.run(transport="http", host="0.0.0.0", port=int(port_env))
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=int(port_env))
     else:
-        mcp.run(transport="stdio")
\ No newline at end of file
+        mcp.run(transport="stdio")
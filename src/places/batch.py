@@ -0,0 +1,221 @@
+"""
+Batch execution of CDC PLACES queries.
+
+Queries that resolve to the same dataset endpoint are combined into one
+upstream request whose ``$where`` clause ORs together a ``measureid IN (...)``
+filter for each distinct (datavaluetypeid, locations) combination, so the
+combined request returns exactly the rows the individual queries would. A
+combined result can exceed the row limit even when every query alone fits,
+so it is paged with ``$order`` and ``$offset`` until a short page comes back.
+The rows are then partitioned back to their queries. Requests for different
+endpoints run concurrently, bounded by a semaphore.
+
+State-level queries are answered from the cached county rollup in
+places.rollup instead of a dataset endpoint. Location names are first
+rewritten to their canonical form with places.locations, so typos and
+"County" suffixes do not produce empty results.
+"""
+
+import asyncio
+
+from places.config import BATCH_MAX_CONCURRENCY, QUERY_ROW_LIMIT, SELECT_COLUMNS
+from places.locations import resolve_locations
+from places.rollup import STATE_ROLLUP_NOTE, filter_states, get_state_estimates
+from places.utils import get_endpoint, get_release_for_year, _fetch_api, soql_in
+
+# Columns added to the select list so combined rows can be routed back to their query
+PARTITION_COLUMNS = ("measureid", "datavaluetypeid")
+
+# Unique row order within a release dataset, so pages neither overlap nor skip rows
+PAGE_ORDER = "datavaluetypeid,measureid,locationid"
+
+
+def plan_batch(queries) -> tuple:
+    """
+    Resolves each query to its endpoint and groups queries sharing an endpoint.
+
+    Args:
+        queries (list[PlacesQuery]): The queries to plan.
+
+    Returns:
+        tuple: (groups, errors) where groups maps (url, geo) to a list of queries
+        and errors maps result keys to error results for unresolvable queries.
+        State queries are grouped under ((release_name, measureid, datavaluetypeid), "state").
+    """
+    groups = {}
+    errors = {}
+    for query in queries:
+        if query.geo == "state":
+            release_name = get_release_for_year(query.measureid.value, query.year)
+            group_key = ((release_name, query.measureid.value, query.datavaluetypeid), "state") if release_name else None
+        else:
+            url = get_endpoint(query.geo, query.year, query.measureid.value)
+            group_key = (url, query.geo) if url else None
+        if group_key is None:
+            errors[query.result_key()] = {
+                "query": query.model_dump(mode="json", exclude_none=True),
+                "error": f"Could not determine API endpoint for geo={query.geo}, year={query.year}, measureid={query.measureid.value}",
+            }
+            continue
+        groups.setdefault(group_key, []).append(query)
+    return groups, errors
+
+
+def build_group_params(geo: str, queries) -> dict:
+    """
+    Builds the API parameters for one combined upstream request.
+
+    Args:
+        geo (str): The geographic level shared by the queries.
+        queries (list[PlacesQuery]): Queries resolving to the same endpoint.
+
+    Returns:
+        dict: Socrata parameters with a combined ``$where`` clause.
+    """
+    combos = {}
+    for query in queries:
+        combos.setdefault((query.datavaluetypeid, query.locations()), set()).add(query.measureid.value)
+
+    clauses = []
+    for (datavaluetypeid, locations), measures in sorted(combos.items(), key=lambda item: (item[0][0], item[0][1] or ())):
+        parts = [soql_in("datavaluetypeid", [datavaluetypeid]), soql_in("measureid", sorted(measures))]
+        if locations:
+            parts.append(soql_in("locationname", locations))
+        clauses.append("(" + " AND ".join(parts) + ")")
+
+    return {
+        "$select": ",".join([SELECT_COLUMNS[geo], *PARTITION_COLUMNS]),
+        "$where": " OR ".join(clauses),
+        "$order": PAGE_ORDER,
+        "$limit": QUERY_ROW_LIMIT,
+    }
+
+
+async def fetch_pages(url: str, params: dict) -> tuple:
+    """
+    Fetches every row of a combined request, one ``$limit``-sized page at a time.
+
+    Args:
+        url (str): The dataset endpoint.
+        params (dict): Parameters from build_group_params().
+
+    Returns:
+        tuple: (rows, requests) where rows is None if any page failed.
+    """
+    rows = []
+    requests = 0
+    while True:
+        page = await _fetch_api(url, {**params, "$offset": len(rows)} if rows else params)
+        requests += 1
+        if page is None:
+            return None, requests
+        rows.extend(page)
+        if len(page) < params["$limit"]:
+            return rows, requests
+
+
+def partition_rows(query, rows: list) -> list:
+    """
+    Selects the rows belonging to a single query from a combined response.
+
+    Args:
+        query (PlacesQuery): The query to select rows for.
+        rows (list): Records returned for the combined request.
+
+    Returns:
+        list: The matching records, without the partition columns.
+    """
+    locations = query.locations()
+    matched = []
+    for row in rows:
+        if row.get("measureid") != query.measureid.value or row.get("datavaluetypeid") != query.datavaluetypeid:
+            continue
+        if locations and row.get("locationname") not in locations:
+            continue
+        matched.append({k: v for k, v in row.items() if k not in PARTITION_COLUMNS})
+    return matched
+
+
+async def canonicalize_locations(queries) -> tuple:
+    """
+    Rewrites each query's location names to the canonical names from the location index.
+
+    Args:
+        queries (list[PlacesQuery]): The queries to rewrite.
+
+    Returns:
+        tuple: (queries, errors) where rewritten queries keep their original result
+        key and errors maps result keys to unknown-location errors with suggestions.
+    """
+    rewritten = []
+    errors = {}
+    for query in queries:
+        if query.geo == "state" or not query.locationname:
+            rewritten.append(query)
+            continue
+        release_name = get_release_for_year(query.measureid.value, query.year)
+        resolved = await resolve_locations(query.geo, query.locationname, release_name=release_name)
+        if "error" in resolved:
+            errors[query.result_key()] = {"query": query.model_dump(mode="json", exclude_none=True), **resolved}
+        elif "entries" in resolved:
+            names = sorted({entry["locationname"] for entry in resolved["entries"]})
+            rewritten.append(query.model_copy(update={"locationname": names, "key": query.result_key()}))
+        else:
+            rewritten.append(query)
+    return rewritten, errors
+
+
+async def run_batch(queries, max_concurrency: int = BATCH_MAX_CONCURRENCY) -> dict:
+    """
+    Runs a batch of queries with one upstream request per distinct endpoint.
+
+    Args:
+        queries (list[PlacesQuery]): The queries to run.
+        max_concurrency (int): Maximum number of upstream requests in flight.
+
+    Returns:
+        dict: ``results`` keyed by each query's result key (in input order),
+        and ``upstream_requests``, the number of upstream requests (one per
+        page of a combined request; a state rollup counts once even when it
+        is served from cache).
+    """
+    resolved, location_errors = await canonicalize_locations(queries)
+    groups, results = plan_batch(resolved)
+    results.update(location_errors)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    requests = []
+
+    async def run_state_group(rollup_key, group):
+        async with semaphore:
+            states = await get_state_estimates(*rollup_key)
+        requests.append(1)
+        for query in group:
+            result = {"query": query.model_dump(mode="json", exclude_none=True)}
+            if states is None:
+                result["error"] = "No data returned from API"
+            else:
+                result["data"] = filter_states(states, query.locationname)
+                result["note"] = STATE_ROLLUP_NOTE
+            results[query.result_key()] = result
+
+    async def run_group(url, geo, group):
+        if geo == "state":
+            await run_state_group(url, group)
+            return
+        async with semaphore:
+            rows, pages = await fetch_pages(url, build_group_params(geo, group))
+        requests.append(pages)
+        for query in group:
+            result = {"query": query.model_dump(mode="json", exclude_none=True)}
+            if rows is None:
+                result["error"] = "No data returned from API"
+            else:
+                result["data"] = partition_rows(query, rows)
+            results[query.result_key()] = result
+
+    await asyncio.gather(*(run_group(url, geo, group) for (url, geo), group in groups.items()))
+
+    return {
+        "results": {query.result_key(): results[query.result_key()] for query in queries},
+        "upstream_requests": sum(requests),
+    }
@@ -0,0 +1,415 @@
+"""
+In-process caches for the CDC PLACES MCP server.
+
+Caches are plain LRU mappings with optional per-entry expiry. ``get_or_load``
+adds single-flight loading: concurrent misses for the same key share one
+load instead of each hitting upstream. Entries stored with ``stale_after``
+are served stale-while-revalidate: past that age they are still returned
+immediately while one background task per key refreshes them, and a failed
+refresh leaves the old value in place.
+
+Every cache also shares one memory budget (``PLACES_CACHE_BUDGET_MB`` per
+worker process). The retained size of each entry is estimated when it is
+stored, and when the caches together exceed the budget the entries that are
+cheapest to lose go first: GreedyDual-Size priorities rank an entry by the
+seconds it took to load per byte it holds, aged so that entries nobody reads
+eventually lose to newer ones. Entries too large for their share of the
+budget are returned to the caller but not kept.
+
+Caches of reference data that is preloaded before workers fork and shared
+copy-on-write (feature matrices) are created with ``budgeted=False``: like
+the location indexes they are bounded by their entry count only, since a
+single matrix can exceed any per-entry share of the budget.
+"""
+
+import asyncio
+import sys
+import time
+import weakref
+from collections import OrderedDict
+
+from places.config import CACHE_BUDGET_MB
+
+_MISSING = object()
+
+# Largest share of the budget a single entry may take
+MAX_ENTRY_SHARE = 0.5
+
+# Seconds before a stale entry whose refresh failed is refreshed again
+REVALIDATE_RETRY_SECONDS = 60
+
+# Containers longer than this are sized from an evenly spaced sample of their items
+_SIZE_SAMPLE = 32
+
+_SCALARS = (str, bytes, int, float, bool, type(None))
+
+
+def estimate_size(obj, _seen=None) -> int:
+    """
+    Estimates the memory retained by an object and everything it references.
+
+    Lists, tuples, sets and dicts are walked (large ones from a sample of their
+    items), numpy arrays count their buffers and other objects their attribute
+    dicts. Objects referenced twice are counted once.
+
+    Args:
+        obj: The object to size.
+
+    Returns:
+        int: Estimated size in bytes.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, _SCALARS):
+        return sys.getsizeof(obj)
+
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int) and hasattr(obj, "dtype"):
+        return nbytes + 112
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = list(obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = list(obj)
+    elif hasattr(obj, "__dict__"):
+        return size + estimate_size(vars(obj), seen)
+    else:
+        return size
+
+    if not items:
+        return size
+    step = max(1, len(items) // _SIZE_SAMPLE)
+    sample = items[::step]
+    if isinstance(obj, dict):
+        sampled = sum(estimate_size(key, seen) + estimate_size(value, seen) for key, value in sample)
+    else:
+        sampled = sum(estimate_size(item, seen) for item in sample)
+    return size + int(sampled * len(items) / len(sample))
+
+
+def request_key(url: str, params: dict) -> tuple:
+    """
+    Returns a hashable key identifying an upstream request.
+
+    Args:
+        url (str): The API endpoint URL.
+        params (dict): The query parameters; order and value types do not matter.
+
+    Returns:
+        tuple: (url, sorted (name, value) string pairs).
+    """
+    return (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "cost", "priority", "stale_after", "stale_at", "meta")
+
+    def __init__(self, value, expires_at, size, cost, priority, stale_after=None, meta=None):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.cost = cost
+        self.priority = priority
+        self.stale_after = stale_after
+        self.stale_at = time.monotonic() + stale_after if stale_after is not None else None
+        self.meta = meta
+
+
+class MemoryBudget:
+    """
+    One byte budget shared by every TTLCache, with cost-aware eviction.
+
+    Args:
+        max_bytes (int): Bytes the caches may hold together.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        # GreedyDual-Size inflation value: the priority of the last entry evicted
+        self.clock = 0.0
+
+    def caches(self) -> list:
+        """Returns the caches accounted against this budget, by name."""
+        return sorted((cache for cache in TTLCache.instances if cache.budget is self), key=lambda cache: cache.name)
+
+    def used(self) -> int:
+        """Returns the bytes currently held by the caches."""
+        return sum(cache.bytes for cache in self.caches())
+
+    def priority(self, cost: float, size: int) -> float:
+        """Returns the priority of an entry stored or read now."""
+        return self.clock + cost / max(size, 1)
+
+    def fits(self, size: int) -> bool:
+        """Whether an entry of this size may be cached at all."""
+        return size <= self.max_bytes * MAX_ENTRY_SHARE
+
+    def enforce(self) -> int:
+        """
+        Evicts entries, expired ones first, then lowest priority, until usage fits the budget.
+
+        Returns:
+            int: The number of entries evicted.
+        """
+        used = self.used()
+        if used <= self.max_bytes:
+            return 0
+        now = time.monotonic()
+        candidates = [
+            (-1.0 if entry.expires_at is not None and entry.expires_at <= now else entry.priority, cache, key)
+            for cache in self.caches()
+            for key, entry in cache._entries.items()
+        ]
+        candidates.sort(key=lambda candidate: candidate[0])
+        evicted = 0
+        for priority, cache, key in candidates:
+            if used <= self.max_bytes:
+                break
+            used -= cache._evict(key)
+            self.clock = max(self.clock, priority)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def report(self) -> dict:
+        """Returns the budget, current usage and per-cache stats, plus the stats of caches kept outside any budget."""
+        caches = self.caches()
+        unbudgeted = sorted((cache for cache in TTLCache.instances if cache.budget is None), key=lambda cache: cache.name)
+        return {
+            "budget_bytes": self.max_bytes,
+            "used_bytes": sum(cache.bytes for cache in caches),
+            "evictions": self.evictions,
+            "caches": [cache.stats() for cache in caches],
+            "outside_budget": [cache.stats() for cache in unbudgeted],
+        }
+
+
+memory_budget = MemoryBudget(int(CACHE_BUDGET_MB * 1024 * 1024))
+
+
+class TTLCache:
+    """
+    LRU cache with an optional time-to-live for entries, accounted against the shared memory budget.
+
+    Args:
+        name (str): Identifier used in stats and diagnostics.
+        maxsize (int): Maximum number of entries kept.
+        ttl (float): Seconds an entry stays valid, or None to never expire.
+        budget (MemoryBudget): The byte budget the cache's entries count against.
+        budgeted (bool): False keeps the cache outside any budget (no per-entry
+            size limit, no budget eviction); its bytes are still reported.
+    """
+
+    # Every live cache, for metrics and the memory budget
+    instances = weakref.WeakSet()
+
+    def __init__(self, name: str, maxsize: int = 128, ttl=None, budget=None, budgeted: bool = True):
+        TTLCache.instances.add(self)
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        if not budgeted:
+            budget = None
+        elif budget is None:
+            budget = memory_budget
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+        self.revalidations = dict.fromkeys(("modified", "not_modified", "failed"), 0)
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._revalidating = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for a key, or ``default`` if missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self._evict(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        entry.priority = self._priority(entry.cost, entry.size)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key, value, cost: float = 0.0, size=None, stale_after=None, meta=None) -> bool:
+        """
+        Stores a value, evicting the least recently used entries beyond ``maxsize``
+        and the lowest priority entries of any cache beyond the memory budget.
+
+        Args:
+            key: The cache key.
+            value: The value to store.
+            cost (float): Seconds it took to produce the value, i.e. the price of losing it.
+            size (int): Retained size in bytes; estimated when omitted.
+            stale_after (float): Seconds after which get_or_load revalidates the entry, or None.
+            meta: Data kept with the entry for revalidation (e.g. HTTP validators).
+
+        Returns:
+            bool: Whether the value was stored (False if it is too large for the budget).
+        """
+        size = estimate_size(value) if size is None else size
+        if key in self._entries:
+            self._evict(key, counted=False)
+        if self.budget is not None and not self.budget.fits(size):
+            return False
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        priority = self._priority(cost, size)
+        self._entries[key] = _Entry(value, expires_at, size, cost, priority, stale_after, meta)
+        self.bytes += size
+        while len(self._entries) > self.maxsize:
+            self._evict(next(iter(self._entries)))
+        if self.budget is not None:
+            self.budget.enforce()
+        return True
+
+    def _priority(self, cost: float, size: int) -> float:
+        return self.budget.priority(cost, size) if self.budget is not None else 0.0
+
+    def _evict(self, key, counted: bool = True) -> int:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        if counted:
+            self.evictions += 1
+        return entry.size
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        self._entries.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+        self.revalidations = dict.fromkeys(self.revalidations, 0)
+
+    def invalidate(self, predicate) -> int:
+        """
+        Removes the entries whose key matches a predicate.
+
+        Args:
+            predicate: Function taking a key; entries it accepts are removed.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            self._evict(key, counted=False)
+        return len(keys)
+
+    async def get_or_load(self, key, loader, cache_if=None, stale_after=None, revalidate=None, meta=None):
+        """
+        Returns the cached value for a key, loading it on a miss.
+
+        Concurrent callers missing on the same key await a single call to
+        ``loader``. ``None`` results are returned but not cached. The time the
+        load took is the entry's eviction cost.
+
+        With ``stale_after`` and ``revalidate``, an entry older than
+        ``stale_after`` seconds is still returned at once, and a background
+        task (one per key) calls ``revalidate(value, meta)`` to refresh it.
+
+        Args:
+            key: The cache key.
+            loader: Zero-argument coroutine function producing the value.
+            cache_if: Optional predicate; loaded values it rejects are returned but not cached.
+            stale_after (float): Seconds after which a loaded entry is revalidated.
+            revalidate: Coroutine function taking the cached value and its meta; returns
+                the same value object if unchanged, a new value, or None on failure.
+            meta: Data stored with a loaded entry and passed to ``revalidate``.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            entry = self._entries[key]
+            if revalidate is not None and entry.stale_at is not None and entry.stale_at <= time.monotonic():
+                self.stale_hits += 1
+                if key not in self._revalidating:
+                    task = asyncio.get_running_loop().create_task(self._revalidate(key, entry, revalidate, cache_if))
+                    self._revalidating[key] = task
+                    task.add_done_callback(lambda _: self._revalidating.pop(key, None))
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        start = time.perf_counter()
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not log a warning.
+            future.exception()
+            raise
+        else:
+            if value is not None and (cache_if is None or cache_if(value)):
+                self.set(key, value, cost=time.perf_counter() - start, stale_after=stale_after, meta=meta)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _revalidate(self, key, entry, revalidate, cache_if):
+        start = time.perf_counter()
+        try:
+            value = await revalidate(entry.value, entry.meta)
+        except Exception:
+            value = None
+        if self._entries.get(key) is not entry:
+            # Replaced or evicted while the refresh ran
+            return
+        now = time.monotonic()
+        if value is None:
+            self.revalidations["failed"] += 1
+            entry.stale_at = now + REVALIDATE_RETRY_SECONDS
+        elif value is entry.value:
+            self.revalidations["not_modified"] += 1
+            entry.stale_at = now + entry.stale_after
+            if self.ttl is not None:
+                entry.expires_at = now + self.ttl
+        else:
+            self.revalidations["modified"] += 1
+            if cache_if is None or cache_if(value):
+                self.set(key, value, cost=time.perf_counter() - start, stale_after=entry.stale_after, meta=entry.meta)
+            else:
+                self._evict(key)
+
+    def stats(self) -> dict:
+        """Returns entry count, retained bytes and hit/miss/eviction/revalidation counters."""
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_hits": self.stale_hits,
+            "revalidations": dict(self.revalidations),
+        }
@@ -0,0 +1,166 @@
+"""
+Record/replay cassettes for upstream Socrata requests.
+
+Evaluation runs call the same few hundred upstream queries over and over.
+Against data.cdc.gov that is slow, flaky and needs network access. With
+``PLACES_CASSETTE_MODE`` the fetch layer instead:
+
+- ``record``: sends requests upstream as usual and writes every successful
+  response to the cassette store,
+- ``replay``: answers every request from the store and never opens a
+  connection. A request that was not recorded fails like an upstream error.
+
+Entries are keyed on the dataset id and the canonical query parameters, taken
+from the response cache key (``cache.request_key``). The Socrata host is left
+out, so cassettes recorded against data.cdc.gov replay behind any
+``PLACES_SOCRATA_BASE_URL``. Each entry is one gzip file,
+``<PLACES_CASSETTE_DIR>/<dataset id>/<key hash>.json.gz``, holding a line of
+JSON metadata (request, status, validators, recorded duration) followed by
+the response body as received. Replayed responses carry their recorded ETag
+and Last-Modified, so conditional requests and revalidation behave as they
+did while recording.
+
+``PLACES_CASSETTE_LATENCY`` adds simulated latency to replayed responses:
+seconds per response, or ``recorded`` to wait as long as each response took
+to record.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+import httpx
+
+from places.cache import request_key
+from places.config import CASSETTE_DIR, CASSETTE_LATENCY, CASSETTE_MODE
+from places.metrics import dataset_id
+
+MODES = ("off", "record", "replay")
+
+# Response headers kept in an entry and sent with its replays
+RECORDED_HEADERS = ("content-type", "etag", "last-modified")
+
+logger = logging.getLogger(__name__)
+
+
+def entry_key(url: str, params: dict) -> tuple:
+    """Returns the cassette key of a request: its dataset id and the parameter pairs of its request_key."""
+    return (dataset_id(url), request_key(url, params)[1])
+
+
+class CassetteStore:
+    """
+    Recorded upstream responses on disk.
+
+    Args:
+        directory (str): Directory holding one subdirectory of entries per dataset.
+        mode (str): 'record' or 'replay'.
+        latency (float | str): Seconds added to each replayed response, or 'recorded'.
+    """
+
+    def __init__(self, directory: str, mode: str = "replay", latency=0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', not {mode!r}")
+        self.directory = directory
+        self.mode = mode
+        self.latency = latency if latency == "recorded" else float(latency)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def path(self, url: str, params: dict) -> str:
+        """Returns the file holding the entry for a request."""
+        dataset, pairs = entry_key(url, params)
+        digest = hashlib.sha256(json.dumps(pairs).encode()).hexdigest()[:32]
+        return os.path.join(self.directory, dataset, f"{digest}.json.gz")
+
+    def write(self, url: str, params: dict, response: httpx.Response, elapsed: float) -> str:
+        """
+        Writes a response to the store, replacing any earlier recording of the request.
+
+        Args:
+            url (str): The API endpoint URL.
+            params (dict): The query parameters sent.
+            response (httpx.Response): The upstream response.
+            elapsed (float): Seconds the request took.
+
+        Returns:
+            str: The entry's path.
+        """
+        path = self.path(url, params)
+        meta = {
+            "request": {"url": url, "dataset": dataset_id(url), "params": {str(k): str(v) for k, v in params.items()}},
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            "elapsed": round(elapsed, 4),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temporary, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n")
+            f.write(response.content)
+        os.replace(temporary, path)
+        return path
+
+    def read(self, url: str, params: dict):
+        """Returns (metadata, body bytes) of a request's entry, or None when it was not recorded."""
+        try:
+            with gzip.open(self.path(url, params), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        meta, _, body = data.partition(b"\n")
+        return json.loads(meta), body
+
+    async def record(self, url: str, params: dict, response: httpx.Response, elapsed: float) -> None:
+        """Writes a successful response to the store off the event loop; a failed write is logged, not raised."""
+        if response.status_code != 200:
+            return
+        try:
+            await asyncio.to_thread(self.write, url, params, response, elapsed)
+        except OSError as e:
+            logger.warning("Could not record cassette entry: %s", e)
+
+    async def replay(self, url: str, params: dict, headers: dict = None):
+        """
+        Answers a request from the store.
+
+        Args:
+            url (str): The API endpoint URL.
+            params (dict): The query parameters.
+            headers (dict): Request headers; If-None-Match / If-Modified-Since matching the
+                recorded validators are answered with a 304.
+
+        Returns:
+            httpx.Response: The recorded response, or None when the request was not recorded.
+        """
+        entry = await asyncio.to_thread(self.read, url, params)
+        if entry is None:
+            return None
+        meta, body = entry
+        delay = meta.get("elapsed", 0.0) if self.latency == "recorded" else self.latency
+        if delay:
+            await asyncio.sleep(delay)
+        recorded = meta["headers"]
+        headers = headers or {}
+        if (headers.get("If-None-Match") and headers["If-None-Match"] == recorded.get("etag")) or (
+            headers.get("If-Modified-Since") and headers["If-Modified-Since"] == recorded.get("last-modified")
+        ):
+            return httpx.Response(304, headers=recorded, request=httpx.Request("GET", url, params=params))
+        return httpx.Response(meta["status"], headers=recorded, content=body,
+                              request=httpx.Request("GET", url, params=params))
+
+
+def from_config():
+    """Returns the store configured by PLACES_CASSETTE_MODE, or None when cassettes are off."""
+    if CASSETTE_MODE not in MODES:
+        raise ValueError(f"PLACES_CASSETTE_MODE must be one of {', '.join(MODES)}, not {CASSETTE_MODE!r}")
+    if CASSETTE_MODE == "off":
+        return None
+    return CassetteStore(CASSETTE_DIR, CASSETTE_MODE, CASSETTE_LATENCY)
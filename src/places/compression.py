@@ -0,0 +1,247 @@
+"""
+Negotiated response compression for the HTTP transport.
+
+Supports gzip from the standard library and, when the optional packages are
+installed, zstd (``zstandard``) and brotli (``brotli``). The encoding is picked
+from the client's Accept-Encoding header, honouring q-values and falling back
+to the server preference order on ties.
+
+Complete responses smaller than the configured threshold are sent as-is.
+Streamed responses (including the ``text/event-stream`` bodies used by the
+streamable HTTP transport) are compressed chunk by chunk and flushed after
+every chunk so events are never held back.
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from places.config import COMPRESSION_ENCODINGS, COMPRESSION_LEVELS, COMPRESSION_MIN_SIZE
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+# Content types that are already compressed or must not be transformed
+EXCLUDED_CONTENT_TYPES = ("image/", "audio/", "video/", "application/gzip", "application/zip")
+
+
+class _GzipEncoder:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _ZstdEncoder:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+ENCODERS = {"gzip": _GzipEncoder}
+if zstandard is not None:
+    ENCODERS["zstd"] = _ZstdEncoder
+if brotli is not None:
+    ENCODERS["br"] = _BrotliEncoder
+
+
+def available_encodings(preferred=COMPRESSION_ENCODINGS) -> list:
+    """
+    Returns the configured encodings that can actually be produced.
+
+    Args:
+        preferred (list): Encodings in server preference order.
+
+    Returns:
+        list: The subset of ``preferred`` with an installed encoder.
+    """
+    return [name for name in preferred if name in ENCODERS]
+
+
+def negotiate_encoding(accept_encoding: str, supported: list):
+    """
+    Picks a content coding for a request's Accept-Encoding header.
+
+    Args:
+        accept_encoding (str): The raw Accept-Encoding header value.
+        supported (list): Encodings the server can produce, most preferred first.
+
+    Returns:
+        str: The selected encoding, or None if the response should not be compressed.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[token] = q
+
+    best, best_q = None, 0.0
+    for name in supported:
+        q = qualities.get(name, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress_bytes(data: bytes, encoding: str, level=None) -> bytes:
+    """
+    Compresses a complete payload with the given encoding.
+
+    Args:
+        data (bytes): The payload to compress.
+        encoding (str): One of the names in ``ENCODERS``.
+        level (int): Compression level; defaults to the configured level.
+
+    Returns:
+        bytes: The compressed payload.
+    """
+    if level is None:
+        level = COMPRESSION_LEVELS[encoding]
+    encoder = ENCODERS[encoding](level)
+    return encoder.compress(data) + encoder.finish()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses HTTP responses with a negotiated encoding.
+
+    Args:
+        app: The wrapped ASGI application.
+        minimum_size (int): Complete bodies smaller than this many bytes are not compressed.
+        encodings (list): Encodings to offer, most preferred first.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, encodings=None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings or COMPRESSION_ENCODINGS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.encoder = None
+        self.passthrough = False
+        self.streaming = False
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = "content-encoding" in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            self.streaming = content_type.startswith("text/event-stream")
+            return
+
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.passthrough:
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                # Small complete response: not worth the encoding overhead.
+                self.passthrough = True
+                await self._flush_start()
+                await self._send(message)
+                return
+
+            self.encoder = ENCODERS[self.encoding](COMPRESSION_LEVELS[self.encoding])
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                payload = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(payload))
+                await self._flush_start()
+                await self._send({"type": "http.response.body", "body": payload})
+                return
+            del headers["Content-Length"]
+            await self._flush_start()
+
+        if more_body:
+            payload = self.encoder.compress(body)
+            if self.streaming:
+                payload += self.encoder.flush()
+        else:
+            payload = self.encoder.compress(body) + self.encoder.finish()
+        await self._send({"type": "http.response.body", "body": payload, "more_body": more_body})
+
+    async def _flush_start(self):
+        if self.start_message is not None:
+            await self._send(self.start_message)
+            self.start_message = None
@@ -1,42 +1,202 @@
-# API Endpoints 
-DATA_DICTIONARY_ENDPOINT = "https://data.cdc.gov/resource/m35w-spkz.json"
-
 # Local lookup table path (relative to this config file)
 import os
 _CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
 LOOKUP_TABLE_PATH = os.path.join(_CONFIG_DIR, "data", "places_year_measureid_lookup.csv")
 
+# API Endpoints
+# Socrata host serving the datasets; point it at a local emulator (python -m places.emulator) to run offline
+SOCRATA_BASE_URL = os.getenv("PLACES_SOCRATA_BASE_URL", "https://data.cdc.gov").rstrip("/")
+DATA_DICTIONARY_ENDPOINT = f"{SOCRATA_BASE_URL}/resource/m35w-spkz.json"
+
 API_ENDPOINTS = {
     "county": {
-        "places_release_2025": "https://data.cdc.gov/resource/swc5-untb.json",
-        "places_release_2024": "https://data.cdc.gov/resource/fu4u-a9bh.json",
-        "places_release_2023": "https://data.cdc.gov/resource/h3ej-a9ec.json",
-        "places_release_2022": "https://data.cdc.gov/resource/duw2-7jbt.json",
-        "places_release_2021": "https://data.cdc.gov/resource/pqpp-u99h.json",
-        "places_release_2020": "https://data.cdc.gov/resource/dv4u-3x3q.json",
+        "places_release_2025": f"{SOCRATA_BASE_URL}/resource/swc5-untb.json",
+        "places_release_2024": f"{SOCRATA_BASE_URL}/resource/fu4u-a9bh.json",
+        "places_release_2023": f"{SOCRATA_BASE_URL}/resource/h3ej-a9ec.json",
+        "places_release_2022": f"{SOCRATA_BASE_URL}/resource/duw2-7jbt.json",
+        "places_release_2021": f"{SOCRATA_BASE_URL}/resource/pqpp-u99h.json",
+        "places_release_2020": f"{SOCRATA_BASE_URL}/resource/dv4u-3x3q.json",
     },
     "census": {
-        "places_release_2025": "https://data.cdc.gov/resource/cwsq-ngmh.json",
-        "places_release_2024": "https://data.cdc.gov/resource/ai6z-tcin.json",
-        "places_release_2023": "https://data.cdc.gov/resource/em5e-5hvn.json",
-        "places_release_2022": "https://data.cdc.gov/resource/nw2y-v4gm.json",
-        "places_release_2021": "https://data.cdc.gov/resource/373s-ayzu.json",
-        "places_release_2020": "https://data.cdc.gov/resource/4ai3-zynv.json",
+        "places_release_2025": f"{SOCRATA_BASE_URL}/resource/cwsq-ngmh.json",
+        "places_release_2024": f"{SOCRATA_BASE_URL}/resource/ai6z-tcin.json",
+        "places_release_2023": f"{SOCRATA_BASE_URL}/resource/em5e-5hvn.json",
+        "places_release_2022": f"{SOCRATA_BASE_URL}/resource/nw2y-v4gm.json",
+        "places_release_2021": f"{SOCRATA_BASE_URL}/resource/373s-ayzu.json",
+        "places_release_2020": f"{SOCRATA_BASE_URL}/resource/4ai3-zynv.json",
     },
     "zcta": {
-        "places_release_2025": "https://data.cdc.gov/resource/qnzd-25i4.json",
-        "places_release_2024": "https://data.cdc.gov/resource/4r2x-hcfq.json",
-        "places_release_2023": "https://data.cdc.gov/resource/9umn-c3jf.json",
-        "places_release_2022": "https://data.cdc.gov/resource/gd4x-jyhw.json",
-        "places_release_2021": "https://data.cdc.gov/resource/s85h-9xpy.json",
-        "places_release_2020": "https://data.cdc.gov/resource/fbbf-hgkc.json",
+        "places_release_2025": f"{SOCRATA_BASE_URL}/resource/qnzd-25i4.json",
+        "places_release_2024": f"{SOCRATA_BASE_URL}/resource/4r2x-hcfq.json",
+        "places_release_2023": f"{SOCRATA_BASE_URL}/resource/9umn-c3jf.json",
+        "places_release_2022": f"{SOCRATA_BASE_URL}/resource/gd4x-jyhw.json",
+        "places_release_2021": f"{SOCRATA_BASE_URL}/resource/s85h-9xpy.json",
+        "places_release_2020": f"{SOCRATA_BASE_URL}/resource/fbbf-hgkc.json",
     },
     "places": {
-        "places_release_2025": "https://data.cdc.gov/resource/eav7-hnsx.json",
-        "places_release_2024": "https://data.cdc.gov/resource/sd8v-uq83.json",
-        "places_release_2023": "https://data.cdc.gov/resource/krqc-563j.json",
-        "places_release_2022": "https://data.cdc.gov/resource/epbn-9bv3.json",
-        "places_release_2021": "https://data.cdc.gov/resource/q8ig-wwk9.json",
-        "places_release_2020": "https://data.cdc.gov/resource/q8xq-ygsk.json",
+        "places_release_2025": f"{SOCRATA_BASE_URL}/resource/eav7-hnsx.json",
+        "places_release_2024": f"{SOCRATA_BASE_URL}/resource/sd8v-uq83.json",
+        "places_release_2023": f"{SOCRATA_BASE_URL}/resource/krqc-563j.json",
+        "places_release_2022": f"{SOCRATA_BASE_URL}/resource/epbn-9bv3.json",
+        "places_release_2021": f"{SOCRATA_BASE_URL}/resource/q8ig-wwk9.json",
+        "places_release_2020": f"{SOCRATA_BASE_URL}/resource/q8xq-ygsk.json",
     }
 }
+
+# Columns returned by get_cdc_places_data for each geographic level
+SELECT_COLUMNS = {
+    "county": "stateabbr,statedesc,locationid,locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation",
+    "census": "stateabbr,statedesc,countyname,locationid,locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation",
+    "zcta": "locationid,locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation",
+    "places": "stateabbr,statedesc,locationid,locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation",
+}
+
+# Location-name resolution index
+# Directory holding <geo>.csv / <geo>.json location snapshots (locationid, locationname, stateabbr[, countyname])
+LOCATION_SNAPSHOT_DIR = os.getenv("PLACES_LOCATION_SNAPSHOT_DIR") or None
+# Geos whose index is built on first use from the distinct locations of the latest release
+LOCATION_INDEX_BOOTSTRAP_GEOS = [
+    g.strip() for g in os.getenv("PLACES_LOCATION_INDEX_BOOTSTRAP_GEOS", "county,places").split(",") if g.strip()
+]
+# Seconds to wait before retrying a failed bootstrap
+LOCATION_INDEX_RETRY_SECONDS = 300
+# Minimum trigram similarity for a suggestion, and for an automatic correction
+LOCATION_FUZZY_MIN_SCORE = 0.45
+LOCATION_FUZZY_ACCEPT_SCORE = 0.75
+
+# Maximum number of upstream requests a batch tool call runs at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("PLACES_BATCH_MAX_CONCURRENCY", "4"))
+
+# Upstream response cache in front of every Socrata request
+# Entries kept, seconds an entry stays valid, and largest response (in rows) worth caching
+RESPONSE_CACHE_SIZE = int(os.getenv("PLACES_RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("PLACES_RESPONSE_CACHE_TTL", "86400"))
+RESPONSE_CACHE_MAX_ROWS = int(os.getenv("PLACES_RESPONSE_CACHE_MAX_ROWS", "20000"))
+# Releases whose datasets may be republished (default: the newest), and the age after which
+# their cached responses are served stale while a background conditional request refreshes them
+REVALIDATE_RELEASES = [
+    r.strip() for r in os.getenv("PLACES_REVALIDATE_RELEASES", max(API_ENDPOINTS["county"])).split(",") if r.strip()
+]
+REVALIDATE_AFTER_SECONDS = float(os.getenv("PLACES_REVALIDATE_AFTER_SECONDS", "3600"))
+
+# Upstream record/replay cassettes (off by default)
+# 'record' writes every successful upstream response to CASSETTE_DIR; 'replay' answers every
+# request from it without network access
+CASSETTE_MODE = os.getenv("PLACES_CASSETTE_MODE", "off").lower()
+CASSETTE_DIR = os.getenv("PLACES_CASSETTE_DIR", "cassettes")
+# Seconds added to each replayed response, or 'recorded' to replay each response's recorded duration
+CASSETTE_LATENCY = os.getenv("PLACES_CASSETTE_LATENCY", "0")
+
+# Memory budget shared by every in-process cache, per worker process.
+# manifest.yaml gives the app 256 MB; the launcher and two workers use about 200 MB
+# before caching anything (benchmarks/bench_worker_memory.py), which leaves 24 MB per worker.
+CACHE_BUDGET_MB = float(os.getenv("PLACES_CACHE_BUDGET_MB", "24"))
+
+# Row limit sent with every upstream query
+QUERY_ROW_LIMIT = 100000
+
+# Longest request URL sent upstream; long locationid lists are split into several requests
+MAX_URL_LENGTH = int(os.getenv("PLACES_MAX_URL_LENGTH", "4000"))
+
+# Number of (release, measure, datavaluetypeid) state rollups kept in memory
+STATE_ROLLUP_CACHE_SIZE = int(os.getenv("PLACES_STATE_ROLLUP_CACHE_SIZE", "64"))
+
+# HTTP response compression
+# Encodings in server preference order; zstd and br require the optional
+# zstandard and brotli packages and are skipped when they are not installed.
+COMPRESSION_ENCODINGS = [
+    e.strip() for e in os.getenv("PLACES_COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()
+]
+COMPRESSION_MIN_SIZE = int(os.getenv("PLACES_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVELS = {
+    "gzip": 6,
+    "zstd": 3,
+    "br": 4,
+}
+
+# "Similar places" feature matrices (location x measure, one file per geo/release/datavaluetypeid).
+# They are generated at runtime, so they go to the user cache directory rather than into the package.
+_CACHE_HOME = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+FEATURE_MATRIX_DIR = os.getenv("PLACES_FEATURE_MATRIX_DIR") or os.path.join(_CACHE_HOME, "places", "features")
+# Geos whose matrix may be built on first use from upstream when no file exists
+FEATURE_MATRIX_BUILD_GEOS = [
+    g.strip() for g in os.getenv("PLACES_FEATURE_MATRIX_BUILD_GEOS", "county").split(",") if g.strip()
+]
+# Number of feature matrices kept in memory
+FEATURE_MATRIX_CACHE_SIZE = int(os.getenv("PLACES_FEATURE_MATRIX_CACHE_SIZE", "4"))
+
+# Number of (dataset, measure, datavaluetypeid, scope) value pulls kept in memory for correlations
+SCOPE_VALUES_CACHE_SIZE = int(os.getenv("PLACES_SCOPE_VALUES_CACHE_SIZE", "64"))
+
+# HTTP deployment
+# Stateless streamable HTTP lets any worker answer any request; tools keep no per-session state
+STATELESS_HTTP = os.getenv("PLACES_STATELESS_HTTP", "true").lower() in ("1", "true", "yes")
+# Number of pre-forked worker processes started by places.serve
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# Startup cache warm-up
+# JSON list of {"tool": ..., "arguments": {...}} tool calls to run at startup
+WARMUP_FILE = os.getenv("PLACES_WARMUP_FILE") or None
+# File the upstream requests of this run are counted in; its top entries are prefetched on the next start
+ACCESS_LOG_PATH = os.getenv("PLACES_ACCESS_LOG") or None
+WARMUP_TOP_N = int(os.getenv("PLACES_WARMUP_TOP_N", "50"))
+WARMUP_CONCURRENCY = int(os.getenv("PLACES_WARMUP_CONCURRENCY", "4"))
+# Seconds after which /ready reports ready even if warm-up has not finished
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("PLACES_WARMUP_TIMEOUT_SECONDS", "120"))
+# Seconds between writes of the access log
+ACCESS_LOG_FLUSH_SECONDS = 300
+
+# On-demand tool call profiling
+# Profile every tool call (otherwise only HTTP requests sending the PROFILE_HEADER header)
+PROFILE_ALL = os.getenv("PLACES_PROFILE", "false").lower() in ("1", "true", "yes")
+PROFILE_HEADER = "x-places-profile"
+# Directory profiles are written to, and how many files / megabytes of them are kept
+PROFILE_DIR = os.getenv("PLACES_PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PLACES_PROFILE_MAX_FILES", "100"))
+PROFILE_MAX_MB = float(os.getenv("PLACES_PROFILE_MAX_MB", "50"))
+# Seconds between stack samples, and shortest profiled call worth writing
+PROFILE_INTERVAL = float(os.getenv("PLACES_PROFILE_INTERVAL", "0.005"))
+PROFILE_MIN_SECONDS = float(os.getenv("PLACES_PROFILE_MIN_SECONDS", "0"))
+# Number of recent tool calls kept for the /debug/slow-calls route
+SLOW_CALLS_WINDOW = int(os.getenv("PLACES_SLOW_CALLS_WINDOW", "500"))
+
+# Admission control for tool calls
+# Tool calls running at once per tool, with lower limits for tools that fan out into many upstream requests
+TOOL_MAX_CONCURRENCY = int(os.getenv("PLACES_TOOL_MAX_CONCURRENCY", "16"))
+TOOL_CONCURRENCY_LIMITS = {
+    "batch_cdc_places_data": 4,
+    "get_cdc_places_time_series": 8,
+    "correlate_cdc_places_measures": 8,
+}
+# Tool calls allowed to wait for a slot per tool; later arrivals are rejected at once
+TOOL_MAX_QUEUE = int(os.getenv("PLACES_TOOL_MAX_QUEUE", "64"))
+# Seconds a caller is assumed to wait for a result when it does not send the TIMEOUT_HEADER header
+DEFAULT_CALL_TIMEOUT_SECONDS = float(os.getenv("PLACES_DEFAULT_CALL_TIMEOUT_SECONDS", "60"))
+TIMEOUT_HEADER = "x-places-timeout"
+
+# CPU-heavy stages (JSON decoding, summary statistics) run on worker threads above these input
+# sizes, so one large response does not stall the event loop for every other session
+OFFLOAD_MIN_BYTES = int(os.getenv("PLACES_OFFLOAD_MIN_BYTES", str(1024 * 1024)))
+OFFLOAD_MIN_ROWS = int(os.getenv("PLACES_OFFLOAD_MIN_ROWS", "5000"))
+OFFLOAD_THREADS = int(os.getenv("PLACES_OFFLOAD_THREADS", "2"))
+
+# Event-loop watchdog (off by default)
+# A background thread notices when the event loop has not run for WATCHDOG_THRESHOLD_SECONDS,
+# samples the blocking stack and the active tool, and logs the block once the loop resumes
+WATCHDOG_ENABLED = os.getenv("PLACES_WATCHDOG", "false").lower() in ("1", "true", "yes")
+WATCHDOG_THRESHOLD_SECONDS = float(os.getenv("PLACES_WATCHDOG_THRESHOLD_SECONDS", "0.1"))
+# Seconds between event-loop heartbeats and watchdog checks
+WATCHDOG_INTERVAL = float(os.getenv("PLACES_WATCHDOG_INTERVAL", "0.01"))
+# Number of recent blocks kept for the /debug/event-loop-blocks route
+WATCHDOG_WINDOW = int(os.getenv("PLACES_WATCHDOG_WINDOW", "100"))
+
+# Logging
+# Records are queued by the caller and written to stderr by a background thread, as JSON lines or text
+LOG_LEVEL = os.getenv("PLACES_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("PLACES_LOG_FORMAT", "json")
+# Records queued beyond this are dropped rather than blocking the caller
+LOG_QUEUE_SIZE = int(os.getenv("PLACES_LOG_QUEUE_SIZE", "10000"))
+# High-volume events (lookup misses, upstream failures) are logged once per this many occurrences
+LOG_SAMPLE_EVERY = int(os.getenv("PLACES_LOG_SAMPLE_EVERY", "100"))
+# Header carrying a caller-supplied correlation id; one is generated per tool call otherwise
+REQUEST_ID_HEADER = "x-request-id"
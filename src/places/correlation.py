@@ -0,0 +1,181 @@
+"""
+Cross-measure correlation of CDC PLACES estimates within a geographic scope.
+
+Both measures are pulled for the scope concurrently (or served from an
+in-memory cache of earlier pulls), joined on ``locationid`` and summarised
+server-side: Pearson and Spearman coefficients, a least-squares line and
+the locations furthest from it. The model receives a few numbers instead of
+thousands of rows.
+"""
+
+import asyncio
+import math
+
+import numpy as np
+import pandas as pd
+
+from places.config import QUERY_ROW_LIMIT, SCOPE_VALUES_CACHE_SIZE
+from places.utils import _fetch_api, derived_cache, derived_revalidation, soql_in
+
+# Columns pulled for each measure
+VALUE_SELECT = "locationid,locationname,stateabbr,data_value"
+
+# Residuals at least this many standard deviations from the line are outliers
+OUTLIER_Z = 2.0
+
+# (url, measureid, datavaluetypeid, where) -> scope_columns of the response. The
+# rows themselves may also be in the response cache; the arrays hold their own copy
+# of just the columns needed, so the budget does not count the rows twice.
+scope_values_cache = derived_cache("scope_values", maxsize=SCOPE_VALUES_CACHE_SIZE)
+
+
+async def fetch_scope_values(url: str, measureid: str, datavaluetypeid: str, where: str):
+    """
+    Returns the estimates of one measure for every location in a scope.
+
+    Args:
+        url (str): The release dataset endpoint.
+        measureid (str): The measure ID (e.g., 'OBESITY').
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+        where (str): SoQL filter selecting the scope, or None for the whole dataset.
+
+    Returns:
+        dict: The scope_columns of the locations, or None if the request failed.
+    """
+    clauses = [soql_in("measureid", [measureid]), soql_in("datavaluetypeid", [datavaluetypeid])]
+    if where:
+        clauses.append(where)
+
+    async def load():
+        records = await _fetch_api(url, {"$select": VALUE_SELECT, "$where": " AND ".join(clauses), "$limit": QUERY_ROW_LIMIT})
+        return None if records is None else scope_columns(records)
+
+    return await scope_values_cache.get_or_load(
+        (url, measureid, datavaluetypeid, where), load, **derived_revalidation(url, load, equal=columns_equal)
+    )
+
+
+async def fetch_measure_pair(x_source: tuple, y_source: tuple, datavaluetypeid: str, where: str):
+    """
+    Fetches two measures for a scope concurrently.
+
+    Args:
+        x_source (tuple): (url, measureid) of the first measure.
+        y_source (tuple): (url, measureid) of the second measure.
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+        where (str): SoQL filter selecting the scope.
+
+    Returns:
+        tuple: The scope_columns of each measure; either may be None on failure.
+    """
+    return await asyncio.gather(
+        fetch_scope_values(*x_source, datavaluetypeid, where),
+        fetch_scope_values(*y_source, datavaluetypeid, where),
+    )
+
+
+def _values(data) -> pd.DataFrame:
+    df = pd.DataFrame(data).reindex(columns=["locationid", "locationname", "stateabbr", "data_value"])
+    df["data_value"] = pd.to_numeric(df["data_value"], errors="coerce")
+    df = df.dropna(subset=["locationid", "data_value"])
+    df["locationid"] = df["locationid"].astype(str)
+    return df.drop_duplicates("locationid")
+
+
+def scope_columns(records: list) -> dict:
+    """
+    Extracts the values of one measure from response rows as column arrays.
+
+    Args:
+        records (list): Rows with locationid, locationname, stateabbr and data_value.
+
+    Returns:
+        dict: numpy arrays "locationid", "locationname" and "stateabbr" (strings)
+        and "data_value" (floats), one item per location with a numeric value.
+    """
+    df = _values(records)
+    columns = {name: df[name].fillna("").to_numpy(dtype=str) for name in ("locationid", "locationname", "stateabbr")}
+    columns["data_value"] = df["data_value"].to_numpy(dtype=float)
+    return columns
+
+
+def columns_equal(a: dict, b: dict) -> bool:
+    """Whether two scope_columns results hold the same values."""
+    return a.keys() == b.keys() and all(np.array_equal(a[name], b[name]) for name in a)
+
+
+def _round(value, digits=4):
+    return None if value is None or not math.isfinite(value) else round(float(value), digits)
+
+
+def correlate(x_records: list, y_records: list, max_outliers: int = 5) -> dict:
+    """
+    Correlates two measures over the locations both report.
+
+    Args:
+        x_records (list | dict): Records of the first measure (locationid, locationname,
+            data_value), or their scope_columns.
+        y_records (list | dict): Records or scope_columns of the second measure.
+        max_outliers (int): Maximum number of outliers to report.
+
+    Returns:
+        dict: "n" joined locations, "x"/"y" mean and standard deviation,
+        "pearson" r with a 95% confidence interval (Fisher z), "spearman" rho,
+        "regression" slope/intercept/r_squared of y on x, and "outliers"
+        with standardized residuals of at least OUTLIER_Z, largest first.
+        Fewer than three joined locations give an "error".
+    """
+    joined = _values(x_records).merge(
+        _values(y_records)[["locationid", "data_value"]], on="locationid", suffixes=("_x", "_y")
+    )
+    n = len(joined)
+    if n < 3:
+        return {"error": f"Only {n} locations report both measures; at least 3 are needed", "n": n}
+
+    x = joined["data_value_x"].to_numpy(dtype=float)
+    y = joined["data_value_y"].to_numpy(dtype=float)
+    x_std, y_std = x.std(ddof=1), y.std(ddof=1)
+    summary = {
+        "n": n,
+        "x": {"mean": _round(x.mean()), "std": _round(x_std)},
+        "y": {"mean": _round(y.mean()), "std": _round(y_std)},
+    }
+    if x_std == 0 or y_std == 0:
+        return {**summary, "error": "One of the measures is constant across the scope"}
+
+    r = float(np.corrcoef(x, y)[0, 1])
+    rho = float(np.corrcoef(joined["data_value_x"].rank(), joined["data_value_y"].rank())[0, 1])
+    ci = None
+    if n > 3 and abs(r) < 1:
+        z, se = math.atanh(r), 1.96 / math.sqrt(n - 3)
+        ci = [_round(math.tanh(z - se)), _round(math.tanh(z + se))]
+
+    slope = r * y_std / x_std
+    intercept = y.mean() - slope * x.mean()
+    predicted = intercept + slope * x
+    residuals = y - predicted
+    residual_std = residuals.std(ddof=2) if n > 2 else 0.0
+    z_scores = residuals / residual_std if residual_std > 0 else np.zeros(n)
+
+    order = np.argsort(-np.abs(z_scores), kind="stable")
+    order = order[np.abs(z_scores[order]) >= OUTLIER_Z][:max_outliers]
+    outliers = [
+        {
+            "locationid": joined["locationid"].iat[i],
+            "locationname": joined["locationname"].iat[i],
+            "stateabbr": joined["stateabbr"].iat[i] if pd.notna(joined["stateabbr"].iat[i]) else None,
+            "x": _round(x[i], 2),
+            "y": _round(y[i], 2),
+            "predicted_y": _round(predicted[i], 2),
+            "residual_z": _round(z_scores[i], 2),
+        }
+        for i in order
+    ]
+
+    return {
+        **summary,
+        "pearson": {"r": _round(r), "ci95": ci},
+        "spearman": {"rho": _round(rho)},
+        "regression": {"slope": _round(slope), "intercept": _round(intercept), "r_squared": _round(r * r)},
+        "outliers": outliers,
+    }
@@ -0,0 +1,495 @@
+"""
+Local stand-in for the Socrata ``/resource/<id>.json`` API.
+
+Serves fixture datasets with the subset of SoQL the tools send, so the whole
+upstream path (URL building, chunked IN filters, paging, caching,
+revalidation, error handling) runs without network access:
+
+- ``$select``: columns, ``AS`` aliases, and ``count(*)``, ``count``, ``sum``,
+  ``avg``, ``min`` and ``max`` aggregates,
+- ``$where``: ``=``, ``!=``/``<>``, ``<``, ``<=``, ``>``, ``>=``, ``IN (...)``,
+  ``NOT IN (...)``, ``IS [NOT] NULL``, combined with ``AND``, ``OR``, ``NOT``
+  and parentheses,
+- ``$group``, ``$order`` (``ASC``/``DESC``), ``$limit`` (default 1000) and
+  ``$offset``,
+- simple filters: ``?column=value`` parameters match on equality.
+
+Values are returned as strings and null fields are omitted, as Socrata does.
+Responses carry an ETag per dataset version and honour ``If-None-Match``.
+Latency, jitter, an error rate and a request-rate limit (answered with 429
+and ``Retry-After``) can be configured to test slow or failing upstreams.
+
+Datasets are loaded from a directory: ``<dataset id>.json`` files holding a
+list of rows, ``<dataset id>.csv`` files, or recorded fixtures
+(``{"request": {"dataset": ...}, "response": {"body": [...]}}``, as in
+benchmarks/fixtures). Point the server at the emulator with
+``PLACES_SOCRATA_BASE_URL``:
+
+    python -m places.emulator --data-dir benchmarks/fixtures --port 8001 --latency 0.2 --jitter 0.1
+    PLACES_SOCRATA_BASE_URL=http://127.0.0.1:8001 python -m places.serve
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import re
+import time
+from collections import Counter
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from places.serialization import dumps
+
+# Rows returned when a query has no $limit
+DEFAULT_LIMIT = 1000
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<string>'(?:[^']|'')*')
+    | (?P<number>-?\d+(?:\.\d+)?)
+    | (?P<op><>|!=|<=|>=|=|<|>)
+    | (?P<punct>[(),*])
+    | (?P<name>[A-Za-z_:@][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+
+class SoQLError(ValueError):
+    """A query the emulator cannot parse or does not support."""
+
+
+def tokenize(text: str) -> list:
+    """
+    Splits a SoQL expression into (kind, value) tokens.
+
+    Args:
+        text (str): The expression.
+
+    Returns:
+        list: Tokens; kind is 'string', 'number', 'op', 'punct' or 'name'
+        (keywords are names, upper-cased in value).
+    """
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise SoQLError(f"Unexpected character at position {position}: {text[position:position + 20]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = value[1:-1].replace("''", "'")
+        elif kind == "name" and value.upper() in ("AND", "OR", "NOT", "IN", "IS", "NULL", "AS", "ASC", "DESC"):
+            value = value.upper()
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _compare(left, op: str, right, numeric: bool) -> bool:
+    if left is None:
+        return False
+    a, b = (_number(left), _number(right)) if numeric or op not in ("=", "!=", "<>") else (None, None)
+    if a is None or b is None:
+        a, b = str(left), str(right)
+    if op == "=":
+        return a == b
+    if op in ("!=", "<>"):
+        return a != b
+    if op == "<":
+        return a < b
+    if op == "<=":
+        return a <= b
+    if op == ">":
+        return a > b
+    return a >= b
+
+
+class _WhereParser:
+    """Recursive-descent parser compiling a $where clause into a row predicate."""
+
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def parse(self):
+        predicate = self._or()
+        if self.position != len(self.tokens):
+            raise SoQLError(f"Unexpected {self.tokens[self.position][1]!r} in $where")
+        return predicate
+
+    def _peek(self, value=None):
+        if self.position >= len(self.tokens):
+            return None
+        token = self.tokens[self.position]
+        return token if value is None or token[1] == value and token[0] != "string" else None
+
+    def _take(self, value=None):
+        token = self._peek(value)
+        if token is None:
+            raise SoQLError(f"Expected {value or 'a token'} in $where")
+        self.position += 1
+        return token
+
+    def _or(self):
+        terms = [self._and()]
+        while self._keyword("OR"):
+            terms.append(self._and())
+        return terms[0] if len(terms) == 1 else lambda row: any(term(row) for term in terms)
+
+    def _and(self):
+        terms = [self._not()]
+        while self._keyword("AND"):
+            terms.append(self._not())
+        return terms[0] if len(terms) == 1 else lambda row: all(term(row) for term in terms)
+
+    def _not(self):
+        if self._keyword("NOT"):
+            term = self._not()
+            return lambda row: not term(row)
+        if self._keyword("("):
+            term = self._or()
+            self._take(")")
+            return term
+        return self._comparison()
+
+    def _literal(self):
+        kind, value = self._take()
+        if kind not in ("string", "number"):
+            raise SoQLError(f"Expected a literal, got {value!r}")
+        return kind, value
+
+    def _keyword(self, value) -> bool:
+        if self._peek(value):
+            self.position += 1
+            return True
+        return False
+
+    def _comparison(self):
+        kind, column = self._take()
+        if kind != "name":
+            raise SoQLError(f"Expected a column name, got {column!r}")
+        if self._keyword("IS"):
+            negate = self._keyword("NOT")
+            self._take("NULL")
+            return (lambda row: row.get(column) is not None) if negate else (lambda row: row.get(column) is None)
+        negate = self._keyword("NOT")
+        if self._keyword("IN"):
+            self._take("(")
+            values = [self._literal()[1]]
+            while self._keyword(","):
+                values.append(self._literal()[1])
+            self._take(")")
+            strings = {str(value) for value in values}
+            if negate:
+                return lambda row: row.get(column) is not None and str(row.get(column)) not in strings
+            return lambda row: row.get(column) is not None and str(row.get(column)) in strings
+        if negate:
+            raise SoQLError("NOT must be followed by IN here")
+        kind, op = self._take()
+        if kind != "op":
+            raise SoQLError(f"Expected a comparison operator, got {op!r}")
+        literal_kind, value = self._literal()
+        numeric = literal_kind == "number"
+        return lambda row: _compare(row.get(column), op, value, numeric)
+
+
+def compile_where(text: str):
+    """Compiles a $where clause into a function taking a row and returning whether it matches."""
+    return _WhereParser(text).parse()
+
+
+def _split_top_level(text: str) -> list:
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def parse_select(text: str) -> list:
+    """
+    Parses a $select list.
+
+    Args:
+        text (str): e.g. "stateabbr, count(*) AS n, avg(data_value)".
+
+    Returns:
+        list: (output name, column, aggregate or None) per selected item.
+    """
+    items = []
+    for part in _split_top_level(text):
+        match = re.fullmatch(r"(?:(\w+)\s*\(\s*(\*|\w+)\s*\)|(\w+))(?:\s+(?i:as)\s+(\w+))?", part)
+        if match is None:
+            raise SoQLError(f"Unsupported $select item {part!r}")
+        function, argument, column, alias = match.groups()
+        if function is not None:
+            function = function.lower()
+            if function not in AGGREGATES or (argument == "*" and function != "count"):
+                raise SoQLError(f"Unsupported aggregate {part!r}")
+            default = "count" if argument == "*" else f"{function}_{argument}"
+            items.append((alias or default, argument, function))
+        else:
+            items.append((alias or column, column, None))
+    return items
+
+
+def _aggregate(function: str, column: str, rows: list):
+    if function == "count":
+        return len(rows) if column == "*" else sum(row.get(column) is not None for row in rows)
+    values = [value for value in (_number(row.get(column)) for row in rows) if value is not None]
+    if not values:
+        return None
+    if function == "sum":
+        return sum(values)
+    if function == "avg":
+        return sum(values) / len(values)
+    return min(values) if function == "min" else max(values)
+
+
+def _format(value):
+    if value is None:
+        return None
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def _sort_key(value):
+    number = _number(value)
+    return (value is None, 0 if number is not None else 1, number if number is not None else str(value or ""))
+
+
+def _order(rows: list, order) -> list:
+    # Nulls sort last ascending and first descending, as in Socrata
+    for part in reversed(_split_top_level(order or "")):
+        match = re.fullmatch(r"(\w+)(?:\s+(?i:(asc|desc)))?", part)
+        if match is None:
+            raise SoQLError(f"Unsupported $order item {part!r}")
+        column, direction = match.groups()
+        rows = sorted(rows, key=lambda row: _sort_key(row.get(column)), reverse=(direction or "").lower() == "desc")
+    return rows
+
+
+def run_query(rows: list, params) -> list:
+    """
+    Runs a SoQL query over a dataset's rows.
+
+    Args:
+        rows (list): The dataset, one dict per row.
+        params: Query parameters: $select, $where, $group, $order, $limit, $offset, and
+            column=value equality filters.
+
+    Returns:
+        list: Result rows with string values and null fields omitted.
+    """
+    filters = {name: value for name, value in params.items() if not name.startswith("$")}
+    if filters:
+        rows = [row for row in rows if all(str(row.get(name)) == value for name, value in filters.items())]
+    where = params.get("$where")
+    if where:
+        predicate = compile_where(where)
+        rows = [row for row in rows if predicate(row)]
+
+    select = parse_select(params["$select"]) if params.get("$select") else None
+    group = [column.strip() for column in params.get("$group", "").split(",") if column.strip()]
+    aggregated = select is not None and (group or any(function for _, _, function in select))
+    if not aggregated:
+        # Rows may be ordered by columns that are not selected
+        rows = _order(rows, params.get("$order"))
+    if aggregated:
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(row.get(column) for column in group), []).append(row)
+        if not group and not groups:
+            groups[()] = []
+        rows = []
+        for key, members in groups.items():
+            values = dict(zip(group, key))
+            result = {}
+            for name, column, function in select:
+                if function is None:
+                    if column not in values:
+                        raise SoQLError(f"Column {column!r} must appear in $group or an aggregate")
+                    result[name] = values[column]
+                else:
+                    result[name] = _aggregate(function, column, members)
+            rows.append(result)
+        rows = _order(rows, params.get("$order"))
+    elif select is not None:
+        rows = [{name: row.get(column) for name, column, _ in select} for row in rows]
+
+    try:
+        offset = int(params.get("$offset", 0))
+        limit = int(params.get("$limit", DEFAULT_LIMIT))
+    except ValueError as e:
+        raise SoQLError(f"Invalid $limit or $offset: {e}") from e
+    rows = rows[offset:offset + limit]
+    return [{name: _format(value) for name, value in row.items() if value is not None} for row in rows]
+
+
+def load_datasets(directory: str) -> dict:
+    """
+    Loads every dataset in a directory.
+
+    Args:
+        directory (str): Holds <dataset id>.json / .csv files or recorded fixtures.
+
+    Returns:
+        dict: Dataset id -> list of rows.
+    """
+    datasets = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        stem, extension = os.path.splitext(name)
+        if extension == ".csv":
+            with open(path, newline="", encoding="utf-8") as f:
+                datasets[stem] = [{key: value for key, value in row.items() if value != ""} for row in csv.DictReader(f)]
+        elif extension == ".json":
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and "response" in data:
+                datasets[data.get("request", {}).get("dataset", stem)] = data["response"]["body"]
+            elif isinstance(data, list):
+                datasets[stem] = data
+    return datasets
+
+
+class SocrataEmulator:
+    """
+    An emulated Socrata host serving in-memory datasets.
+
+    Args:
+        datasets (dict): Dataset id -> list of rows.
+        latency (float): Seconds added to every response.
+        jitter (float): Up to this many seconds added or removed at random.
+        error_rate (float): Fraction of requests answered with a 500.
+        max_rps (float): Requests per second allowed before answering 429, or None.
+        seed (int): Random seed for jitter and errors.
+    """
+
+    def __init__(self, datasets: dict, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 max_rps=None, seed=None):
+        self.datasets = datasets
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.versions = Counter()
+        self.requests = Counter()
+        self.statuses = Counter()
+        self._random = random.Random(seed)
+        self._tokens = max_rps or 0.0
+        self._refilled_at = time.monotonic()
+
+    def etag(self, dataset: str) -> str:
+        """Returns the ETag of a dataset's current version."""
+        return f'"{dataset}-{self.versions[dataset]}"'
+
+    def republish(self, dataset: str) -> None:
+        """Marks a dataset as changed, so its ETag no longer matches."""
+        self.versions[dataset] += 1
+
+    def _throttled(self) -> bool:
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        self._tokens = min(self.max_rps, self._tokens + (now - self._refilled_at) * self.max_rps)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def _respond(self, status: int, content=None, headers=None) -> Response:
+        self.statuses[status] += 1
+        if content is None:
+            return Response(status_code=status, headers=headers)
+        body = dumps(content) if not isinstance(content, bytes) else content
+        return Response(body, status_code=status, media_type="application/json", headers=headers)
+
+    async def resource(self, request: Request) -> Response:
+        dataset = request.path_params["dataset"]
+        self.requests[dataset] += 1
+        if self._throttled():
+            return self._respond(429, {"error": True, "message": "Too many requests (emulated)"}, {"Retry-After": "1"})
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._respond(500, {"error": True, "message": "Internal error (emulated)"})
+        rows = self.datasets.get(dataset)
+        if rows is None:
+            return self._respond(404, {"code": "not_found", "error": True, "message": f"Dataset {dataset} not found"})
+        etag = self.etag(dataset)
+        if request.headers.get("if-none-match") == etag:
+            return self._respond(304, headers={"ETag": etag})
+        try:
+            result = run_query(rows, request.query_params)
+        except SoQLError as e:
+            return self._respond(400, {"code": "query.compiler.malformed", "error": True, "message": str(e)})
+        return self._respond(200, result, {"ETag": etag})
+
+    async def stats(self, request: Request) -> JSONResponse:
+        return JSONResponse({
+            "requests": dict(self.requests),
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "datasets": {dataset: len(rows) for dataset, rows in self.datasets.items()},
+        })
+
+    async def republish_route(self, request: Request) -> JSONResponse:
+        dataset = request.path_params["dataset"]
+        self.republish(dataset)
+        return JSONResponse({"dataset": dataset, "etag": self.etag(dataset)})
+
+    def app(self) -> Starlette:
+        """Returns the ASGI application."""
+        return Starlette(routes=[
+            Route("/resource/{dataset}.json", self.resource, methods=["GET"]),
+            Route("/emulator/stats", self.stats, methods=["GET"]),
+            Route("/emulator/republish/{dataset}", self.republish_route, methods=["POST"]),
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture datasets through an emulated Socrata API.")
+    parser.add_argument("--data-dir", required=True, help="Directory of <dataset id>.json/.csv files or fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--max-rps", type=float, default=None, help="Requests per second before answering 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    emulator = SocrataEmulator(load_datasets(args.data_dir), latency=args.latency, jitter=args.jitter,
+                               error_rate=args.error_rate, max_rps=args.max_rps, seed=args.seed)
+    print(f"Serving {len(emulator.datasets)} datasets on http://{args.host}:{args.port}/resource/<id>.json")
+    uvicorn.run(emulator.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
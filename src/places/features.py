@@ -0,0 +1,354 @@
+"""
+Multi-measure feature matrices for "similar places" queries.
+
+A feature matrix holds one row per location and one column per measure for a
+single (geo, release, datavaluetypeid). Raw values are stored as float32 in a
+compressed ``.npz`` file in ``PLACES_FEATURE_MATRIX_DIR``, named
+``<geo>_<release>_<datavaluetypeid>.npz``, and standardized per measure
+(z-scores) when loaded. Nearest-neighbour queries are a single vectorized
+distance computation over the standardized matrix, which takes a few
+milliseconds even for every census place.
+
+Matrices are built from a PLACES CSV export (the "Download" file of a release
+dataset) or from a paged pull of every measure in a release:
+
+    PYTHONPATH=src python -m places.features --geo county --release places_release_2025 --datavaluetypeid AgeAdjPrv
+    PYTHONPATH=src python -m places.features --geo places --release places_release_2025 --datavaluetypeid AgeAdjPrv --csv PLACES_2025.csv
+
+Geos listed in ``PLACES_FEATURE_MATRIX_BUILD_GEOS`` (default ``county``) are
+also built on first use when no file exists; larger geos should be prebuilt.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from places.cache import TTLCache
+from places.config import (
+    API_ENDPOINTS,
+    FEATURE_MATRIX_BUILD_GEOS,
+    FEATURE_MATRIX_CACHE_SIZE,
+    FEATURE_MATRIX_DIR,
+    QUERY_ROW_LIMIT,
+)
+from places.locations import LocationIndex
+from places.utils import _fetch_api, soql_in
+
+logger = logging.getLogger(__name__)
+
+FEATURE_GEOS = ("county", "places")
+
+# Columns read from upstream rows or CSV exports
+FEATURE_COLUMNS = ["locationid", "locationname", "stateabbr", "measureid", "data_value"]
+
+# (geo, release_name, datavaluetypeid) -> FeatureMatrix. Outside the cache memory
+# budget: a places matrix with its name index is larger than any entry the budget admits.
+feature_matrix_cache = TTLCache("feature_matrix", maxsize=FEATURE_MATRIX_CACHE_SIZE, budgeted=False)
+
+
+class FeatureMatrix:
+    """
+    Location x measure matrix of estimates for one geo, release and value type.
+
+    Args:
+        geo (str): The geographic level ('county' or 'places').
+        ids (array): Location IDs, one per row.
+        names (array): Location names, one per row.
+        states (array): Two-letter state abbreviations, one per row.
+        measures (array): Measure IDs, one per column.
+        values (array): float32 estimates; NaN where a measure is not published.
+    """
+
+    def __init__(self, geo: str, ids, names, states, measures, values):
+        self.geo = geo
+        self.ids = np.asarray(ids, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.states = np.asarray(states, dtype=str)
+        self.measures = np.asarray(measures, dtype=str)
+        self.values = np.asarray(values, dtype=np.float32)
+        self._positions = {location_id: i for i, location_id in enumerate(self.ids)}
+        self._index = None
+
+        # z-scores per measure; missing values sit at the measure mean (0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nanmean(self.values, axis=0) if len(self.values) else np.zeros(len(self.measures))
+            std = np.nanstd(self.values, axis=0) if len(self.values) else np.ones(len(self.measures))
+        std = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+        self.scaled = np.nan_to_num((self.values - mean) / std, nan=0.0).astype(np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, geo: str, records) -> "FeatureMatrix":
+        """
+        Builds a matrix from long-format rows (one row per location and measure).
+
+        Args:
+            geo (str): The geographic level of the rows.
+            records (list | DataFrame): Rows with the FEATURE_COLUMNS fields.
+
+        Returns:
+            FeatureMatrix: Locations sorted by locationid and measures by measureid.
+        """
+        df = pd.DataFrame(records).reindex(columns=FEATURE_COLUMNS)
+        df = df.dropna(subset=["locationid", "measureid"])
+        df["locationid"] = df["locationid"].astype(str)
+        df["data_value"] = pd.to_numeric(df["data_value"], errors="coerce")
+
+        wide = df.pivot_table(index="locationid", columns="measureid", values="data_value", aggfunc="first")
+        wide = wide.sort_index().sort_index(axis=1)
+        info = df.drop_duplicates("locationid").set_index("locationid").reindex(wide.index)
+        return cls(
+            geo,
+            wide.index.to_numpy(dtype=str),
+            info["locationname"].fillna("").to_numpy(dtype=str),
+            info["stateabbr"].fillna("").to_numpy(dtype=str),
+            wide.columns.to_numpy(dtype=str),
+            wide.to_numpy(dtype=np.float32),
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the matrix to a compressed .npz file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, geo=np.asarray(self.geo), ids=self.ids, names=self.names,
+                            states=self.states, measures=self.measures, values=self.values)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureMatrix":
+        """Reads a matrix written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(str(data["geo"]), data["ids"], data["names"], data["states"], data["measures"], data["values"])
+
+    def location(self, position: int) -> dict:
+        """Returns the descriptive fields of the location in a row."""
+        return {
+            "locationid": str(self.ids[position]),
+            "locationname": str(self.names[position]),
+            "stateabbr": str(self.states[position]),
+        }
+
+    def position(self, locationid: str):
+        """Returns the row of a location ID, or None."""
+        return self._positions.get(str(locationid).strip())
+
+    @property
+    def index(self) -> LocationIndex:
+        """A name index over the locations in this matrix, built on first access (see build_index)."""
+        if self._index is None:
+            self.build_index()
+        return self._index
+
+    @property
+    def has_index(self) -> bool:
+        """Whether the name index has been built."""
+        return self._index is not None
+
+    def build_index(self) -> LocationIndex:
+        """
+        Builds the name index over the locations in this matrix.
+
+        Building it takes about a second for every census place, so loaders call
+        this on a worker thread (or before workers fork) rather than on first use.
+
+        Returns:
+            LocationIndex: The complete index.
+        """
+        index = LocationIndex(self.geo)
+        index.add(self.location(i) for i in range(len(self)))
+        index.complete = True
+        self._index = index
+        return index
+
+    @classmethod
+    def load_indexed(cls, path: str) -> "FeatureMatrix":
+        """Reads a matrix written by save() and builds its name index."""
+        matrix = cls.load(path)
+        matrix.build_index()
+        return matrix
+
+    def neighbours(self, position: int, k: int = 10, measures=None, states=None) -> list:
+        """
+        Finds the locations with the most similar measure profile.
+
+        Distance is the root-mean-square difference of z-scores over the
+        measures the target location reports.
+
+        Args:
+            position (int): Row of the target location.
+            k (int): Number of neighbours to return.
+            measures (list): Optional measure IDs to compare on; all by default.
+            states (set): Optional two-letter state abbreviations candidates must be in.
+
+        Returns:
+            list: (row, distance) tuples, nearest first, excluding the target.
+        """
+        columns = np.flatnonzero(~np.isnan(self.values[position]))
+        if measures:
+            columns = columns[np.isin(self.measures[columns], list(measures))]
+        if not len(columns):
+            return []
+
+        block = self.scaled[:, columns]
+        diff = block - block[position]
+        distances = np.sqrt(np.einsum("ij,ij->i", diff, diff) / len(columns))
+        distances[position] = np.inf
+        if states:
+            distances[~np.isin(self.states, list(states))] = np.inf
+
+        candidates = int(np.isfinite(distances).sum())
+        k = min(k, candidates)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(int(i), float(distances[i])) for i in nearest]
+
+
+def matrix_path(geo: str, release_name: str, datavaluetypeid: str) -> str:
+    """Returns the file a feature matrix is stored in."""
+    return os.path.join(FEATURE_MATRIX_DIR, f"{geo}_{release_name}_{datavaluetypeid}.npz")
+
+
+def read_csv_export(path: str, datavaluetypeid: str) -> pd.DataFrame:
+    """
+    Reads the rows of one value type from a PLACES CSV export.
+
+    Args:
+        path (str): The downloaded CSV (column names are matched case-insensitively).
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+
+    Returns:
+        DataFrame: Rows with the FEATURE_COLUMNS fields.
+    """
+    wanted = set(FEATURE_COLUMNS) | {"datavaluetypeid"}
+    df = pd.read_csv(path, usecols=lambda col: col.lower() in wanted, dtype=str)
+    df.columns = [col.lower() for col in df.columns]
+    return df[df["datavaluetypeid"] == datavaluetypeid].reindex(columns=FEATURE_COLUMNS)
+
+
+async def fetch_feature_records(geo: str, release_name: str, datavaluetypeid: str):
+    """
+    Pulls every measure of a release for one value type, paging through the dataset.
+
+    Args:
+        geo (str): The geographic level.
+        release_name (str): The data release (e.g., 'places_release_2025').
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+
+    Returns:
+        list: All rows, or None if the release has no dataset for the geo or a page failed.
+    """
+    url = API_ENDPOINTS.get(geo, {}).get(release_name)
+    if not url:
+        return None
+    records = []
+    while True:
+        page = await _fetch_api(url, {
+            "$select": ",".join(FEATURE_COLUMNS),
+            "$where": soql_in("datavaluetypeid", [datavaluetypeid]),
+            "$order": "locationid,measureid",
+            "$limit": QUERY_ROW_LIMIT,
+            "$offset": len(records),
+        })
+        if page is None:
+            return None
+        records.extend(page)
+        if len(page) < QUERY_ROW_LIMIT:
+            return records
+
+
+async def get_feature_matrix(geo: str, release_name: str, datavaluetypeid: str):
+    """
+    Returns the feature matrix for a geo, release and value type.
+
+    The matrix is read from FEATURE_MATRIX_DIR, or, for geos in
+    FEATURE_MATRIX_BUILD_GEOS, built from upstream and saved on first use.
+
+    Args:
+        geo (str): 'county' or 'places'.
+        release_name (str): The data release (e.g., 'places_release_2025').
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+
+    Returns:
+        FeatureMatrix: The matrix, or None if none is available.
+    """
+    path = matrix_path(geo, release_name, datavaluetypeid)
+
+    async def load():
+        if os.path.exists(path):
+            return await asyncio.to_thread(FeatureMatrix.load_indexed, path)
+        if geo not in FEATURE_MATRIX_BUILD_GEOS:
+            return None
+        records = await fetch_feature_records(geo, release_name, datavaluetypeid)
+        if not records:
+            return None
+        matrix = await asyncio.to_thread(FeatureMatrix.from_records, geo, records)
+        await asyncio.to_thread(matrix.build_index)
+        try:
+            await asyncio.to_thread(matrix.save, path)
+        except OSError as e:
+            logger.warning("Could not save feature matrix to %s: %s", path, e)
+        return matrix
+
+    return await feature_matrix_cache.get_or_load((geo, release_name, datavaluetypeid), load)
+
+
+def load_feature_matrices() -> list:
+    """
+    Loads the matrices found in FEATURE_MATRIX_DIR into memory, newest releases first.
+
+    Used to load matrices, with their name indexes, once in the parent process before workers fork; at
+    most FEATURE_MATRIX_CACHE_SIZE matrices are kept.
+
+    Returns:
+        list: The (geo, release_name, datavaluetypeid) keys loaded.
+    """
+    if not os.path.isdir(FEATURE_MATRIX_DIR):
+        return []
+    keys = []
+    for filename in os.listdir(FEATURE_MATRIX_DIR):
+        geo, _, rest = filename.removesuffix(".npz").partition("_")
+        release_name, _, datavaluetypeid = rest.rpartition("_")
+        if filename.endswith(".npz") and geo in FEATURE_GEOS and release_name:
+            keys.append((geo, release_name, datavaluetypeid))
+    keys.sort(key=lambda key: key[1], reverse=True)
+
+    loaded = []
+    for key in keys[:feature_matrix_cache.maxsize]:
+        start = time.perf_counter()
+        matrix = FeatureMatrix.load_indexed(matrix_path(*key))
+        if feature_matrix_cache.set(key, matrix, cost=time.perf_counter() - start):
+            loaded.append(key)
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a CDC PLACES feature matrix for similar-place queries.")
+    parser.add_argument("--geo", choices=FEATURE_GEOS, required=True)
+    parser.add_argument("--release", required=True, help="Release name, e.g. places_release_2025")
+    parser.add_argument("--datavaluetypeid", choices=["CrdPrv", "AgeAdjPrv"], default="AgeAdjPrv")
+    parser.add_argument("--csv", help="PLACES CSV export to build from instead of the API")
+    parser.add_argument("--output", help="Output .npz path (default: the server's matrix path)")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        records = read_csv_export(args.csv, args.datavaluetypeid)
+    else:
+        records = asyncio.run(fetch_feature_records(args.geo, args.release, args.datavaluetypeid))
+    if records is None or len(records) == 0:
+        raise SystemExit("No rows found for the requested release and value type")
+
+    matrix = FeatureMatrix.from_records(args.geo, records)
+    path = args.output or matrix_path(args.geo, args.release, args.datavaluetypeid)
+    matrix.save(path)
+    print(f"Wrote {len(matrix)} locations x {len(matrix.measures)} measures to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Local location-name resolution for CDC PLACES queries.
+
+Upstream filters on ``locationname`` are exact, so "Worcester County",
+"st. louis" or a typo return nothing after a full round trip. This module
+keeps an in-memory index of locations per geographic level and resolves
+user-supplied names to canonical ``locationid``s before any data query:
+
+- exact matches go through a hash of normalized names
+  ("St. Louis County" -> "st louis"),
+- everything else is scored against a trigram inverted index and either
+  auto-corrected (one clear winner) or returned as suggestions.
+
+An index is filled from snapshot files (``<geo>.csv`` or ``<geo>.json`` in
+``PLACES_LOCATION_SNAPSHOT_DIR``), from a one-time pull of the distinct
+locations in the latest release (for the geos in
+``PLACES_LOCATION_INDEX_BOOTSTRAP_GEOS``), and from rows seen in responses.
+Only snapshot or bootstrap loads make an index complete. An incomplete index
+(always the case for tract and zcta, which are too large to bootstrap) may
+hold only some of the locations sharing a name, or a near-miss of the one
+asked for, so until it is complete names go to the upstream filter unchanged.
+
+An index describes the latest release of its geo. Location names and IDs
+change between releases (e.g. Connecticut's counties became planning regions),
+so names in queries against older releases are not resolved locally: they are
+sent upstream as a ``locationname`` filter, and rows from older releases are
+not added to the index.
+"""
+
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+
+from places.config import (
+    API_ENDPOINTS,
+    LOCATION_FUZZY_ACCEPT_SCORE,
+    LOCATION_FUZZY_MIN_SCORE,
+    LOCATION_INDEX_BOOTSTRAP_GEOS,
+    LOCATION_INDEX_RETRY_SECONDS,
+    LOCATION_SNAPSHOT_DIR,
+    QUERY_ROW_LIMIT,
+)
+from places.utils import _fetch_api, soql_in
+
+# Suffixes dropped during normalization so "Wayne County" matches "Wayne"
+_NAME_SUFFIXES = (
+    " city and borough",
+    " census area",
+    " municipality",
+    " borough",
+    " parish",
+    " county",
+)
+_WORD_REPLACEMENTS = {"saint": "st", "sainte": "ste", "fort": "ft", "mount": "mt", "&": "and"}
+_NON_ALNUM = re.compile(r"[^a-z0-9& ]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a location name for matching.
+
+    Lowercases, strips accents and punctuation, abbreviates common words
+    (saint -> st) and drops county-equivalent suffixes.
+
+    Args:
+        name (str): A location name as typed by a user or returned upstream.
+
+    Returns:
+        str: The normalized name (e.g., "St. Louis County" -> "st louis").
+    """
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii").lower()
+    text = _NON_ALNUM.sub(" ", text.replace(".", "").replace("'", ""))
+    text = " ".join(_WORD_REPLACEMENTS.get(word, word) for word in text.split())
+    for suffix in _NAME_SUFFIXES:
+        if text.endswith(suffix) and len(text) > len(suffix):
+            text = text[: -len(suffix)]
+            break
+    return text
+
+
+def trigrams(text: str) -> set:
+    """Returns the set of character trigrams of a normalized name, padded at word edges."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocationIndex:
+    """
+    Index of the locations for one geographic level.
+
+    Args:
+        geo (str): The geographic level ('county', 'census', 'zcta' or 'places').
+    """
+
+    def __init__(self, geo: str):
+        self.geo = geo
+        self.complete = False
+        self.entries = []
+        self._ids = {}
+        self._exact = {}
+        self._trigrams = {}
+        self._trigram_counts = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, records) -> int:
+        """
+        Adds locations from records with at least locationid and locationname.
+
+        Args:
+            records (list): Rows from a snapshot or an upstream response.
+
+        Returns:
+            int: The number of new locations added.
+        """
+        added = 0
+        for record in records:
+            location_id = record.get("locationid")
+            name = record.get("locationname")
+            if not location_id or not name or str(location_id) in self._ids:
+                continue
+            entry = {"locationid": str(location_id), "locationname": name}
+            for col in ("stateabbr", "countyname"):
+                if record.get(col):
+                    entry[col] = record[col]
+
+            position = len(self.entries)
+            self.entries.append(entry)
+            self._ids[entry["locationid"]] = position
+            normalized = normalize_name(name)
+            self._exact.setdefault(normalized, []).append(position)
+            grams = trigrams(normalized)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(position)
+            added += 1
+        return added
+
+    def _in_state(self, position, states):
+        return states is None or self.entries[position].get("stateabbr", "").upper() in states
+
+    def lookup(self, name: str, states=None) -> list:
+        """
+        Returns the locations whose normalized name or id equals the given name.
+
+        Args:
+            name (str): The location name (or id) to look up.
+            states (set): Optional set of two-letter state abbreviations to restrict to.
+
+        Returns:
+            list: Matching location entries.
+        """
+        position = self._ids.get(str(name).strip())
+        if position is not None and self._in_state(position, states):
+            return [self.entries[position]]
+        return [self.entries[p] for p in self._exact.get(normalize_name(name), []) if self._in_state(p, states)]
+
+    def search(self, name: str, states=None, limit: int = 5, min_score: float = LOCATION_FUZZY_MIN_SCORE) -> list:
+        """
+        Finds locations with names similar to the given name.
+
+        Candidates are scored with the Dice coefficient of their trigram sets.
+
+        Args:
+            name (str): The location name to search for.
+            states (set): Optional set of two-letter state abbreviations to restrict to.
+            limit (int): Maximum number of results.
+            min_score (float): Minimum similarity (0-1) for a result.
+
+        Returns:
+            list: (score, entry) tuples, best first.
+        """
+        grams = trigrams(normalize_name(name))
+        if not grams:
+            return []
+        overlap = Counter()
+        for gram in grams:
+            overlap.update(self._trigrams.get(gram, ()))
+
+        scored = []
+        for position, shared in overlap.items():
+            score = 2 * shared / (len(grams) + self._trigram_counts[position])
+            if score >= min_score and self._in_state(position, states):
+                scored.append((round(score, 3), position))
+        scored.sort(key=lambda item: (-item[0], self.entries[item[1]]["locationname"]))
+        return [(score, self.entries[position]) for score, position in scored[:limit]]
+
+    def resolve(self, names, states=None) -> dict:
+        """
+        Resolves location names to index entries.
+
+        Exact matches are always used. Otherwise the best fuzzy match is accepted
+        when it scores at least LOCATION_FUZZY_ACCEPT_SCORE and clearly beats the
+        runner-up; remaining names are reported with suggestions. Both assume the
+        index holds every location (see resolve_locations).
+
+        Args:
+            names (list): Location names to resolve.
+            states (set): Optional set of two-letter state abbreviations to restrict to.
+
+        Returns:
+            dict: "matches" mapping each resolved name to its entries,
+            "corrections" mapping auto-corrected names to the canonical name,
+            and "unresolved" mapping other names to suggested entries.
+        """
+        result = {"matches": {}, "corrections": {}, "unresolved": {}}
+        for name in names:
+            exact = self.lookup(name, states)
+            if exact:
+                result["matches"][name] = exact
+                continue
+            candidates = self.search(name, states, limit=25)
+            # Same-named locations in different states share a score, so the
+            # margin is measured between distinct names.
+            best_by_name = {}
+            for score, entry in candidates:
+                best_by_name.setdefault(normalize_name(entry["locationname"]), (score, entry))
+            ranked = list(best_by_name.values())
+            if ranked and ranked[0][0] >= LOCATION_FUZZY_ACCEPT_SCORE and (
+                len(ranked) == 1 or ranked[0][0] - ranked[1][0] >= 0.1
+            ):
+                best = ranked[0][1]
+                result["matches"][name] = self.lookup(best["locationname"], states)
+                result["corrections"][name] = best["locationname"]
+                continue
+            result["unresolved"][name] = [entry for _, entry in candidates[:5]]
+        return result
+
+
+# geo -> LocationIndex
+location_indexes = {geo: LocationIndex(geo) for geo in API_ENDPOINTS}
+_load_locks = {}
+_load_failed_at = {}
+
+
+def _read_snapshot(geo: str):
+    for ext in ("csv", "json"):
+        path = os.path.join(LOCATION_SNAPSHOT_DIR, f"{geo}.{ext}")
+        if not os.path.exists(path):
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            if ext == "csv":
+                return list(csv.DictReader(f))
+            return json.load(f)
+    return None
+
+
+def latest_release(geo: str):
+    """Returns the most recent release name with an endpoint for a geo, or None."""
+    releases = sorted(API_ENDPOINTS.get(geo, {}))
+    return releases[-1] if releases else None
+
+
+async def _bootstrap(geo: str):
+    url = API_ENDPOINTS[geo][latest_release(geo)]
+    columns = "locationid,locationname,stateabbr" + (",countyname" if geo == "census" else "")
+    return await _fetch_api(url, {"$select": columns, "$group": columns, "$limit": QUERY_ROW_LIMIT})
+
+
+def load_snapshots() -> list:
+    """
+    Fills the index of every geo that has a snapshot file, without any upstream requests.
+
+    Used to load snapshots once in the parent process before workers fork.
+
+    Returns:
+        list: The geos whose index was loaded.
+    """
+    if not LOCATION_SNAPSHOT_DIR:
+        return []
+    loaded = []
+    for geo, index in location_indexes.items():
+        records = None if index.complete else _read_snapshot(geo)
+        if records:
+            index.add(records)
+            index.complete = True
+            loaded.append(geo)
+    return loaded
+
+
+async def get_location_index(geo: str) -> LocationIndex:
+    """
+    Returns the index for a geo, loading it from a snapshot or upstream on first use.
+
+    Args:
+        geo (str): The geographic level.
+
+    Returns:
+        LocationIndex: The (possibly incomplete) index for the geo.
+    """
+    index = location_indexes[geo]
+    if index.complete or (geo not in LOCATION_INDEX_BOOTSTRAP_GEOS and LOCATION_SNAPSHOT_DIR is None):
+        return index
+
+    failed_at = _load_failed_at.get(geo)
+    if failed_at is not None and time.monotonic() - failed_at < LOCATION_INDEX_RETRY_SECONDS:
+        return index
+
+    lock = _load_locks.setdefault(geo, asyncio.Lock())
+    async with lock:
+        if index.complete:
+            return index
+        records = _read_snapshot(geo) if LOCATION_SNAPSHOT_DIR else None
+        if records is None and geo in LOCATION_INDEX_BOOTSTRAP_GEOS:
+            records = await _bootstrap(geo)
+        if records:
+            index.add(records)
+            index.complete = True
+            _load_failed_at.pop(geo, None)
+        else:
+            _load_failed_at[geo] = time.monotonic()
+    return index
+
+
+def indexed(geo: str, release_name=None) -> bool:
+    """Whether the index for a geo describes a release (None meaning the latest)."""
+    return release_name is None or release_name == latest_release(geo)
+
+
+def record_locations(geo: str, records, release_name=None) -> None:
+    """
+    Adds locations seen in an upstream response to the index for a geo.
+
+    Args:
+        geo (str): The geographic level of the records.
+        records (list): Response rows; rows without locationid are ignored.
+        release_name (str): The release the rows come from; rows of older releases are ignored.
+    """
+    if geo in location_indexes and records and indexed(geo, release_name):
+        location_indexes[geo].add(records)
+
+
+async def resolve_locations(geo: str, locationname, states=None, release_name=None) -> dict:
+    """
+    Resolves user-supplied location names against the index for a geo.
+
+    Args:
+        geo (str): The geographic level.
+        locationname (str | list): Location name(s) as given by the caller.
+        states (set): Optional set of two-letter state abbreviations to restrict to.
+        release_name (str): The release the names will be queried in; names for
+            releases other than the indexed (latest) one are used verbatim.
+
+    Returns:
+        dict: One of
+            {"entries": [...], "corrections": {...}} when every name resolved,
+            {"error": ..., "suggestions": {...}} when some names are unknown to a complete index,
+            {"names": [...]} when the index is incomplete or describes another release,
+            and the names should be used verbatim.
+    """
+    names = [locationname] if isinstance(locationname, str) else list(locationname)
+    if not indexed(geo, release_name):
+        return {"names": names}
+    index = await get_location_index(geo)
+    if not index.complete:
+        # Learned locations only: other places may share a name, and a near-miss may be unseen
+        return {"names": names}
+
+    resolution = index.resolve(names, states)
+    if not resolution["unresolved"]:
+        entries = {entry["locationid"]: entry for matches in resolution["matches"].values() for entry in matches}
+        return {"entries": [entries[key] for key in sorted(entries)], "corrections": resolution["corrections"]}
+    return {
+        "error": f"Unknown location name(s) for geo '{geo}': {', '.join(resolution['unresolved'])}",
+        "suggestions": {
+            name: [entry["locationname"] + (f", {entry['stateabbr']}" if entry.get("stateabbr") else "") for entry in entries]
+            for name, entries in resolution["unresolved"].items()
+        },
+    }
+
+
+async def resolve_location_filter(geo: str, locationname, states=None, release_name=None) -> dict:
+    """
+    Builds the upstream location filter for user-supplied location names.
+
+    Args:
+        geo (str): The geographic level.
+        locationname (str | list): Location name(s) as given by the caller.
+        states (set): Optional set of two-letter state abbreviations to restrict to.
+        release_name (str): The release the filter is for (default: the latest).
+
+    Returns:
+        dict: {"where": "locationid IN (...)"} when the names resolved,
+        {"where": "locationname IN (...)"} when the index cannot decide, or the
+        {"error": ..., "suggestions": ...} result of resolve_locations.
+    """
+    resolved = await resolve_locations(geo, locationname, states, release_name)
+    if "error" in resolved:
+        return resolved
+    if "entries" in resolved:
+        return {"where": soql_in("locationid", [entry["locationid"] for entry in resolved["entries"]])}
+    return {"where": soql_in("locationname", resolved["names"])}
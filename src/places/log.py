@@ -0,0 +1,245 @@
+"""
+Structured, non-blocking logging for the CDC PLACES MCP server.
+
+Modules log through ``logging.getLogger(__name__)`` as usual. Under the
+``places`` logger, records are:
+
+- stamped with the correlation id and tool of the tool call that produced
+  them (``LoggingMiddleware`` sets both per call; the id comes from the
+  ``X-Request-ID`` header when present),
+- sampled when marked as high-volume (``extra=sampled(...)``): one record in
+  every ``PLACES_LOG_SAMPLE_EVERY`` per call site is kept, and carries the
+  sampling rate,
+- put on a bounded queue, then formatted and written to stderr by a listener
+  thread. A full queue drops the record instead of blocking the event loop.
+
+Nothing is written to stdout, which carries the MCP stream under the stdio
+transport. Output is one JSON object per line (``PLACES_LOG_FORMAT=json``,
+default) or plain text (``text``), at ``PLACES_LOG_LEVEL`` (default INFO).
+Debug calls cost a level check when debug is off; guard expensive arguments
+with ``logger.isEnabledFor(logging.DEBUG)``.
+
+The listener is started per worker process by the server lifespan, since
+threads do not survive a fork. Until then, warnings and errors go to stderr
+through the logging module's last-resort handler. The pre-fork supervisor
+(places.serve) logs synchronously, without a listener thread to fork.
+"""
+
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as _Counts
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware
+
+from places.config import LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_EVERY, REQUEST_ID_HEADER
+from places.metrics import Counter
+
+LOG_DROPPED = Counter("places_log_records_dropped_total", "Log records dropped because the log queue was full.")
+
+request_id = contextvars.ContextVar("request_id", default=None)
+current_tool = contextvars.ContextVar("current_tool", default=None)
+
+logger = logging.getLogger(__name__)
+
+_listener = None
+_handler = None
+
+
+def fields(**values) -> dict:
+    """Returns ``extra`` for a record carrying structured fields."""
+    return {"fields": values}
+
+
+def sampled(every: int = LOG_SAMPLE_EVERY, **values) -> dict:
+    """Returns ``extra`` for a high-volume record kept once per ``every`` occurrences of its call site."""
+    return {"fields": values, "sample_every": every}
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the current tool call's correlation id and tool name."""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        record.tool = current_tool.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in every ``sample_every`` records of each logger and message template."""
+
+    def __init__(self):
+        super().__init__()
+        self._counts = _Counts()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        every = getattr(record, "sample_every", 1)
+        if every <= 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts[key]
+            self._counts[key] = count + 1
+        if count % every:
+            return False
+        record.sampled = every
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """A queue handler that drops records when the queue is full instead of blocking."""
+
+    def prepare(self, record):
+        # Merge arguments now (they may change later) but leave formatting to the listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in ("request_id", "tool", "sampled"):
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formats a record as a line of text, with its correlation id and fields."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        context = " ".join(
+            f"{name}={value}"
+            for name, value in (
+                ("request_id", getattr(record, "request_id", None)),
+                ("tool", getattr(record, "tool", None)),
+                ("sampled", getattr(record, "sampled", None)),
+                *(getattr(record, "fields", None) or {}).items(),
+            )
+            if value is not None
+        )
+        return f"{line} [{context}]" if context else line
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None, queue_size: int = LOG_QUEUE_SIZE,
+                      threaded: bool = True):
+    """
+    Routes ``places`` log records through a bounded queue to a listener thread.
+
+    Replaces any configuration made by an earlier call.
+
+    Args:
+        level (str): Minimum level, e.g. 'INFO' or 'DEBUG'.
+        fmt (str): 'json' or 'text'.
+        stream: Output stream; stderr by default.
+        queue_size (int): Records held before new ones are dropped.
+        threaded (bool): When False, records are written synchronously by the
+            calling thread; for processes that fork and run no event loop.
+
+    Returns:
+        QueueListener: The running listener (None when not threaded); stop it to flush queued records.
+    """
+    global _listener, _handler
+    stop_logging()
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(TextFormatter() if fmt == "text" else JSONFormatter())
+    if threaded:
+        records = queue.Queue(maxsize=queue_size)
+        places_handler = DroppingQueueHandler(records)
+    else:
+        places_handler = handler
+    places_handler.addFilter(SamplingFilter())
+    places_handler.addFilter(ContextFilter())
+
+    places_logger = logging.getLogger("places")
+    places_logger.addHandler(places_handler)
+    places_logger.setLevel(level)
+    places_logger.propagate = False
+
+    _handler = places_handler
+    if threaded:
+        _listener = logging.handlers.QueueListener(records, handler)
+        _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Detaches the queue, writes out queued records and stops the listener thread, if running."""
+    global _listener, _handler
+    if _handler is not None:
+        places_logger = logging.getLogger("places")
+        places_logger.removeHandler(_handler)
+        places_logger.setLevel(logging.NOTSET)
+        places_logger.propagate = True
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class LoggingMiddleware(Middleware):
+    """Sets the correlation id and tool name of each tool call for the records it logs."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        supplied = get_http_headers(include={REQUEST_ID_HEADER}).get(REQUEST_ID_HEADER)
+        id_token = request_id.set(supplied or uuid.uuid4().hex[:16])
+        tool_token = current_tool.set(tool)
+        start = time.perf_counter()
+        try:
+            return await call_next(context)
+        finally:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tool call finished", extra=fields(duration_ms=round((time.perf_counter() - start) * 1000, 1)))
+            current_tool.reset(tool_token)
+            request_id.reset(id_token)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Server lifespan: starts the log listener thread, and flushes it at shutdown."""
+    configure_logging()
+    try:
+        yield {}
+    finally:
+        stop_logging()
@@ -0,0 +1,373 @@
+"""
+Prometheus metrics for the CDC PLACES MCP server.
+
+A small dependency-free registry of counters, gauges and histograms,
+rendered in the Prometheus text exposition format by the ``/metrics`` route.
+Recording a sample is a dict lookup and a few additions under a lock, cheap
+enough to leave on in production.
+
+Exported series:
+
+- ``places_tool_calls_total{tool,outcome}``, ``places_tool_duration_seconds{tool}``,
+  ``places_tool_response_bytes{tool}`` and ``places_tool_calls_in_flight{tool}``
+  from ``ToolMetricsMiddleware``,
+- ``places_upstream_requests_total{dataset,status}``,
+  ``places_upstream_duration_seconds{dataset}``,
+  ``places_upstream_response_bytes{dataset}`` and
+  ``places_upstream_requests_in_flight`` from the fetch layer,
+- ``places_cache_*{cache}`` hit, miss, eviction, stale-hit, revalidation,
+  entry, byte and hit-ratio series for every ``TTLCache``, and
+  ``places_cache_budget_bytes``,
+- ``places_event_loop_lag_seconds`` from a sampling task started by the
+  server lifespan.
+
+Each worker process keeps its own registry; scrape every worker, or run one
+worker, for complete numbers.
+"""
+
+import asyncio
+import bisect
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastmcp.server.middleware import Middleware
+
+from places.cache import TTLCache, memory_budget
+
+# Latency buckets in seconds, from cache hits to slow upstream pulls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Size buckets in bytes, 1 KB to 64 MB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+# Event-loop lag buckets in seconds
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Seconds between event-loop lag samples
+LOOP_LAG_INTERVAL = 0.5
+
+# Tool label of calls to names the server has no tool for
+UNKNOWN_TOOL = "unknown"
+
+_lock = threading.Lock()
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        """Returns the child series for the given label values."""
+        child = self._children.get(values)
+        if child is not None:
+            return child
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with _lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def collect(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._child_lines(values, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def _child_lines(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0):
+        with _lock:
+            self.value += amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def _child_lines(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        with _lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with _lock:
+            self.value -= amount
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def _child_lines(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, [("le", _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        position = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            self.counts[position] += 1
+            self.sum += value
+
+
+class Registry:
+    """A set of metrics and collector functions rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric) -> None:
+        self._metrics.append(metric)
+
+    def register_collector(self, collector) -> None:
+        """Adds a function returning exposition lines computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_CALLS = Counter(
+    "places_tool_calls_total", "MCP tool calls by tool and outcome (ok, error, overloaded).", ["tool", "outcome"]
+)
+TOOL_DURATION = Histogram("places_tool_duration_seconds", "MCP tool call latency.", ["tool"])
+TOOL_RESPONSE_BYTES = Histogram(
+    "places_tool_response_bytes", "Size of MCP tool results (text content).", ["tool"], buckets=SIZE_BUCKETS
+)
+TOOL_IN_FLIGHT = Gauge("places_tool_calls_in_flight", "MCP tool calls currently running.", ["tool"])
+
+UPSTREAM_REQUESTS = Counter(
+    "places_upstream_requests_total",
+    "Socrata requests by dataset id and HTTP status (error for no response, not_recorded for a cassette miss).",
+    ["dataset", "status"],
+)
+UPSTREAM_DURATION = Histogram("places_upstream_duration_seconds", "Socrata request latency.", ["dataset"])
+UPSTREAM_RESPONSE_BYTES = Histogram(
+    "places_upstream_response_bytes", "Size of Socrata response bodies.", ["dataset"], buckets=SIZE_BUCKETS
+)
+UPSTREAM_IN_FLIGHT = Gauge("places_upstream_requests_in_flight", "Socrata requests currently in flight.")
+
+EVENT_LOOP_LAG = Gauge("places_event_loop_lag_seconds", "Most recent event-loop scheduling delay.")
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "places_event_loop_lag_distribution_seconds", "Event-loop scheduling delay samples.", buckets=LAG_BUCKETS
+)
+
+
+def _cache_lines() -> list:
+    caches = sorted(TTLCache.instances, key=lambda cache: cache.name)
+    series = [
+        ("places_cache_hits_total", "counter", "Cache lookups that found a live entry.", lambda c: c.hits),
+        ("places_cache_misses_total", "counter", "Cache lookups that found no live entry.", lambda c: c.misses),
+        ("places_cache_evictions_total", "counter", "Entries evicted by the LRU size, TTL or memory budget.",
+         lambda c: c.evictions),
+        ("places_cache_stale_hits_total", "counter", "Lookups served a stale entry while it was revalidated.",
+         lambda c: c.stale_hits),
+        ("places_cache_entries", "gauge", "Entries currently held.", len),
+        ("places_cache_bytes", "gauge", "Estimated bytes retained by the cache's entries.", lambda c: c.bytes),
+        ("places_cache_hit_ratio", "gauge", "Hits divided by lookups since start.",
+         lambda c: c.hits / (c.hits + c.misses) if c.hits + c.misses else 0.0),
+    ]
+    lines = []
+    for name, kind, documentation, value in series:
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{cache.name}"}} {_format_value(value(cache))}' for cache in caches]
+    lines += [
+        "# HELP places_cache_revalidations_total Background refreshes of stale entries by outcome.",
+        "# TYPE places_cache_revalidations_total counter",
+    ]
+    lines += [
+        f'places_cache_revalidations_total{{cache="{cache.name}",outcome="{outcome}"}} {count}'
+        for cache in caches
+        for outcome, count in cache.revalidations.items()
+    ]
+    lines += [
+        "# HELP places_cache_budget_bytes Memory budget shared by all caches.",
+        "# TYPE places_cache_budget_bytes gauge",
+        f"places_cache_budget_bytes {memory_budget.max_bytes}",
+    ]
+    return lines
+
+
+REGISTRY.register_collector(_cache_lines)
+
+
+def dataset_id(url: str) -> str:
+    """Returns the Socrata dataset id of an endpoint URL (e.g. 'swc5-untb')."""
+    return url.rstrip("/").rsplit("/", 1)[-1].removesuffix(".json")
+
+
+async def registered_tool(context):
+    """
+    Returns the name of the tool a call targets, if the server has such a tool.
+
+    Tool names come from the client, so metric labels and per-tool state are
+    only created for registered tools.
+
+    Args:
+        context: The middleware context of a tools/call request.
+
+    Returns:
+        str: The tool name, or None for a name the server does not know.
+    """
+    tool = context.message.name
+    server = context.fastmcp_context.fastmcp if context.fastmcp_context is not None else None
+    if server is not None and await server.get_tool(tool) is None:
+        return None
+    return tool
+
+
+def _result_bytes(result) -> int:
+    return sum(len(getattr(block, "text", "") or "") for block in getattr(result, "content", None) or ())
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Records count, latency, result size and concurrency of every tool call."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = await registered_tool(context) or UNKNOWN_TOOL
+        in_flight = TOOL_IN_FLIGHT.labels(tool)
+        in_flight.inc()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await call_next(context)
+            structured = getattr(result, "structured_content", None)
+            outcome = "ok"
+            if isinstance(structured, dict) and "error" in structured:
+                outcome = "overloaded" if structured.get("overloaded") else "error"
+            TOOL_RESPONSE_BYTES.labels(tool).observe(_result_bytes(result))
+            return result
+        finally:
+            in_flight.dec()
+            TOOL_DURATION.labels(tool).observe(time.perf_counter() - start)
+            TOOL_CALLS.labels(tool, outcome).inc()
+
+
+async def sample_event_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Measures how late the event loop wakes a sleeping task, forever."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Server lifespan: samples event-loop lag while the server runs."""
+    task = asyncio.create_task(sample_event_loop_lag())
+    try:
+        yield {}
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -1,4 +1,7 @@
 from enum import Enum 
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 class MeasureID(str, Enum):
     """Enumeration of health measure IDs from CDC PLACES dataset"""
@@ -59,3 +62,38 @@ class MeasureID(str, Enum):
     LACKTRPT = "LACKTRPT"
     EMOTIONSPT = "EMOTIONSPT"
     LONELINESS = "LONELINESS"
+
+
+class PlacesQuery(BaseModel):
+    """A single CDC PLACES query, with the same fields as get_cdc_places_data"""
+
+    year: str = Field(description="Year of the data release, e.g. '2020'")
+    measureid: MeasureID = Field(description="The health measure identifier")
+    geo: Literal["state", "county", "census", "zcta", "places"] = Field(description="Geographic breakdown level")
+    datavaluetypeid: Literal["CrdPrv", "AgeAdjPrv"] = Field(
+        description="Type of data value to retrieve (e.g. crude prevalence, age-adjusted prevalence)"
+    )
+    locationname: Optional[str | List[str]] = Field(
+        default=None,
+        description="The name of the location (e.g. 'Wayne'). Can be a single string or a list of strings.",
+    )
+    key: Optional[str] = Field(
+        default=None,
+        description="Optional label for this query in the results. Defaults to 'MEASURE:year:geo:datavaluetypeid:location'.",
+    )
+
+    def result_key(self) -> str:
+        """Returns the key this query's result is reported under."""
+        if self.key:
+            return self.key
+        locations = self.locations()
+        location = ",".join(locations) if locations else "*"
+        return f"{self.measureid.value}:{self.year}:{self.geo}:{self.datavaluetypeid}:{location}"
+
+    def locations(self) -> Optional[tuple]:
+        """Returns the requested location names as a sorted tuple, or None for all locations."""
+        if not self.locationname:
+            return None
+        if isinstance(self.locationname, str):
+            return (self.locationname,)
+        return tuple(sorted(set(self.locationname)))
@@ -0,0 +1,65 @@
+"""
+Offloading CPU-heavy work from the event loop.
+
+Decoding a large Socrata response or computing statistics over tens of
+thousands of rows takes hundreds of milliseconds. Run inline, that stalls
+every other session on the worker. ``run_cpu`` sends such work to a small
+thread pool when its input is above a size threshold and runs small inputs
+inline, where a thread hand-off would cost more than the work.
+
+Threads rather than processes: the inputs are decoded Python objects that
+already live in the worker, and pickling them to another process would cost
+about as much as the work itself. The offloaded functions hand the GIL back
+regularly (pure-Python loops, or JSON decoded in chunks; see
+``serialization.loads_rows``), so the event loop keeps getting scheduled
+while they run.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from places.config import OFFLOAD_THREADS
+from places.metrics import Counter
+
+OFFLOADED = Counter("places_offloaded_total", "CPU-heavy stages run on the offload thread pool.", ["stage"])
+
+_executor = None
+
+
+def executor() -> ThreadPoolExecutor:
+    """Returns the offload thread pool, created on first use in each process."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=OFFLOAD_THREADS, thread_name_prefix="places-offload")
+    return _executor
+
+
+async def run_cpu(func, *args, size: int = 0, threshold: int = 0):
+    """
+    Runs a CPU-bound function, on the offload pool when its input is large.
+
+    Args:
+        func: The function to call.
+        *args: Its arguments.
+        size (int): Size of the input (rows, bytes, ...).
+        threshold (int): Inputs at least this large are offloaded.
+
+    Returns:
+        The function's result.
+    """
+    if size < threshold:
+        return func(*args)
+    OFFLOADED.labels(func.__name__).inc()
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor(), context.run, func, *args)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Server lifespan: reads the release lookup table on the pool instead of during the first tool call."""
+    from places.utils import load_release_index
+
+    await run_cpu(load_release_index, size=1, threshold=0)
+    yield {}
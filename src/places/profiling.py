@@ -0,0 +1,276 @@
+"""
+On-demand sampling profiler for tool calls.
+
+Profiling is opt-in: every tool call is profiled when ``PLACES_PROFILE=true``,
+otherwise only calls arriving over HTTP with an ``X-Places-Profile: 1`` header.
+While a profiled call runs, a background thread samples the event-loop
+thread's stack every ``PLACES_PROFILE_INTERVAL`` seconds. A sample counts
+towards the call only when the call's own task is on the stack, so
+concurrent calls do not pollute each other's profiles and time spent awaiting
+upstream shows up as missing samples rather than as CPU. Work offloaded to
+other threads is not sampled.
+
+Each profile is written to ``PLACES_PROFILE_DIR`` as folded stacks
+(``root;caller;callee count`` per line), the input format of ``flamegraph.pl``,
+speedscope and inferno, next to a JSON file naming the tool, its arguments
+and the call's duration. The oldest profiles are deleted beyond
+``PLACES_PROFILE_MAX_FILES`` files or ``PLACES_PROFILE_MAX_MB`` megabytes.
+
+Every tool call, profiled or not, is also timed into a window of recent calls
+served slowest first by ``/debug/slow-calls``. That route needs no
+authentication, so argument values there are cut to
+``SLOW_CALL_ARGUMENT_CHARS`` characters. Calls to names the server has no
+tool for are neither profiled nor recorded.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware
+
+from places.config import (
+    PROFILE_ALL,
+    PROFILE_DIR,
+    PROFILE_HEADER,
+    PROFILE_INTERVAL,
+    PROFILE_MAX_FILES,
+    PROFILE_MAX_MB,
+    PROFILE_MIN_SECONDS,
+    SLOW_CALLS_WINDOW,
+)
+from places.metrics import registered_tool
+
+logger = logging.getLogger(__name__)
+
+recent_calls = deque(maxlen=SLOW_CALLS_WINDOW)
+
+# Longest argument value (JSON-encoded) listed by /debug/slow-calls
+SLOW_CALL_ARGUMENT_CHARS = 200
+
+# Characters replaced in the tool name part of profile file names
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_-]")
+
+_labels = {}
+
+
+def frame_label(code) -> str:
+    """Returns a readable 'qualname (file:line)' label for a code object, without semicolons."""
+    label = _labels.get(code)
+    if label is None:
+        name = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        label = _labels[code] = name.replace(";", ":")
+    return label
+
+
+class Profile:
+    """Stack samples of one tool call, taken while its task runs on the event-loop thread."""
+
+    def __init__(self, tool: str, arguments: dict, frame, thread_id: int):
+        self.tool = tool
+        self.arguments = arguments
+        self.frame = frame
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+
+    def folded(self) -> str:
+        """Returns the samples as folded stacks, root frame first."""
+        return "".join(f"{';'.join(reversed(stack))} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Sampler:
+    """A background thread sampling the stacks of every active profile."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._active[profile.frame] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="places-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.pop(profile.frame, None)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = dict(self._active)
+            threads = {profile.thread_id for profile in active.values()}
+            frames = sys._current_frames()
+            for thread_id in threads:
+                self._sample(frames.get(thread_id), active)
+            del frames
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _sample(frame, active: dict) -> None:
+        stack = []
+        while frame is not None:
+            profile = active.get(frame)
+            if profile is not None:
+                profile.stacks[tuple(stack)] += 1
+                profile.samples += 1
+                return
+            stack.append(frame_label(frame.f_code))
+            frame = frame.f_back
+
+
+sampler = Sampler()
+
+
+def profiling_requested() -> bool:
+    """Whether the current tool call should be profiled (PLACES_PROFILE or the request header)."""
+    if PROFILE_ALL:
+        return True
+    value = get_http_headers(include={PROFILE_HEADER}).get(PROFILE_HEADER, "")
+    return value.lower() in ("1", "true", "yes")
+
+
+def prune_profiles(directory: str, max_files: int = PROFILE_MAX_FILES, max_mb: float = PROFILE_MAX_MB) -> int:
+    """
+    Deletes the oldest profiles beyond the retention limits.
+
+    Args:
+        directory (str): The profile directory.
+        max_files (int): Maximum number of profiles kept.
+        max_mb (float): Maximum megabytes of profiles kept.
+
+    Returns:
+        int: The number of profiles deleted.
+    """
+    entries = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(".folded"):
+                stat = entry.stat()
+                meta = entry.path[: -len(".folded")] + ".json"
+                size = stat.st_size + (os.path.getsize(meta) if os.path.exists(meta) else 0)
+                entries.append((stat.st_mtime, entry.path, meta, size))
+    entries.sort()
+    total = sum(size for *_, size in entries)
+    deleted = 0
+    while entries and (len(entries) > max_files or total > max_mb * 1024 * 1024):
+        _, path, meta, size = entries.pop(0)
+        for name in (path, meta):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def write_profile(profile: Profile, duration: float, started_at: str, directory: str = PROFILE_DIR) -> str:
+    """
+    Writes a profile as folded stacks plus a JSON description, then applies retention.
+
+    Args:
+        profile (Profile): The finished profile.
+        duration (float): Wall-clock duration of the call in seconds.
+        started_at (str): ISO 8601 start time of the call.
+        directory (str): Destination directory, created if missing.
+
+    Returns:
+        str: Path of the folded stacks file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    arguments = json.dumps(profile.arguments, sort_keys=True, default=str)
+    digest = hashlib.sha1(arguments.encode()).hexdigest()[:8]
+    stamp = started_at.replace("-", "").replace(":", "").replace("+0000", "Z")
+    tool = _UNSAFE_FILENAME.sub("_", profile.tool)
+    base = os.path.join(directory, f"{stamp}_{tool}_{digest}")
+    with open(base + ".folded", "w", encoding="utf-8") as f:
+        f.write(profile.folded())
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({
+            "tool": profile.tool,
+            "arguments": profile.arguments,
+            "started_at": started_at,
+            "duration_ms": round(duration * 1000, 1),
+            "samples": profile.samples,
+            "interval_ms": sampler.interval * 1000,
+            "sampled_cpu_ms": round(profile.samples * sampler.interval * 1000, 1),
+        }, f, indent=2, default=str)
+    prune_profiles(directory)
+    return base + ".folded"
+
+
+def truncate_arguments(arguments: dict, max_chars: int = SLOW_CALL_ARGUMENT_CHARS) -> dict:
+    """
+    Shortens long argument values for the recent-call window.
+
+    Args:
+        arguments (dict): The tool call's arguments.
+        max_chars (int): Longest JSON-encoded value kept as is.
+
+    Returns:
+        dict: The arguments, with longer values replaced by their first max_chars
+        JSON characters followed by '...'.
+    """
+    truncated = {}
+    for name, value in arguments.items():
+        text = json.dumps(value, default=str)
+        truncated[name] = value if len(text) <= max_chars else text[:max_chars] + "..."
+    return truncated
+
+
+def slowest_calls(limit: int = 20) -> list:
+    """Returns the slowest calls of the recent-call window, slowest first."""
+    return sorted(recent_calls, key=lambda call: -call["duration_ms"])[:limit]
+
+
+class ProfilingMiddleware(Middleware):
+    """Times every tool call and profiles the ones that ask for it."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = await registered_tool(context)
+        if tool is None:
+            return await call_next(context)
+        arguments = context.message.arguments or {}
+        profile = None
+        if profiling_requested():
+            profile = Profile(tool, arguments, sys._getframe(), threading.get_ident())
+            sampler.add(profile)
+        started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f%z")
+        start = time.perf_counter()
+        try:
+            return await call_next(context)
+        finally:
+            duration = time.perf_counter() - start
+            path = None
+            if profile is not None:
+                sampler.remove(profile)
+                profile.frame = None
+                if duration >= PROFILE_MIN_SECONDS:
+                    try:
+                        path = await asyncio.to_thread(write_profile, profile, duration, started_at, PROFILE_DIR)
+                    except OSError as e:
+                        logger.warning("Could not write profile for %s: %s", tool, e)
+            recent_calls.append({
+                "tool": tool,
+                "arguments": truncate_arguments(arguments),
+                "started_at": started_at,
+                "duration_ms": round(duration * 1000, 1),
+                "profile": path,
+            })
@@ -0,0 +1,131 @@
+"""
+State-level estimates rolled up from the county datasets.
+
+PLACES does not publish a state-level dataset, so state estimates are
+computed server-side as the ``totalpopulation``-weighted mean of the county
+estimates. One county pull per (release, measure, datavaluetypeid) serves
+every state-level question for that measure.
+
+Note that this is a rollup of model-based county estimates, not an official
+CDC state estimate, and the confidence limits are weighted means of the
+county limits rather than true intervals for the state.
+"""
+
+import pandas as pd
+
+from places.config import API_ENDPOINTS, QUERY_ROW_LIMIT, STATE_ROLLUP_CACHE_SIZE
+from places.tracing import span
+from places.utils import _fetch_api, derived_cache, derived_revalidation
+
+VALUE_COLUMNS = ["data_value", "low_confidence_limit", "high_confidence_limit"]
+
+STATE_ROLLUP_NOTE = (
+    "State values are totalpopulation-weighted means of county estimates computed by this server, "
+    "not official CDC state estimates."
+)
+
+# (county url, measureid, datavaluetypeid) -> list of state records
+state_rollup_cache = derived_cache("state_rollup", maxsize=STATE_ROLLUP_CACHE_SIZE)
+
+
+def rollup_counties(records: list) -> list:
+    """
+    Aggregates county records into population-weighted state records.
+
+    Args:
+        records (list): County records with stateabbr, statedesc, data_value,
+            confidence limits and totalpopulation.
+
+    Returns:
+        list: One record per state, sorted by stateabbr, with weighted values,
+        the summed totalpopulation and the number of counties used. The state
+        FIPS code (the first two digits of the county locationid) is reported
+        as locationid when available.
+    """
+    df = pd.DataFrame.from_records(records)
+    if df.empty:
+        return []
+
+    weights = pd.to_numeric(df["totalpopulation"], errors="coerce")
+    values = df.reindex(columns=VALUE_COLUMNS).apply(pd.to_numeric, errors="coerce")
+    valid = values["data_value"].notna() & weights.notna() & (weights > 0)
+    values, weights = values[valid], weights[valid]
+
+    # Each column is normalised by the population of the counties that report it.
+    present = values.notna()
+    frame = values.mul(weights, axis=0).fillna(0.0)
+    frame[[f"{col}_weight" for col in VALUE_COLUMNS]] = present.mul(weights, axis=0).to_numpy()
+    frame["totalpopulation"] = weights
+    frame["county_count"] = 1
+    frame[["stateabbr", "statedesc"]] = df.loc[valid, ["stateabbr", "statedesc"]]
+
+    sums = frame.groupby(["stateabbr", "statedesc"], sort=True).sum()
+    for col in VALUE_COLUMNS:
+        sums[col] = (sums[col] / sums[f"{col}_weight"].where(sums[f"{col}_weight"] > 0)).round(1)
+    sums = sums.reset_index()
+    sums["locationname"] = sums["statedesc"]
+    if "locationid" in df.columns:
+        state_fips = df.loc[valid, "locationid"].astype(str).str[:2].groupby(df.loc[valid, "stateabbr"]).first()
+        sums["locationid"] = sums["stateabbr"].map(state_fips)
+    else:
+        sums["locationid"] = None
+    sums["totalpopulation"] = sums["totalpopulation"].astype("int64")
+
+    columns = ["stateabbr", "statedesc", "locationid", "locationname", *VALUE_COLUMNS, "totalpopulation", "county_count"]
+    sums = sums[columns].astype(object).where(sums[columns].notna(), None)
+    return sums.to_dict(orient="records")
+
+
+async def get_state_estimates(release_name: str, measureid: str, datavaluetypeid: str):
+    """
+    Returns state-level estimates for a measure, computing them on first use.
+
+    Args:
+        release_name (str): The data release (e.g., 'places_release_2025').
+        measureid (str): The measure ID (e.g., 'CSMOKING').
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+
+    Returns:
+        list: One record per state, or None if the county data could not be fetched.
+    """
+    url = API_ENDPOINTS["county"].get(release_name)
+    if not url:
+        return None
+
+    async def load():
+        records = await _fetch_api(url, {
+            "measureid": measureid,
+            "datavaluetypeid": datavaluetypeid,
+            "$select": "stateabbr,statedesc,locationid,data_value,low_confidence_limit,high_confidence_limit,totalpopulation",
+            "$limit": QUERY_ROW_LIMIT,
+        })
+        if records is None:
+            return None
+        with span("places.compute.state_rollup", {"places.rows": len(records)}):
+            return rollup_counties(records)
+
+    return await state_rollup_cache.get_or_load((url, measureid, datavaluetypeid), load, **derived_revalidation(url, load))
+
+
+def filter_states(states: list, locationname=None, locationid=None) -> list:
+    """
+    Selects states by name, abbreviation (case-insensitive) or FIPS code.
+
+    Args:
+        states (list): State records from get_state_estimates.
+        locationname (str | list): State name(s) or two-letter abbreviation(s).
+        locationid (str | list): Two-digit state FIPS code(s).
+
+    Returns:
+        list: The matching state records; all states if neither filter is given.
+    """
+    if not locationname and not locationid:
+        return states
+    names = [locationname] if isinstance(locationname, str) else list(locationname or [])
+    ids = [locationid] if isinstance(locationid, str) else list(locationid or [])
+    wanted = {name.strip().lower() for name in names}
+    wanted_ids = {str(i).strip().zfill(2) for i in ids}
+    return [
+        s for s in states
+        if s["stateabbr"].lower() in wanted or s["statedesc"].lower() in wanted or s.get("locationid") in wanted_ids
+    ]
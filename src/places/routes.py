@@ -1,10 +1,46 @@
 from fastmcp import FastMCP
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import PlainTextResponse
+from places.cache import memory_budget
+from places.metrics import REGISTRY
+from places.profiling import recent_calls, slowest_calls
+from places.serialization import JSONResponse
+from places.warmup import readiness
+from places.watchdog import recent_blocks
 
 def register_routes(mcp: FastMCP) -> None:
 
     # Health check endpoint
     @mcp.custom_route("/health", methods=["GET"])
     async def health_check(request: Request) -> JSONResponse:
-        return JSONResponse({"status": "healthy", "service": "nih-reporter-mcp-server"})
\ No newline at end of file
+        return JSONResponse({"status": "healthy", "service": "cdc-places-mcp-server"})
+
+    # Readiness endpoint: 503 until the startup cache warm-up has finished
+    @mcp.custom_route("/ready", methods=["GET"])
+    async def readiness_check(request: Request) -> JSONResponse:
+        report = readiness()
+        return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+    # Prometheus metrics
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    # Slowest tool calls of the recent-call window, with their profiles when recorded
+    @mcp.custom_route("/debug/slow-calls", methods=["GET"])
+    async def slow_calls(request: Request) -> JSONResponse:
+        try:
+            limit = int(request.query_params.get("limit", "20"))
+        except ValueError:
+            return JSONResponse({"error": "limit must be an integer"}, status_code=400)
+        return JSONResponse({"window": len(recent_calls), "calls": slowest_calls(limit)})
+
+    # Cache memory usage against the shared budget
+    @mcp.custom_route("/debug/caches", methods=["GET"])
+    async def cache_usage(request: Request) -> JSONResponse:
+        return JSONResponse(memory_budget.report())
+
+    # Recent event-loop blocks seen by the watchdog (PLACES_WATCHDOG), newest first
+    @mcp.custom_route("/debug/event-loop-blocks", methods=["GET"])
+    async def event_loop_blocks(request: Request) -> JSONResponse:
+        return JSONResponse({"blocks": list(reversed(recent_blocks))})
@@ -0,0 +1,116 @@
+"""
+JSON serialization helpers for the CDC PLACES MCP server.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise, so the server keeps working with only the core dependencies.
+"""
+
+import json
+import re
+
+from mcp.types import TextContent
+from starlette.responses import JSONResponse as _StarletteJSONResponse
+from fastmcp.tools import ToolResult
+
+from places.tracing import set_attributes, span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """
+    Serialize an object to compact UTF-8 JSON bytes.
+
+    Args:
+        obj: Any JSON-compatible object. Unknown types are converted with str().
+
+    Returns:
+        bytes: The encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    """
+    Parse a JSON document from bytes or str.
+
+    Args:
+        data (bytes | str): The encoded JSON document.
+
+    Returns:
+        The decoded Python object.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Boundary between two objects of a top-level JSON array, e.g. '}\n,{'
+_ROW_BOUNDARY = re.compile(rb"\}\s*,\s*\{")
+
+
+def loads_rows(data: bytes, chunk_bytes: int = 512 * 1024):
+    """
+    Parse a JSON array of objects in chunks of about chunk_bytes.
+
+    Each chunk is a separate decoder call, so a thread decoding a large
+    response releases the GIL between chunks. A chunk boundary that falls
+    inside a string leaves that chunk unparseable; the whole document is
+    then decoded in one call instead.
+
+    Args:
+        data (bytes): The encoded JSON document.
+        chunk_bytes (int): Approximate size of each chunk.
+
+    Returns:
+        The decoded Python object.
+    """
+    body = data.strip()
+    if len(body) <= chunk_bytes or not (body.startswith(b"[") and body.endswith(b"]")):
+        return loads(data)
+    rows = []
+    start, end = 1, len(body) - 1
+    try:
+        while start < end:
+            boundary = _ROW_BOUNDARY.search(body, start + chunk_bytes, end)
+            stop = boundary.start() + 1 if boundary else end
+            rows.extend(loads(b"[" + body[start:stop] + b"]"))
+            start = boundary.end() - 1 if boundary else end
+    except ValueError:
+        return loads(data)
+    return rows
+
+
+class JSONResponse(_StarletteJSONResponse):
+    """Starlette JSON response rendered with the fast serializer."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def tool_result(payload) -> ToolResult:
+    """
+    Wrap a tool payload in a ToolResult with pre-serialized text content.
+
+    Large list results are the common case for data tools, so the JSON text is
+    produced once here instead of going through the generic serializer. Dict
+    payloads are also attached as structured content, matching what FastMCP
+    does for plain dict return values.
+
+    Args:
+        payload: The JSON-compatible tool output.
+
+    Returns:
+        ToolResult: The result to return from the tool function.
+    """
+    with span("places.serialize") as current:
+        text = TextContent(type="text", text=dumps(payload).decode("utf-8"))
+        set_attributes(current, {"places.bytes": len(text.text)})
+    if isinstance(payload, dict):
+        return ToolResult(content=[text], structured_content=payload)
+    return ToolResult(content=[text])
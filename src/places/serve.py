@@ -0,0 +1,134 @@
+"""
+Pre-fork HTTP server for multi-worker deployments.
+
+``uvicorn --workers`` starts each worker as a fresh interpreter, so every
+worker imports pandas, numpy and fastmcp and loads the lookup index and
+snapshots on its own. This launcher instead builds the app and loads the
+immutable data once in the parent process, moves those objects out of the
+garbage collector's reach with ``gc.freeze()``, binds the listening socket and
+forks ``WEB_CONCURRENCY`` workers. The workers share the parent's pages
+copy-on-write and only pay for what they allocate after the fork.
+
+    PYTHONPATH=src python -m places.serve
+
+The parent restarts workers that exit unexpectedly and forwards SIGTERM /
+SIGINT to them for a graceful shutdown.
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from places.app import app
+from places.config import WEB_CONCURRENCY
+from places.features import load_feature_matrices
+from places.locations import load_snapshots
+from places.log import configure_logging, fields, stop_logging
+from places.utils import load_release_index
+
+logger = logging.getLogger(__name__)
+
+
+def preload() -> dict:
+    """
+    Loads the immutable data every worker needs and freezes it for sharing.
+
+    Returns:
+        dict: What was loaded, for the startup log.
+    """
+    loaded = {
+        "measures": len(load_release_index()),
+        "location_snapshots": load_snapshots(),
+        "feature_matrices": len(load_feature_matrices()),
+    }
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Binds the listening socket shared by all workers."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, lifespan="on", log_level=os.getenv("PLACES_LOG_LEVEL", "info").lower())
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(sock)
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            code = 1
+            logger.exception("Worker failed", extra=fields(pid=os.getpid()))
+        finally:
+            # Write out records still queued before the process ends without cleanup
+            stop_logging()
+            os._exit(code)
+    return pid
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = WEB_CONCURRENCY) -> None:
+    """
+    Runs the HTTP server with pre-forked workers sharing preloaded data.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on.
+        workers (int): Number of worker processes.
+    """
+    # No listener thread in the parent: it would be forked into every worker
+    configure_logging(threaded=False)
+    sock = bind_socket(host, port)
+    loaded = preload()
+    logger.info("Starting workers", extra=fields(workers=workers, host=host, port=port, parent_pid=os.getpid(), **loaded))
+
+    children = {_spawn(sock) for _ in range(max(1, workers))}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning("Worker exited; restarting", extra=fields(pid=pid, exit_code=os.waitstatus_to_exitcode(status)))
+            time.sleep(1)
+            children.add(_spawn(sock))
+    sock.close()
+
+
+if __name__ == "__main__":
+    port = int(os.getenv("PORT") or os.getenv("DATABRICKS_APP_PORT") or (sys.argv[1] if len(sys.argv) > 1 else 8000))
+    serve(port=port)
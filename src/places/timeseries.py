@@ -0,0 +1,139 @@
+"""
+Multi-release time series for CDC PLACES measures.
+
+Each BRFSS year of a measure is published in a different release dataset.
+The releases for a measure are resolved from the lookup index, fetched
+concurrently, and the rows are aligned by ``locationid`` into one compact
+series per location.
+"""
+
+import asyncio
+
+from places.config import BATCH_MAX_CONCURRENCY, QUERY_ROW_LIMIT
+from places.locations import resolve_location_filter
+from places.utils import get_endpoint_for_geo, get_years_for_measure, _fetch_api, soql_in
+
+# Columns of each point in a series, in order
+SERIES_COLUMNS = ["year", "data_value", "low_confidence_limit", "high_confidence_limit"]
+
+# Descriptive columns kept once per location
+LOCATION_COLUMNS = {
+    "county": ["stateabbr", "locationname"],
+    "census": ["stateabbr", "countyname", "locationname"],
+    "zcta": ["locationname"],
+    "places": ["stateabbr", "locationname"],
+}
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def align_series(geo: str, rows_by_year: dict) -> list:
+    """
+    Aligns rows from several releases into one series per location.
+
+    Args:
+        geo (str): The geographic level of the rows.
+        rows_by_year (dict): Maps each data year to the records fetched for it.
+
+    Returns:
+        list: One dict per location with its descriptive columns and a "series"
+        of [year, data_value, low_confidence_limit, high_confidence_limit] points
+        sorted by year. Locations are ordered by locationid.
+    """
+    locations = {}
+    for year in sorted(rows_by_year):
+        for row in rows_by_year[year]:
+            location_id = row.get("locationid") or row.get("locationname")
+            entry = locations.get(location_id)
+            if entry is None:
+                entry = {"locationid": location_id}
+                entry.update({col: row.get(col) for col in LOCATION_COLUMNS[geo]})
+                entry["series"] = []
+                locations[location_id] = entry
+            entry["series"].append([
+                year,
+                _to_float(row.get("data_value")),
+                _to_float(row.get("low_confidence_limit")),
+                _to_float(row.get("high_confidence_limit")),
+            ])
+    return [locations[key] for key in sorted(locations)]
+
+
+async def fetch_time_series(measureid: str, geo: str, datavaluetypeid: str, locationnames: list,
+                            start_year=None, end_year=None,
+                            max_concurrency: int = BATCH_MAX_CONCURRENCY) -> dict:
+    """
+    Fetches every available year of a measure for the given locations.
+
+    Args:
+        measureid (str): The measure ID (e.g., 'CSMOKING').
+        geo (str): The geographic level ('county', 'census', 'zcta' or 'places').
+        datavaluetypeid (str): 'CrdPrv' or 'AgeAdjPrv'.
+        locationnames (list): Location names to include.
+        start_year (str): Optional first data year to include.
+        end_year (str): Optional last data year to include.
+        max_concurrency (int): Maximum number of releases fetched at once.
+
+    Returns:
+        dict: "years" with the release used for each year, "columns" describing
+        series points, "locations" with one series per location, and "errors"
+        for releases that could not be fetched. Location names unknown to the
+        location index that no release returns rows for give an "error" with
+        "suggestions" instead.
+    """
+    years = [
+        (year, release_name)
+        for year, release_name in get_years_for_measure(measureid, geo)
+        if (start_year is None or int(year) >= int(start_year))
+        and (end_year is None or int(year) <= int(end_year))
+    ]
+    if not years:
+        return {"error": f"No data releases found for measure {measureid} at geo '{geo}' in the requested years"}
+
+    # Names resolve to IDs only in the release the location index describes;
+    # older releases are filtered by name, since IDs and names can change.
+    filters = {}
+    unknown = None
+    for _, release_name in years:
+        location_filter = await resolve_location_filter(geo, locationnames, release_name=release_name)
+        if "error" in location_filter:
+            # The names may exist only in older releases: report them only if no release has them
+            unknown = location_filter
+            location_filter = {"where": soql_in("locationname", locationnames)}
+        filters[release_name] = location_filter["where"]
+
+    select = ",".join(["locationid", *LOCATION_COLUMNS[geo], *SERIES_COLUMNS[1:]])
+    where = " AND ".join([
+        soql_in("measureid", [measureid]),
+        soql_in("datavaluetypeid", [datavaluetypeid]),
+    ])
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_year(year, release_name):
+        url = get_endpoint_for_geo(geo, release_name)
+        params = {"$select": select, "$where": f"{where} AND {filters[release_name]}", "$limit": QUERY_ROW_LIMIT}
+        async with semaphore:
+            return year, await _fetch_api(url, params)
+
+    rows_by_year = {}
+    errors = {}
+    for year, rows in await asyncio.gather(*(fetch_year(year, release) for year, release in years)):
+        if rows is None:
+            errors[year] = "No data returned from API"
+        else:
+            rows_by_year[year] = rows
+
+    if unknown is not None and not any(rows_by_year.values()):
+        return unknown
+
+    return {
+        "years": {year: release_name for year, release_name in years},
+        "columns": SERIES_COLUMNS,
+        "locations": align_series(geo, rows_by_year),
+        "errors": errors,
+    }
@@ -5,7 +5,15 @@ This module provides tools for querying the CDC PLACES API.
 Each tool is defined in its own file for better organization and maintainability.
 """
 
-from places.tools import get_cdc_places_data, area_summary_stats
+from places.admission import AdmissionMiddleware
+from places.tools import (
+    get_cdc_places_data,
+    area_summary_stats,
+    batch_cdc_places_data,
+    get_cdc_places_time_series,
+    find_similar_places,
+    correlate_cdc_places_measures,
+)
 
 
 def register_tools(mcp):
@@ -13,6 +21,7 @@ def register_tools(mcp):
     Register all tools with the MCP server.
     
     This function maintains backward compatibility with the original tools.py interface.
+    It also installs admission control, which bounds concurrent and queued calls per tool.
     
     Args:
         mcp: The FastMCP server instance to register tools with.
@@ -20,6 +29,13 @@ def register_tools(mcp):
     # Register individual tools
     get_cdc_places_data.register(mcp)
     area_summary_stats.register(mcp)
+    batch_cdc_places_data.register(mcp)
+    get_cdc_places_time_series.register(mcp)
+    find_similar_places.register(mcp)
+    correlate_cdc_places_measures.register(mcp)
+
+    # Shed load per tool instead of queueing without bound
+    mcp.add_middleware(AdmissionMiddleware())
 
 
 __all__ = ['register_tools']
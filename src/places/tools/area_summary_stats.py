@@ -1,7 +1,7 @@
-from places.utils import get_endpoint_for_geo, get_release_for_year, _fetch_api, compute_summary_stats
+from places.utils import GEO_SCOPES, get_endpoint_for_geo, get_release_for_year, _fetch_api, query_api_chunked, compute_summary_stats, scope_filter
 from places.models import MeasureID
 
-from typing import Annotated, Literal, Optional
+from typing import Annotated, Literal, Optional, List
 
 def register(mcp):
     """Register the area_summary_stats tool with the MCP server."""
@@ -21,16 +21,26 @@ def register(mcp):
         ],
         county: Annotated[
             Optional[str], 
-            "County name (required if geo_scope is 'tracts_in_county'). Use just the county name, e.g. 'Worcester'."
+            "County name (required if geo_scope is 'tracts_in_county' and county_fips is not given). Use just the county name, e.g. 'Worcester'."
+        ] = None,
+        county_fips: Annotated[
+            Optional[str],
+            "5-digit county FIPS code, an unambiguous alternative to county for 'tracts_in_county' (e.g. '25027' for Worcester County, MA)"
+        ] = None,
+        locationid: Annotated[
+            Optional[List[str]],
+            "Optional list of location IDs (FIPS codes) to restrict the statistics to, e.g. a set of counties"
         ] = None,
     ):
         """Get summary statistics for a health measure across all areas within a geographic scope.
 
         Supports three scopes:
         - counties_in_state: all counties within a state
-        - tracts_in_county: all census tracts within a county (requires county field)
+        - tracts_in_county: all census tracts within a county (requires county or county_fips)
         - places_in_state: all designated places (cities/CDPs) within a state
 
+        Pass locationid to compute statistics over an explicit subset of areas within the scope.
+
         Returns count, mean, min, Q1, median, Q3, and max. Point statistics (min, median, max)
         include the corresponding location name.
 
@@ -38,16 +48,11 @@ def register(mcp):
             dict: Summary statistics with location attribution for point values.
         """
         # Validate county requirement for tracts_in_county
-        if geo_scope == "tracts_in_county" and not county:
-            return {"error": "county parameter is required when geo_scope is 'tracts_in_county'"}
+        if geo_scope == "tracts_in_county" and not (county or county_fips):
+            return {"error": "county or county_fips parameter is required when geo_scope is 'tracts_in_county'"}
         
         # Map geo_scope to geo_type
-        geo_type_map = {
-            "counties_in_state": "county",
-            "tracts_in_county": "census",
-            "places_in_state": "places",
-        }
-        geo_type = geo_type_map[geo_scope]
+        geo_type = GEO_SCOPES[geo_scope]
         
         # Get the release name for the specified measure and year
         release_name = get_release_for_year(measureid.value, year)
@@ -63,33 +68,33 @@ def register(mcp):
         api_params = {
             "measureid": measureid.value,
             "datavaluetypeid": datavaluetypeid,
+            "$where": scope_filter(geo_scope, state_code, county, county_fips),
             "$limit": 100000,
         }
         
         # Add geo-specific parameters
-        if geo_type == "county":
-            api_params["$where"] = f"stateabbr = '{state_code}'"
-            api_params["$select"] = "locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation"
-        elif geo_type == "census":
-            api_params["$where"] = f"stateabbr = '{state_code}' AND countyname = '{county}'"
+        if geo_type == "census":
             api_params["$select"] = "locationname,countyname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation"
-        elif geo_type == "places":
-            api_params["$where"] = f"stateabbr = '{state_code}'"
+        else:
             api_params["$select"] = "locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation"
 
-        # Fetch data from API
-        records = await _fetch_api(url, api_params)
+        # Fetch data from API, as keyed lookups when specific areas were requested
+        if locationid:
+            records = await query_api_chunked(url, api_params, "locationid", locationid)
+        else:
+            records = await _fetch_api(url, api_params)
         if not records:
             return {"error": "No data returned from API"}
 
         # Compute summary statistics
-        stats = compute_summary_stats(records)
+        stats = await compute_summary_stats(records)
 
         return {
             "measure": measureid.value,
             "geo_scope": geo_scope,
             "state": state_code,
             "county": county,
+            "county_fips": county_fips,
             "year": year,
             "datavaluetypeid": datavaluetypeid,
             "stats": stats,
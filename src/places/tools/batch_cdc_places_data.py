@@ -0,0 +1,38 @@
+from typing import Annotated, List
+
+from places.batch import run_batch
+from places.models import PlacesQuery
+from places.serialization import tool_result
+
+
+def register(mcp):
+    """Register the batch_cdc_places_data tool with the MCP server."""
+
+    @mcp.tool()
+    async def batch_cdc_places_data(
+        queries: Annotated[
+            List[PlacesQuery],
+            "List of query specifications, each with the same fields as get_cdc_places_data"
+        ],
+    ):
+        """Fetch data for several CDC PLACES queries (measures, years, geographies) in one call.
+
+        Use this instead of repeated get_cdc_places_data calls when comparing multiple measures,
+        years or locations. Queries that hit the same release dataset are combined into a single
+        upstream request and the rest run concurrently.
+
+        Example of valid parameters comparing smoking and obesity in Wayne County, Michigan, in 2023:
+
+                "queries": [
+                    {"geo": "county", "year": "2023", "measureid": "CSMOKING", "datavaluetypeid": "CrdPrv", "locationname": "Wayne"},
+                    {"geo": "county", "year": "2023", "measureid": "OBESITY", "datavaluetypeid": "CrdPrv", "locationname": "Wayne"}
+                ]
+
+        Returns:
+            dict: "results" keyed by each query's key (or "MEASURE:year:geo:datavaluetypeid:location"),
+            each holding the query and either its "data" rows or an "error".
+        """
+        if not queries:
+            return {"error": "At least one query is required"}
+
+        return tool_result(await run_batch(queries))
@@ -0,0 +1,92 @@
+from typing import Annotated, Literal, Optional
+
+from places.correlation import correlate, fetch_measure_pair
+from places.models import MeasureID
+from places.serialization import tool_result
+from places.tracing import span
+from places.utils import GEO_SCOPES, get_endpoint_for_geo, get_release_for_year, scope_filter
+
+
+def register(mcp):
+    """Register the correlate_cdc_places_measures tool with the MCP server."""
+
+    @mcp.tool()
+    async def correlate_cdc_places_measures(
+        measureid_x: Annotated[MeasureID, "The first health measure (x axis), e.g. 'LPA'"],
+        measureid_y: Annotated[MeasureID, "The second health measure (y axis), e.g. 'OBESITY'"],
+        geo_scope: Annotated[
+            Literal["counties_in_state", "tracts_in_county", "places_in_state", "counties_in_us"],
+            "Set of areas to correlate across"
+        ],
+        year: Annotated[str, "Year of the data (e.g., '2023')"],
+        datavaluetypeid: Annotated[
+            Literal["CrdPrv", "AgeAdjPrv"],
+            "Type of data value to compare (crude prevalence or age-adjusted prevalence)"
+        ],
+        state_code: Annotated[
+            Optional[str],
+            "Two-letter state abbreviation (required unless geo_scope is 'counties_in_us')"
+        ] = None,
+        county: Annotated[Optional[str], "County name, for 'tracts_in_county' (e.g. 'Worcester')"] = None,
+        county_fips: Annotated[Optional[str], "5-digit county FIPS code, for 'tracts_in_county'"] = None,
+        max_outliers: Annotated[int, "Maximum number of outlying locations to list"] = 5,
+    ):
+        """Correlate two health measures across all areas in a geographic scope.
+
+        Both measures are fetched concurrently and joined by location on the server, so only the
+        summary is returned: Pearson r (with 95% confidence interval), Spearman rho, the
+        least-squares line of y on x, and the locations furthest from that line.
+
+        Example of valid parameters for physical inactivity vs. obesity across Ohio counties in 2023:
+
+                "measureid_x":"LPA",
+                "measureid_y":"OBESITY",
+                "geo_scope":"counties_in_state",
+                "state_code":"OH",
+                "year":"2023",
+                "datavaluetypeid":"AgeAdjPrv"
+
+        Returns:
+            dict: Correlation coefficients, regression line and outliers, with the release used for
+            each measure.
+        """
+        if geo_scope != "counties_in_us" and not state_code:
+            return {"error": f"state_code is required when geo_scope is '{geo_scope}'"}
+        if geo_scope == "tracts_in_county" and not (county or county_fips):
+            return {"error": "county or county_fips parameter is required when geo_scope is 'tracts_in_county'"}
+
+        geo = GEO_SCOPES[geo_scope]
+        sources = {}
+        for measure in (measureid_x.value, measureid_y.value):
+            release_name = get_release_for_year(measure, year)
+            if not release_name:
+                return {"error": f"No data release found for measure {measure} in year {year}"}
+            url = get_endpoint_for_geo(geo, release_name)
+            if not url:
+                return {"error": f"No endpoint found for geo type '{geo}' and release '{release_name}'"}
+            sources[measure] = (release_name, url)
+
+        where = scope_filter(geo_scope, state_code, county, county_fips)
+        x_records, y_records = await fetch_measure_pair(
+            (sources[measureid_x.value][1], measureid_x.value),
+            (sources[measureid_y.value][1], measureid_y.value),
+            datavaluetypeid,
+            where,
+        )
+        if x_records is None or y_records is None:
+            return {"error": "No data returned from API"}
+
+        rows = len(x_records["data_value"]) + len(y_records["data_value"])
+        with span("places.compute.correlation", {"places.rows": rows}):
+            result = correlate(x_records, y_records, max_outliers=max(0, max_outliers))
+        result["x"] = {"measure": measureid_x.value, "release": sources[measureid_x.value][0], **result.get("x", {})}
+        result["y"] = {"measure": measureid_y.value, "release": sources[measureid_y.value][0], **result.get("y", {})}
+        return tool_result({
+            "geo_scope": geo_scope,
+            "state": state_code,
+            "county": county,
+            "county_fips": county_fips,
+            "year": year,
+            "datavaluetypeid": datavaluetypeid,
+            **result,
+        })
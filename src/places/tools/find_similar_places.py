@@ -0,0 +1,104 @@
+from typing import Annotated, Literal, Optional, List
+
+import asyncio
+
+from places.features import get_feature_matrix
+from places.locations import latest_release
+from places.models import MeasureID
+from places.serialization import tool_result
+
+
+def register(mcp):
+    """Register the find_similar_places tool with the MCP server."""
+
+    @mcp.tool()
+    async def find_similar_places(
+        geo: Annotated[Literal["county", "places"], "Geographic level to compare"],
+        locationname: Annotated[
+            Optional[str],
+            "Name of the location to find peers for (e.g. 'Wayne'). Use state_code to pick the state."
+        ] = None,
+        locationid: Annotated[Optional[str], "FIPS code / location ID of the location, e.g. '26163'"] = None,
+        state_code: Annotated[Optional[str], "Two-letter state abbreviation of the location, e.g. 'MI'"] = None,
+        release_year: Annotated[
+            Optional[str],
+            "Year of the PLACES release to compare in, e.g. '2025'. Defaults to the latest release."
+        ] = None,
+        datavaluetypeid: Annotated[
+            Literal["CrdPrv", "AgeAdjPrv"],
+            "Type of data value to compare (age-adjusted prevalence is better for comparing areas)"
+        ] = "AgeAdjPrv",
+        measures: Annotated[
+            Optional[List[MeasureID]],
+            "Measures to compare on. Defaults to every measure the location reports."
+        ] = None,
+        within_states: Annotated[
+            Optional[List[str]],
+            "Only return peers in these two-letter state abbreviations"
+        ] = None,
+        k: Annotated[int, "Number of similar locations to return (1-50)"] = 10,
+    ):
+        """Find the counties or places whose health profile across many measures is most similar to a given location.
+
+        Similarity is the root-mean-square difference of standardized (z-score) estimates across
+        the compared measures, so 0 means an identical profile and 1 means a typical difference of
+        one standard deviation per measure.
+
+        Example of valid parameters for the 5 counties most like Wayne County, Michigan:
+
+                "geo":"county",
+                "locationname":"Wayne",
+                "state_code":"MI",
+                "k":5
+
+        Returns:
+            dict: "location" (the target), "release", "measures" compared and "similar" locations,
+            nearest first, each with its "distance".
+        """
+        if not locationname and not locationid:
+            return {"error": "Either locationname or locationid is required"}
+        k = max(1, min(int(k), 50))
+
+        release_name = f"places_release_{release_year}" if release_year else latest_release(geo)
+        matrix = await get_feature_matrix(geo, release_name, datavaluetypeid)
+        if matrix is None:
+            return {"error": f"No feature matrix available for geo '{geo}', release '{release_name}' and {datavaluetypeid}"}
+
+        if locationid:
+            position = matrix.position(locationid)
+            if position is None:
+                return {"error": f"Unknown locationid '{locationid}' for geo '{geo}' in {release_name}"}
+        else:
+            states = {state_code.upper()} if state_code else None
+            index = matrix.index if matrix.has_index else await asyncio.to_thread(matrix.build_index)
+            resolution = index.resolve([locationname], states)
+            entries = resolution["matches"].get(locationname, [])
+            if len(entries) != 1:
+                candidates = entries or resolution["unresolved"].get(locationname, [])
+                return {
+                    "error": f"Location '{locationname}' is {'ambiguous' if entries else 'unknown'}; "
+                             "give state_code or locationid",
+                    "suggestions": [
+                        f"{entry['locationname']}, {entry.get('stateabbr', '')} ({entry['locationid']})"
+                        for entry in candidates
+                    ],
+                }
+            position = matrix.position(entries[0]["locationid"])
+
+        measure_ids = [m.value for m in measures] if measures else None
+        within = {s.upper() for s in within_states} if within_states else None
+        nearest = matrix.neighbours(position, k=k, measures=measure_ids, states=within)
+
+        compared = [m for m in matrix.measures.tolist() if measure_ids is None or m in measure_ids]
+        row = matrix.values[position]
+        profile = {
+            m: round(float(v), 1) for m, v in zip(matrix.measures.tolist(), row.tolist())
+            if m in compared and v == v
+        }
+        return tool_result({
+            "location": {**matrix.location(position), "values": profile},
+            "release": release_name,
+            "datavaluetypeid": datavaluetypeid,
+            "measures": list(profile),
+            "similar": [{**matrix.location(i), "distance": round(d, 3)} for i, d in nearest],
+        })
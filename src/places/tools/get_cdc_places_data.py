@@ -1,6 +1,12 @@
 from typing import Annotated, Literal, Optional, List  
 
-from places.utils import query_api, get_endpoint
+import asyncio
+
+from places.utils import query_api, query_api_chunked, get_endpoint, get_release_for_year, soql_in
+from places.rollup import STATE_ROLLUP_NOTE, filter_states, get_state_estimates
+from places.locations import record_locations, resolve_locations
+from places.serialization import tool_result
+from places.config import SELECT_COLUMNS
 from places.models import MeasureID
 
 
@@ -21,7 +27,11 @@ def register(mcp):
         ],
         locationname: Annotated[
             Optional[str | List[str]], 
-            "The name of the location (e.g., county name). Phrase as just the county name (e.g. 'Worcester', not 'Worcester County'). Can be a single string or a list of strings."
+            "The name of the location (e.g., county name). Phrase as just the county name (e.g. 'Worcester', not 'Worcester County'). For geo 'state', a state name or abbreviation. Can be a single string or a list of strings."
+        ] = None,
+        locationid: Annotated[
+            Optional[str | List[str]],
+            "FIPS code(s) / location ID(s) to fetch directly, e.g. '26163' for Wayne County, MI. County IDs are 5 digits, places 7, census tracts 11, ZCTAs 5 and states 2. Unambiguous and preferred over locationname when known."
         ] = None
     ):
         """Fetch data from the CDC PLACES API for a given measure, geographic breakdown, and year.
@@ -33,9 +43,29 @@ def register(mcp):
                 "measureid":"CSMOKING",
                 "datavaluetypeid":"CrdPrv", 
                 "locationname":"Wayne"
+
+        The same query by FIPS code uses "locationid":"26163" instead of locationname. Long lists of
+        location IDs are split into several upstream requests automatically.
+
+        For geo "state", locationname is a state name or abbreviation (omit it for all states). State values
+        are population-weighted rollups of the county estimates.
+
+        Misspelled location names may be corrected to the closest known name; the result is then
+        {"corrections": {given name: corrected name}, "data": [...]}.
         """
         
+        # State estimates are computed from the county dataset
+        if geo == "state":
+            release_name = get_release_for_year(measureid.value, year)
+            if not release_name:
+                return {"error": f"No data release found for measure {measureid.value} in year {year}"}
+            states = await get_state_estimates(release_name, measureid.value, datavaluetypeid)
+            if states is None:
+                return {"error": f"Could not compute state estimates for measure {measureid.value} from release '{release_name}'"}
+            return tool_result({"note": STATE_ROLLUP_NOTE, "data": filter_states(states, locationname, locationid)})
+
         # Construct the URL for the API query
+        release_name = get_release_for_year(measureid.value, year)
         url = get_endpoint(geo, year, measureid.value)
         
         if not url:
@@ -47,18 +77,41 @@ def register(mcp):
             "datavaluetypeid": datavaluetypeid,
         }
         
+        # Resolve location names to canonical location IDs before querying upstream
+        location_ids = [locationid] if isinstance(locationid, str) else list(locationid or [])
+        unresolved_names = None
+        corrections = {}
         if locationname:
-            api_params["locationname"] = locationname
+            resolved = await resolve_locations(geo, locationname, release_name=release_name)
+            if "error" in resolved:
+                return resolved
+            if "entries" in resolved:
+                location_ids += [entry["locationid"] for entry in resolved["entries"]]
+                corrections = resolved["corrections"]
+            else:
+                unresolved_names = resolved["names"]
         
         # Set parameters based on geography
-        if geo == 'county':
-            api_params["$select"] = 'stateabbr,statedesc,locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation'
-        elif geo == 'census': 
-            api_params["$select"] = 'stateabbr,statedesc,countyname,locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation'
-        elif geo == 'zcta':
-            api_params["$select"] = 'locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation'
-        elif geo == 'places':
-            api_params["$select"] = 'stateabbr,statedesc,locationname,data_value,low_confidence_limit,high_confidence_limit,totalpopulation'
+        if geo in SELECT_COLUMNS:
+            api_params["$select"] = SELECT_COLUMNS[geo]
+
+        # Query the API: keyed lookups by location ID (chunked to respect URL limits),
+        # plus a name filter for any names the local index could not resolve
+        requests = []
+        if location_ids:
+            requests.append(query_api_chunked(url, api_params, "locationid", location_ids))
+        if unresolved_names:
+            requests.append(query_api(url, {**api_params, "$where": soql_in("locationname", unresolved_names)}))
+        if not requests:
+            requests.append(query_api(url, api_params))
+        results = await asyncio.gather(*requests)
+        if any(records is None for records in results):
+            return {"error": "No data returned from API"}
 
-        # Query the API and return the result
-        return await query_api(url, api_params)
+        records = results[0] if len(results) == 1 else list(
+            {record.get("locationid") or id(record): record for records in results for record in records}.values()
+        )
+        record_locations(geo, records, release_name)
+        if corrections:
+            return tool_result({"corrections": corrections, "data": records})
+        return tool_result(records)
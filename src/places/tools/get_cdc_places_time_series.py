@@ -0,0 +1,61 @@
+from typing import Annotated, Literal, Optional, List
+
+from places.timeseries import fetch_time_series
+from places.models import MeasureID
+from places.serialization import tool_result
+
+
+def register(mcp):
+    """Register the get_cdc_places_time_series tool with the MCP server."""
+
+    @mcp.tool()
+    async def get_cdc_places_time_series(
+        measureid: Annotated[MeasureID, "The health measure identifier"],
+        geo: Annotated[
+            Literal["county", "census", "zcta", "places"],
+            "Geographic breakdown level"
+        ],
+        datavaluetypeid: Annotated[
+            Literal["CrdPrv", "AgeAdjPrv"],
+            "Type of data value to retrieve (e.g. crude prevalence, age-adjusted prevalence)"
+        ],
+        locationname: Annotated[
+            str | List[str],
+            "The name of the location (e.g., county name). Phrase as just the county name (e.g. 'Wayne', not 'Wayne County'). Can be a single string or a list of strings."
+        ],
+        start_year: Annotated[Optional[str], "First data year to include, e.g. '2017'"] = None,
+        end_year: Annotated[Optional[str], "Last data year to include, e.g. '2023'"] = None,
+    ):
+        """Fetch every available year of a health measure for one or more locations in a single call.
+
+        Use this for trend questions instead of calling get_cdc_places_data once per year. All
+        release datasets covering the requested years are queried concurrently and the results
+        are aligned by location.
+
+        Example of valid parameters for smoking rates in Wayne County, Michigan, from 2017 to 2023:
+
+                "measureid":"CSMOKING",
+                "geo":"county",
+                "datavaluetypeid":"CrdPrv",
+                "locationname":"Wayne",
+                "start_year":"2017",
+                "end_year":"2023"
+
+        Returns:
+            dict: "years" mapping each data year to its release, "columns" naming the fields of each
+            series point, and "locations" with one series per location (keyed by locationid).
+        """
+        locationnames = [locationname] if isinstance(locationname, str) else list(locationname)
+        if not locationnames:
+            return {"error": "At least one locationname is required"}
+        for name, value in (("start_year", start_year), ("end_year", end_year)):
+            if value is not None and not str(value).strip().isdigit():
+                return {"error": f"{name} must be a year such as '2020', not {value!r}"}
+
+        result = await fetch_time_series(
+            measureid.value, geo, datavaluetypeid, locationnames, start_year=start_year, end_year=end_year
+        )
+        if "error" in result:
+            return result
+
+        return tool_result({"measure": measureid.value, "geo": geo, "datavaluetypeid": datavaluetypeid, **result})
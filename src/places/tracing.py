@@ -0,0 +1,139 @@
+"""
+OpenTelemetry tracing for the CDC PLACES MCP server.
+
+FastMCP already opens a span per MCP request and continues a trace passed in
+the request's ``_meta``. This module adds a span per stage of the tool call
+path underneath it:
+
+- ``places.lookup_release``: resolving the release for a measure and year,
+- ``places.fetch``: a request through the response cache (``places.cache_hit``),
+- ``places.upstream.request``: waiting on data.cdc.gov (dataset id, status, bytes),
+- ``places.upstream.decode``: JSON decoding (rows),
+- ``places.compute.*``: server-side computation (rows in),
+- ``places.serialize``: encoding the tool result (bytes).
+
+``TraceContextMiddleware`` also continues W3C ``traceparent`` headers sent on
+the HTTP transport, so a client whose HTTP calls are instrumented (such as the
+Phoenix eval agent) sees server spans inside its own trace.
+
+Only ``opentelemetry-api`` (a FastMCP dependency) is required, and spans are
+no-ops until a tracer provider is configured. Set ``PLACES_OTEL_ENABLED=true``
+(or ``OTEL_EXPORTER_OTLP_ENDPOINT``) and install the ``otel`` extra to export
+spans over OTLP/HTTP; the exporter reads the standard ``OTEL_EXPORTER_OTLP_*``
+variables. The provider is created per worker process by the server lifespan,
+since exporter threads do not survive a fork.
+"""
+
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "cdc-places-mcp-server"
+
+tracer = trace.get_tracer("places")
+
+# Headers carrying W3C trace context and baggage
+_PROPAGATION_HEADERS = (b"traceparent", b"tracestate", b"baggage")
+
+_provider = None
+
+
+def span(name: str, attributes=None, kind=trace.SpanKind.INTERNAL):
+    """
+    Starts a span as the current span; attributes that are None are skipped.
+
+    Args:
+        name (str): The span name, e.g. 'places.upstream.request'.
+        attributes (dict): Span attributes.
+        kind (SpanKind): The span kind.
+
+    Returns:
+        A context manager yielding the span.
+    """
+    attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+    return tracer.start_as_current_span(name, kind=kind, attributes=attributes)
+
+
+def set_attributes(current_span, attributes: dict) -> None:
+    """Sets the attributes that are not None on a recording span."""
+    if current_span.is_recording():
+        current_span.set_attributes({key: value for key, value in attributes.items() if value is not None})
+
+
+def tracing_enabled() -> bool:
+    """Whether spans should be exported from this process."""
+    flag = os.getenv("PLACES_OTEL_ENABLED")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes")
+    return bool(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") or os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT"))
+
+
+def configure_tracing(exporter=None):
+    """
+    Installs a tracer provider exporting spans in batches.
+
+    Args:
+        exporter: Span exporter to use; by default an OTLP/HTTP exporter configured
+            from the OTEL_EXPORTER_OTLP_* environment variables.
+
+    Returns:
+        The tracer provider, or None if the OpenTelemetry SDK or exporter is not installed.
+    """
+    global _provider
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        if exporter is None:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+    except ImportError as e:
+        logger.warning("Tracing disabled: %s. Install with: pip install -e \".[otel]\"", e)
+        return None
+
+    service_name = os.getenv("OTEL_SERVICE_NAME", SERVICE_NAME)
+    _provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    return _provider
+
+
+class TraceContextMiddleware:
+    """ASGI middleware continuing the W3C trace context of incoming HTTP requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope.get("headers", ())
+            if name in _PROPAGATION_HEADERS
+        }
+        if not carrier:
+            await self.app(scope, receive, send)
+            return
+        token = otel_context.attach(propagate.extract(carrier))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            otel_context.detach(token)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Server lifespan: installs the exporting tracer provider when tracing is enabled."""
+    provider = configure_tracing() if tracing_enabled() and _provider is None else None
+    try:
+        yield {}
+    finally:
+        if provider is not None:
+            provider.force_flush()
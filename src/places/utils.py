@@ -1,14 +1,101 @@
+import asyncio
+import bisect
+import contextvars
+import functools
 import httpx
+import logging
+import operator
+from opentelemetry.trace import SpanKind
 import statistics
 import pandas as pd
 import os
-from places.config import API_ENDPOINTS, LOOKUP_TABLE_PATH
+import time
+from collections import Counter
+from urllib.parse import quote, urlencode
+from places import cassette
+from places.cache import TTLCache, request_key
+from places.config import (
+    API_ENDPOINTS,
+    BATCH_MAX_CONCURRENCY,
+    LOOKUP_TABLE_PATH,
+    MAX_URL_LENGTH,
+    OFFLOAD_MIN_BYTES,
+    OFFLOAD_MIN_ROWS,
+    QUERY_ROW_LIMIT,
+    RESPONSE_CACHE_MAX_ROWS,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    REVALIDATE_AFTER_SECONDS,
+    REVALIDATE_RELEASES,
+)
+from places.log import sampled
+from places.metrics import UPSTREAM_DURATION, UPSTREAM_IN_FLIGHT, UPSTREAM_REQUESTS, UPSTREAM_RESPONSE_BYTES, dataset_id
+from places.offload import run_cpu
+from places.serialization import loads_rows
+from places.tracing import set_attributes, span
+
+logger = logging.getLogger(__name__)
+
+# Record/replay store for upstream responses, when PLACES_CASSETTE_MODE is set
+cassettes = cassette.from_config()
+
+# request_key(url, params) -> decoded upstream response
+response_cache = TTLCache("upstream_responses", maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+# Endpoints of releases that may be republished; their cached responses are revalidated
+revalidated_urls = {
+    endpoints[release] for endpoints in API_ENDPOINTS.values() for release in REVALIDATE_RELEASES if release in endpoints
+}
+
+# Returned by _fetch_upstream when a conditional request finds the response unchanged
+NOT_MODIFIED = object()
+
+# Caches of values computed from upstream responses, keyed by tuples starting with the endpoint URL
+derived_caches = []
+
+# request_key(url, params) -> number of requests in this run, written to the access log
+access_counts = Counter()
+
+# Cleared while warming up so prefetches do not count as demand
+counting_access = contextvars.ContextVar("counting_access", default=True)
+
+def _release_name(column):
+    """
+    Converts a lookup table release column name to a data release name.
+
+    e.g., "PLACES Release 2024" -> "places_release_2024",
+    "500 Cities Release 2019" -> "500cities_release_2019".
+    """
+    if 'PLACES Release' in column:
+        return f"places_release_{column.replace('PLACES Release ', '')}"
+    return f"500cities_release_{column.replace('500 Cities Release ', '')}"
+
+@functools.lru_cache(maxsize=1)
+def load_release_index():
+    """
+    Reads the local lookup table once and indexes it by measure ID.
+
+    Returns:
+        dict: Maps each measure ID to a list of (release_name, year) tuples in
+        lookup table column order. Releases without data for the measure are omitted.
+    """
+    lookup_df = pd.read_csv(LOOKUP_TABLE_PATH)
+    release_columns = [col for col in lookup_df.columns if 'PLACES Release' in col or '500 Cities Release' in col]
+
+    index = {}
+    for _, row in lookup_df.iterrows():
+        index[row['MeasureID']] = [
+            (_release_name(col), str(row[col]))
+            for col in release_columns
+            if str(row[col]).isdigit()
+        ]
+    return index
 
 def get_release_for_year(measureid, year):
     """
     Looks up the name of the data release for a given measure ID and year.
     
-    Uses the local CSV lookup table at docs/places_year_measureid_lookup.csv.
+    Uses the local CSV lookup table at src/places/data/places_year_measureid_lookup.csv.
     
     Args:
         measureid (str): The measure ID to look up (e.g., 'CSMOKING').
@@ -17,44 +104,67 @@ def get_release_for_year(measureid, year):
     Returns:
         str: The name of the data release (e.g., 'places_release_2024') or None if not found.
     """
+    with span("places.lookup_release", {"places.measureid": str(measureid), "places.year": str(year)}) as current:
+        release_name = _find_release(measureid, year)
+        set_attributes(current, {"places.release": release_name})
+        return release_name
+
+def _find_release(measureid, year):
     # Convert year to string for comparison
     year_str = str(year)
     
     try:
-        # Read the local lookup table
-        lookup_df = pd.read_csv(LOOKUP_TABLE_PATH)
+        release_index = load_release_index()
         
-        # Find the row matching the measureid
-        if measureid not in lookup_df['MeasureID'].values:
-            print(f"Measure ID {measureid} not found in the lookup table.")
+        # Find the releases for the measureid
+        if measureid not in release_index:
+            logger.info("Measure ID not found in the lookup table", extra=sampled(measureid=measureid))
             return None
         
-        measure_row = lookup_df[lookup_df['MeasureID'] == measureid].iloc[0]
-        
-        # Search through the PLACES Release columns to find which one contains the year
-        release_columns = [col for col in lookup_df.columns if 'PLACES Release' in col or '500 Cities Release' in col]
-        
-        for col in release_columns:
-            if str(measure_row[col]) == year_str:
-                # Extract the release year from the column name
-                # e.g., "PLACES Release 2024" -> "places_release_2024"
-                if 'PLACES Release' in col:
-                    release_year = col.replace('PLACES Release ', '')
-                    return f"places_release_{release_year}"
-                elif '500 Cities Release' in col:
-                    release_year = col.replace('500 Cities Release ', '')
-                    return f"500cities_release_{release_year}"
+        # Return the first release (in lookup table column order) that contains the year
+        for release_name, release_year in release_index[measureid]:
+            if release_year == year_str:
+                return release_name
         
-        print(f"No data release found for measure {measureid} with year {year_str}")
+        logger.info("No data release found for measure and year", extra=sampled(measureid=measureid, year=year_str))
         return None
         
     except FileNotFoundError:
-        print(f"Lookup table not found at: {LOOKUP_TABLE_PATH}")
+        logger.error("Lookup table not found", extra=sampled(path=LOOKUP_TABLE_PATH))
         return None
-    except Exception as e:
-        print(f"Error reading lookup table: {e}")
+    except Exception:
+        logger.exception("Error reading lookup table", extra=sampled(path=LOOKUP_TABLE_PATH))
         return None
 
+def get_years_for_measure(measureid, geo=None):
+    """
+    Lists every BRFSS data year available for a measure, with the release that provides it.
+
+    Each year maps to the same release get_release_for_year would return, so a
+    time series point always matches the corresponding single-year query.
+
+    Args:
+        measureid (str): The measure ID to look up (e.g., 'CSMOKING').
+        geo (str): Optional geographic level; if given, only releases with an API
+            endpoint for that level are included.
+
+    Returns:
+        list: (year, release_name) tuples sorted by year, or an empty list if the
+        measure is unknown.
+    """
+    try:
+        releases = load_release_index().get(measureid, [])
+    except Exception:
+        logger.exception("Error reading lookup table", extra=sampled(path=LOOKUP_TABLE_PATH))
+        return []
+
+    years = {}
+    for release_name, year in releases:
+        if geo is not None and release_name not in API_ENDPOINTS.get(geo, {}):
+            continue
+        years.setdefault(year, release_name)
+    return sorted(years.items())
+
 def get_endpoint_for_geo(geo, release_name):
     """
     Retrieves the API endpoint for a given geographic level and data release name.
@@ -67,10 +177,10 @@ def get_endpoint_for_geo(geo, release_name):
         str: The API endpoint URL for the specified geographic level and data release.
     """
     if geo not in API_ENDPOINTS:
-        print(f"Geographic level '{geo}' is not supported.")
+        logger.info("Geographic level not supported", extra=sampled(geo=geo))
         return None
     if release_name not in API_ENDPOINTS[geo]:
-        print(f"Data release '{release_name}' is not available for geographic level '{geo}'.")
+        logger.info("Data release not available for geographic level", extra=sampled(geo=geo, release=release_name))
         return None
     return API_ENDPOINTS[geo][release_name]
 
@@ -91,14 +201,173 @@ def get_endpoint(geo: str, year: str, measureid: str):
         return None
     return get_endpoint_for_geo(geo, release_name)
 
-async def _fetch_api(url: str, params: dict):
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, params=params, timeout=30.0)
+async def _fetch_upstream(url: str, params: dict, validators=None):
+    """
+    Requests JSON rows from Socrata, optionally as a conditional request.
+
+    With PLACES_CASSETTE_MODE=replay the response comes from the cassette store
+    instead; with 'record' it is also written there (see places.cassette).
+
+    Args:
+        url (str): The API endpoint URL.
+        params (dict): Dictionary of API parameters.
+        validators (dict): Optional 'etag' / 'last_modified' of a previous response, sent as
+            If-None-Match / If-Modified-Since; replaced with the new response's validators.
+
+    Returns:
+        list: The decoded response, NOT_MODIFIED if the validators still match, or None on failure.
+    """
+    dataset = dataset_id(url)
+    status = "error"
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    UPSTREAM_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        with span("places.upstream.request", {"places.dataset_id": dataset, "url.full": url,
+                                              "places.conditional": bool(headers)},
+                  kind=SpanKind.CLIENT) as current:
+            if cassettes is not None and cassettes.replaying:
+                response = await cassettes.replay(url, params, headers)
+                if response is None:
+                    status = "not_recorded"
+                    raise LookupError(f"No cassette entry for {url} {params}")
+            else:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(url, params=params, headers=headers, timeout=30.0)
+                if cassettes is not None:
+                    await cassettes.record(url, params, response, time.perf_counter() - start)
+            status = str(response.status_code)
+            set_attributes(current, {"http.response.status_code": response.status_code,
+                                     "places.response_bytes": len(response.content)})
+            if response.status_code == 304 and headers:
+                return NOT_MODIFIED
             response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+        UPSTREAM_RESPONSE_BYTES.labels(dataset).observe(len(response.content))
+        with span("places.upstream.decode", {"places.dataset_id": dataset}) as current:
+            rows = await run_cpu(loads_rows, response.content, size=len(response.content), threshold=OFFLOAD_MIN_BYTES)
+            set_attributes(current, {"places.rows": len(rows) if isinstance(rows, list) else None})
+        if validators is not None:
+            validators.clear()
+            for name, header in (("etag", "etag"), ("last_modified", "last-modified")):
+                if header in response.headers:
+                    validators[name] = response.headers[header]
+        return rows
+    except Exception as e:
+        logger.warning("Upstream request failed: %s", e, extra=sampled(dataset=dataset, status=status))
+        return None
+    finally:
+        UPSTREAM_IN_FLIGHT.dec()
+        UPSTREAM_DURATION.labels(dataset).observe(time.perf_counter() - start)
+        UPSTREAM_REQUESTS.labels(dataset, status).inc()
+
+async def _fetch_api(url: str, params: dict):
+    """
+    Fetch JSON rows from the CDC PLACES API, served from the response cache when possible.
+
+    Identical concurrent requests share one upstream call, and responses of
+    up to RESPONSE_CACHE_MAX_ROWS rows are kept for RESPONSE_CACHE_TTL seconds
+    while they fit the cache memory budget. Responses from REVALIDATE_RELEASES
+    older than REVALIDATE_AFTER_SECONDS are still served from the cache while a
+    background conditional request refreshes them.
+
+    Args:
+        url (str): The API endpoint URL.
+        params (dict): Dictionary of API parameters.
+
+    Returns:
+        list: The decoded response (shared with the cache; do not modify), or None on failure.
+    """
+    key = request_key(url, params)
+    if counting_access.get():
+        access_counts[key] += 1
+    with span("places.fetch", {"places.dataset_id": dataset_id(url)}) as current:
+        if RESPONSE_CACHE_SIZE <= 0:
+            rows = await _fetch_upstream(url, params)
+            set_attributes(current, {"places.cache_hit": False})
+            return rows
+
+        loaded = False
+        validators = {}
+
+        async def load():
+            nonlocal loaded
+            loaded = True
+            return await _fetch_upstream(url, params, validators=validators)
+
+        async def revalidate(rows, meta):
+            fresh = await _fetch_upstream(url, params, validators=meta)
+            if fresh is NOT_MODIFIED:
+                return rows
+            if fresh is not None:
+                # Values computed from the old response are recomputed on their next use
+                for cache in derived_caches:
+                    cache.invalidate(lambda key: key[0] == url)
+            return fresh
+
+        rows = await response_cache.get_or_load(
+            key,
+            load,
+            cache_if=lambda rows: not isinstance(rows, list) or len(rows) <= RESPONSE_CACHE_MAX_ROWS,
+            stale_after=REVALIDATE_AFTER_SECONDS if url in revalidated_urls else None,
+            revalidate=revalidate,
+            meta=validators,
+        )
+        set_attributes(current, {"places.cache_hit": not loaded,
+                                 "places.rows": len(rows) if isinstance(rows, list) else None})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetched upstream rows", extra={"fields": {
+                "dataset": dataset_id(url), "cache_hit": not loaded, "rows": len(rows) if isinstance(rows, list) else None,
+            }})
+        return rows
+
+def derived_cache(name: str, maxsize: int) -> TTLCache:
+    """
+    Creates a cache for values computed from upstream responses.
+
+    Entries expire with the responses (RESPONSE_CACHE_TTL) and are dropped
+    when a revalidation of their endpoint's responses finds new content, so
+    keys must be tuples starting with the endpoint URL.
+
+    Args:
+        name (str): The cache name reported in cache statistics.
+        maxsize (int): Maximum number of entries.
+
+    Returns:
+        TTLCache: The cache.
+    """
+    cache = TTLCache(name, maxsize=maxsize, ttl=RESPONSE_CACHE_TTL)
+    derived_caches.append(cache)
+    return cache
+
+def derived_revalidation(url: str, load, equal=operator.eq) -> dict:
+    """
+    Returns get_or_load options revalidating a value computed from an endpoint's responses.
+
+    For endpoints of REVALIDATE_RELEASES, a value older than
+    REVALIDATE_AFTER_SECONDS is served while ``load`` computes it again in the
+    background; an equal result keeps the cached value.
+
+    Args:
+        url (str): The endpoint URL the value is computed from.
+        load: The zero-argument coroutine function that computes the value.
+        equal: Function telling whether a recomputed value equals the cached one.
+
+    Returns:
+        dict: ``stale_after`` and ``revalidate`` options, or none for other endpoints.
+    """
+    if url not in revalidated_urls:
+        return {}
+
+    async def revalidate(value, meta):
+        fresh = await load()
+        return value if fresh is not None and equal(fresh, value) else fresh
+
+    return {"stale_after": REVALIDATE_AFTER_SECONDS, "revalidate": revalidate}
 
 async def query_api(url, api_params: dict):
     """
@@ -113,10 +382,83 @@ async def query_api(url, api_params: dict):
     """
     if api_params is None:
         api_params = {}
-    api_params["$limit"] = 100000
+    api_params["$limit"] = QUERY_ROW_LIMIT
     return await _fetch_api(url, api_params)
 
-def compute_summary_stats(records: list) -> dict:
+def soql_quote(value) -> str:
+    """
+    Quote a value as a SoQL string literal, escaping embedded single quotes.
+
+    Args:
+        value: The value to quote (converted with str()).
+
+    Returns:
+        str: The quoted literal, e.g. "'St. Mary''s'".
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+def soql_in(field: str, values) -> str:
+    """
+    Build a SoQL equality or IN filter for a field.
+
+    Args:
+        field (str): The column name.
+        values (list): One or more values to match.
+
+    Returns:
+        str: "field = 'a'" for a single value, otherwise "field IN ('a', 'b')".
+    """
+    values = list(values)
+    if len(values) == 1:
+        return f"{field} = {soql_quote(values[0])}"
+    return f"{field} IN ({', '.join(soql_quote(v) for v in values)})"
+
+# geo_scope -> geographic level used by the scoped tools
+GEO_SCOPES = {
+    "counties_in_state": "county",
+    "tracts_in_county": "census",
+    "places_in_state": "places",
+    "counties_in_us": "county",
+}
+
+def scope_filter(geo_scope: str, state_code: str, county=None, county_fips=None) -> str:
+    """
+    Build the SoQL $where clause selecting the areas of a geographic scope.
+
+    Args:
+        geo_scope (str): One of the GEO_SCOPES keys.
+        state_code (str): Two-letter state abbreviation.
+        county (str): County name, for 'tracts_in_county'.
+        county_fips (str): 5-digit county FIPS code, for 'tracts_in_county' (preferred over county).
+
+    Returns:
+        str: The filter, e.g. "stateabbr = 'MA' AND countyfips = '25027'", or
+        None for 'counties_in_us'.
+    """
+    if geo_scope == "counties_in_us":
+        return None
+    where = soql_in("stateabbr", [state_code])
+    if geo_scope == "tracts_in_county":
+        county_filter = soql_in("countyfips", [county_fips]) if county_fips else soql_in("countyname", [county])
+        where = f"{where} AND {county_filter}"
+    return where
+
+async def compute_summary_stats(records: list) -> dict:
+    """
+    Computes count, mean, quartiles and the min/median/max locations of records' data values.
+
+    Inputs of OFFLOAD_MIN_ROWS rows or more are processed on the offload thread pool.
+
+    Args:
+        records (list): Rows with data_value and locationname fields.
+
+    Returns:
+        dict: The summary statistics, or an error if no row has a numeric value.
+    """
+    with span("places.compute.summary_stats", {"places.rows": len(records)}):
+        return await run_cpu(_summary_stats, records, size=len(records), threshold=OFFLOAD_MIN_ROWS)
+
+def _summary_stats(records: list) -> dict:
     valid = []
     for r in records:
         try:
@@ -134,7 +476,10 @@ def compute_summary_stats(records: list) -> dict:
     mean_val = statistics.mean(values)
     quartiles = statistics.quantiles(values, n=4)
     median_val = statistics.median(values)
-    median_idx = min(range(n), key=lambda i: abs(values[i] - median_val))
+    # First position of the value closest to the median (values are sorted)
+    above = bisect.bisect_left(values, median_val)
+    closest = min((i for i in (above - 1, above) if 0 <= i < n), key=lambda i: abs(values[i] - median_val))
+    median_idx = bisect.bisect_left(values, values[closest])
 
     def location_info(record):
         info = {"value": float(record["data_value"]), "location": record["locationname"]}
@@ -150,4 +495,70 @@ def compute_summary_stats(records: list) -> dict:
         "median": location_info(valid[median_idx][1]),
         "q3": round(quartiles[2], 2),
         "max": location_info(valid[-1][1]),
-    }
\ No newline at end of file
+    }
+
+def chunk_in_filter(field: str, values, budget: int) -> list:
+    """
+    Split values into groups whose SoQL IN filter fits a URL-encoded size budget.
+
+    Args:
+        field (str): The column name.
+        values (list): Values to match; duplicates are dropped and order is kept.
+        budget (int): Maximum URL-encoded length of each filter clause.
+
+    Returns:
+        list: Lists of values, each small enough for one request.
+    """
+    overhead = len(quote(f"{field} IN ()", safe=""))
+    separator = len(quote(", ", safe=""))
+    chunks, current, size = [], [], overhead
+    for value in dict.fromkeys(str(v) for v in values):
+        cost = len(quote(soql_quote(value), safe="")) + (separator if current else 0)
+        if current and size + cost > budget:
+            chunks.append(current)
+            current, size = [], overhead
+            cost = len(quote(soql_quote(value), safe=""))
+        current.append(value)
+        size += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def query_api_chunked(url, api_params: dict, field: str, values,
+                            max_url_length: int = MAX_URL_LENGTH,
+                            max_concurrency: int = BATCH_MAX_CONCURRENCY):
+    """
+    Query the CDC PLACES API for rows whose field is in a (possibly long) list of values.
+
+    The values are split so every request URL stays under max_url_length, and
+    the requests run concurrently. Any existing $where clause is ANDed with
+    each chunk's IN filter.
+
+    Args:
+        url (str): The API endpoint URL.
+        api_params (dict): Dictionary of API parameters to send with every request.
+        field (str): The column to filter on (e.g., 'locationid').
+        values (list): Values to match.
+        max_url_length (int): Maximum length of a request URL.
+        max_concurrency (int): Maximum number of requests in flight.
+
+    Returns:
+        list: The concatenated records, or None if any request failed.
+    """
+    api_params = dict(api_params or {})
+    api_params["$limit"] = QUERY_ROW_LIMIT
+    base_where = api_params.pop("$where", None)
+    prefix = f"({base_where}) AND " if base_where else ""
+    budget = max_url_length - len(url) - len(urlencode(api_params)) - len("?&%24where=") - len(quote(prefix, safe=""))
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_chunk(chunk):
+        params = {**api_params, "$where": prefix + soql_in(field, chunk)}
+        async with semaphore:
+            return await _fetch_api(url, params)
+
+    results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunk_in_filter(field, values, budget)))
+    if any(records is None for records in results):
+        return None
+    return [record for records in results for record in records]
@@ -0,0 +1,220 @@
+"""
+Startup cache warm-up and readiness for the CDC PLACES MCP server.
+
+When the server starts, a background task fills the upstream response cache
+before agents ask for the data:
+
+- the tool calls declared in ``PLACES_WARMUP_FILE`` (a JSON list of
+  ``{"tool": ..., "arguments": {...}}``), run exactly as a client would
+  call them so every cache they touch is filled, and
+- the ``PLACES_WARMUP_TOP_N`` most requested upstream queries of the
+  previous run, read from the access log at ``PLACES_ACCESS_LOG``.
+
+The access log is rewritten every ``ACCESS_LOG_FLUSH_SECONDS`` and at
+shutdown with the request counts of the current run. Requests made during
+warm-up are not counted. Each worker warms its own cache and the last worker
+to write the access log wins.
+
+``/ready`` answers 503 until warm-up has finished (or
+``PLACES_WARMUP_TIMEOUT_SECONDS`` have passed), so a platform health check
+pointed at it only routes traffic to warm workers.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from places import utils
+from places.config import (
+    ACCESS_LOG_FLUSH_SECONDS,
+    ACCESS_LOG_PATH,
+    WARMUP_CONCURRENCY,
+    WARMUP_FILE,
+    WARMUP_TIMEOUT_SECONDS,
+    WARMUP_TOP_N,
+)
+
+logger = logging.getLogger(__name__)
+
+warmup_state = {
+    "status": "idle",
+    "total": 0,
+    "done": 0,
+    "failed": 0,
+    "started_at": None,
+    "finished_at": None,
+}
+
+
+def reset_state() -> None:
+    """Returns the warm-up state to idle."""
+    warmup_state.update(status="idle", total=0, done=0, failed=0, started_at=None, finished_at=None)
+
+
+def is_ready() -> bool:
+    """Whether the server should receive traffic: warm-up finished, timed out or not configured."""
+    if warmup_state["status"] != "running":
+        return True
+    return time.monotonic() - warmup_state["started_at"] >= WARMUP_TIMEOUT_SECONDS
+
+
+def readiness() -> dict:
+    """Returns the readiness report served by /ready."""
+    report = {key: value for key, value in warmup_state.items() if key not in ("started_at", "finished_at")}
+    if warmup_state["started_at"] is not None:
+        finished_at = warmup_state["finished_at"] or time.monotonic()
+        report["elapsed_seconds"] = round(finished_at - warmup_state["started_at"], 3)
+    report["ready"] = is_ready()
+    report["response_cache"] = utils.response_cache.stats()
+    return report
+
+
+def load_working_set(path: str) -> list:
+    """
+    Reads the declared working set of tool calls.
+
+    Args:
+        path (str): JSON file with a list of {"tool": name, "arguments": {...}} objects.
+
+    Returns:
+        list: (tool, arguments) tuples; an empty list if the file is missing or invalid.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        return [(entry["tool"], entry.get("arguments") or {}) for entry in entries]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring warm-up file %s: %s", path, e)
+        return []
+
+
+def load_access_log(path: str, top_n: int = WARMUP_TOP_N) -> list:
+    """
+    Reads the most requested upstream queries from an access log.
+
+    Args:
+        path (str): Access log written by save_access_log.
+        top_n (int): Number of queries to return.
+
+    Returns:
+        list: (url, params) tuples, most requested first.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    entries.sort(key=lambda entry: -entry.get("count", 0))
+    return [(entry["url"], entry["params"]) for entry in entries[:top_n] if "url" in entry and "params" in entry]
+
+
+def save_access_log(path: str, counts=None, limit: int = 1000) -> int:
+    """
+    Writes the most requested upstream queries of this run.
+
+    Args:
+        path (str): Destination file; replaced atomically.
+        counts (Counter): Request counts by request_key (default: utils.access_counts).
+        limit (int): Maximum number of queries written.
+
+    Returns:
+        int: The number of queries written.
+    """
+    counts = utils.access_counts if counts is None else counts
+    if not counts:
+        return 0
+    entries = [
+        {"url": url, "params": dict(params), "count": count}
+        for (url, params), count in counts.most_common(limit)
+    ]
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+async def run_warmup(mcp, working_set=None, queries=None, max_concurrency: int = WARMUP_CONCURRENCY) -> dict:
+    """
+    Runs the warm-up tool calls and prefetches, updating warmup_state as they finish.
+
+    Args:
+        mcp: The FastMCP server whose tools are called.
+        working_set (list): (tool, arguments) tuples to call.
+        queries (list): (url, params) upstream queries to prefetch.
+        max_concurrency (int): Maximum number of warm-up calls in flight.
+
+    Returns:
+        dict: The final warmup_state.
+    """
+    working_set = working_set or []
+    queries = queries or []
+    warmup_state.update(status="running", total=len(working_set) + len(queries), done=0, failed=0,
+                        started_at=time.monotonic(), finished_at=None)
+    utils.counting_access.set(False)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call_tool(tool, arguments):
+        result = await mcp.call_tool(tool, arguments, run_middleware=False)
+        structured = getattr(result, "structured_content", None)
+        return not (isinstance(structured, dict) and "error" in structured)
+
+    async def prefetch(url, params):
+        return await utils._fetch_api(url, params) is not None
+
+    async def run(step, *args):
+        async with semaphore:
+            try:
+                ok = await step(*args)
+            except Exception:
+                ok = False
+        warmup_state["done"] += 1
+        if not ok:
+            warmup_state["failed"] += 1
+
+    await asyncio.gather(
+        *(run(call_tool, tool, arguments) for tool, arguments in working_set),
+        *(run(prefetch, url, params) for url, params in queries),
+    )
+    warmup_state.update(status="complete", finished_at=time.monotonic())
+    return warmup_state
+
+
+async def _flush_access_log(path: str):
+    while True:
+        await asyncio.sleep(ACCESS_LOG_FLUSH_SECONDS)
+        try:
+            save_access_log(path)
+        except OSError as e:
+            logger.warning("Could not write access log %s: %s", path, e)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """
+    Server lifespan: starts warm-up in the background and persists the access log.
+
+    Args:
+        server: The FastMCP server.
+    """
+    working_set = load_working_set(WARMUP_FILE) if WARMUP_FILE else []
+    queries = load_access_log(ACCESS_LOG_PATH) if ACCESS_LOG_PATH else []
+    tasks = []
+    if working_set or queries:
+        tasks.append(asyncio.create_task(run_warmup(server, working_set, queries)))
+    if ACCESS_LOG_PATH:
+        tasks.append(asyncio.create_task(_flush_access_log(ACCESS_LOG_PATH)))
+    try:
+        yield {}
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if ACCESS_LOG_PATH:
+            try:
+                save_access_log(ACCESS_LOG_PATH)
+            except OSError as e:
+                logger.warning("Could not write access log %s: %s", ACCESS_LOG_PATH, e)
@@ -0,0 +1,173 @@
+"""
+Event-loop blocking detector.
+
+A synchronous section on the async tool path (a CSV read, a large decode, a
+long pure-Python loop) stalls every session on the worker for as long as it
+runs. With ``PLACES_WATCHDOG=true`` the server lifespan starts:
+
+- a heartbeat task that stamps the time it is next due to run every
+  ``PLACES_WATCHDOG_INTERVAL`` seconds, and measures how late it actually ran,
+- a watchdog thread that checks the heartbeat on the same interval. Once the
+  loop is ``PLACES_WATCHDOG_THRESHOLD_SECONDS`` overdue, it samples the
+  event-loop thread's stack and the tool call on it, while the block is still
+  in progress.
+
+When the loop resumes, the heartbeat logs the block with its duration, tool
+and stack, and records it in ``places_event_loop_blocks_total{tool}``,
+``places_event_loop_block_seconds`` and the ``/debug/event-loop-blocks``
+window. Blocks shorter than one watchdog interval past the threshold may be
+reported without a stack.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from fastmcp.server.middleware import Middleware
+
+from places.config import WATCHDOG_ENABLED, WATCHDOG_INTERVAL, WATCHDOG_THRESHOLD_SECONDS, WATCHDOG_WINDOW
+from places.log import fields
+from places.metrics import LAG_BUCKETS, Counter, Histogram
+from places.profiling import frame_label
+
+EVENT_LOOP_BLOCKS = Counter(
+    "places_event_loop_blocks_total", "Event-loop blocks longer than the watchdog threshold, by active tool.", ["tool"]
+)
+EVENT_LOOP_BLOCK_SECONDS = Histogram(
+    "places_event_loop_block_seconds", "Duration of event-loop blocks seen by the watchdog.", buckets=LAG_BUCKETS
+)
+
+# Innermost frames kept in a block's stack sample
+MAX_STACK_DEPTH = 40
+
+logger = logging.getLogger(__name__)
+
+recent_blocks = deque(maxlen=WATCHDOG_WINDOW)
+
+# Frame of each running tool call's middleware -> tool name, for attributing blocks
+_active_calls = {}
+
+
+def active_tool(frame):
+    """Returns the tool whose call is on the stack starting at ``frame``, or None."""
+    while frame is not None:
+        tool = _active_calls.get(frame)
+        if tool is not None:
+            return tool
+        frame = frame.f_back
+    return None
+
+
+def sample_stack(frame) -> list:
+    """Returns the labels of the innermost frames of a stack, outermost first."""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return stack[::-1]
+
+
+class Watchdog:
+    """
+    Detects, samples and reports event-loop blocks.
+
+    Args:
+        threshold (float): Seconds the loop may be overdue before a block is reported.
+        interval (float): Seconds between heartbeats and between watchdog checks.
+    """
+
+    def __init__(self, threshold: float = WATCHDOG_THRESHOLD_SECONDS, interval: float = WATCHDOG_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.blocks = 0
+        # When the heartbeat is next due (time.monotonic), written by the loop and read by the thread
+        self._due = None
+        # (due, tool, stack) sampled by the thread during the current block
+        self._sample = None
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Starts the watchdog thread for the event loop running in the calling thread."""
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="places-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the watchdog thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def heartbeat(self) -> None:
+        """Stamps the heartbeat and reports late wake-ups as blocks, forever."""
+        while True:
+            due = time.monotonic() + self.interval
+            self._due = due
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - due
+            if lag >= self.threshold:
+                self._report(due, lag)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            due = self._due
+            if due is None or time.monotonic() - due < self.threshold:
+                continue
+            if self._sample is not None and self._sample[0] == due:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            self._sample = (due, active_tool(frame), sample_stack(frame))
+            del frame
+
+    def _report(self, due: float, lag: float) -> None:
+        sample = self._sample
+        tool, stack = (sample[1], sample[2]) if sample is not None and sample[0] == due else (None, [])
+        self.blocks += 1
+        EVENT_LOOP_BLOCKS.labels(tool or "none").inc()
+        EVENT_LOOP_BLOCK_SECONDS.observe(lag)
+        recent_blocks.append({
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(lag * 1000, 1),
+            "tool": tool,
+            "stack": stack,
+        })
+        logger.warning("Event loop blocked for %.0f ms", lag * 1000,
+                       extra=fields(blocked_tool=tool, duration_ms=round(lag * 1000, 1), stack=stack))
+
+
+class WatchdogMiddleware(Middleware):
+    """Marks the stack frames of running tool calls so blocks can be attributed to a tool."""
+
+    async def on_call_tool(self, context, call_next):
+        frame = sys._getframe()
+        _active_calls[frame] = context.message.name
+        try:
+            return await call_next(context)
+        finally:
+            del _active_calls[frame]
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Server lifespan: runs the heartbeat and watchdog thread when PLACES_WATCHDOG is enabled."""
+    if not WATCHDOG_ENABLED:
+        yield {}
+        return
+    watchdog = Watchdog()
+    watchdog.start()
+    task = asyncio.create_task(watchdog.heartbeat())
+    try:
+        yield {}
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        watchdog.stop()
@@ -0,0 +1,71 @@
+"""
+Shared fixtures for the CDC PLACES MCP Server tests.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from places import locations
+
+
+@pytest.fixture(autouse=True)
+def offline_location_index(monkeypatch):
+    """Keep location indexes empty and never bootstrap them from upstream."""
+    monkeypatch.setattr(locations, "LOCATION_INDEX_BOOTSTRAP_GEOS", [])
+    monkeypatch.setattr(locations, "location_indexes", {geo: locations.LocationIndex(geo) for geo in locations.location_indexes})
+    monkeypatch.setattr(locations, "_load_failed_at", {})
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    """Start every test with an empty upstream response cache, access counts, recent-call window and recent event-loop blocks."""
+    from places import profiling, utils, warmup, watchdog
+    utils.response_cache.clear()
+    utils.access_counts.clear()
+    profiling.recent_calls.clear()
+    watchdog.recent_blocks.clear()
+    warmup.reset_state()
+    yield
+    utils.response_cache.clear()
+    utils.access_counts.clear()
+    profiling.recent_calls.clear()
+    watchdog.recent_blocks.clear()
+    warmup.reset_state()
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """
+    Factory replacing a module's upstream fetch (its ``_fetch_api``) with an in-memory fake.
+
+    ``fake_upstream(module, respond, delay=0.05, caches=())`` installs the fake
+    and returns the list of (url, params) calls it receives. Each call waits
+    ``delay`` seconds, so concurrency can be observed, and returns
+    ``respond(url, params)`` (None for an upstream failure). ``caches`` are
+    cleared when the fake is installed and again after the test.
+    """
+    cleared = []
+
+    def install(module, respond, delay=0.05, caches=()):
+        calls = []
+
+        async def _fake(url, params):
+            calls.append((url, params))
+            if delay:
+                await asyncio.sleep(delay)
+            return respond(url, params)
+
+        monkeypatch.setattr(module, "_fetch_api", _fake)
+        for cache in caches:
+            cache.clear()
+            cleared.append(cache)
+        return calls
+
+    yield install
+    for cache in cleared:
+        cache.clear()
@@ -0,0 +1,155 @@
+"""
+Tests for admission control and load shedding of tool calls.
+
+Tools under test are registered on a throwaway FastMCP server, so these tests
+run without network access.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastmcp import Client, FastMCP
+
+from places import admission
+from places.admission import AdmissionMiddleware, ToolLimiter, caller_timeout
+from places.app import mcp as places_mcp
+from places.config import DEFAULT_CALL_TIMEOUT_SECONDS
+from places.metrics import REGISTRY
+
+
+def _server(middleware, delay=0.1):
+    """A server with one slow tool that records its peak concurrency."""
+    server = FastMCP("test", middleware=[middleware])
+    state = {"running": 0, "peak": 0}
+
+    @server.tool()
+    async def slow() -> dict:
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(delay)
+        state["running"] -= 1
+        return {"ok": True}
+
+    return server, state
+
+
+async def _call_many(server, n):
+    async with Client(server) as client:
+        results = await asyncio.gather(*(client.call_tool("slow", {}, raise_on_error=False) for _ in range(n)))
+    return [result.structured_content for result in results]
+
+
+class TestToolLimiter:
+    """Test suite for the per-tool limiter."""
+
+    def test_concurrency_bounded(self):
+        """No more than max_concurrency calls run at once; the rest queue."""
+        server, state = _server(AdmissionMiddleware(max_concurrency=2, limits={}, max_queue=10))
+        results = asyncio.run(_call_many(server, 6))
+        assert all(result == {"ok": True} for result in results)
+        assert state["peak"] == 2
+
+    def test_queue_full(self):
+        """Arrivals beyond the queue bound are rejected at once."""
+        middleware = AdmissionMiddleware(max_concurrency=1, limits={}, max_queue=1)
+        server, _ = _server(middleware)
+        results = asyncio.run(_call_many(server, 4))
+        rejected = [result for result in results if result.get("overloaded")]
+        assert len(rejected) == 2
+        assert {result["reason"] for result in rejected} == {"queue_full"}
+        assert rejected[0]["tool"] == "slow"
+        assert rejected[0]["retry_after_seconds"] >= 1
+        assert "Server overloaded" in rejected[0]["error"]
+
+    def test_per_tool_limit(self):
+        """TOOL_CONCURRENCY_LIMITS lowers the limit for listed tools."""
+        middleware = AdmissionMiddleware(max_concurrency=8, limits={"slow": 1}, max_queue=10)
+        server, state = _server(middleware, delay=0.02)
+        asyncio.run(_call_many(server, 4))
+        assert state["peak"] == 1
+        assert middleware.limiter("slow").max_concurrency == 1
+        assert middleware.limiter("other").max_concurrency == 8
+
+    def test_unknown_tool_passed_through(self):
+        """Calls to unregistered tool names get no limiter and reach the server's own error."""
+        middleware = AdmissionMiddleware(max_concurrency=1, limits={}, max_queue=1)
+        server, _ = _server(middleware)
+
+        async def run():
+            async with Client(server) as client:
+                return await client.call_tool("no_such_tool", {}, raise_on_error=False)
+
+        result = asyncio.run(run())
+        assert result.is_error
+        assert "Unknown tool" in result.content[0].text
+        assert middleware.limiters == {}
+
+    def test_expected_wait_rejection(self):
+        """A call whose expected wait exceeds the caller's timeout is rejected without waiting."""
+        async def run():
+            limiter = ToolLimiter("slow", max_concurrency=1, max_queue=10)
+            limiter.record(10.0)
+            assert await limiter.acquire(timeout=1.0) is None
+            return await limiter.acquire(timeout=1.0), limiter.waiting
+
+        assert asyncio.run(run()) == ("deadline", 0)
+
+    def test_wait_timeout(self):
+        """A queued call gives up when its timeout passes before a slot frees."""
+        async def run():
+            limiter = ToolLimiter("slow", max_concurrency=1, max_queue=10)
+            assert await limiter.acquire(timeout=1.0) is None
+            reason = await limiter.acquire(timeout=0.05)
+            limiter.release()
+            return reason, await limiter.acquire(timeout=0.05)
+
+        assert asyncio.run(run()) == ("deadline", None)
+
+    def test_moving_average(self):
+        """Durations are smoothed into the expected wait."""
+        limiter = ToolLimiter("slow", max_concurrency=2, max_queue=10)
+        limiter.record(1.0)
+        limiter.record(2.0)
+        assert limiter.average_duration == pytest.approx(1.2)
+        limiter.running, limiter.waiting = 2, 3
+        assert limiter.expected_wait() == pytest.approx(2 * 1.2)
+
+
+class TestCallerTimeout:
+    """Test suite for reading the caller's timeout."""
+
+    def test_header(self, monkeypatch):
+        """X-Places-Timeout sets the timeout; missing or invalid values fall back to the default."""
+        headers = {}
+        monkeypatch.setattr(admission, "get_http_headers", lambda include=None: headers)
+        assert caller_timeout() == DEFAULT_CALL_TIMEOUT_SECONDS
+        headers["x-places-timeout"] = "2.5"
+        assert caller_timeout() == 2.5
+        headers["x-places-timeout"] = "soon"
+        assert caller_timeout() == DEFAULT_CALL_TIMEOUT_SECONDS
+
+
+class TestRegistration:
+    """Test suite for installing admission control on the server."""
+
+    def test_installed_by_register_tools(self):
+        """register_tools adds the admission middleware to the places server."""
+        assert any(isinstance(m, AdmissionMiddleware) for m in places_mcp.middleware)
+
+    def test_metrics(self):
+        """Rejections and queue depth are exported."""
+        server, _ = _server(AdmissionMiddleware(max_concurrency=1, limits={}, max_queue=1))
+        asyncio.run(_call_many(server, 3))
+        text = REGISTRY.render()
+        assert 'places_tool_rejections_total{tool="slow",reason="queue_full"}' in text
+        assert 'places_tool_queue_depth{tool="slow"} 0' in text
+        assert 'places_tool_queue_wait_seconds_count{tool="slow"}' in text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
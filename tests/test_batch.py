@@ -0,0 +1,176 @@
+"""
+Tests for batched CDC PLACES queries.
+
+The upstream fetch is replaced with an in-memory fake, so these tests run
+without network access.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from places import batch
+from places.batch import build_group_params, partition_rows, plan_batch, run_batch
+from places.models import PlacesQuery
+
+
+def _row(measureid, locationname, value, datavaluetypeid="CrdPrv"):
+    return {
+        "measureid": measureid,
+        "datavaluetypeid": datavaluetypeid,
+        "stateabbr": "MI",
+        "statedesc": "Michigan",
+        "locationname": locationname,
+        "data_value": value,
+    }
+
+
+ROWS = [
+    _row("CSMOKING", "Wayne", "21.3"),
+    _row("CSMOKING", "Oakland", "14.1"),
+    _row("OBESITY", "Wayne", "38.0"),
+    _row("OBESITY", "Oakland", "31.2"),
+]
+
+
+@pytest.fixture
+def fake_fetch(fake_upstream):
+    """Serve ROWS from a fake upstream; endpoints containing 'bad' fail."""
+    return fake_upstream(batch, lambda url, params: None if "bad" in url else ROWS)
+
+
+class TestPlanBatch:
+    """Test suite for grouping queries by endpoint."""
+
+    def test_same_release_grouped(self):
+        """Queries for the same geo and release share one group."""
+        queries = [
+            PlacesQuery(year="2023", measureid="CSMOKING", geo="county", datavaluetypeid="CrdPrv"),
+            PlacesQuery(year="2023", measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv"),
+        ]
+        groups, errors = plan_batch(queries)
+        assert len(groups) == 1
+        assert errors == {}
+
+    def test_unresolvable_query_reported(self):
+        """Queries with no endpoint are reported as per-item errors."""
+        queries = [PlacesQuery(year="2030", measureid="CSMOKING", geo="county", datavaluetypeid="CrdPrv")]
+        groups, errors = plan_batch(queries)
+        assert groups == {}
+        assert "error" in errors["CSMOKING:2030:county:CrdPrv:*"]
+
+    def test_combined_where_clause(self):
+        """Measures sharing a location set are merged into one IN filter."""
+        queries = [
+            PlacesQuery(year="2023", measureid="CSMOKING", geo="county", datavaluetypeid="CrdPrv", locationname="Wayne"),
+            PlacesQuery(year="2023", measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv", locationname="Wayne"),
+            PlacesQuery(year="2023", measureid="DIABETES", geo="county", datavaluetypeid="AgeAdjPrv"),
+        ]
+        params = build_group_params("county", queries)
+        assert params["$where"] == (
+            "(datavaluetypeid = 'AgeAdjPrv' AND measureid = 'DIABETES') OR "
+            "(datavaluetypeid = 'CrdPrv' AND measureid IN ('CSMOKING', 'OBESITY') AND locationname = 'Wayne')"
+        )
+        assert params["$select"].endswith(",measureid,datavaluetypeid")
+
+    def test_partition_rows(self):
+        """Rows are routed back to the query that asked for them."""
+        query = PlacesQuery(year="2023", measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv", locationname=["Oakland"])
+        rows = partition_rows(query, ROWS)
+        assert rows == [{"stateabbr": "MI", "statedesc": "Michigan", "locationname": "Oakland", "data_value": "31.2"}]
+
+
+class TestRunBatch:
+    """Test suite for run_batch."""
+
+    def test_single_upstream_request(self, fake_fetch):
+        """Queries for one release need a single upstream request."""
+        queries = [
+            PlacesQuery(year="2023", measureid="CSMOKING", geo="county", datavaluetypeid="CrdPrv", locationname="Wayne"),
+            PlacesQuery(year="2023", measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv", locationname="Wayne", key="obesity"),
+        ]
+        result = asyncio.run(run_batch(queries))
+        assert result["upstream_requests"] == 1
+        assert len(fake_fetch) == 1
+        assert result["results"]["CSMOKING:2023:county:CrdPrv:Wayne"]["data"][0]["data_value"] == "21.3"
+        assert result["results"]["obesity"]["data"][0]["data_value"] == "38.0"
+
+    def test_combined_result_paged(self, fake_upstream, monkeypatch):
+        """A combined result over the row limit is fetched page by page, not truncated."""
+        def page(url, params):
+            offset = params.get("$offset", 0)
+            return ROWS[offset:offset + params["$limit"]]
+
+        calls = fake_upstream(batch, page, delay=0)
+        monkeypatch.setattr(batch, "QUERY_ROW_LIMIT", 3)
+        queries = [
+            PlacesQuery(year="2023", measureid="CSMOKING", geo="county", datavaluetypeid="CrdPrv"),
+            PlacesQuery(year="2023", measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv"),
+        ]
+        result = asyncio.run(run_batch(queries))
+        assert [params.get("$offset") for _, params in calls] == [None, 3]
+        assert calls[0][1]["$order"] == batch.PAGE_ORDER
+        assert result["upstream_requests"] == 2
+        assert len(result["results"]["CSMOKING:2023:county:CrdPrv:*"]["data"]) == 2
+        assert len(result["results"]["OBESITY:2023:county:CrdPrv:*"]["data"]) == 2
+
+    def test_groups_run_concurrently(self, fake_fetch):
+        """Requests to different releases overlap instead of running in sequence."""
+        queries = [
+            PlacesQuery(year=year, measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv")
+            for year in ("2019", "2020", "2021", "2022")
+        ]
+        start = time.perf_counter()
+        result = asyncio.run(run_batch(queries, max_concurrency=4))
+        elapsed = time.perf_counter() - start
+        assert result["upstream_requests"] == 4
+        assert elapsed < 0.15
+
+    def test_partial_failure(self, fake_fetch, monkeypatch):
+        """A failing group reports errors without affecting other queries."""
+        from places import config
+        monkeypatch.setitem(config.API_ENDPOINTS["places"], "places_release_2025", "https://example.invalid/bad.json")
+        queries = [
+            PlacesQuery(year="2023", measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv"),
+            PlacesQuery(year="2023", measureid="OBESITY", geo="places", datavaluetypeid="CrdPrv"),
+            PlacesQuery(year="2030", measureid="OBESITY", geo="county", datavaluetypeid="CrdPrv"),
+        ]
+        results = asyncio.run(run_batch(queries))["results"]
+        assert len(results["OBESITY:2023:county:CrdPrv:*"]["data"]) == 2
+        assert results["OBESITY:2023:places:CrdPrv:*"]["error"] == "No data returned from API"
+        assert "error" in results["OBESITY:2030:county:CrdPrv:*"]
+
+    def test_state_queries_use_rollup(self, fake_fetch, monkeypatch):
+        """State queries are answered from the county rollup."""
+        from places import rollup
+
+        async def _fake_states(release_name, measureid, datavaluetypeid):
+            return [{"stateabbr": "MI", "statedesc": "Michigan", "data_value": 20.0},
+                    {"stateabbr": "OH", "statedesc": "Ohio", "data_value": 22.0}]
+
+        monkeypatch.setattr(batch, "get_state_estimates", _fake_states)
+        queries = [PlacesQuery(year="2023", measureid="OBESITY", geo="state", datavaluetypeid="CrdPrv", locationname="MI")]
+        result = asyncio.run(run_batch(queries))
+        state_result = result["results"]["OBESITY:2023:state:CrdPrv:MI"]
+        assert state_result["data"] == [{"stateabbr": "MI", "statedesc": "Michigan", "data_value": 20.0}]
+        assert state_result["note"] == rollup.STATE_ROLLUP_NOTE
+        assert fake_fetch == []
+
+    def test_location_names_canonicalized(self, fake_fetch):
+        """Location names are rewritten to canonical index names before querying."""
+        from places import locations
+        locations.location_indexes["county"].add([{"locationid": "26163", "locationname": "Wayne", "stateabbr": "MI"}])
+        locations.location_indexes["county"].complete = True
+        queries = [PlacesQuery(year="2023", measureid="CSMOKING", geo="county", datavaluetypeid="CrdPrv", locationname="Wayne County")]
+        result = asyncio.run(run_batch(queries))
+        assert "locationname = 'Wayne'" in fake_fetch[0][1]["$where"]
+        assert result["results"]["CSMOKING:2023:county:CrdPrv:Wayne County"]["data"][0]["data_value"] == "21.3"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
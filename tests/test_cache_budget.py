@@ -0,0 +1,182 @@
+"""
+Tests for the memory budget shared by the in-process caches.
+
+Caches under test get their own small budget, so these tests do not depend on
+what the server's caches hold.
+"""
+
+import asyncio
+import json
+import tracemalloc
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+from starlette.testclient import TestClient
+
+from places.app import create_app
+from places import features
+from places.cache import MAX_ENTRY_SHARE, MemoryBudget, TTLCache, estimate_size, memory_budget
+from places.features import FeatureMatrix
+from places.metrics import REGISTRY
+
+
+def _rows(n):
+    """Socrata-like JSON rows decoded the way the fetch layer decodes them."""
+    return json.loads(json.dumps([
+        {"stateabbr": "OH", "locationname": f"County {i}", "locationid": str(39000 + i),
+         "measureid": "OBESITY", "data_value": str(30 + i % 10 / 10), "totalpopulation": str(10000 + i)}
+        for i in range(n)
+    ]))
+
+
+class TestEstimateSize:
+    """Test suite for estimate_size."""
+
+    def test_rows_match_allocations(self):
+        """The estimate of decoded rows is close to what decoding allocated."""
+        payload = json.dumps(_rows(5000))
+        tracemalloc.start()
+        rows = json.loads(payload)
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert 0.8 < estimate_size(rows) / allocated < 1.25
+
+    def test_arrays_and_objects(self):
+        """numpy buffers and object attributes are counted."""
+        array = np.zeros((1000, 10), dtype=np.float32)
+        assert estimate_size(array) >= 40000
+
+        class Holder:
+            def __init__(self):
+                self.array = array
+
+        assert estimate_size(Holder()) > estimate_size(array)
+
+    def test_shared_objects_counted_once(self):
+        """An object referenced twice is sized once."""
+        row = {"name": "x" * 1000}
+        assert estimate_size([row, row]) < 2 * estimate_size(row)
+
+
+class TestMemoryBudget:
+    """Test suite for budget enforcement across caches."""
+
+    def test_cost_aware_eviction(self):
+        """Over budget, the entry with the least load time per byte goes first, whichever cache holds it."""
+        budget = MemoryBudget(1000)
+        responses = TTLCache("responses", budget=budget)
+        results = TTLCache("results", budget=budget)
+        responses.set("slow", "a", cost=2.0, size=400)
+        results.set("cheap", "b", cost=0.01, size=400)
+        responses.set("new", "c", cost=1.0, size=400)
+
+        assert "slow" in responses and "new" in responses
+        assert "cheap" not in results
+        assert budget.used() == 800
+        assert results.evictions == 1 and budget.evictions == 1
+
+    def test_aging(self):
+        """Evictions raise the clock, so an expensive entry nobody reads is eventually evicted."""
+        budget = MemoryBudget(1000)
+        cache = TTLCache("test", budget=budget)
+        cache.set("idle", "a", cost=1.0, size=400)
+        cache.set("n0", "b", cost=0.5, size=400)
+        cache.set("n1", "c", cost=0.5, size=400)
+        assert "idle" in cache
+        for i in range(2, 6):
+            cache.set(f"n{i}", "d", cost=0.5, size=400)
+        assert "idle" not in cache
+        assert budget.clock > 0
+
+    def test_expired_entries_go_first(self):
+        """Expired entries are evicted before live ones regardless of cost."""
+        budget = MemoryBudget(1000)
+        expired = TTLCache("expired", ttl=0, budget=budget)
+        live = TTLCache("live", budget=budget)
+        expired.set("old", "a", cost=100.0, size=400)
+        live.set("first", "b", cost=0.01, size=400)
+        live.set("second", "c", cost=0.01, size=400)
+        assert expired.bytes == 0
+        assert "first" in live and "second" in live
+
+    def test_oversized_entries_not_cached(self):
+        """Entries over half the budget are returned by get_or_load but not kept."""
+        budget = MemoryBudget(10_000)
+        cache = TTLCache("test", budget=budget)
+
+        async def loader():
+            return _rows(100)
+
+        rows = asyncio.run(cache.get_or_load("k", loader))
+        assert len(rows) == 100
+        assert len(cache) == 0 and cache.bytes == 0
+        assert cache.set("small", [1, 2, 3]) is True
+
+    def test_replacing_and_clearing(self):
+        """Bytes are released when an entry is replaced, evicted by LRU or cleared."""
+        budget = MemoryBudget(10_000)
+        cache = TTLCache("test", maxsize=1, budget=budget)
+        cache.set("a", "x", size=100)
+        cache.set("a", "y", size=300)
+        assert cache.bytes == 300
+        cache.set("b", "z", size=200)
+        assert cache.bytes == 200 and cache.evictions == 1
+        cache.clear()
+        assert cache.bytes == 0 and budget.used() == 0
+
+    def test_places_feature_matrix_stays_cached(self, tmp_path, monkeypatch):
+        """A places-sized matrix with its name index exceeds any budgeted entry but is still preloaded and kept."""
+        n, rng = 32_000, np.random.default_rng(0)
+        matrix = FeatureMatrix(
+            "places", [f"{i:07d}" for i in range(n)], [f"Place {i} city" for i in range(n)],
+            ["OH"] * n, [f"M{j:02d}" for j in range(40)], rng.uniform(5, 50, (n, 40)),
+        )
+        matrix.save(str(tmp_path / "places_places_release_2025_AgeAdjPrv.npz"))
+        monkeypatch.setattr(features, "FEATURE_MATRIX_DIR", str(tmp_path))
+        features.feature_matrix_cache.clear()
+        try:
+            assert features.load_feature_matrices() == [("places", "places_release_2025", "AgeAdjPrv")]
+            cached = features.feature_matrix_cache.get(("places", "places_release_2025", "AgeAdjPrv"))
+            assert cached is not None and cached.has_index
+            assert features.feature_matrix_cache.bytes > memory_budget.max_bytes * MAX_ENTRY_SHARE
+            assert features.feature_matrix_cache not in memory_budget.caches()
+        finally:
+            features.feature_matrix_cache.clear()
+
+    def test_load_time_is_cost(self):
+        """get_or_load records how long the load took."""
+        cache = TTLCache("test", budget=MemoryBudget(10_000))
+
+        async def loader():
+            await asyncio.sleep(0.02)
+            return "value"
+
+        asyncio.run(cache.get_or_load("k", loader))
+        assert cache._entries["k"].cost >= 0.02
+
+
+class TestUsageReporting:
+    """Test suite for exposing cache memory usage."""
+
+    def test_debug_route_and_metrics(self):
+        """/debug/caches reports the budget and per-cache bytes; /metrics exports them."""
+        with TestClient(create_app()) as client:
+            report = client.get("/debug/caches").json()
+        names = {cache["name"] for cache in report["caches"]}
+        assert {"upstream_responses", "state_rollup", "scope_values"} <= names
+        assert "feature_matrix" in {cache["name"] for cache in report["outside_budget"]}
+        assert report["used_bytes"] == sum(cache["bytes"] for cache in report["caches"])
+        assert report["budget_bytes"] > 0
+
+        text = REGISTRY.render()
+        assert 'places_cache_bytes{cache="upstream_responses"}' in text
+        assert f"places_cache_budget_bytes {report['budget_bytes']}" in text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
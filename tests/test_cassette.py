@@ -0,0 +1,163 @@
+"""
+Tests for upstream record/replay cassettes.
+
+Responses are recorded from an in-process Socrata emulator, then replayed with
+every upstream connection refused.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from places import cassette, utils
+from places.app import mcp
+from places.cassette import CassetteStore
+from places.emulator import SocrataEmulator
+from places.metrics import UPSTREAM_REQUESTS
+
+COUNTY_DATASET = "swc5-untb"
+COUNTY_URL = f"https://data.cdc.gov/resource/{COUNTY_DATASET}.json"
+
+STATS_CALL = {
+    "geo_scope": "counties_in_state", "state_code": "OH", "year": "2023",
+    "measureid": "OBESITY", "datavaluetypeid": "CrdPrv",
+}
+
+
+def _county_rows():
+    """OBESITY estimates for 10 Ohio counties."""
+    return [
+        {"stateabbr": "OH", "statedesc": "Ohio", "locationid": f"39{2 * i + 1:03d}", "locationname": f"County {i}",
+         "measureid": "OBESITY", "datavaluetypeid": "CrdPrv", "data_value": f"{25 + i:.1f}",
+         "low_confidence_limit": "20.0", "high_confidence_limit": "40.0", "totalpopulation": str(1000 * (i + 1))}
+        for i in range(10)
+    ]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route upstream requests to an in-process emulator; returns a switch that refuses all connections."""
+    emulated = SocrataEmulator({COUNTY_DATASET: _county_rows()})
+    app = emulated.app()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(utils.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.ASGITransport(app=app), base_url="http://emulator"))
+
+    def refuse(request):
+        raise httpx.ConnectError("network disabled", request=request)
+
+    def go_offline():
+        monkeypatch.setattr(utils.httpx, "AsyncClient",
+                            lambda **kwargs: real_client(transport=httpx.MockTransport(refuse)))
+
+    emulated.go_offline = go_offline
+    return emulated
+
+
+def _use(monkeypatch, store):
+    monkeypatch.setattr(utils, "cassettes", store)
+    utils.response_cache.clear()
+
+
+class TestRecordReplay:
+    """Test suite for recording responses and replaying them offline."""
+
+    def test_replay_matches_recording(self, upstream, monkeypatch, tmp_path):
+        """Tool results replayed offline are identical to the recorded run."""
+        _use(monkeypatch, CassetteStore(str(tmp_path), "record"))
+        recorded = asyncio.run(mcp.call_tool("area_summary_stats", STATS_CALL)).structured_content
+        assert recorded["stats"]["count"] == 10
+        assert len(list((tmp_path / COUNTY_DATASET).glob("*.json.gz"))) == 1
+
+        upstream.go_offline()
+        _use(monkeypatch, CassetteStore(str(tmp_path), "replay"))
+        replayed = asyncio.run(mcp.call_tool("area_summary_stats", STATS_CALL)).structured_content
+        assert replayed == recorded
+        assert upstream.requests[COUNTY_DATASET] == 1
+
+    def test_entry_format(self, upstream, monkeypatch, tmp_path):
+        """An entry is gzip: a metadata line (request, status, validators, duration) then the body as received."""
+        store = CassetteStore(str(tmp_path), "record")
+        _use(monkeypatch, store)
+        asyncio.run(utils._fetch_api(COUNTY_URL, {"measureid": "OBESITY", "$where": "stateabbr = 'OH'"}))
+        [path] = (tmp_path / COUNTY_DATASET).glob("*.json.gz")
+        meta, _, body = gzip.decompress(path.read_bytes()).partition(b"\n")
+        meta = json.loads(meta)
+        assert meta["request"]["params"] == {"measureid": "OBESITY", "$where": "stateabbr = 'OH'"}
+        assert meta["status"] == 200 and meta["headers"]["etag"] and meta["elapsed"] >= 0
+        assert len(json.loads(body)) == 10
+
+    def test_key_is_canonical(self, tmp_path):
+        """Parameter order, value types and the Socrata host do not change an entry's key."""
+        store = CassetteStore(str(tmp_path), "replay")
+        assert store.path(COUNTY_URL, {"$limit": 100, "measureid": "OBESITY"}) == \
+            store.path(f"http://127.0.0.1:8001/resource/{COUNTY_DATASET}.json", {"measureid": "OBESITY", "$limit": "100"})
+        assert store.path(COUNTY_URL, {"measureid": "OBESITY"}) != store.path(COUNTY_URL, {"measureid": "CSMOKING"})
+
+    def test_key_matches_response_cache_key(self):
+        """Entries are keyed on the same parameter pairs as the response cache."""
+        params = {"$limit": 100, "measureid": "OBESITY"}
+        assert cassette.entry_key(COUNTY_URL, params) == (COUNTY_DATASET, utils.request_key(COUNTY_URL, params)[1])
+
+    def test_not_recorded(self, upstream, monkeypatch, tmp_path):
+        """A request missing from the cassettes fails like an upstream error, without a connection."""
+        upstream.go_offline()
+        _use(monkeypatch, CassetteStore(str(tmp_path), "replay"))
+        misses = UPSTREAM_REQUESTS.labels(COUNTY_DATASET, "not_recorded").value
+        result = asyncio.run(mcp.call_tool("area_summary_stats", STATS_CALL)).structured_content
+        assert "error" in result
+        assert UPSTREAM_REQUESTS.labels(COUNTY_DATASET, "not_recorded").value == misses + 1
+
+    def test_failures_are_not_recorded(self, upstream, monkeypatch, tmp_path):
+        """Error responses are not written to the store."""
+        upstream.error_rate = 1.0
+        _use(monkeypatch, CassetteStore(str(tmp_path), "record"))
+        assert asyncio.run(utils._fetch_api(COUNTY_URL, {"measureid": "OBESITY"})) is None
+        assert not tmp_path.exists() or not any(tmp_path.rglob("*.json.gz"))
+
+    def test_conditional_replay(self, upstream, monkeypatch, tmp_path):
+        """Replays answer conditional requests carrying the recorded validators with a 304."""
+        _use(monkeypatch, CassetteStore(str(tmp_path), "record"))
+        validators = {}
+        asyncio.run(utils._fetch_upstream(COUNTY_URL, {"measureid": "OBESITY"}, validators=validators))
+        assert validators["etag"]
+
+        upstream.go_offline()
+        _use(monkeypatch, CassetteStore(str(tmp_path), "replay"))
+        again = asyncio.run(utils._fetch_upstream(COUNTY_URL, {"measureid": "OBESITY"}, validators=dict(validators)))
+        assert again is utils.NOT_MODIFIED
+        stale = asyncio.run(utils._fetch_upstream(COUNTY_URL, {"measureid": "OBESITY"}, validators={"etag": '"old"'}))
+        assert len(stale) == 10
+
+    def test_simulated_latency(self, upstream, monkeypatch, tmp_path):
+        """Replays wait the configured seconds, or each entry's recorded duration."""
+        store = CassetteStore(str(tmp_path), "replay", latency=0.1)
+        response = httpx.Response(200, content=b"[]", request=httpx.Request("GET", COUNTY_URL))
+        store.write(COUNTY_URL, {"measureid": "OBESITY"}, response, elapsed=0.2)
+        for latency, expected in ((0.1, 0.1), ("recorded", 0.2)):
+            store.latency = latency
+            start = time.perf_counter()
+            assert asyncio.run(store.replay(COUNTY_URL, {"measureid": "OBESITY"})).json() == []
+            assert time.perf_counter() - start >= expected
+
+    def test_mode_from_config(self, monkeypatch):
+        """Cassettes are off by default, and an unknown mode is rejected."""
+        assert cassette.from_config() is None
+        monkeypatch.setattr(cassette, "CASSETTE_MODE", "replay")
+        assert cassette.from_config().replaying
+        monkeypatch.setattr(cassette, "CASSETTE_MODE", "playback")
+        with pytest.raises(ValueError):
+            cassette.from_config()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
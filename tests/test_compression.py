@@ -0,0 +1,127 @@
+"""
+Tests for HTTP response compression and JSON serialization helpers.
+"""
+
+import gzip
+import json
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from places.compression import CompressionMiddleware, negotiate_encoding
+from places.serialization import dumps, loads, tool_result, JSONResponse
+
+
+def _app(minimum_size=100):
+    async def big(request):
+        return JSONResponse({"rows": [{"data_value": "12.5"}] * 200})
+
+    async def small(request):
+        return PlainTextResponse("ok")
+
+    async def stream(request):
+        async def events():
+            for i in range(3):
+                yield f"event: message\ndata: {i}\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(
+        routes=[Route("/big", big), Route("/small", small), Route("/stream", stream)],
+        middleware=[Middleware(CompressionMiddleware, minimum_size=minimum_size, encodings=["gzip"])],
+    )
+
+
+class TestNegotiateEncoding:
+    """Test suite for Accept-Encoding negotiation."""
+
+    def test_server_preference_on_tie(self):
+        """Equal q-values resolve to the server's preferred encoding."""
+        assert negotiate_encoding("gzip, br, zstd", ["zstd", "br", "gzip"]) == "zstd"
+
+    def test_client_q_values_win(self):
+        """A higher client q-value beats server preference."""
+        assert negotiate_encoding("zstd;q=0.5, gzip", ["zstd", "gzip"]) == "gzip"
+
+    def test_q_zero_disables(self):
+        """An encoding with q=0 is never selected."""
+        assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+
+    def test_wildcard(self):
+        """The * token matches any supported encoding."""
+        assert negotiate_encoding("*", ["br", "gzip"]) == "br"
+
+    def test_missing_header(self):
+        """No header means no compression."""
+        assert negotiate_encoding("", ["gzip"]) is None
+
+
+class TestCompressionMiddleware:
+    """Test suite for CompressionMiddleware."""
+
+    def test_large_response_compressed(self):
+        """Responses over the threshold are gzip-encoded."""
+        client = TestClient(_app())
+        response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json()["rows"][0] == {"data_value": "12.5"}
+
+    def test_small_response_not_compressed(self):
+        """Responses under the threshold are sent as-is."""
+        client = TestClient(_app())
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.text == "ok"
+
+    def test_no_accept_encoding(self):
+        """Clients that do not advertise compression get identity responses."""
+        client = TestClient(_app())
+        response = client.get("/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def test_event_stream_compressed_incrementally(self):
+        """Event streams are compressed and decode to the original events."""
+        client = TestClient(_app(minimum_size=10_000))
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == "".join(f"event: message\ndata: {i}\n\n" for i in range(3))
+
+
+class TestSerialization:
+    """Test suite for the JSON serialization helpers."""
+
+    def test_round_trip(self):
+        """dumps and loads are inverse operations."""
+        payload = [{"locationname": "Wayne", "data_value": "21.3"}]
+        assert loads(dumps(payload)) == payload
+        assert json.loads(dumps(payload)) == payload
+
+    def test_tool_result_list(self):
+        """List payloads become a single text content block."""
+        result = tool_result([{"a": 1}])
+        assert len(result.content) == 1
+        assert json.loads(result.content[0].text) == [{"a": 1}]
+        assert result.structured_content is None
+
+    def test_tool_result_dict(self):
+        """Dict payloads are also returned as structured content."""
+        result = tool_result({"a": 1})
+        assert result.structured_content == {"a": 1}
+
+    def test_gzip_helper_round_trip(self):
+        """compress_bytes produces standard gzip streams."""
+        from places.compression import compress_bytes
+        assert gzip.decompress(compress_bytes(b"x" * 1000, "gzip")) == b"x" * 1000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,129 @@
+"""
+Tests for server-side cross-measure correlation.
+
+The upstream fetch is replaced with an in-memory fake, so these tests run
+without network access.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+from fastmcp import Client
+
+from places import correlation
+from places.app import mcp
+from places.correlation import correlate
+
+
+def _records(values, prefix=""):
+    return [
+        {"locationid": f"39{i:03d}", "locationname": f"{prefix}County {i}", "stateabbr": "OH", "data_value": v}
+        for i, v in enumerate(values)
+    ]
+
+
+# y = 2x + 1 except for one outlier
+X = [float(i) for i in range(20)]
+Y = [2 * x + 1 for x in X]
+Y[7] = 40.0
+
+
+@pytest.fixture
+def fake_fetch(fake_upstream):
+    """Serve X for LPA and Y for OBESITY from a fake upstream."""
+    return fake_upstream(
+        correlation,
+        lambda url, params: _records([str(v) for v in (X if "'LPA'" in params["$where"] else Y)]),
+        caches=[correlation.scope_values_cache],
+    )
+
+
+class TestCorrelate:
+    """Test suite for correlate."""
+
+    def test_perfect_linear(self):
+        """A linear relation gives r = rho = 1 and the exact line."""
+        result = correlate(_records(X), _records([2 * x + 1 for x in X]))
+        assert result["n"] == 20
+        assert result["pearson"]["r"] == 1.0
+        assert result["spearman"]["rho"] == 1.0
+        assert result["regression"]["slope"] == 2.0
+        assert result["regression"]["intercept"] == 1.0
+        assert result["outliers"] == []
+
+    def test_outlier_reported(self):
+        """Locations far from the line are listed with their residual."""
+        result = correlate(_records(X), _records(Y))
+        assert [o["locationid"] for o in result["outliers"]] == ["39007"]
+        assert result["outliers"][0]["residual_z"] > 2
+        assert 0 < result["pearson"]["ci95"][0] < result["pearson"]["r"] < result["pearson"]["ci95"][1]
+
+    def test_join_on_locationid(self):
+        """Only locations reporting both measures are used; missing values are dropped."""
+        y = _records([2 * x + 1 for x in X])[5:]
+        y[0]["data_value"] = None
+        assert correlate(_records(X), y)["n"] == 14
+
+    def test_too_few_locations(self):
+        """Fewer than three shared locations is an error."""
+        assert "error" in correlate(_records([1.0, 2.0]), _records([1.0, 2.0]))
+
+
+class TestFetchMeasurePair:
+    """Test suite for fetch_measure_pair."""
+
+    def test_fetched_concurrently(self, fake_fetch):
+        """The two measures are requested at the same time."""
+        start = time.perf_counter()
+        x, y = asyncio.run(correlation.fetch_measure_pair(("https://x", "LPA"), ("https://x", "OBESITY"), "CrdPrv", None))
+        assert time.perf_counter() - start < 0.09
+        assert len(x["data_value"]) == len(y["data_value"]) == 20
+        assert fake_fetch[0][1]["$where"] == "measureid = 'LPA' AND datavaluetypeid = 'CrdPrv'"
+
+
+    def test_cached_as_column_arrays(self, fake_fetch):
+        """Only compact column arrays are cached, not the response rows the response cache already holds."""
+        from places.cache import estimate_size
+        x, _ = asyncio.run(correlation.fetch_measure_pair(("https://x", "LPA"), ("https://x", "OBESITY"), "CrdPrv", None))
+        assert all(isinstance(column, np.ndarray) for column in x.values())
+        assert x["data_value"].tolist() == X
+        assert correlation.scope_values_cache.bytes < estimate_size(_records([str(v) for v in X])) * 2
+        assert correlate(x, correlation.scope_columns(_records([str(v) for v in Y])))["n"] == 20
+
+
+class TestCorrelateTool:
+    """Test suite for the correlate_cdc_places_measures tool."""
+
+    def _call(self, **arguments):
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("correlate_cdc_places_measures", {
+                    "measureid_x": "LPA", "measureid_y": "OBESITY", "geo_scope": "counties_in_state",
+                    "year": "2023", "datavaluetypeid": "AgeAdjPrv", "state_code": "OH", **arguments,
+                })
+        return asyncio.run(run()).structured_content
+
+    def test_concurrent_and_cached(self, fake_fetch):
+        """Both measures are fetched concurrently once; a repeat call uses the cache."""
+        result = self._call()
+        self._call()
+        assert len(fake_fetch) == 2
+        assert fake_fetch[0][1]["$where"].endswith("stateabbr = 'OH'")
+        assert result["x"]["measure"] == "LPA" and result["y"]["release"].startswith("places_release_")
+        assert result["n"] == 20
+
+    def test_state_required(self, fake_fetch):
+        """State scopes need state_code."""
+        assert "error" in self._call(state_code=None)
+        assert fake_fetch == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
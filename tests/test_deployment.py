@@ -0,0 +1,109 @@
+"""
+Tests for the ASGI app export and the pre-fork launcher's preload step.
+"""
+
+import gc
+import json
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from starlette.testclient import TestClient
+
+from places import features, locations
+from places.app import app, create_app
+from places.features import FeatureMatrix, load_feature_matrices
+from places import serve
+from places.log import configure_logging, stop_logging
+from places.serve import preload
+
+
+class TestAppExport:
+    """Test suite for the ASGI application."""
+
+    def test_module_level_app(self):
+        """places.app:app is an ASGI app serving the MCP endpoint and custom routes."""
+        paths = [route.path for route in app.routes]
+        assert "/mcp" in paths and "/health" in paths
+
+    def test_factory_serves_health(self):
+        """create_app() builds a working app with its lifespan."""
+        with TestClient(create_app()) as client:
+            assert client.get("/health").json()["status"] == "healthy"
+
+    def test_stateless_tools_list(self):
+        """A tools/list request works without a session handshake."""
+        with TestClient(create_app()) as client:
+            response = client.post(
+                "/mcp",
+                json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+                headers={"accept": "application/json, text/event-stream"},
+            )
+        assert response.status_code == 200
+        assert "get_cdc_places_data" in response.text
+
+
+class TestPreload:
+    """Test suite for loading shared data before workers fork."""
+
+    def test_snapshots_and_matrices_loaded(self, tmp_path, monkeypatch):
+        """Snapshots fill the indexes and matrices on disk are cached, then the heap is frozen."""
+        (tmp_path / "county.json").write_text(json.dumps([{"locationid": "26163", "locationname": "Wayne", "stateabbr": "MI"}]))
+        FeatureMatrix("county", ["26163"], ["Wayne"], ["MI"], ["OBESITY"], [[38.0]]).save(
+            str(tmp_path / "county_places_release_2025_AgeAdjPrv.npz")
+        )
+        monkeypatch.setattr(locations, "LOCATION_SNAPSHOT_DIR", str(tmp_path))
+        monkeypatch.setattr(features, "FEATURE_MATRIX_DIR", str(tmp_path))
+        features.feature_matrix_cache.clear()
+        try:
+            loaded = preload()
+            assert gc.get_freeze_count() > 0
+        finally:
+            gc.unfreeze()
+            features.feature_matrix_cache.clear()
+        assert loaded["location_snapshots"] == ["county"]
+        assert loaded["feature_matrices"] == 1
+        assert locations.location_indexes["county"].complete
+
+    def test_matrix_file_names_parsed(self, tmp_path, monkeypatch):
+        """Release names containing underscores are recovered from file names."""
+        FeatureMatrix("places", ["1"], ["A"], ["MI"], ["OBESITY"], [[1.0]]).save(
+            str(tmp_path / "places_places_release_2024_CrdPrv.npz")
+        )
+        monkeypatch.setattr(features, "FEATURE_MATRIX_DIR", str(tmp_path))
+        features.feature_matrix_cache.clear()
+        try:
+            assert load_feature_matrices() == [("places", "places_release_2024", "CrdPrv")]
+        finally:
+            features.feature_matrix_cache.clear()
+
+
+
+class TestWorkerSupervision:
+    """Test suite for forked workers."""
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+    @pytest.mark.filterwarnings("ignore:This process .* is multi-threaded:DeprecationWarning")
+    def test_worker_failure_logged(self, tmp_path, monkeypatch):
+        """A worker that fails to start logs its traceback before exiting with status 1."""
+        def _fail(sock):
+            raise RuntimeError("bad worker configuration")
+
+        monkeypatch.setattr(serve, "_run_worker", _fail)
+        log_path = tmp_path / "serve.log"
+        with open(log_path, "w") as stream:
+            configure_logging(level="INFO", fmt="json", stream=stream, threaded=False)
+            try:
+                _, status = os.waitpid(serve._spawn(None), 0)
+            finally:
+                stop_logging()
+        record = json.loads(log_path.read_text().splitlines()[-1])
+        assert os.waitstatus_to_exitcode(status) == 1
+        assert record["message"] == "Worker failed"
+        assert "RuntimeError: bad worker configuration" in record["exception"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,206 @@
+"""
+Tests for the local Socrata emulator.
+
+The server's upstream client is pointed at the emulator's ASGI app in process,
+so these tests run without network access.
+"""
+
+import asyncio
+import json
+import subprocess
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from places import utils
+from places.app import mcp
+from places.emulator import SocrataEmulator, SoQLError, load_datasets, run_query
+
+COUNTY_DATASET = "swc5-untb"
+
+ROWS = [
+    {"stateabbr": "OH", "statedesc": "Ohio", "locationid": "39035", "locationname": "Cuyahoga", "data_value": "30.5"},
+    {"stateabbr": "OH", "statedesc": "Ohio", "locationid": "39049", "locationname": "Franklin", "data_value": "33.1"},
+    {"stateabbr": "MI", "statedesc": "Michigan", "locationid": "26163", "locationname": "St. Mary's", "data_value": "35.0"},
+    {"stateabbr": "MI", "statedesc": "Michigan", "locationid": "26125", "locationname": "Oakland"},
+]
+
+
+def _county_rows():
+    """County estimates of two measures for 20 Ohio counties."""
+    rows = []
+    for i in range(20):
+        for measureid in ("OBESITY", "CSMOKING"):
+            rows.append({
+                "stateabbr": "OH", "statedesc": "Ohio", "locationid": f"39{2 * i + 1:03d}",
+                "locationname": f"County {i}", "measureid": measureid, "datavaluetypeid": "CrdPrv",
+                "data_value": f"{20 + i + (5 if measureid == 'OBESITY' else 0):.1f}",
+                "low_confidence_limit": "10.0", "high_confidence_limit": "40.0", "totalpopulation": str(1000 * (i + 1)),
+            })
+    return rows
+
+
+@pytest.fixture
+def emulator(monkeypatch):
+    """Route upstream requests to an in-process emulator serving the 2025 county dataset."""
+    emulated = SocrataEmulator({COUNTY_DATASET: _county_rows()})
+    app = emulated.app()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(utils.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.ASGITransport(app=app), base_url="http://emulator"))
+    return emulated
+
+
+async def _get(emulated, path, headers=None):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=emulated.app()), base_url="http://emulator") as client:
+        return await client.get(path, headers=headers)
+
+
+class TestSoQL:
+    """Test suite for the supported SoQL subset."""
+
+    def test_where(self):
+        """Equality, IN, comparisons, AND/OR/NOT, parentheses and escaped quotes."""
+        ids = lambda where: [row["locationid"] for row in run_query(ROWS, {"$where": where})]
+        assert ids("stateabbr = 'OH'") == ["39035", "39049"]
+        assert ids("locationid IN ('39049', '26125')") == ["39049", "26125"]
+        assert ids("locationid NOT IN ('39049', '26125')") == ["39035", "26163"]
+        assert ids("data_value > 31 AND (stateabbr = 'MI' OR locationname = 'Franklin')") == ["39049", "26163"]
+        assert ids("NOT stateabbr = 'OH' and data_value IS NULL") == ["26125"]
+        assert ids("locationname = 'St. Mary''s'") == ["26163"]
+
+    def test_numeric_and_text_comparison(self):
+        """Quoted literals compare as text for equality; ordering compares numbers."""
+        rows = [{"fips": "01"}, {"fips": "1"}, {"fips": "9"}, {"fips": "10"}]
+        assert run_query(rows, {"$where": "fips = '1'"}) == [{"fips": "1"}]
+        assert run_query(rows, {"$where": "fips > 5"}) == [{"fips": "9"}, {"fips": "10"}]
+
+    def test_select_group_and_aggregates(self):
+        """Aliases, grouped aggregates and null fields omitted from results."""
+        result = run_query(ROWS, {"$select": "stateabbr AS state, count(*), avg(data_value) AS mean, count(data_value)",
+                                  "$group": "stateabbr", "$order": "state DESC"})
+        assert result == [
+            {"state": "OH", "count": "2", "mean": "31.8", "count_data_value": "2"},
+            {"state": "MI", "count": "2", "mean": "35", "count_data_value": "1"},
+        ]
+        assert run_query(ROWS, {"$select": "max(data_value), sum(data_value)"}) == [
+            {"max_data_value": "35", "sum_data_value": "98.6"}]
+        assert run_query(ROWS, {"$select": "locationid,data_value", "$where": "locationid = '26125'"}) == [
+            {"locationid": "26125"}]
+
+    def test_order_limit_offset(self):
+        """Numeric-aware ordering by unselected columns (nulls first descending), paging and the default limit."""
+        ordered = run_query(ROWS, {"$select": "locationid", "$order": "data_value DESC, locationid", "$limit": 2,
+                                   "$offset": 1})
+        assert ordered == [{"locationid": "26163"}, {"locationid": "39049"}]
+        many = [{"i": str(i)} for i in range(1500)]
+        assert len(run_query(many, {})) == 1000
+
+    def test_unsupported(self):
+        """Queries outside the subset are rejected."""
+        for params in ({"$where": "upper(locationname) = 'X'"}, {"$where": "stateabbr ="},
+                       {"$select": "median(data_value)"}, {"$select": "locationid, count(*)"}):
+            with pytest.raises(SoQLError):
+                run_query(ROWS, params)
+
+
+class TestEmulatedHost:
+    """Test suite for the HTTP behaviour of the emulator."""
+
+    def test_etag_and_republish(self):
+        """Responses carry an ETag, matching conditional requests get 304 until the dataset is republished."""
+        emulated = SocrataEmulator({"abcd-1234": ROWS})
+        first = asyncio.run(_get(emulated, "/resource/abcd-1234.json?$where=stateabbr='OH'"))
+        assert first.status_code == 200 and len(first.json()) == 2
+        etag = first.headers["etag"]
+        assert asyncio.run(_get(emulated, "/resource/abcd-1234.json", {"If-None-Match": etag})).status_code == 304
+        emulated.republish("abcd-1234")
+        assert asyncio.run(_get(emulated, "/resource/abcd-1234.json", {"If-None-Match": etag})).status_code == 200
+
+    def test_errors(self):
+        """Unknown datasets, malformed queries and the configured error rate."""
+        emulated = SocrataEmulator({"abcd-1234": ROWS})
+        assert asyncio.run(_get(emulated, "/resource/none-0000.json")).status_code == 404
+        malformed = asyncio.run(_get(emulated, "/resource/abcd-1234.json?$where=stateabbr=="))
+        assert malformed.status_code == 400 and malformed.json()["error"] is True
+        failing = SocrataEmulator({"abcd-1234": ROWS}, error_rate=1.0)
+        assert asyncio.run(_get(failing, "/resource/abcd-1234.json")).status_code == 500
+        stats = asyncio.run(_get(emulated, "/emulator/stats")).json()
+        assert stats["statuses"] == {"404": 1, "400": 1}
+
+    def test_latency_and_throttling(self):
+        """Configured latency delays responses; requests beyond max_rps get 429 with Retry-After."""
+        slow = SocrataEmulator({"abcd-1234": ROWS}, latency=0.1, jitter=0.02, seed=1)
+        start = time.perf_counter()
+        asyncio.run(_get(slow, "/resource/abcd-1234.json"))
+        assert time.perf_counter() - start >= 0.08
+
+        throttled = SocrataEmulator({"abcd-1234": ROWS}, max_rps=2)
+
+        async def burst():
+            return [await _get(throttled, "/resource/abcd-1234.json") for _ in range(4)]
+
+        statuses = [response.status_code for response in asyncio.run(burst())]
+        assert statuses[:2] == [200, 200]
+        assert 429 in statuses[2:]
+
+    def test_load_datasets(self, tmp_path):
+        """Datasets load from row lists, CSV files and recorded fixtures."""
+        (tmp_path / "aaaa-0001.json").write_text(json.dumps(ROWS))
+        (tmp_path / "bbbb-0002.csv").write_text("locationid,data_value\n39035,30.5\n39049,\n")
+        (tmp_path / "recorded.json").write_text(json.dumps(
+            {"request": {"dataset": "cccc-0003"}, "response": {"status": 200, "body": ROWS[:1]}}))
+        datasets = load_datasets(str(tmp_path))
+        assert set(datasets) == {"aaaa-0001", "bbbb-0002", "cccc-0003"}
+        assert datasets["bbbb-0002"] == [{"locationid": "39035", "data_value": "30.5"}, {"locationid": "39049"}]
+
+
+class TestServerAgainstEmulator:
+    """Test suite for tool calls answered by the emulator."""
+
+    def test_area_summary_stats(self, emulator):
+        """The scope filter and measure filter are applied upstream."""
+        result = asyncio.run(mcp.call_tool("area_summary_stats", {
+            "geo_scope": "counties_in_state", "state_code": "OH", "year": "2023",
+            "measureid": "OBESITY", "datavaluetypeid": "CrdPrv"})).structured_content
+        assert result["stats"]["count"] == 20
+        assert result["stats"]["max"] == {"value": 44.0, "location": "County 19"}
+
+    def test_chunked_locationid_lookup(self, emulator):
+        """Long location ID lists are split across several requests and merged."""
+        ids = [f"39{n:03d}" for n in range(1000)]
+        result = asyncio.run(mcp.call_tool("get_cdc_places_data", {
+            "year": "2023", "measureid": "CSMOKING", "geo": "county", "datavaluetypeid": "CrdPrv",
+            "locationid": ids}))
+        rows = json.loads(result.content[0].text)
+        assert sorted(row["locationid"] for row in rows) == [f"39{2 * i + 1:03d}" for i in range(20)]
+        assert {row["data_value"] for row in rows} == {f"{20 + i:.1f}" for i in range(20)}
+        assert emulator.requests[COUNTY_DATASET] > 1
+
+    def test_upstream_errors(self, emulator):
+        """Emulated upstream failures surface as tool errors."""
+        emulator.error_rate = 1.0
+        result = asyncio.run(mcp.call_tool("area_summary_stats", {
+            "geo_scope": "counties_in_state", "state_code": "OH", "year": "2023",
+            "measureid": "OBESITY", "datavaluetypeid": "CrdPrv"})).structured_content
+        assert "error" in result
+
+    def test_base_url_switch(self):
+        """PLACES_SOCRATA_BASE_URL points every endpoint at another host."""
+        code = "from places.config import API_ENDPOINTS, DATA_DICTIONARY_ENDPOINT; " \
+               "import json; print(json.dumps([DATA_DICTIONARY_ENDPOINT, API_ENDPOINTS['county']['places_release_2025']]))"
+        env = {**os.environ, "PLACES_SOCRATA_BASE_URL": "http://127.0.0.1:8001/",
+               "PYTHONPATH": os.path.join(os.path.dirname(__file__), '..', 'src')}
+        output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+        assert json.loads(output) == ["http://127.0.0.1:8001/resource/m35w-spkz.json",
+                                      "http://127.0.0.1:8001/resource/swc5-untb.json"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
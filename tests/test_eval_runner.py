@@ -0,0 +1,139 @@
+"""
+Tests for the concurrent evaluation runner (eval/phoenix).
+
+The session pool connects to the server in process, with the upstream fetch
+replaced by an httpx mock transport; the agent and judge are replaced by fakes.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add src and the Phoenix eval directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'eval', 'phoenix'))
+
+import httpx
+
+from places import utils
+from places.app import mcp
+from mcp_pool import MCPSessionPool, ToolResultCache, call_key, record_tool_calls
+from run_concurrent_eval import load_questions, run_eval
+
+QUESTIONS_CSV = os.path.join(os.path.dirname(__file__), '..', 'eval', 'mcp-data-check', 'questions.csv')
+
+CALL = {"year": "2023", "measureid": "OBESITY", "geo": "county", "datavaluetypeid": "CrdPrv", "locationid": "39035"}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Answers every upstream request with one county row after a short delay; returns the request count."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=[{"locationid": "39035", "locationname": "Cuyahoga", "data_value": "30.5"}])
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(utils.httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(utils, "RESPONSE_CACHE_SIZE", 0)
+    return requests
+
+
+class TestToolResultCache:
+    """Test suite for the shared session pool and tool-result cache."""
+
+    def test_identical_calls_deduplicated(self, upstream):
+        """Concurrent and later identical calls share one server call; each task records its own calls."""
+        async def scenario():
+            async with MCPSessionPool(mcp, size=2) as pool:
+                cache = ToolResultCache(pool)
+
+                async def task():
+                    calls = record_tool_calls()
+                    result = await cache.call_tool("get_cdc_places_data", dict(CALL))
+                    return calls, result
+
+                runs = await asyncio.gather(*(task() for _ in range(5)))
+                reordered = await cache.call_tool("get_cdc_places_data", dict(reversed(list(CALL.items()))))
+                return cache, runs, reordered
+
+        cache, runs, reordered = asyncio.run(scenario())
+        assert cache.stats() == {"enabled": True, "hits": 5, "misses": 1, "server_calls": 1}
+        assert len(upstream) == 1
+        assert sorted(calls[0]["cached"] for calls, _ in runs) == [False, True, True, True, True]
+        assert {json.loads(result.content[0].text)[0]["locationid"] for _, result in runs} == {"39035"}
+        assert reordered.content[0].text == runs[0][1].content[0].text
+
+    def test_errors_not_cached(self, upstream):
+        """Error results are returned but retried by the next identical call."""
+        async def scenario():
+            async with MCPSessionPool(mcp) as pool:
+                cache = ToolResultCache(pool)
+                for _ in range(2):
+                    await cache.call_tool("area_summary_stats", {
+                        "geo_scope": "tracts_in_county", "state_code": "OH", "year": "2023",
+                        "measureid": "OBESITY", "datavaluetypeid": "CrdPrv"})
+                return cache
+
+        cache = asyncio.run(scenario())
+        assert cache.misses == 2 and cache.hits == 0 and cache.pool.calls == 2
+
+    def test_disabled(self, upstream):
+        """With the cache disabled every call reaches the server, spread over the pool's sessions."""
+        async def scenario():
+            async with MCPSessionPool(mcp, size=2) as pool:
+                cache = ToolResultCache(pool, enabled=False)
+                await asyncio.gather(*(cache.call_tool("get_cdc_places_data", dict(CALL)) for _ in range(3)))
+                return cache
+
+        cache = asyncio.run(scenario())
+        assert cache.pool.calls == 3 and cache.hits == 0
+        assert call_key("t", {"a": 1, "b": 2}) == call_key("t", {"b": 2, "a": 1})
+
+
+class TestRunEval:
+    """Test suite for running questions and repeats concurrently."""
+
+    def test_concurrency_limit_and_results(self):
+        """Runs overlap up to the limit; results are grouped per question with repeat verdicts."""
+        questions = [{"question": f"q{i}", "expected_answer": str(i), "eval_type": "llm_judge"} for i in range(3)]
+        running, peak = 0, 0
+
+        async def answer(question, thread_id):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            if thread_id == "2-1":
+                raise RuntimeError("model timed out")
+            return f"answer {question[1:]}"
+
+        def judge(question, expected, response):
+            return response == f"answer {expected}" and question != "q1"
+
+        report = asyncio.run(run_eval(answer, questions, repeats=4, concurrency=3, judge=judge))
+        assert peak == 3
+        summary = report["summary"]
+        assert summary["runs"] == 12 and summary["errors"] == 1
+        assert [result["repeat_pass_count"] for result in report["results"]] == [4, 0, 3]
+        assert [result["passed"] for result in report["results"]] == [True, False, True]
+        assert report["results"][2]["repeat_results"][1]["error"] == "RuntimeError: model timed out"
+        assert summary["repeat_pass_rate"] == 7 / 12
+        assert summary["wall_seconds"] < summary["sequential_seconds"]
+
+    def test_load_questions(self, tmp_path):
+        """Both the mcp-data-check and the Phoenix dataset column layouts are read."""
+        questions = load_questions(QUESTIONS_CSV)
+        assert len(questions) == 10 and questions[0]["expected_answer"] == "36.9"
+        phoenix = tmp_path / "dataset.csv"
+        phoenix.write_text('query,responses\n"What is x?",42\n')
+        assert load_questions(phoenix) == [{"question": "What is x?", "expected_answer": "42", "eval_type": "llm_judge"}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
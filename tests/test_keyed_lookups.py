@@ -0,0 +1,151 @@
+"""
+Tests for keyed lookups by FIPS code / locationid.
+
+The upstream fetch is replaced with an in-memory fake, so these tests run
+without network access.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+import sys
+import os
+from urllib.parse import urlencode
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastmcp import Client
+
+from places import utils
+from places.app import mcp
+from places.rollup import filter_states, rollup_counties
+from places.utils import chunk_in_filter, query_api_chunked
+
+
+def _echo_ids(url, params):
+    """Returns one row per location ID in the request's $where filter."""
+    where = params.get("$where", "")
+    ids = [part.strip(" ()'") for part in where.split("IN", 1)[-1].split(",")] if " IN " in where else []
+    if "locationid = " in where:
+        ids = [where.split("locationid = ")[1].strip("'")]
+    return [{"locationid": i, "locationname": f"Area {i}", "data_value": "10.0"} for i in ids]
+
+
+@pytest.fixture
+def fake_fetch(fake_upstream):
+    """Replace the upstream fetch with a fake echoing one row per requested ID."""
+    return fake_upstream(utils, _echo_ids)
+
+
+class TestChunkInFilter:
+    """Test suite for chunk_in_filter."""
+
+    def test_chunks_fit_budget(self):
+        """Every chunk's encoded IN clause fits the budget."""
+        from urllib.parse import quote
+        values = [f"{i:05d}" for i in range(1000)]
+        chunks = chunk_in_filter("locationid", values, 1500)
+        assert len(chunks) > 1
+        assert [v for chunk in chunks for v in chunk] == values
+        for chunk in chunks:
+            assert len(quote(utils.soql_in("locationid", chunk), safe="")) <= 1500
+
+    def test_duplicates_dropped(self):
+        """Repeated IDs are only requested once."""
+        assert chunk_in_filter("locationid", ["1", "2", "1"], 1000) == [["1", "2"]]
+
+
+class TestQueryApiChunked:
+    """Test suite for query_api_chunked."""
+
+    def test_long_id_list_split_and_concurrent(self, fake_fetch):
+        """Long ID lists become several concurrent requests under the URL limit."""
+        url = "https://data.cdc.gov/resource/swc5-untb.json"
+        ids = [f"{i:05d}" for i in range(600)]
+        start = time.perf_counter()
+        records = asyncio.run(query_api_chunked(url, {"measureid": "OBESITY", "$where": "stateabbr = 'MI'"},
+                                                "locationid", ids, max_url_length=2000, max_concurrency=16))
+        elapsed = time.perf_counter() - start
+        assert len(fake_fetch) > 1
+        assert elapsed < 0.05 * len(fake_fetch)
+        assert sorted(r["locationid"] for r in records) == ids
+        for _, params in fake_fetch:
+            assert params["$where"].startswith("(stateabbr = 'MI') AND locationid")
+            assert len(url) + 1 + len(urlencode(params)) <= 2000
+
+    def test_failure_returns_none(self, fake_upstream):
+        """A failed chunk fails the whole query rather than returning partial data."""
+        fake_upstream(utils, lambda url, params: None, delay=0)
+        assert asyncio.run(query_api_chunked("https://x", {}, "locationid", ["1"])) is None
+
+
+class TestToolsWithLocationId:
+    """Test suite for the locationid parameters of the tools."""
+
+    def test_get_cdc_places_data_by_fips(self, fake_fetch):
+        """get_cdc_places_data sends locationid filters upstream."""
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("get_cdc_places_data", {
+                    "year": "2023", "measureid": "OBESITY", "geo": "county",
+                    "datavaluetypeid": "CrdPrv", "locationid": ["26163", "39169"],
+                })
+
+        result = asyncio.run(run())
+        assert fake_fetch[0][1]["$where"] == "locationid IN ('26163', '39169')"
+        assert [r["locationid"] for r in json.loads(result.content[0].text)] == ["26163", "39169"]
+
+    def test_get_cdc_places_data_reports_corrections(self, fake_fetch):
+        """A fuzzy-corrected location name is reported next to the data."""
+        from places import locations
+        index = locations.location_indexes["county"]
+        index.add([{"locationid": "25027", "locationname": "Worcester", "stateabbr": "MA"}])
+        index.complete = True
+
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("get_cdc_places_data", {
+                    "year": "2023", "measureid": "OBESITY", "geo": "county",
+                    "datavaluetypeid": "CrdPrv", "locationname": "Worchester",
+                })
+
+        result = json.loads(asyncio.run(run()).content[0].text)
+        assert result["corrections"] == {"Worchester": "Worcester"}
+        assert [r["locationid"] for r in result["data"]] == ["25027"]
+
+    def test_area_summary_stats_by_county_fips(self, fake_upstream):
+        """tracts_in_county can select the county by FIPS code."""
+        from places.tools import area_summary_stats
+        calls = fake_upstream(area_summary_stats, lambda url, params: [
+            {"locationname": str(i), "countyname": "Worcester", "data_value": str(i)} for i in range(1, 6)
+        ], delay=0)
+
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("area_summary_stats", {
+                    "geo_scope": "tracts_in_county", "state_code": "MA", "year": "2023",
+                    "measureid": "OBESITY", "datavaluetypeid": "CrdPrv", "county_fips": "25027",
+                })
+
+        result = asyncio.run(run())
+        assert calls[0][1]["$where"] == "stateabbr = 'MA' AND countyfips = '25027'"
+        assert result.structured_content["stats"]["count"] == 5
+
+
+class TestStateFips:
+    """Test suite for state FIPS codes on rolled-up states."""
+
+    def test_state_fips_from_county_ids(self):
+        """State records carry the first two digits of their county IDs."""
+        states = rollup_counties([
+            {"stateabbr": "MI", "statedesc": "Michigan", "locationid": "26163", "data_value": "20", "totalpopulation": "10"},
+            {"stateabbr": "OH", "statedesc": "Ohio", "locationid": "39169", "data_value": "10", "totalpopulation": "10"},
+        ])
+        assert [s["locationid"] for s in states] == ["26", "39"]
+        assert [s["stateabbr"] for s in filter_states(states, locationid=["39"])] == ["OH"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
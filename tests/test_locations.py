@@ -0,0 +1,153 @@
+"""
+Tests for the local location-name resolution index.
+
+The upstream fetch is replaced with an in-memory fake, so these tests run
+without network access.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from places import locations
+from places.locations import LocationIndex, normalize_name, resolve_location_filter, resolve_locations
+
+COUNTIES = [
+    {"locationid": "25027", "locationname": "Worcester", "stateabbr": "MA"},
+    {"locationid": "24047", "locationname": "Worcester", "stateabbr": "MD"},
+    {"locationid": "29189", "locationname": "St. Louis", "stateabbr": "MO"},
+    {"locationid": "27137", "locationname": "St. Louis", "stateabbr": "MN"},
+    {"locationid": "26163", "locationname": "Wayne", "stateabbr": "MI"},
+    {"locationid": "39169", "locationname": "Wayne", "stateabbr": "OH"},
+    {"locationid": "26125", "locationname": "Oakland", "stateabbr": "MI"},
+    {"locationid": "22071", "locationname": "Orleans", "stateabbr": "LA"},
+]
+
+
+@pytest.fixture
+def county_index():
+    index = LocationIndex("county")
+    index.add(COUNTIES)
+    return index
+
+
+@pytest.fixture
+def bootstrapped(fake_upstream, monkeypatch):
+    """Enable bootstrapping the county index from a fake upstream."""
+    monkeypatch.setattr(locations, "LOCATION_INDEX_BOOTSTRAP_GEOS", ["county"])
+    return fake_upstream(locations, lambda url, params: COUNTIES, delay=0)
+
+
+class TestNormalizeName:
+    """Test suite for normalize_name."""
+
+    def test_suffixes_and_punctuation(self):
+        """County suffixes, periods and case are ignored."""
+        assert normalize_name("Worcester County") == "worcester"
+        assert normalize_name("St. Louis") == normalize_name("saint louis") == "st louis"
+        assert normalize_name("Orleans Parish") == "orleans"
+
+    def test_accents(self):
+        """Accented characters match their ASCII forms."""
+        assert normalize_name("Doña Ana County") == "dona ana"
+
+
+class TestLocationIndex:
+    """Test suite for LocationIndex."""
+
+    def test_exact_lookup_is_ambiguous_across_states(self, county_index):
+        """A bare name matches every state; a state filter narrows it."""
+        assert {e["locationid"] for e in county_index.lookup("Worcester County")} == {"25027", "24047"}
+        assert [e["locationid"] for e in county_index.lookup("worcester", states={"MA"})] == ["25027"]
+
+    def test_lookup_by_id(self, county_index):
+        """Location IDs resolve directly."""
+        assert county_index.lookup("26163")[0]["locationname"] == "Wayne"
+
+    def test_fuzzy_search(self, county_index):
+        """Typos are found through trigram similarity."""
+        results = county_index.search("Oaklnd")
+        assert results[0][1]["locationname"] == "Oakland"
+
+    def test_resolve_corrects_typos(self, county_index):
+        """A single clear fuzzy winner is accepted as a correction."""
+        resolution = county_index.resolve(["Worchester"])
+        assert resolution["corrections"] == {"Worchester": "Worcester"}
+        assert len(resolution["matches"]["Worchester"]) == 2
+
+    def test_resolve_reports_unknown(self, county_index):
+        """Names with no good match are unresolved."""
+        resolution = county_index.resolve(["Los Angeles"])
+        assert resolution["unresolved"] == {"Los Angeles": []}
+
+    def test_duplicate_ids_ignored(self, county_index):
+        """Adding the same location twice keeps one entry."""
+        assert county_index.add(COUNTIES) == 0
+        assert len(county_index) == len(COUNTIES)
+
+
+class TestResolveLocationFilter:
+    """Test suite for resolve_location_filter."""
+
+    def test_names_become_location_ids(self, bootstrapped):
+        """Resolved names are sent upstream as a locationid filter."""
+        result = asyncio.run(resolve_location_filter("county", ["St. Louis County", "Wayne"]))
+        assert result == {"where": "locationid IN ('26163', '27137', '29189', '39169')"}
+
+    def test_unknown_name_returns_suggestions(self, bootstrapped):
+        """A complete index rejects unknown names without a data query."""
+        result = asyncio.run(resolve_locations("county", "Wane"))
+        assert "error" in result
+        assert "Wayne, MI" in result["suggestions"]["Wane"]
+
+    def test_bootstrap_happens_once(self, bootstrapped):
+        """The distinct-location pull runs only on first use."""
+        asyncio.run(resolve_locations("county", "Wayne"))
+        asyncio.run(resolve_locations("county", "Oakland"))
+        assert len(bootstrapped) == 1
+        assert bootstrapped[0][1]["$group"] == "locationid,locationname,stateabbr"
+
+    def test_older_release_uses_names(self, bootstrapped):
+        """Names for releases other than the indexed one are sent verbatim, and their rows are not indexed."""
+        latest = locations.latest_release("county")
+        result = asyncio.run(resolve_location_filter("county", "Fairfield", release_name="places_release_2020"))
+        assert result == {"where": "locationname = 'Fairfield'"}
+        assert bootstrapped == []
+        locations.record_locations("county", [{"locationid": "09001", "locationname": "Fairfield"}], "places_release_2020")
+        locations.record_locations("county", [{"locationid": "09110", "locationname": "Capitol"}], latest)
+        index = locations.location_indexes["county"]
+        assert index.lookup("Fairfield") == [] and index.lookup("Capitol")[0]["locationid"] == "09110"
+
+    def test_empty_index_falls_back_to_names(self):
+        """Without an index the names are passed through verbatim."""
+        result = asyncio.run(resolve_location_filter("county", "Wayne County"))
+        assert result == {"where": "locationname = 'Wayne County'"}
+
+    def test_incomplete_index_does_not_correct(self):
+        """A near-miss of a learned tract ID is sent verbatim, not corrected to the learned tract."""
+        locations.record_locations("census", [{"locationid": "25017353101", "locationname": "25017353101", "stateabbr": "MA"}])
+        result = asyncio.run(resolve_locations("census", ["25017353102"]))
+        assert result == {"names": ["25017353102"]}
+
+    def test_incomplete_index_keeps_name_filter(self):
+        """An exact name learned in one state still queries every location with that name."""
+        locations.record_locations("places", [{"locationid": "1772000", "locationname": "Springfield", "stateabbr": "IL"}])
+        result = asyncio.run(resolve_location_filter("places", "Springfield"))
+        assert result == {"where": "locationname = 'Springfield'"}
+
+    def test_snapshot_directory(self, tmp_path, monkeypatch):
+        """Snapshots on disk build a complete index without upstream requests."""
+        (tmp_path / "county.json").write_text(json.dumps(COUNTIES))
+        monkeypatch.setattr(locations, "LOCATION_SNAPSHOT_DIR", str(tmp_path))
+        result = asyncio.run(resolve_locations("county", "Oakland County"))
+        assert [e["locationid"] for e in result["entries"]] == ["26125"]
+        assert locations.location_indexes["county"].complete
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,180 @@
+"""
+Tests for structured, queue-based logging.
+
+Tools under test are registered on a throwaway FastMCP server, so these tests
+run without network access.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastmcp import Client, FastMCP
+from starlette.testclient import TestClient
+
+from places import log
+from places.app import create_app
+from places.log import LoggingMiddleware, configure_logging, fields, sampled, stop_logging
+from places.metrics import REGISTRY
+from places.utils import get_release_for_year
+
+logger = logging.getLogger("places.test")
+
+
+@pytest.fixture
+def output():
+    """Route places logs to a buffer as JSON; read it after the listener is stopped."""
+    stream = io.StringIO()
+    configure_logging(level="INFO", fmt="json", stream=stream)
+    yield stream
+    stop_logging()
+
+
+def _lines(stream):
+    stop_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def _server():
+    server = FastMCP("test", middleware=[LoggingMiddleware()])
+
+    @server.tool()
+    async def noisy() -> dict:
+        logger.info("Inside the tool", extra=fields(answer=42))
+        return {"ok": True}
+
+    return server
+
+
+async def _call(server, n=1):
+    async with Client(server) as client:
+        for _ in range(n):
+            await client.call_tool("noisy", {})
+
+
+class TestStructuredLogging:
+    """Test suite for record formatting and correlation ids."""
+
+    def test_json_record_with_correlation_id(self, output):
+        """Records logged during a tool call carry its tool name, a correlation id and their fields."""
+        asyncio.run(_call(_server(), n=2))
+        lines = _lines(output)
+        assert [line["message"] for line in lines] == ["Inside the tool"] * 2
+        assert {line["tool"] for line in lines} == {"noisy"}
+        assert lines[0]["answer"] == 42
+        assert lines[0]["level"] == "INFO" and lines[0]["logger"] == "places.test"
+        assert len({line["request_id"] for line in lines}) == 2
+
+    def test_outside_tool_calls(self, output):
+        """Records outside a tool call have no correlation id."""
+        logger.warning("Background %s", "work")
+        (line,) = _lines(output)
+        assert line["message"] == "Background work"
+        assert "request_id" not in line and "tool" not in line
+
+    def test_exception_and_text_format(self):
+        """Tracebacks are kept, and the text format lists context as key=value pairs."""
+        stream = io.StringIO()
+        configure_logging(level="INFO", fmt="text", stream=stream)
+        try:
+            raise ValueError("bad row")
+        except ValueError:
+            logger.exception("Decode failed", extra=fields(dataset="swc5-untb"))
+        stop_logging()
+        text = stream.getvalue()
+        assert "ERROR places.test Decode failed [dataset=swc5-untb]" in text
+        assert "ValueError: bad row" in text
+
+    def test_nothing_on_stdout(self, capsys):
+        """Records go to stderr, never to stdout (the stdio MCP transport)."""
+        configure_logging(level="INFO", fmt="json")
+        logger.warning("To stderr")
+        stop_logging()
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "To stderr" in captured.err
+
+
+class TestSamplingAndLevels:
+    """Test suite for sampling, levels and the bounded queue."""
+
+    def test_sampling(self, output):
+        """High-volume records are kept once per sampling interval, per message template."""
+        for i in range(25):
+            logger.info("Lookup miss", extra=sampled(every=10, measureid=f"M{i}"))
+        logger.info("Other miss", extra=sampled(every=10))
+        lines = _lines(output)
+        misses = [line for line in lines if line["message"] == "Lookup miss"]
+        assert [line["measureid"] for line in misses] == ["M0", "M10", "M20"]
+        assert misses[0]["sampled"] == 10
+        assert any(line["message"] == "Other miss" for line in lines)
+
+    def test_debug_disabled(self, output):
+        """Debug records are discarded by the level check before any work is done."""
+        class Expensive:
+            def __str__(self):
+                raise AssertionError("formatted")
+
+        assert not logging.getLogger("places.utils").isEnabledFor(logging.DEBUG)
+        logger.debug("Value %s", Expensive())
+        assert _lines(output) == []
+
+    def test_full_queue_drops(self):
+        """A full queue drops records instead of blocking the caller."""
+        stream = io.StringIO()
+        listener = configure_logging(level="INFO", fmt="json", stream=stream, queue_size=1)
+        # Hold the listener so the queue stays full
+        listener.stop()
+        before = log.LOG_DROPPED.labels().value
+        for _ in range(5):
+            logger.warning("Dropped?")
+        assert log.LOG_DROPPED.labels().value - before == 4
+        log._listener = None
+        stop_logging()
+        assert "places_log_records_dropped_total" in REGISTRY.render()
+
+    def test_stop_restores_propagation(self):
+        """After stop_logging, places records propagate to the root logger again."""
+        configure_logging(level="INFO", stream=io.StringIO())
+        assert logging.getLogger("places").propagate is False
+        stop_logging()
+        assert logging.getLogger("places").propagate is True
+        assert log._listener is None
+
+
+class TestServerLogging:
+    """Test suite for logging in the server."""
+
+    def test_lookup_miss_logged(self, output):
+        """A lookup miss is logged with its fields instead of printed."""
+        assert get_release_for_year("NOT_A_MEASURE", "2023") is None
+        (line,) = _lines(output)
+        assert line["message"] == "Measure ID not found in the lookup table"
+        assert line["measureid"] == "NOT_A_MEASURE"
+
+    def test_request_id_header(self, capsys):
+        """The lifespan logs to stderr, with the X-Request-ID header as the correlation id."""
+        body = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                "params": {"name": "area_summary_stats", "arguments": {
+                    "geo_scope": "counties_in_state", "state_code": "OH", "year": "1900",
+                    "measureid": "OBESITY", "datavaluetypeid": "CrdPrv"}}}
+        headers = {"accept": "application/json, text/event-stream", "x-request-id": "req-123"}
+        with TestClient(create_app()) as client:
+            client.post("/mcp", json=body, headers=headers)
+        captured = capsys.readouterr()
+        lines = [json.loads(line) for line in captured.err.splitlines() if line.startswith("{")]
+        miss = next(line for line in lines if line["message"] == "No data release found for measure and year")
+        assert miss["request_id"] == "req-123"
+        assert miss["tool"] == "area_summary_stats"
+        assert captured.out == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
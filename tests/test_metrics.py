@@ -0,0 +1,165 @@
+"""
+Tests for the Prometheus metrics registry, instrumentation and /metrics route.
+
+Upstream responses come from an httpx mock transport, so these tests run
+without network access.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+from fastmcp import Client
+from starlette.testclient import TestClient
+
+from places import metrics, utils
+from places.app import create_app, mcp
+from places.metrics import Counter, Gauge, Histogram, Registry, dataset_id
+
+
+def _sample(text, line_prefix):
+    """Returns the value of the first exposition line starting with line_prefix."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+@pytest.fixture
+def mock_upstream(monkeypatch):
+    """Serve upstream requests from an httpx mock transport: 500 for dataset 'fail-0000'."""
+    def handler(request):
+        if "fail-0000" in request.url.path:
+            return httpx.Response(500)
+        return httpx.Response(200, json=[{"locationid": "26163", "locationname": "Wayne", "data_value": "20.0"}])
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(utils.httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(handler)))
+
+
+class TestRegistry:
+    """Test suite for the metric types and text exposition."""
+
+    def test_exposition_format(self):
+        """Counters, gauges and histograms render as Prometheus text."""
+        registry = Registry()
+        calls = Counter("calls_total", "Calls.", ["tool"], registry=registry)
+        gauge = Gauge("in_flight", "In flight.", registry=registry)
+        latency = Histogram("latency_seconds", "Latency.", ["tool"], buckets=(0.1, 1.0), registry=registry)
+        calls.labels("a").inc()
+        calls.labels("a").inc(2)
+        gauge.inc()
+        latency.labels("a").observe(0.1)
+        latency.labels("a").observe(0.5)
+        text = registry.render()
+        assert "# TYPE calls_total counter" in text
+        assert 'calls_total{tool="a"} 3' in text
+        assert "in_flight 1" in text
+        assert 'latency_seconds_bucket{tool="a",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{tool="a",le="1"} 2' in text
+        assert 'latency_seconds_bucket{tool="a",le="+Inf"} 2' in text
+        assert 'latency_seconds_count{tool="a"} 2' in text
+
+    def test_label_escaping(self):
+        """Quotes and backslashes in label values are escaped."""
+        registry = Registry()
+        Counter("c_total", "C.", ["x"], registry=registry).labels('a"b\\').inc()
+        assert 'c_total{x="a\\"b\\\\"} 1' in registry.render()
+
+    def test_dataset_id(self):
+        """Dataset ids are taken from Socrata resource URLs."""
+        assert dataset_id("https://data.cdc.gov/resource/swc5-untb.json") == "swc5-untb"
+
+
+class TestInstrumentation:
+    """Test suite for tool, upstream and cache metrics."""
+
+    def test_tool_and_upstream_metrics(self, mock_upstream):
+        """A tool call records tool latency, upstream status by dataset and cache lookups."""
+        before = metrics.REGISTRY.render()
+
+        async def run():
+            async with Client(mcp) as client:
+                await client.call_tool("get_cdc_places_data", {
+                    "year": "2023", "measureid": "OBESITY", "geo": "county",
+                    "datavaluetypeid": "CrdPrv", "locationid": "26163",
+                })
+
+        asyncio.run(run())
+        text = metrics.REGISTRY.render()
+
+        def delta(prefix):
+            return (_sample(text, prefix) or 0) - (_sample(before, prefix) or 0)
+
+        assert delta('places_tool_calls_total{tool="get_cdc_places_data",outcome="ok"}') == 1
+        assert delta('places_tool_duration_seconds_count{tool="get_cdc_places_data"}') == 1
+        assert delta('places_tool_response_bytes_count{tool="get_cdc_places_data"}') == 1
+        assert delta('places_upstream_requests_total{dataset="swc5-untb",status="200"}') == 1
+        assert _sample(text, 'places_tool_calls_in_flight{tool="get_cdc_places_data"}') == 0
+        assert _sample(text, "places_upstream_requests_in_flight") == 0
+        assert _sample(text, 'places_cache_misses_total{cache="upstream_responses"}') >= 1
+
+    def test_unknown_tool_label(self):
+        """Calls to tool names the server does not have share the 'unknown' label."""
+        before = metrics.REGISTRY.render()
+
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("no_such_tool_7f3a", {}, raise_on_error=False)
+
+        assert asyncio.run(run()).is_error
+        text = metrics.REGISTRY.render()
+        assert "no_such_tool_7f3a" not in text
+        prefix = 'places_tool_calls_total{tool="unknown",outcome="error"}'
+        assert (_sample(text, prefix) or 0) - (_sample(before, prefix) or 0) == 1
+
+    def test_upstream_error_status(self, mock_upstream):
+        """Failed upstream requests are counted with their HTTP status."""
+        before = metrics.REGISTRY.render()
+        assert asyncio.run(utils._fetch_upstream("https://data.cdc.gov/resource/fail-0000.json", {})) is None
+        prefix = 'places_upstream_requests_total{dataset="fail-0000",status="500"}'
+        assert _sample(metrics.REGISTRY.render(), prefix) - (_sample(before, prefix) or 0) == 1
+
+
+class TestEventLoopLag:
+    """Test suite for event-loop lag sampling."""
+
+    def test_blocking_call_measured(self):
+        """A blocking call on the loop shows up as lag."""
+        async def run():
+            sampler = asyncio.create_task(metrics.sample_event_loop_lag(interval=0.01))
+            await asyncio.sleep(0.02)
+            time.sleep(0.15)
+            await asyncio.sleep(0.02)
+            sampler.cancel()
+
+        asyncio.run(run())
+        assert _sample(metrics.REGISTRY.render(), "places_event_loop_lag_distribution_seconds_bucket{le=\"0.1\"}") is not None
+        assert metrics.EVENT_LOOP_LAG_HISTOGRAM.labels().sum >= 0.1
+
+
+class TestRoutes:
+    """Test suite for /metrics and /health."""
+
+    def test_metrics_route(self):
+        """/metrics serves the registry as Prometheus text."""
+        with TestClient(create_app()) as client:
+            response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE places_tool_duration_seconds histogram" in response.text
+
+    def test_health_service_name(self):
+        """/health names this service."""
+        with TestClient(create_app()) as client:
+            assert client.get("/health").json()["service"] == "cdc-places-mcp-server"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+Tests for offloading CPU-heavy stages from the event loop.
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from places import offload, utils
+from places.offload import run_cpu
+from places.serialization import dumps, loads_rows
+from places.utils import compute_summary_stats
+
+marker = contextvars.ContextVar("marker", default=None)
+
+
+def _where():
+    return threading.current_thread().name, marker.get()
+
+
+def _records(n):
+    return [{"locationname": f"Tract {i}", "countyname": "Wayne", "data_value": f"{(i * 37) % 500 / 10:.1f}"}
+            for i in range(n)]
+
+
+class TestRunCpu:
+    """Test suite for run_cpu."""
+
+    def test_small_inputs_inline(self):
+        """Inputs below the threshold run on the event-loop thread."""
+        async def run():
+            return await run_cpu(_where, size=10, threshold=100)
+
+        thread, _ = asyncio.run(run())
+        assert thread == threading.current_thread().name
+
+    def test_large_inputs_offloaded_with_context(self):
+        """Inputs at the threshold run on the pool, with the caller's context variables."""
+        async def run():
+            marker.set("caller")
+            return await run_cpu(_where, size=100, threshold=100)
+
+        thread, value = asyncio.run(run())
+        assert thread.startswith("places-offload")
+        assert value == "caller"
+
+    def test_lifespan_loads_release_index(self):
+        """The server lifespan reads the lookup table before the first tool call."""
+        utils.load_release_index.cache_clear()
+
+        async def run():
+            async with offload.lifespan(None):
+                pass
+
+        asyncio.run(run())
+        assert utils.load_release_index.cache_info().currsize == 1
+
+
+class TestChunkedDecode:
+    """Test suite for loads_rows."""
+
+    def test_matches_single_decode(self):
+        """Decoding in chunks gives the same rows, with or without whitespace between objects."""
+        rows = _records(3000)
+        compact = dumps(rows)
+        spaced = json.dumps(rows).replace("}, {", "}\n,{").encode()
+        assert loads_rows(compact, chunk_bytes=1000) == rows
+        assert loads_rows(spaced, chunk_bytes=1000) == rows
+
+    def test_boundary_inside_string(self):
+        """A chunk boundary inside a string value falls back to one decode."""
+        rows = [{"name": "a},{b" * 50, "i": i} for i in range(200)]
+        assert loads_rows(dumps(rows), chunk_bytes=100) == rows
+
+    def test_other_documents(self):
+        """Small documents and non-arrays decode as usual."""
+        assert loads_rows(b'{"error": true}', chunk_bytes=1) == {"error": True}
+        assert loads_rows(b"[]", chunk_bytes=1) == []
+
+
+class TestSummaryStats:
+    """Test suite for offloaded summary statistics."""
+
+    def test_offloaded_matches_inline(self, monkeypatch):
+        """Statistics computed on the pool equal those computed inline."""
+        records = _records(2000)
+        inline = asyncio.run(compute_summary_stats(records))
+        monkeypatch.setattr(utils, "OFFLOAD_MIN_ROWS", 1)
+        offloaded = asyncio.run(compute_summary_stats(records))
+        assert offloaded == inline
+        assert inline["count"] == 2000
+
+    def test_median_location(self):
+        """The median location is the first row whose value is closest to the median."""
+        records = [{"locationname": name, "data_value": value}
+                   for name, value in [("a", "1.0"), ("b", "3.0"), ("c", "3.0"), ("d", "9.0")]]
+        stats = asyncio.run(compute_summary_stats(records))
+        assert stats["median"] == {"value": 3.0, "location": "b"}
+        assert stats["min"]["location"] == "a" and stats["max"]["location"] == "d"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,213 @@
+"""
+Tests for on-demand tool call profiling and the /debug/slow-calls route.
+
+The upstream fetch is replaced with an in-memory fake and profiles are
+written to a temporary directory, so these tests run without network access.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastmcp import Client
+from starlette.testclient import TestClient
+
+from places import profiling, utils
+from places.app import create_app, mcp
+from places.profiling import Profile, Sampler, prune_profiles, slowest_calls, truncate_arguments, write_profile
+
+ARGUMENTS = {
+    "geo_scope": "counties_in_state", "state_code": "OH", "year": "2023",
+    "measureid": "OBESITY", "datavaluetypeid": "CrdPrv",
+}
+
+
+def burn(seconds):
+    """Keeps the calling thread busy for the given time."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """Replace the network call behind the response cache."""
+    async def _fake(url, params, validators=None):
+        return [{"locationname": f"County {i}", "data_value": str(i)} for i in range(50)]
+
+    monkeypatch.setattr(utils, "_fetch_upstream", _fake)
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """Write profiles to a temporary directory."""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestSampler:
+    """Test suite for the stack sampler."""
+
+    def test_samples_only_the_profiled_task(self):
+        """CPU spent by another task on the same thread is not attributed to the profile."""
+        sampler = Sampler(interval=0.002)
+
+        async def profiled():
+            profile = Profile("tool", {}, sys._getframe(), threading.get_ident())
+            sampler.add(profile)
+            await asyncio.sleep(0.05)
+            burn(0.05)
+            sampler.remove(profile)
+            return profile
+
+        async def other():
+            await asyncio.sleep(0)
+            burn(0.05)
+
+        async def run():
+            profile, _ = await asyncio.gather(profiled(), other())
+            return profile
+
+        profile = asyncio.run(run())
+        assert profile.samples > 0
+        assert all(stack[0].startswith("burn ") for stack in profile.stacks)
+        lines = profile.folded().splitlines()
+        assert lines[0].endswith(f" {profile.stacks.most_common(1)[0][1]}")
+        assert lines[0].split(" (")[0] == "burn"
+
+    def test_thread_stops_when_idle(self):
+        """The sampling thread exits once no profile is active."""
+        sampler = Sampler(interval=0.001)
+        profile = Profile("tool", {}, sys._getframe(), threading.get_ident())
+        sampler.add(profile)
+        thread = sampler._thread
+        sampler.remove(profile)
+        thread.join(timeout=1)
+        assert not thread.is_alive()
+        assert sampler._thread is None
+
+
+class TestProfileFiles:
+    """Test suite for writing profiles and retention."""
+
+    def test_write_profile(self, tmp_path):
+        """Profiles are folded stacks plus a JSON description tagged by tool and arguments."""
+        profile = Profile("area_summary_stats", ARGUMENTS, None, 0)
+        profile.stacks[("leaf (a.py:1)", "root (b.py:2)")] = 3
+        profile.samples = 3
+        path = write_profile(profile, 0.25, "2026-01-02T03:04:05.000006+0000", str(tmp_path))
+
+        name = os.path.basename(path)
+        assert name.startswith("20260102T030405.000006Z_area_summary_stats_")
+        assert open(path).read() == "root (b.py:2);leaf (a.py:1) 3\n"
+        meta = json.load(open(path[: -len(".folded")] + ".json"))
+        assert meta["tool"] == "area_summary_stats"
+        assert meta["arguments"] == ARGUMENTS
+        assert meta["duration_ms"] == 250.0
+        assert meta["samples"] == 3
+
+    def test_tool_name_sanitized(self, tmp_path):
+        """Characters outside [A-Za-z0-9_-] in the tool name do not reach the file name."""
+        profile = Profile("../../etc/x y", {}, None, 0)
+        path = write_profile(profile, 0.1, "2026-01-02T03:04:05.000006+0000", str(tmp_path))
+        assert os.path.dirname(path) == str(tmp_path)
+        assert os.path.basename(path).startswith("20260102T030405.000006Z_______etc_x_y_")
+
+    def test_retention(self, tmp_path):
+        """The oldest profiles go first once the file or size limit is exceeded."""
+        for i in range(5):
+            for suffix, text in ((".folded", "x 1\n" * 100), (".json", "{}")):
+                path = tmp_path / f"{i}{suffix}"
+                path.write_text(text)
+                os.utime(path, (i, i))
+
+        assert prune_profiles(str(tmp_path), max_files=3, max_mb=10) == 2
+        assert sorted(p.name for p in tmp_path.glob("*.folded")) == ["2.folded", "3.folded", "4.folded"]
+        assert not (tmp_path / "0.json").exists()
+
+        assert prune_profiles(str(tmp_path), max_files=3, max_mb=500 / 1024 / 1024) == 2
+        assert [p.name for p in tmp_path.glob("*.folded")] == ["4.folded"]
+
+
+class TestProfilingMiddleware:
+    """Test suite for profiling and timing tool calls."""
+
+    def test_calls_recorded_without_profile(self, fake_upstream, profile_dir):
+        """Every call is timed; nothing is written unless profiling is requested."""
+        asyncio.run(mcp.call_tool("area_summary_stats", ARGUMENTS))
+        calls = slowest_calls()
+        assert len(calls) == 1
+        assert calls[0]["tool"] == "area_summary_stats"
+        assert calls[0]["arguments"] == ARGUMENTS
+        assert calls[0]["profile"] is None
+        assert not list(profile_dir.iterdir())
+
+    def test_profile_all(self, fake_upstream, profile_dir, monkeypatch):
+        """PLACES_PROFILE profiles every call."""
+        monkeypatch.setattr(profiling, "PROFILE_ALL", True)
+        asyncio.run(mcp.call_tool("area_summary_stats", ARGUMENTS))
+        path = slowest_calls()[0]["profile"]
+        assert path and os.path.dirname(path) == str(profile_dir)
+        assert os.path.exists(path[: -len(".folded")] + ".json")
+
+    def test_minimum_duration(self, fake_upstream, profile_dir, monkeypatch):
+        """Profiles of calls faster than PROFILE_MIN_SECONDS are discarded."""
+        monkeypatch.setattr(profiling, "PROFILE_ALL", True)
+        monkeypatch.setattr(profiling, "PROFILE_MIN_SECONDS", 60)
+        asyncio.run(mcp.call_tool("area_summary_stats", ARGUMENTS))
+        assert slowest_calls()[0]["profile"] is None
+        assert not list(profile_dir.iterdir())
+
+    def test_header_and_debug_route(self, fake_upstream, profile_dir):
+        """The X-Places-Profile header profiles one HTTP call, listed by /debug/slow-calls."""
+        body = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                "params": {"name": "area_summary_stats", "arguments": ARGUMENTS}}
+        headers = {"accept": "application/json, text/event-stream"}
+        with TestClient(create_app()) as client:
+            client.post("/mcp", json=body, headers=headers)
+            client.post("/mcp", json=body, headers={**headers, "x-places-profile": "1"})
+            response = client.get("/debug/slow-calls?limit=5")
+            bad = client.get("/debug/slow-calls?limit=x")
+
+        assert response.status_code == 200
+        report = response.json()
+        assert report["window"] == 2
+        profiles = [call["profile"] for call in report["calls"]]
+        assert profiles.count(None) == 1
+        assert len(list(profile_dir.glob("*.folded"))) == 1
+        assert bad.status_code == 400
+
+    def test_unknown_tool_not_recorded(self, profile_dir, monkeypatch):
+        """Calls to names the server has no tool for are neither profiled nor listed."""
+        monkeypatch.setattr(profiling, "PROFILE_ALL", True)
+
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("no_such_tool", {}, raise_on_error=False)
+
+        assert asyncio.run(run()).is_error
+        assert slowest_calls() == []
+        assert not list(profile_dir.iterdir())
+
+    def test_long_arguments_truncated(self):
+        """Long argument values are cut in the recent-call window; short ones are kept."""
+        arguments = truncate_arguments({"year": "2023", "locationid": [f"{i:05d}" for i in range(100)]}, max_chars=20)
+        assert arguments["year"] == "2023"
+        assert arguments["locationid"] == '["00000", "00001", "...'
+
+    def test_slowest_first(self):
+        """slowest_calls sorts the window by duration."""
+        for duration in (5.0, 50.0, 1.0):
+            profiling.recent_calls.append({"tool": "t", "duration_ms": duration})
+        assert [call["duration_ms"] for call in slowest_calls(2)] == [50.0, 5.0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
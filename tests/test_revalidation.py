@@ -0,0 +1,268 @@
+"""
+Tests for stale-while-revalidate refreshes of cached upstream responses.
+
+Upstream responses come from an httpx mock transport that honours
+If-None-Match, so these tests run without network access.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from places import correlation, rollup, utils
+from places.cache import TTLCache
+from places.config import API_ENDPOINTS
+from places.utils import NOT_MODIFIED, _fetch_api, _fetch_upstream
+
+CURRENT = API_ENDPOINTS["county"]["places_release_2025"]
+PREVIOUS = API_ENDPOINTS["county"]["places_release_2024"]
+PARAMS = {"measureid": "OBESITY", "stateabbr": "OH"}
+
+
+class FakeSocrata:
+    """Mock transport handler serving one versioned dataset with ETags."""
+
+    def __init__(self):
+        self.version = 1
+        self.status = 200
+        self.delay = 0.0
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        etag = f'"v{self.version}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"etag": etag})
+        rows = [{"locationid": "26163", "locationname": "Wayne", "data_value": str(20 + self.version)}]
+        return httpx.Response(200, json=rows, headers={"etag": etag, "last-modified": "Mon, 01 Sep 2025 00:00:00 GMT"})
+
+
+@pytest.fixture
+def socrata(monkeypatch):
+    """Serve upstream requests from FakeSocrata and treat cached responses as stale at once."""
+    fake = FakeSocrata()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(utils.httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(fake)))
+    monkeypatch.setattr(utils, "REVALIDATE_AFTER_SECONDS", 0)
+    return fake
+
+
+async def _settle():
+    """Waits for the background refreshes of the response cache."""
+    await asyncio.gather(*list(utils.response_cache._revalidating.values()))
+
+
+@pytest.fixture
+def scope_values():
+    """Start with an empty correlation scope values cache."""
+    correlation.scope_values_cache.clear()
+    yield correlation.scope_values_cache
+    correlation.scope_values_cache.clear()
+
+
+class TestConditionalRequests:
+    """Test suite for conditional requests in _fetch_upstream."""
+
+    def test_validators_sent_and_updated(self, socrata):
+        """Validators from a response are sent back and a 304 reports NOT_MODIFIED."""
+        validators = {}
+        rows = asyncio.run(_fetch_upstream(CURRENT, PARAMS, validators=validators))
+        assert rows[0]["data_value"] == "21"
+        assert validators == {"etag": '"v1"', "last_modified": "Mon, 01 Sep 2025 00:00:00 GMT"}
+
+        assert asyncio.run(_fetch_upstream(CURRENT, PARAMS, validators=validators)) is NOT_MODIFIED
+        assert socrata.requests[1].headers["if-none-match"] == '"v1"'
+        assert socrata.requests[1].headers["if-modified-since"] == "Mon, 01 Sep 2025 00:00:00 GMT"
+
+    def test_plain_request_without_validators(self, socrata):
+        """Requests without validators are unconditional."""
+        asyncio.run(_fetch_upstream(CURRENT, PARAMS))
+        assert "if-none-match" not in socrata.requests[0].headers
+
+
+class TestStaleWhileRevalidate:
+    """Test suite for serving stale responses while refreshing them."""
+
+    def test_not_modified(self, socrata):
+        """A stale response is served and kept when the dataset has not changed."""
+        async def run():
+            first = await _fetch_api(CURRENT, PARAMS)
+            second = await _fetch_api(CURRENT, PARAMS)
+            await _settle()
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert second is first
+        assert socrata.requests[1].headers["if-none-match"] == '"v1"'
+        assert utils.response_cache.revalidations["not_modified"] == 1
+        assert utils.response_cache.stale_hits == 1
+
+    def test_modified(self, socrata):
+        """A republished dataset replaces the cached response after the stale one is served."""
+        async def run():
+            await _fetch_api(CURRENT, PARAMS)
+            socrata.version = 2
+            stale = await _fetch_api(CURRENT, PARAMS)
+            await _settle()
+            return stale, await _fetch_api(CURRENT, PARAMS)
+
+        stale, fresh = asyncio.run(run())
+        assert stale[0]["data_value"] == "21"
+        assert fresh[0]["data_value"] == "22"
+        assert utils.response_cache.revalidations["modified"] == 1
+
+    def test_failure_keeps_old_value(self, socrata):
+        """A failed refresh leaves the cached response in place and backs off."""
+        async def run():
+            first = await _fetch_api(CURRENT, PARAMS)
+            socrata.status = 503
+            await _fetch_api(CURRENT, PARAMS)
+            await _settle()
+            return first, await _fetch_api(CURRENT, PARAMS)
+
+        first, again = asyncio.run(run())
+        assert again is first
+        assert utils.response_cache.revalidations["failed"] == 1
+        # Backing off: the third call did not start another refresh
+        assert len(socrata.requests) == 2
+
+    def test_stale_served_without_waiting(self, socrata):
+        """Concurrent stale hits return at once and share one background refresh."""
+        async def run():
+            await _fetch_api(CURRENT, PARAMS)
+            socrata.delay = 0.2
+            start = time.perf_counter()
+            await asyncio.gather(*(_fetch_api(CURRENT, PARAMS) for _ in range(5)))
+            elapsed = time.perf_counter() - start
+            await _settle()
+            return elapsed
+
+        assert asyncio.run(run()) < 0.1
+        assert len(socrata.requests) == 2
+
+    def test_previous_releases_not_revalidated(self, socrata):
+        """Responses from releases outside REVALIDATE_RELEASES are never refreshed."""
+        async def run():
+            await _fetch_api(PREVIOUS, PARAMS)
+            await _fetch_api(PREVIOUS, PARAMS)
+            await _settle()
+
+        asyncio.run(run())
+        assert len(socrata.requests) == 1
+        assert utils.response_cache.stale_hits == 0
+
+
+class TestDerivedCaches:
+    """Test suite for caches of values computed from upstream responses."""
+
+    def test_expire_with_responses(self):
+        """Derived caches use the response cache TTL."""
+        assert rollup.state_rollup_cache in utils.derived_caches
+        assert correlation.scope_values_cache in utils.derived_caches
+        for cache in utils.derived_caches:
+            assert cache.ttl == utils.response_cache.ttl
+
+    def test_recomputed_after_modified_response(self, socrata, scope_values):
+        """A republished dataset replaces derived values once its response is revalidated."""
+        async def run():
+            first = await correlation.fetch_scope_values(CURRENT, "OBESITY", "CrdPrv", None)
+            socrata.version = 2
+            stale = await correlation.fetch_scope_values(CURRENT, "OBESITY", "CrdPrv", None)
+            await asyncio.gather(*list(scope_values._revalidating.values()))
+            await _settle()
+            return first, stale, await correlation.fetch_scope_values(CURRENT, "OBESITY", "CrdPrv", None)
+
+        first, stale, fresh = asyncio.run(run())
+        assert stale is first
+        assert fresh["data_value"].tolist() == [22.0]
+        assert utils.response_cache.revalidations["modified"] == 1
+
+    def test_unchanged_value_kept(self, socrata, scope_values):
+        """A refresh computing an equal value keeps the cached one."""
+        async def run():
+            first = await correlation.fetch_scope_values(CURRENT, "OBESITY", "CrdPrv", None)
+            await correlation.fetch_scope_values(CURRENT, "OBESITY", "CrdPrv", None)
+            await asyncio.gather(*list(scope_values._revalidating.values()))
+            await _settle()
+            return first, await correlation.fetch_scope_values(CURRENT, "OBESITY", "CrdPrv", None)
+
+        first, again = asyncio.run(run())
+        assert again is first
+        assert scope_values.revalidations["not_modified"] >= 1
+        assert scope_values.revalidations["modified"] == 0
+
+    def test_previous_releases_not_revalidated(self, socrata, scope_values):
+        """Derived values from releases outside REVALIDATE_RELEASES are served without refreshes."""
+        async def run():
+            await correlation.fetch_scope_values(PREVIOUS, "OBESITY", "CrdPrv", None)
+            await correlation.fetch_scope_values(PREVIOUS, "OBESITY", "CrdPrv", None)
+
+        asyncio.run(run())
+        assert len(socrata.requests) == 1
+        assert scope_values.stale_hits == 0
+
+
+class TestCacheRevalidation:
+    """Test suite for revalidation in TTLCache."""
+
+    def test_replaced_entry_not_overwritten(self):
+        """A refresh finishing after the entry was replaced does not overwrite it."""
+        cache = TTLCache("test")
+
+        async def revalidate(value, meta):
+            cache.set("k", "replacement")
+            return "refreshed"
+
+        async def run():
+            cache.set("k", "old", stale_after=0)
+            assert await cache.get_or_load("k", None, revalidate=revalidate) == "old"
+            await asyncio.gather(*list(cache._revalidating.values()))
+
+        asyncio.run(run())
+        assert cache.get("k") == "replacement"
+
+    def test_invalidate(self):
+        """invalidate removes only the entries whose key matches."""
+        cache = TTLCache("test")
+        cache.set(("a", 1), "x")
+        cache.set(("a", 2), "y")
+        cache.set(("b", 1), "z")
+        assert cache.invalidate(lambda key: key[0] == "a") == 2
+        assert cache.get(("b", 1)) == "z"
+        assert len(cache) == 1
+        assert cache.evictions == 0
+
+    def test_meta_passed_to_revalidate(self):
+        """The meta stored by a load is handed to revalidate."""
+        cache = TTLCache("test")
+        seen = []
+
+        async def load():
+            return "value"
+
+        async def revalidate(value, meta):
+            seen.append((value, meta))
+            return value
+
+        async def run():
+            await cache.get_or_load("k", load, stale_after=0, revalidate=revalidate, meta={"etag": "x"})
+            await cache.get_or_load("k", load, stale_after=0, revalidate=revalidate)
+            await asyncio.gather(*list(cache._revalidating.values()))
+
+        asyncio.run(run())
+        assert seen == [("value", {"etag": "x"})]
+        assert cache.revalidations["not_modified"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
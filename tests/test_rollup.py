@@ -0,0 +1,139 @@
+"""
+Tests for state-level rollups of county data and the cache that holds them.
+
+The upstream fetch is replaced with an in-memory fake, so these tests run
+without network access.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from places import rollup
+from places.cache import TTLCache
+from places.rollup import filter_states, get_state_estimates, rollup_counties
+
+
+def _county(state, desc, value, population, low=None, high=None):
+    return {
+        "stateabbr": state,
+        "statedesc": desc,
+        "data_value": value,
+        "low_confidence_limit": low,
+        "high_confidence_limit": high,
+        "totalpopulation": population,
+    }
+
+
+COUNTIES = [
+    _county("MI", "Michigan", "20.0", "100", "18.0", "22.0"),
+    _county("MI", "Michigan", "10.0", "300", "8.0", "12.0"),
+    _county("MI", "Michigan", None, "500"),
+    _county("OH", "Ohio", "5.0", "50"),
+]
+
+
+@pytest.fixture
+def fake_fetch(fake_upstream):
+    """Serve COUNTIES from a fake upstream, with an empty rollup cache."""
+    return fake_upstream(rollup, lambda url, params: COUNTIES, delay=0.01, caches=[rollup.state_rollup_cache])
+
+
+class TestRollupCounties:
+    """Test suite for rollup_counties."""
+
+    def test_population_weighted_mean(self):
+        """State values are weighted by county totalpopulation."""
+        states = rollup_counties(COUNTIES)
+        michigan = states[0]
+        assert michigan["stateabbr"] == "MI"
+        assert michigan["data_value"] == 12.5
+        assert michigan["low_confidence_limit"] == 10.5
+        assert michigan["high_confidence_limit"] == 14.5
+
+    def test_missing_values_excluded(self):
+        """Counties without a data value do not count toward population or county_count."""
+        michigan = rollup_counties(COUNTIES)[0]
+        assert michigan["totalpopulation"] == 400
+        assert michigan["county_count"] == 2
+
+    def test_missing_limits_are_none(self):
+        """States with no confidence limits report None."""
+        ohio = rollup_counties(COUNTIES)[1]
+        assert ohio["data_value"] == 5.0
+        assert ohio["low_confidence_limit"] is None
+
+    def test_empty(self):
+        """No county records gives no states."""
+        assert rollup_counties([]) == []
+
+
+class TestFilterStates:
+    """Test suite for filter_states."""
+
+    def test_by_name_or_abbreviation(self):
+        """States match by case-insensitive name or abbreviation."""
+        states = rollup_counties(COUNTIES)
+        assert [s["stateabbr"] for s in filter_states(states, "ohio")] == ["OH"]
+        assert [s["stateabbr"] for s in filter_states(states, ["mi", "Ohio"])] == ["MI", "OH"]
+        assert len(filter_states(states)) == 2
+
+
+class TestGetStateEstimates:
+    """Test suite for get_state_estimates."""
+
+    def test_memoized_per_measure(self, fake_fetch):
+        """Repeated and concurrent requests share one county pull."""
+        async def run():
+            await asyncio.gather(*(get_state_estimates("places_release_2025", "OBESITY", "CrdPrv") for _ in range(5)))
+            await get_state_estimates("places_release_2025", "OBESITY", "CrdPrv")
+            await get_state_estimates("places_release_2025", "OBESITY", "AgeAdjPrv")
+
+        asyncio.run(run())
+        assert len(fake_fetch) == 2
+
+    def test_unknown_release(self, fake_fetch):
+        """Releases without a county dataset return None."""
+        assert asyncio.run(get_state_estimates("500cities_release_2019", "OBESITY", "CrdPrv")) is None
+        assert fake_fetch == []
+
+
+class TestTTLCache:
+    """Test suite for TTLCache."""
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted at maxsize."""
+        cache = TTLCache("test", maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+
+    def test_expiry(self):
+        """Entries past their ttl are treated as misses."""
+        cache = TTLCache("test", ttl=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_none_not_cached(self):
+        """Failed (None) loads are retried on the next call."""
+        cache = TTLCache("test")
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return None
+
+        asyncio.run(cache.get_or_load("k", loader))
+        asyncio.run(cache.get_or_load("k", loader))
+        assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,149 @@
+"""
+Tests for the multi-measure feature matrix and the find_similar_places tool.
+
+The upstream fetch is replaced with an in-memory fake and matrices are
+written to a temporary directory, so these tests run without network access.
+"""
+
+import asyncio
+import importlib.util
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastmcp import Client
+
+from places import features
+from places.app import mcp
+from places.features import FeatureMatrix, get_feature_matrix
+
+# locationid, name, state, OBESITY, DIABETES, CSMOKING
+PROFILES = [
+    ("26163", "Wayne", "MI", 38.0, 14.0, 22.0),
+    ("39035", "Cuyahoga", "OH", 37.0, 13.5, 21.0),
+    ("42101", "Philadelphia", "PA", 36.0, 13.0, 20.0),
+    ("26125", "Oakland", "MI", 30.0, 9.0, 14.0),
+    ("08013", "Boulder", "CO", 18.0, 6.0, 10.0),
+    ("39169", "Wayne", "OH", 35.0, 11.0, None),
+]
+
+
+def _rows():
+    rows = []
+    for location_id, name, state, *values in PROFILES:
+        for measure, value in zip(["OBESITY", "DIABETES", "CSMOKING"], values):
+            rows.append({
+                "locationid": location_id, "locationname": name, "stateabbr": state,
+                "measureid": measure, "data_value": None if value is None else str(value),
+            })
+    return rows
+
+
+@pytest.fixture
+def matrix():
+    return FeatureMatrix.from_records("county", _rows())
+
+
+@pytest.fixture
+def fake_fetch(fake_upstream, tmp_path, monkeypatch):
+    """Serve _rows() from a fake upstream and store matrices under tmp_path."""
+    monkeypatch.setattr(features, "FEATURE_MATRIX_DIR", str(tmp_path))
+    return fake_upstream(features, lambda url, params: _rows()[params["$offset"]:], delay=0,
+                         caches=[features.feature_matrix_cache])
+
+
+class TestFeatureMatrix:
+    """Test suite for FeatureMatrix."""
+
+    def test_pivot(self, matrix):
+        """Long rows pivot into a location x measure matrix sorted by id and measure."""
+        assert matrix.ids.tolist() == sorted(p[0] for p in PROFILES)
+        assert matrix.measures.tolist() == ["CSMOKING", "DIABETES", "OBESITY"]
+        assert matrix.values.dtype.name == "float32"
+
+    def test_nearest_neighbours(self, matrix):
+        """The nearest profiles come first and the target is excluded."""
+        nearest = matrix.neighbours(matrix.position("26163"), k=3)
+        assert [matrix.ids[i] for i, _ in nearest] == ["39035", "42101", "39169"]
+        assert all(a[1] <= b[1] for a, b in zip(nearest, nearest[1:]))
+
+    def test_state_and_measure_filters(self, matrix):
+        """Candidates can be restricted to states and distance to some measures."""
+        nearest = matrix.neighbours(matrix.position("26163"), k=5, states={"MI", "CO"})
+        assert {matrix.states[i] for i, _ in nearest} <= {"MI", "CO"}
+        assert len(matrix.neighbours(matrix.position("26163"), k=5, measures=["OBESITY"])) == 5
+
+    def test_save_and_load(self, matrix, tmp_path):
+        """Matrices round-trip through the compressed npz format."""
+        path = str(tmp_path / "m.npz")
+        matrix.save(path)
+        loaded = FeatureMatrix.load(path)
+        assert loaded.geo == "county"
+        assert loaded.ids.tolist() == matrix.ids.tolist()
+        assert (loaded.scaled == matrix.scaled).all()
+
+
+class TestGetFeatureMatrix:
+    """Test suite for get_feature_matrix."""
+
+    def test_built_once_and_saved(self, fake_fetch, tmp_path):
+        """A missing county matrix is built from upstream once and written to disk."""
+        async def run():
+            await asyncio.gather(*(get_feature_matrix("county", "places_release_2025", "AgeAdjPrv") for _ in range(3)))
+
+        asyncio.run(run())
+        assert len(fake_fetch) == 1
+        assert fake_fetch[0][1]["$where"] == "datavaluetypeid = 'AgeAdjPrv'"
+        assert (tmp_path / "county_places_release_2025_AgeAdjPrv.npz").exists()
+
+    def test_index_built_on_load(self, fake_fetch, matrix, tmp_path):
+        """Built and file-loaded matrices come with their name index, so queries never build it on the event loop."""
+        built = asyncio.run(get_feature_matrix("county", "places_release_2025", "AgeAdjPrv"))
+        matrix.save(str(tmp_path / "places_places_release_2025_AgeAdjPrv.npz"))
+        loaded = asyncio.run(get_feature_matrix("places", "places_release_2025", "AgeAdjPrv"))
+        assert built.has_index and loaded.has_index
+        assert loaded.index.lookup("Cuyahoga")[0]["locationid"] == "39035"
+
+    def test_default_directory_outside_package(self, monkeypatch, tmp_path):
+        """Without PLACES_FEATURE_MATRIX_DIR, matrices go to the user cache directory, not the package."""
+        from places import config
+        monkeypatch.delenv("PLACES_FEATURE_MATRIX_DIR", raising=False)
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        spec = importlib.util.spec_from_file_location("places_config_defaults", config.__file__)
+        defaults = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(defaults)
+        assert defaults.FEATURE_MATRIX_DIR == str(tmp_path / "places" / "features")
+
+    def test_places_not_built_on_demand(self, fake_fetch):
+        """Geos outside FEATURE_MATRIX_BUILD_GEOS need a prebuilt file."""
+        assert asyncio.run(get_feature_matrix("places", "places_release_2025", "AgeAdjPrv")) is None
+        assert fake_fetch == []
+
+
+class TestFindSimilarPlacesTool:
+    """Test suite for the find_similar_places tool."""
+
+    def _call(self, **arguments):
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("find_similar_places", {"geo": "county", **arguments})
+        return asyncio.run(run()).structured_content
+
+    def test_by_name_and_state(self, fake_fetch):
+        """A name with a state resolves to one location and returns its peers."""
+        result = self._call(locationname="Wayne County", state_code="MI", k=2)
+        assert result["location"]["locationid"] == "26163"
+        assert [p["locationid"] for p in result["similar"]] == ["39035", "42101"]
+
+    def test_ambiguous_name(self, fake_fetch):
+        """Names shared across states ask for a state or ID."""
+        result = self._call(locationname="Wayne")
+        assert "ambiguous" in result["error"]
+        assert len(result["suggestions"]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
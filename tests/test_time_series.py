@@ -0,0 +1,148 @@
+"""
+Tests for multi-release time series.
+
+The upstream fetch is replaced with an in-memory fake, so these tests run
+without network access.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastmcp import Client
+
+from places import timeseries
+from places.app import mcp
+from places.config import API_ENDPOINTS
+from places.timeseries import align_series, fetch_time_series
+from places.utils import get_years_for_measure, get_release_for_year
+
+
+@pytest.fixture
+def fake_fetch(fake_upstream):
+    """Replace the upstream fetch with a fake that returns one row per release."""
+    urls = {url: release for release, url in API_ENDPOINTS["county"].items()}
+    return fake_upstream(timeseries, lambda url, params: [
+        {"locationid": "26163", "stateabbr": "MI", "locationname": "Wayne", "data_value": urls[url][-2:]}
+    ])
+
+
+class TestGetYearsForMeasure:
+    """Test suite for get_years_for_measure."""
+
+    def test_matches_single_year_lookup(self):
+        """Every year maps to the release get_release_for_year returns."""
+        for year, release in get_years_for_measure("TEETHLOST"):
+            assert get_release_for_year("TEETHLOST", year) == release
+
+    def test_geo_filters_to_endpoints(self):
+        """Releases without an endpoint (500 Cities) are excluded for a geo."""
+        years = get_years_for_measure("CSMOKING", "county")
+        assert [year for year, _ in years] == ["2018", "2019", "2020", "2021", "2022", "2023"]
+        assert all(release.startswith("places_release_") for _, release in years)
+
+    def test_unknown_measure(self):
+        """Unknown measures have no years."""
+        assert get_years_for_measure("INVALID_MEASURE") == []
+
+
+class TestAlignSeries:
+    """Test suite for align_series."""
+
+    def test_aligns_by_locationid(self):
+        """Rows for the same locationid across years form one series."""
+        rows_by_year = {
+            "2022": [{"locationid": "26163", "stateabbr": "MI", "locationname": "Wayne", "data_value": "20.1"}],
+            "2021": [
+                {"locationid": "26163", "stateabbr": "MI", "locationname": "Wayne", "data_value": "21.0",
+                 "low_confidence_limit": "19.0", "high_confidence_limit": "23.0"},
+                {"locationid": "26125", "stateabbr": "MI", "locationname": "Oakland", "data_value": "x"},
+            ],
+        }
+        locations = align_series("county", rows_by_year)
+        assert [loc["locationid"] for loc in locations] == ["26125", "26163"]
+        assert locations[1]["series"] == [["2021", 21.0, 19.0, 23.0], ["2022", 20.1, None, None]]
+        assert locations[0]["series"] == [["2021", None, None, None]]
+
+
+class TestFetchTimeSeries:
+    """Test suite for fetch_time_series."""
+
+    def test_releases_fetched_concurrently(self, fake_fetch):
+        """All releases are fetched in roughly the time of one request."""
+        start = time.perf_counter()
+        result = asyncio.run(fetch_time_series("CSMOKING", "county", "CrdPrv", ["Wayne"], max_concurrency=8))
+        elapsed = time.perf_counter() - start
+        assert len(fake_fetch) == 6
+        assert elapsed < 0.2
+        series = result["locations"][0]["series"]
+        assert [point[0] for point in series] == ["2018", "2019", "2020", "2021", "2022", "2023"]
+        assert series[-1][1] == 25.0
+
+    def test_year_range(self, fake_fetch):
+        """start_year and end_year restrict the releases queried."""
+        result = asyncio.run(fetch_time_series("CSMOKING", "county", "CrdPrv", ["Wayne"], start_year="2021", end_year="2022"))
+        assert list(result["years"]) == ["2021", "2022"]
+        assert len(fake_fetch) == 2
+
+    def test_ids_only_for_indexed_release(self, fake_fetch):
+        """Names become IDs for the latest release only; older releases are filtered by name."""
+        from places import locations
+        index = locations.location_indexes["county"]
+        index.add([{"locationid": "26163", "locationname": "Wayne", "stateabbr": "MI"}])
+        index.complete = True
+        asyncio.run(fetch_time_series("CSMOKING", "county", "CrdPrv", ["Wayne County"], start_year="2022"))
+        wheres = {url: params["$where"] for url, params in fake_fetch}
+        assert wheres[API_ENDPOINTS["county"]["places_release_2025"]].endswith("locationid = '26163'")
+        assert wheres[API_ENDPOINTS["county"]["places_release_2024"]].endswith("locationname = 'Wayne County'")
+
+    def test_name_only_in_older_releases(self, fake_fetch):
+        """A name the latest release does not know still returns the releases that have it."""
+        from places import locations
+        locations.location_indexes["county"].complete = True
+        result = asyncio.run(fetch_time_series("CSMOKING", "county", "CrdPrv", ["Fairfield"], start_year="2022"))
+        assert "error" not in result
+        assert len(result["locations"][0]["series"]) == 2
+
+    def test_name_in_no_release(self, fake_upstream):
+        """A name unknown to the index that no release returns rows for is an error with suggestions."""
+        from places import locations
+        index = locations.location_indexes["county"]
+        index.add([{"locationid": "26163", "locationname": "Wayne", "stateabbr": "MI"}])
+        index.complete = True
+        fake_upstream(timeseries, lambda url, params: [], delay=0)
+        result = asyncio.run(fetch_time_series("CSMOKING", "county", "CrdPrv", ["Wane"], start_year="2022"))
+        assert "Wayne, MI" in result["suggestions"]["Wane"]
+
+    def test_no_years(self, fake_fetch):
+        """A range with no releases returns an error without querying upstream."""
+        result = asyncio.run(fetch_time_series("CSMOKING", "county", "CrdPrv", ["Wayne"], start_year="2030"))
+        assert "error" in result
+        assert fake_fetch == []
+
+
+
+class TestTimeSeriesTool:
+    """Test suite for the get_cdc_places_time_series tool."""
+
+    def test_invalid_year_is_an_error(self, fake_fetch):
+        """A start or end year that is not a number is rejected without querying upstream."""
+        async def run():
+            async with Client(mcp) as client:
+                return await client.call_tool("get_cdc_places_time_series", {
+                    "measureid": "CSMOKING", "geo": "county", "datavaluetypeid": "CrdPrv",
+                    "locationname": "Wayne", "start_year": "2017a",
+                })
+
+        result = asyncio.run(run())
+        assert "start_year must be a year" in result.structured_content["error"]
+        assert fake_fetch == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,117 @@
+"""
+Tests for OpenTelemetry spans along the tool call path.
+
+Spans are captured with the OpenTelemetry SDK's in-memory exporter (the tests
+are skipped when the SDK is not installed) and upstream responses come from
+an httpx mock transport, so these tests run without network access.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("opentelemetry.sdk")
+
+import httpx
+from fastmcp import Client
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from starlette.testclient import TestClient
+
+from places import tracing, utils
+from places.app import create_app, mcp
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    """Install an SDK tracer provider exporting to memory (once per process)."""
+    memory = InMemorySpanExporter()
+    if tracing._provider is None:
+        tracing.configure_tracing(exporter=memory)
+    else:
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        tracing._provider.add_span_processor(SimpleSpanProcessor(memory))
+    return memory
+
+
+@pytest.fixture
+def spans(exporter, monkeypatch):
+    """Serve upstream requests from a mock transport and return a function reading finished spans."""
+    def handler(request):
+        rows = [{"locationname": f"County {i}", "data_value": str(10 + i)} for i in range(5)]
+        return httpx.Response(200, json=rows)
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(utils.httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(handler)))
+    exporter.clear()
+
+    def finished():
+        tracing._provider.force_flush()
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    return finished
+
+
+class TestToolCallSpans:
+    """Test suite for the stage spans of a tool call."""
+
+    def test_area_summary_stats_stages(self, spans):
+        """Each stage of area_summary_stats gets a span in the tool call's trace."""
+        async def run():
+            async with Client(mcp) as client:
+                await client.call_tool("area_summary_stats", {
+                    "geo_scope": "counties_in_state", "state_code": "OH", "year": "2023",
+                    "measureid": "OBESITY", "datavaluetypeid": "CrdPrv",
+                })
+
+        asyncio.run(run())
+        finished = spans()
+        for name in ("places.lookup_release", "places.fetch", "places.upstream.request",
+                     "places.upstream.decode", "places.compute.summary_stats"):
+            assert name in finished, name
+
+        request = finished["places.upstream.request"]
+        assert request.attributes["places.dataset_id"] == "swc5-untb"
+        assert request.attributes["http.response.status_code"] == 200
+        assert request.attributes["places.response_bytes"] > 0
+        assert finished["places.upstream.decode"].attributes["places.rows"] == 5
+        assert finished["places.fetch"].attributes["places.cache_hit"] is False
+        assert finished["places.lookup_release"].attributes["places.release"] == "places_release_2025"
+        trace_ids = {span.context.trace_id for name, span in finished.items() if name.startswith("places.")}
+        assert trace_ids == {finished["tools/call area_summary_stats"].context.trace_id}
+
+
+class TestTraceContextPropagation:
+    """Test suite for continuing traces from HTTP headers."""
+
+    def test_traceparent_header(self, spans):
+        """Server spans join the trace named in an incoming traceparent header."""
+        with TestClient(create_app()) as client:
+            response = client.post(
+                "/mcp",
+                json={"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {
+                    "name": "area_summary_stats",
+                    "arguments": {"geo_scope": "places_in_state", "state_code": "OH", "year": "2023",
+                                  "measureid": "OBESITY", "datavaluetypeid": "CrdPrv"},
+                }},
+                headers={
+                    "accept": "application/json, text/event-stream",
+                    "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01",
+                },
+            )
+        assert response.status_code == 200
+        finished = spans()
+        upstream = finished["places.upstream.request"]
+        assert format(upstream.context.trace_id, "032x") == TRACE_ID
+        roots = [span for span in finished.values() if span.parent is not None and format(span.parent.span_id, "016x") == PARENT_ID]
+        assert roots, "no span parented by the incoming traceparent"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,131 @@
+"""
+Tests for the upstream response cache, startup warm-up and the /ready route.
+
+The upstream fetch is replaced with an in-memory fake, so these tests run
+without network access.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from starlette.testclient import TestClient
+
+from places import utils, warmup
+from places.app import create_app, mcp
+from places.utils import _fetch_api, request_key
+from places.warmup import load_access_log, run_warmup, save_access_log
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """Replace the network call behind the response cache."""
+    calls = []
+
+    async def _fake(url, params, validators=None):
+        calls.append(params)
+        await asyncio.sleep(0.02)
+        return [{"locationid": "26163", "locationname": "Wayne", "data_value": "20.0"}] * params.get("rows", 1)
+
+    monkeypatch.setattr(utils, "_fetch_upstream", _fake)
+    return calls
+
+
+class TestResponseCache:
+    """Test suite for the response cache in _fetch_api."""
+
+    def test_cached_and_single_flight(self, fake_upstream):
+        """Identical requests, concurrent or later, share one upstream call."""
+        async def run():
+            await asyncio.gather(*(_fetch_api("https://x", {"a": 1, "b": "2"}) for _ in range(5)))
+            await _fetch_api("https://x", {"b": "2", "a": "1"})
+
+        asyncio.run(run())
+        assert len(fake_upstream) == 1
+        assert utils.access_counts[request_key("https://x", {"a": 1, "b": 2})] == 6
+
+    def test_large_responses_not_cached(self, fake_upstream, monkeypatch):
+        """Responses above RESPONSE_CACHE_MAX_ROWS are returned but not kept."""
+        monkeypatch.setattr(utils, "RESPONSE_CACHE_MAX_ROWS", 10)
+        asyncio.run(_fetch_api("https://x", {"rows": 11}))
+        asyncio.run(_fetch_api("https://x", {"rows": 11}))
+        assert len(fake_upstream) == 2
+
+
+class TestAccessLog:
+    """Test suite for the access log."""
+
+    def test_round_trip_top_n(self, tmp_path):
+        """The most requested queries are read back first."""
+        utils.access_counts.update({request_key("https://a", {"q": 1}): 1, request_key("https://b", {"q": 2}): 5})
+        path = str(tmp_path / "access.json")
+        assert save_access_log(path) == 2
+        assert load_access_log(path, top_n=1) == [("https://b", {"q": "2"})]
+
+    def test_missing_log(self, tmp_path):
+        """A missing access log means nothing to prefetch."""
+        assert load_access_log(str(tmp_path / "none.json")) == []
+
+
+class TestRunWarmup:
+    """Test suite for run_warmup."""
+
+    def test_tool_calls_and_prefetches_fill_cache(self, fake_upstream):
+        """Warm-up fills the cache without counting as demand."""
+        working_set = [("get_cdc_places_data", {
+            "year": "2023", "measureid": "OBESITY", "geo": "county", "datavaluetypeid": "CrdPrv", "locationid": "26163",
+        })]
+        state = asyncio.run(run_warmup(mcp, working_set, [("https://x", {"q": "1"})]))
+        assert state["status"] == "complete"
+        assert (state["total"], state["done"], state["failed"]) == (2, 2, 0)
+        assert len(utils.response_cache) == 2
+        assert not utils.access_counts
+
+    def test_failures_counted(self, monkeypatch):
+        """Failed prefetches and unknown tools are counted, not raised."""
+        async def _none(url, params, validators=None):
+            return None
+
+        monkeypatch.setattr(utils, "_fetch_upstream", _none)
+        state = asyncio.run(run_warmup(mcp, [("no_such_tool", {})], [("https://x", {})]))
+        assert state["failed"] == 2
+
+
+class TestReadyRoute:
+    """Test suite for /ready."""
+
+    def test_ready_without_warmup(self):
+        """With nothing to warm, the server is ready immediately."""
+        with TestClient(create_app()) as client:
+            assert client.get("/ready").status_code == 200
+
+    def test_not_ready_until_warm(self, tmp_path, monkeypatch):
+        """/ready answers 503 while warm-up runs and 200 once it has finished."""
+        async def _slow(url, params, validators=None):
+            await asyncio.sleep(0.3)
+            return [{"locationid": "1"}]
+
+        monkeypatch.setattr(utils, "_fetch_upstream", _slow)
+        log = tmp_path / "access.json"
+        log.write_text(json.dumps([{"url": "https://x", "params": {"q": "1"}, "count": 3}]))
+        monkeypatch.setattr(warmup, "ACCESS_LOG_PATH", str(log))
+
+        with TestClient(create_app()) as client:
+            first = client.get("/ready")
+            deadline = time.monotonic() + 5
+            while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            final = client.get("/ready").json()
+        assert first.status_code == 503
+        assert first.json()["status"] == "running"
+        assert final["status"] == "complete" and final["done"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,135 @@
+"""
+Tests for the event-loop blocking watchdog.
+
+Tools under test are registered on a throwaway FastMCP server, so these tests
+run without network access.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastmcp import Client, FastMCP
+from starlette.testclient import TestClient
+
+from places import watchdog
+from places.app import create_app
+from places.metrics import REGISTRY
+from places.watchdog import Watchdog, WatchdogMiddleware, recent_blocks
+
+
+def _blocking_section(seconds):
+    time.sleep(seconds)
+
+
+def _server():
+    """A server with one tool that blocks the event loop and one that awaits politely."""
+    server = FastMCP("test", middleware=[WatchdogMiddleware()])
+
+    @server.tool()
+    async def blocking() -> dict:
+        _blocking_section(0.3)
+        return {"ok": True}
+
+    @server.tool()
+    async def polite() -> dict:
+        await asyncio.sleep(0.3)
+        return {"ok": True}
+
+    return server
+
+
+async def _watched(coroutine, threshold=0.1, interval=0.01):
+    """Runs a coroutine under a watchdog and returns the watchdog."""
+    dog = Watchdog(threshold=threshold, interval=interval)
+    dog.start()
+    task = asyncio.create_task(dog.heartbeat())
+    try:
+        await asyncio.sleep(0.05)
+        await coroutine
+        await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        dog.stop()
+    return dog
+
+
+async def _call(server, tool):
+    async with Client(server) as client:
+        await client.call_tool(tool, {})
+
+
+class TestWatchdog:
+    """Test suite for block detection and attribution."""
+
+    def test_block_reported_with_tool_and_stack(self, caplog):
+        """A blocking tool is reported once, with its name and the blocking function on the stack."""
+        dog = asyncio.run(_watched(_call(_server(), "blocking")))
+        assert dog.blocks == 1
+        block = recent_blocks[-1]
+        assert block["tool"] == "blocking"
+        assert block["duration_ms"] >= 250
+        assert any(label.startswith("_blocking_section ") for label in block["stack"])
+        record = next(record for record in caplog.records if record.name == "places.watchdog")
+        assert record.getMessage().startswith("Event loop blocked for")
+        assert record.fields["blocked_tool"] == "blocking"
+
+    def test_awaiting_is_not_a_block(self):
+        """Time spent awaiting does not count as blocking."""
+        dog = asyncio.run(_watched(_call(_server(), "polite")))
+        assert dog.blocks == 0
+        assert len(recent_blocks) == 0
+
+    def test_block_outside_tool_calls(self):
+        """Blocks outside any tool call are reported without a tool."""
+        async def block():
+            _blocking_section(0.2)
+
+        dog = asyncio.run(_watched(block()))
+        assert dog.blocks == 1
+        assert recent_blocks[-1]["tool"] is None
+        assert 'places_event_loop_blocks_total{tool="none"}' in REGISTRY.render()
+
+    def test_below_threshold(self):
+        """Short synchronous sections are not reported."""
+        async def block():
+            _blocking_section(0.02)
+
+        dog = asyncio.run(_watched(block(), threshold=0.2))
+        assert dog.blocks == 0
+
+    def test_active_calls_cleared(self):
+        """Finished tool calls leave no frames behind."""
+        asyncio.run(_call(_server(), "polite"))
+        assert watchdog._active_calls == {}
+
+
+class TestWatchdogLifespan:
+    """Test suite for enabling the watchdog on the server."""
+
+    def test_disabled_by_default(self):
+        """Without PLACES_WATCHDOG no watchdog thread runs."""
+        with TestClient(create_app()):
+            assert not any(thread.name == "places-watchdog" for thread in threading.enumerate())
+
+    def test_enabled_and_debug_route(self, monkeypatch):
+        """With PLACES_WATCHDOG the lifespan runs the watchdog, and /debug/event-loop-blocks lists blocks."""
+        monkeypatch.setattr(watchdog, "WATCHDOG_ENABLED", True)
+        with TestClient(create_app()) as client:
+            assert any(thread.name == "places-watchdog" for thread in threading.enumerate())
+            recent_blocks.append({"at": "now", "duration_ms": 120.0, "tool": "x", "stack": []})
+            response = client.get("/debug/event-loop-blocks")
+        assert response.status_code == 200
+        assert response.json()["blocks"][0]["tool"] == "x"
+        assert not any(thread.name == "places-watchdog" for thread in threading.enumerate())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])